@@ -1,7 +1,15 @@
+import logging
 import os
 import pandas as pd
 from strategies.multi_timeframe_strategy import MultiTimeframeStrategy
-import matplotlib.pyplot as plt
+from backtesting.alignment import align_timeframes
+from backtesting.engine import BacktestEngine, BrokerBacktest, precompute_signals
+from utils.lazy import lazy_import
+from utils.logger import configure_logging
+
+# Only loaded when an equity curve is plotted, so headless runs never import matplotlib
+plt = lazy_import("matplotlib.pyplot")
+logger = logging.getLogger(__name__)
 
 class Backtest:
     def __init__(self, symbol, timeframes, initial_balance=1000):
@@ -12,68 +20,80 @@ class Backtest:
         self.equity_curve = [initial_balance]
         self.trades = []
 
-    def load_data(self, data_dir):
+    def load_data(self, data_dir, store=None, start=None, end=None):
         """
         Load prepared data for all timeframes.
         :param data_dir: Directory containing prepared data
+        :param store: Optional MarketDataStore; timeframes found there are read from it instead of CSV
+        :param start: First timestamp to load from the store (default: all)
+        :param end: Last timestamp to load from the store (default: all)
         :return: Dictionary of DataFrames for each timeframe
         """
-        print("Checking prepared data files...")  # Debugging statement
+        logger.debug("Checking prepared data files...")
         data_dict = {}
 
         for timeframe in self.timeframes:
+            if store is not None and store.exists(self.symbol, timeframe):
+                data_dict[timeframe] = store.read(self.symbol, timeframe, start=start, end=end)
+                continue
+
             file_path = os.path.join(data_dir, f"{self.symbol}_{timeframe}.csv")
 
             # Debugging: Check if the file exists
             if os.path.exists(file_path):
-                print(f"File found: {file_path}")
+                logger.debug("File found: %s", file_path)
                 try:
                     data = pd.read_csv(file_path)
                     data["date"] = pd.to_datetime(data["date"])  # Ensure correct datetime format
                     data_dict[timeframe] = data
                 except Exception as e:
-                    print(f"Error reading {file_path}: {e}")
+                    logger.error("Error reading %s: %s", file_path, e)
             else:
-                print(f"File missing: {file_path}")
+                logger.warning("File missing: %s", file_path)
                 data_dict[timeframe] = None
 
-        # Debugging output
-        print(f"Data Dictionary Keys: {list(data_dict.keys())}")
+        logger.debug("Data Dictionary Keys: %s", list(data_dict.keys()))
         if not data_dict or all(value is None for value in data_dict.values()):
             raise ValueError(
                 "Data dictionary is empty or contains only None. Ensure prepared data files are correct and exist."
             )
         return data_dict
 
-    def run(self, strategy, data_dict):
+    def run(self, strategy, data_dict, base_timeframe="1h", fill="close", broker=None):
         """
         Run backtest using the given strategy and data.
         :param strategy: Strategy object (e.g., MultiTimeframeStrategy)
         :param data_dict: Dictionary of DataFrames for each timeframe
+        :param base_timeframe: Timeframe whose bars are traded (default: '1h')
+        :param fill: 'close' to fill at the signal bar's close, 'next_open' at the next bar's open
+        :param broker: Optional SimulatedBroker; the signals then open positions with the strategy's lot size,
+                       stop-loss and take-profit, filled with spread, slippage and commission
+        :return: BacktestResult with the simulated trades
         """
-        print(f"Running backtest for {self.symbol}...")
-
-        # Simulate trades
-        for i in range(len(list(data_dict.values())[0])):  # Iterate over the shortest timeframe
-            current_data = {tf: df.iloc[i:i + 1] for tf, df in data_dict.items() if df is not None}
-
-            signal = strategy.generate_signal(current_data)  # Pass the current_data dictionary
-            print(f"Generated Signal: {signal}")
-            # Add trade execution logic here
-
-            if signal == "buy":
-                self.trades.append({"type": "buy", "price": current_data["1h"]["close"].iloc[-1]})
-                print(f"Buy Signal at {current_data['1h']['date'].iloc[-1]}")
-            elif signal == "sell" and self.trades:
-                last_trade = self.trades.pop()
-                if last_trade["type"] == "buy":
-                    sell_price = current_data["1h"]["close"].iloc[-1]
-                    profit = sell_price - last_trade["price"]
-                    self.balance += profit
-                    print(f"Sell Signal at {current_data['1h']['date'].iloc[-1]} (Profit: {profit:.2f})")
-            self.equity_curve.append(self.balance)
+        logger.info("Running backtest for %s...", self.symbol)
+
+        # Align every timeframe on the base bars, precompute the signals, then simulate the trades on arrays
+        aligned = align_timeframes(data_dict, base_timeframe)
+        signals = precompute_signals(strategy, aligned)
+        base = aligned.columns[base_timeframe]
+        if broker is None:
+            result = BacktestEngine(self.initial_balance, fill=fill).run(signals, base["close"], base.get("open"))
+        else:
+            result = BrokerBacktest(
+                broker, self.symbol,
+                lot_size=getattr(strategy, "lot_size", 0.1),
+                stop_loss=getattr(strategy, "stop_loss", None),
+                take_profit=getattr(strategy, "take_profit", None),
+                fill=fill
+            ).run(signals, base["open"], base["high"], base["low"], base["close"])
+
+        self.balance = result.final_balance
+        self.equity_curve = result.equity_curve.tolist()
+        self.trades = [{"type": "buy", "price": price} for price in result.open_entry_prices.tolist()]
+        logger.info("Closed Trades: %d", len(result.exits))
 
         self.display_performance()
+        return result
 
     def display_performance(self):
         """
@@ -81,10 +101,12 @@ class Backtest:
         """
         total_trades = len(self.trades)
         net_profit = self.balance - self.initial_balance
-        print("\nPerformance Metrics:")
-        print(f"Total Trades: {total_trades}")
-        print(f"Final Balance: ${self.balance:.2f}")
-        print(f"Net Profit: ${net_profit:.2f}")
+        logger.info(
+            "Performance Metrics: Total Trades: %d, Final Balance: $%.2f, Net Profit: $%.2f",
+            total_trades, self.balance, net_profit,
+            extra={"symbol": self.symbol, "total_trades": total_trades, "final_balance": self.balance,
+                   "net_profit": net_profit}
+        )
         self.plot_equity_curve()
 
     def plot_equity_curve(self):
@@ -101,6 +123,8 @@ class Backtest:
 
 
 if __name__ == "__main__":
+    configure_logging()
+
     # Define symbol, timeframes, and data directory
     symbol = "EURUSD=X"
     timeframes = ["1h", "90m", "1d"]
@@ -0,0 +1,109 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Timeframe label suffixes (e.g. '90m', '4h', '1d') and their pandas units
+TIMEFRAME_UNITS = {"m": "min", "min": "min", "h": "h", "d": "D", "w": "W", "wk": "W"}
+
+
+def timeframe_to_timedelta(timeframe):
+    """
+    Convert a timeframe label to the duration of one bar.
+
+    :param timeframe: Timeframe label (e.g., '1h', '90m', '1d')
+    :return: pd.Timedelta
+    """
+    match = re.fullmatch(r"(\d+)([a-z]+)", timeframe.strip().lower())
+    if not match or match.group(2) not in TIMEFRAME_UNITS:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return pd.Timedelta(int(match.group(1)), unit=TIMEFRAME_UNITS[match.group(2)])
+
+
+class AlignedData:
+    """
+    Columnar view of several timeframes of one symbol, aligned on the bars of a base timeframe.
+
+    Every timeframe keeps its own rows as numpy arrays; index[timeframe][i] is the row of
+    that timeframe to use at base bar i (-1 when none has closed yet). Reading any value for
+    a base bar is therefore a pair of array lookups.
+    """
+
+    def __init__(self, base_timeframe, frames, index):
+        """
+        :param base_timeframe: Timeframe whose bars drive the backtest
+        :param frames: Dictionary of date-sorted DataFrames for each timeframe
+        :param index: Dictionary of row index arrays for each timeframe
+        """
+        self.base_timeframe = base_timeframe
+        self.frames = frames
+        self.index = index
+        self.timeframes = list(frames)
+        self.dates = frames[base_timeframe]["date"].to_numpy()
+        self.columns = {tf: {column: df[column].to_numpy() for column in df.columns} for tf, df in frames.items()}
+
+        # Model inputs: every column except the date and the label
+        self.feature_names = {}
+        self.features = {}
+        for tf, df in frames.items():
+            features = df.drop(columns=["date", "target"], errors="ignore")
+            self.feature_names[tf] = features.columns.tolist()
+            self.features[tf] = features.to_numpy()
+
+    def __len__(self):
+        return len(self.dates)
+
+    def value(self, timeframe, column, i):
+        """
+        Value of a column of a timeframe as known at base bar i.
+
+        :return: The value, or None if no bar of that timeframe has closed yet
+        """
+        row = self.index[timeframe][i]
+        return self.columns[timeframe][column][row] if row >= 0 else None
+
+    def column(self, timeframe, column):
+        """
+        A column of a timeframe forward-filled onto the base bars.
+
+        :return: Numpy array with one value per base bar (NaN before the first closed bar)
+        """
+        rows = self.index[timeframe]
+        values = self.columns[timeframe][column][np.maximum(rows, 0)].astype(float)
+        values[rows < 0] = np.nan
+        return values
+
+
+def align_timeframes(data_dict, base_timeframe="1h"):
+    """
+    Align every timeframe onto the bars of the base timeframe without lookahead.
+
+    Bars are labelled by their open time in the 'date' column. A bar of another timeframe
+    is used from the first base bar whose close is at or after that bar's close, so a
+    daily bar only becomes visible once the day is over. The lookup is a sorted merge
+    (searchsorted on close times), equivalent to a backward merge_asof.
+
+    :param data_dict: Dictionary of DataFrames for each timeframe (None entries are skipped)
+    :param base_timeframe: Timeframe whose bars drive the backtest
+    :return: AlignedData
+    """
+    if data_dict.get(base_timeframe) is None:
+        raise ValueError(f"No data for the base timeframe {base_timeframe}")
+
+    frames = {}
+    for timeframe, df in data_dict.items():
+        if df is None:
+            continue
+        df = df.copy()
+        df["date"] = pd.to_datetime(df["date"])
+        frames[timeframe] = df.sort_values("date", kind="stable").reset_index(drop=True)
+
+    base_close = (frames[base_timeframe]["date"] + timeframe_to_timedelta(base_timeframe)).to_numpy()
+    index = {}
+    for timeframe, df in frames.items():
+        if timeframe == base_timeframe:
+            index[timeframe] = np.arange(len(df))
+            continue
+        close = (df["date"] + timeframe_to_timedelta(timeframe)).to_numpy()
+        index[timeframe] = np.searchsorted(close, base_close, side="right") - 1
+
+    return AlignedData(base_timeframe, frames, index)
@@ -0,0 +1,292 @@
+import numpy as np
+from strategies.base_strategy import BaseStrategy, SIGNAL_CODES
+
+
+class BacktestResult:
+    """
+    Trades and equity produced by a BacktestEngine run.
+    """
+
+    def __init__(self, initial_balance, equity_curve, entries, exits, entry_prices, exit_prices,
+                 open_entries, open_entry_prices):
+        """
+        :param initial_balance: Starting balance
+        :param equity_curve: Numpy array with the initial balance followed by the balance after every bar
+        :param entries: Bar indices of the buys that were closed
+        :param exits: Bar indices of the sells that closed them
+        :param entry_prices: Fill prices of the closed buys
+        :param exit_prices: Fill prices of the sells
+        :param open_entries: Bar indices of the buys still open at the end
+        :param open_entry_prices: Fill prices of the buys still open at the end
+        """
+        self.initial_balance = initial_balance
+        self.equity_curve = equity_curve
+        self.entries = entries
+        self.exits = exits
+        self.entry_prices = entry_prices
+        self.exit_prices = exit_prices
+        self.profits = exit_prices - entry_prices
+        self.open_entries = open_entries
+        self.open_entry_prices = open_entry_prices
+
+    @property
+    def final_balance(self):
+        return float(self.equity_curve[-1])
+
+    @property
+    def net_profit(self):
+        return self.final_balance - self.initial_balance
+
+    @property
+    def max_drawdown(self):
+        """
+        Largest peak-to-trough fall of the equity curve.
+        """
+        peaks = np.maximum.accumulate(self.equity_curve)
+        return float(np.max(peaks - self.equity_curve))
+
+    def metrics(self):
+        """
+        Summary statistics of the run.
+
+        :return: Dictionary with net profit, final balance, trade counts, win rate and max drawdown
+        """
+        closed = len(self.profits)
+        return {
+            "net_profit": self.net_profit,
+            "final_balance": self.final_balance,
+            "closed_trades": closed,
+            "open_trades": len(self.open_entries),
+            "win_rate": float(np.mean(self.profits > 0)) if closed else 0.0,
+            "max_drawdown": self.max_drawdown,
+        }
+
+
+class BacktestEngine:
+    """
+    Array-based backtest core.
+
+    Signals are precomputed for every bar and only the bars with a buy or sell signal are
+    visited; balances and the equity curve are then built in bulk. Buys are stacked and
+    each sell closes the most recent open buy, as in the original per-row loop.
+    """
+
+    def __init__(self, initial_balance=1000, fill="close"):
+        """
+        :param initial_balance: Starting balance
+        :param fill: 'close' to fill at the signal bar's close, 'next_open' to fill at the next bar's open
+        """
+        if fill not in ("close", "next_open"):
+            raise ValueError(f"Unsupported fill mode: {fill}")
+        self.initial_balance = initial_balance
+        self.fill = fill
+
+    def run(self, signals, closes, opens=None):
+        """
+        Simulate the trades for an array of signals.
+
+        :param signals: Numpy array of signal codes (1 = buy, -1 = sell, 0 = hold), one per bar
+        :param closes: Numpy array of close prices
+        :param opens: Numpy array of open prices (required for 'next_open' fills)
+        :return: BacktestResult
+        """
+        signals = np.asarray(signals)
+        closes = np.asarray(closes, dtype=float)
+        if len(signals) != len(closes):
+            raise ValueError("Signals and prices must have the same length")
+
+        if self.fill == "close":
+            fill_prices = closes
+            fillable = np.ones(len(closes), dtype=bool)
+        else:
+            if opens is None:
+                raise ValueError("Open prices are required for next-open fills")
+            fill_prices = np.append(np.asarray(opens, dtype=float)[1:], np.nan)
+            fillable = np.arange(len(closes)) < len(closes) - 1
+
+        events = np.flatnonzero((signals != 0) & fillable)
+        event_signals = signals[events].tolist()
+
+        # Only the signal bars are visited; the stack of open buys is inherently sequential
+        stack, entries, exits = [], [], []
+        for bar, signal in zip(events.tolist(), event_signals):
+            if signal > 0:
+                stack.append(bar)
+            elif stack:
+                entries.append(stack.pop())
+                exits.append(bar)
+
+        entries = np.array(entries, dtype=np.int64)
+        exits = np.array(exits, dtype=np.int64)
+        open_entries = np.array(stack, dtype=np.int64)
+        entry_prices, exit_prices = fill_prices[entries], fill_prices[exits]
+
+        profit_per_bar = np.zeros(len(closes))
+        np.add.at(profit_per_bar, exits, exit_prices - entry_prices)
+        # Accumulating from the initial balance keeps the same rounding as adding profits one by one
+        equity_curve = np.cumsum(np.concatenate(([self.initial_balance], profit_per_bar)))
+
+        return BacktestResult(self.initial_balance, equity_curve, entries, exits, entry_prices, exit_prices,
+                              open_entries, fill_prices[open_entries])
+
+
+class SimulatedBacktestResult(BacktestResult):
+    """
+    Trades and equity of a BrokerBacktest run, in account currency.
+    """
+
+    def __init__(self, initial_balance, equity_curve, trades, open_positions):
+        """
+        :param initial_balance: Starting balance
+        :param equity_curve: Numpy array with the initial balance followed by the equity after every bar
+        :param trades: Dictionary of numpy arrays with the closed trades (SimulatedBroker trade log columns)
+        :param open_positions: Dictionary of numpy arrays with the positions still open at the end
+        """
+        super().__init__(initial_balance, equity_curve, trades["entry_time"], trades["exit_time"],
+                         trades["entry_price"], trades["exit_price"], open_positions["entry_time"],
+                         open_positions["entry_price"])
+        self.profits = trades["profit"]
+        self.trades = trades
+        self.open_positions = open_positions
+
+
+class BrokerBacktest:
+    """
+    Backtest that sends the precomputed signals through a SimulatedBroker, exactly as the
+    live bot sends them through TradeExecutor: a buy signal opens a long position, a sell
+    signal a short one, both with the strategy's stop-loss and take-profit. Positions are
+    closed by their stop-loss/take-profit within the bars, with spread, slippage and
+    commission applied by the broker.
+
+    The positions do not depend on each other, so all orders go to the broker at once and
+    their exits are searched in bulk; no bar is visited one by one.
+    """
+
+    def __init__(self, broker, symbol, lot_size=0.1, stop_loss=None, take_profit=None, fill="close"):
+        """
+        :param broker: SimulatedBroker filling the orders
+        :param symbol: Traded symbol
+        :param lot_size: Lot size of every order
+        :param stop_loss: Stop-loss in pips (None for none)
+        :param take_profit: Take-profit in pips (None for none)
+        :param fill: 'close' to fill at the signal bar's close, 'next_open' to fill at the next bar's open
+        """
+        if fill not in ("close", "next_open"):
+            raise ValueError(f"Unsupported fill mode: {fill}")
+        self.broker = broker
+        self.symbol = symbol
+        self.lot_size = lot_size
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.fill = fill
+
+    def run(self, signals, opens, highs, lows, closes):
+        """
+        Simulate the trades for an array of signals. Bar indices are used as times.
+
+        :param signals: Numpy array of signal codes (1 = buy, -1 = sell, 0 = hold), one per bar
+        :param opens: Numpy array of open prices
+        :param highs: Numpy array of high prices
+        :param lows: Numpy array of low prices
+        :param closes: Numpy array of close prices
+        :return: SimulatedBacktestResult
+        """
+        signals = np.asarray(signals)
+        opens, highs, lows, closes = (np.asarray(prices, dtype=float) for prices in (opens, highs, lows, closes))
+        if not len(signals) == len(opens) == len(highs) == len(lows) == len(closes):
+            raise ValueError("Signals and prices must have the same length")
+        broker, symbol = self.broker, self.symbol
+        symbol_id = broker.symbol_id(symbol)
+        if np.any(broker.positions["symbol"] == symbol_id):
+            raise ValueError(f"The broker already has open positions on {symbol}")
+        initial_balance = broker.balance
+
+        fillable = np.arange(len(closes)) < len(closes) - (self.fill == "next_open")
+        events = np.flatnonzero((signals != 0) & fillable)
+        if self.fill == "close":
+            entry_bars, fill_bids = events, closes[events]
+        else:
+            # The order fills at the next open, so that bar's whole range already counts
+            entry_bars, fill_bids = events + 1, opens[events + 1]
+        trades = broker.simulate_orders(symbol, np.sign(signals[events]), self.lot_size, self.stop_loss,
+                                        self.take_profit, fill_bids, entry_bars, opens, highs, lows, closes,
+                                        check_from=events + 1)
+
+        trades = {name: broker.trades[name][trades].copy() for name in broker.trades.arrays}
+        mine = broker.positions["symbol"] == symbol_id
+        open_positions = {name: broker.positions[name][mine].copy() for name in broker.positions.arrays}
+        equity_curve = self._equity_curve(initial_balance, closes, trades, open_positions)
+        return SimulatedBacktestResult(initial_balance, equity_curve, trades, open_positions)
+
+    def _equity_curve(self, initial_balance, closes, trades, open_positions):
+        """
+        Mark every position to market on every bar in bulk.
+
+        While a position is open it is worth direction * units * (mark - entry price), with longs
+        marked at the close and shorts at the close plus the spread. Summing these linear terms with
+        difference arrays gives the equity of every bar without visiting the bars.
+        """
+        broker = self.broker
+        n = len(closes)
+        entries = np.concatenate((trades["entry_time"], open_positions["entry_time"]))
+        exits = np.concatenate((trades["exit_time"], np.full(len(open_positions["ticket"]), n)))
+        directions = np.concatenate((trades["direction"], open_positions["direction"])).astype(float)
+        units = np.concatenate((trades["volume"], open_positions["volume"])) * broker.contract_size
+        entry_prices = np.concatenate((trades["entry_price"], open_positions["entry_price"]))
+        entry_commissions = np.concatenate((trades["commission"], open_positions["commission"]))
+
+        def open_sum(values):
+            # Sum of the values of the positions open on every bar (entry bar included, exit bar excluded)
+            per_bar = np.zeros(n + 1)
+            np.add.at(per_bar, entries, values)
+            np.add.at(per_bar, exits, -values)
+            return np.cumsum(per_bar[:n])
+
+        net_units = open_sum(directions * units)
+        cost = open_sum(directions * units * entry_prices)
+        short_units = open_sum(np.where(directions < 0, units, 0.0))
+        unrealized = net_units * closes - cost - short_units * broker.spread
+
+        realized = np.zeros(n)
+        np.add.at(realized, entries, -entry_commissions)
+        # Trade profits are net of both commissions; the entry commission was booked at the entry
+        np.add.at(realized, trades["exit_time"], trades["profit"] + trades["commission"])
+        balance = np.cumsum(np.concatenate(([initial_balance], realized)))
+        return np.concatenate((balance[:1], balance[1:] + unrealized))
+
+
+def precompute_signals(strategy, aligned):
+    """
+    Compute the signal of a strategy for every bar of the base timeframe.
+
+    Strategies derived from BaseStrategy get the base timeframe's price arrays, and other
+    strategies with a generate_signals method get the aligned data. Strategies with
+    generate_signal_at are called once per bar with the bar index. Anything else falls
+    back to calling generate_signal once per bar with one-row slices of each timeframe,
+    which is how the original backtest loop fed them.
+
+    :param strategy: Strategy object
+    :param aligned: AlignedData for the symbol
+    :return: Numpy array of signal codes
+    """
+    base = aligned.columns[aligned.base_timeframe]
+    if isinstance(strategy, BaseStrategy):
+        market_data = {"highs": base["high"], "lows": base["low"], "closes": base["close"]}
+        return strategy.generate_signals(market_data)
+
+    if hasattr(strategy, "generate_signals"):
+        return strategy.generate_signals(aligned)
+
+    signals = np.zeros(len(aligned), dtype=np.int8)
+    if hasattr(strategy, "generate_signal_at"):
+        for i in range(len(aligned)):
+            signals[i] = SIGNAL_CODES.get(strategy.generate_signal_at(aligned, i), 0)
+        return signals
+
+    for i in range(len(aligned)):
+        current_data = {}
+        for tf, df in aligned.frames.items():
+            row = aligned.index[tf][i]
+            current_data[tf] = df.iloc[row:row + 1] if row >= 0 else df.iloc[0:0]
+        signals[i] = SIGNAL_CODES.get(strategy.generate_signal(current_data), 0)
+    return signals
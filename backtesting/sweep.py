@@ -0,0 +1,198 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from backtesting.engine import BacktestEngine
+from indicators.cache import IndicatorCache
+
+# Price arrays and indicator cache of a sweep worker process (set by _init_worker)
+_worker_state = {}
+
+
+def expand_grid(param_grid):
+    """
+    Expand a parameter grid into the list of parameter sets it describes.
+
+    :param param_grid: Dictionary mapping parameter names to lists of values
+    :return: List of parameter dictionaries (every combination)
+    """
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(param_grid[name] for name in names))]
+
+
+def price_arrays(data):
+    """
+    Collect the price arrays a sweep needs.
+
+    :param data: DataFrame with open/high/low/close columns, or a dictionary of highs/lows/closes(/opens) arrays
+    :return: Dictionary of float numpy arrays keyed highs, lows, closes (and opens when available)
+    """
+    if isinstance(data, pd.DataFrame):
+        arrays = {"highs": data["high"], "lows": data["low"], "closes": data["close"]}
+        if "open" in data:
+            arrays["opens"] = data["open"]
+        return {name: values.to_numpy(dtype=float) for name, values in arrays.items()}
+    return {name: np.asarray(values, dtype=float) for name, values in data.items()}
+
+
+class SharedArrays:
+    """
+    Copies a set of numpy arrays into shared memory blocks so worker processes can map them
+    instead of receiving pickled copies.
+    """
+
+    def __init__(self, arrays):
+        """
+        :param arrays: Dictionary of numpy arrays to share
+        """
+        self.blocks = []
+        self.descriptors = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.descriptors[name] = (block.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(descriptors):
+        """
+        Map shared arrays in another process.
+
+        :param descriptors: The descriptors attribute of the SharedArrays that created them
+        :return: (dictionary of read-only numpy arrays, list of the attached blocks)
+        """
+        arrays, blocks = {}, []
+        for name, (block_name, shape, dtype) in descriptors.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            array.flags.writeable = False
+            arrays[name] = array
+            blocks.append(block)
+        return arrays, blocks
+
+    def close(self):
+        """
+        Release and remove the shared memory blocks.
+        """
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def _init_worker(descriptors, cache_size):
+    arrays, blocks = SharedArrays.attach(descriptors)
+    _worker_state["blocks"] = blocks
+    _set_worker_arrays(arrays, cache_size)
+
+
+def _set_worker_arrays(arrays, cache_size):
+    _worker_state["arrays"] = arrays
+    _worker_state["cache"] = IndicatorCache(arrays["highs"], arrays["lows"], arrays["closes"], max_entries=cache_size)
+
+
+def _run_parameter_sets(strategy_class, strategy_kwargs, initial_balance, fill, param_sets):
+    """
+    Backtest a group of parameter sets in a worker, sharing the worker's indicator cache.
+    """
+    arrays = _worker_state["arrays"]
+    cache = _worker_state["cache"]
+    market_data = {"highs": arrays["highs"], "lows": arrays["lows"], "closes": arrays["closes"]}
+    engine = BacktestEngine(initial_balance, fill=fill)
+
+    rows = []
+    for params in param_sets:
+        strategy = strategy_class(**strategy_kwargs, **params)
+        signals = strategy.generate_signals(market_data, cache=cache)
+        result = engine.run(signals, arrays["closes"], arrays.get("opens"))
+        rows.append(dict(params, **result.metrics()))
+    return rows
+
+
+class ParameterSweep:
+    """
+    Grid search over strategy parameters, fanned out over worker processes.
+
+    The price arrays are placed in shared memory once and mapped by every worker. Parameter
+    sets that only differ in the strategy's threshold_params are sent to the same worker
+    together, so their indicator series (e.g. one RSI(14) for every RSI threshold) are
+    computed once; each worker also keeps a small cache of recently used series.
+    """
+
+    def __init__(self, strategy_class, param_grid, strategy_kwargs=None, initial_balance=1000, fill="close",
+                 max_workers=None, cache_size=16):
+        """
+        :param strategy_class: Strategy class derived from BaseStrategy (e.g., MeanReversionStrategy)
+        :param param_grid: Dictionary mapping constructor parameters to lists of values
+        :param strategy_kwargs: Fixed constructor arguments (symbol, lot_size, stop_loss, take_profit, ...)
+        :param initial_balance: Starting balance of every backtest
+        :param fill: Fill mode of the backtest engine ('close' or 'next_open')
+        :param max_workers: Number of worker processes (default: one per CPU; 1 runs in-process)
+        :param cache_size: Number of indicator series each worker keeps cached
+        """
+        self.strategy_class = strategy_class
+        self.param_sets = expand_grid(param_grid)
+        self.strategy_kwargs = strategy_kwargs or {}
+        self.initial_balance = initial_balance
+        self.fill = fill
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+
+    def make_tasks(self):
+        """
+        Split the parameter sets into work units.
+
+        Sets that share every non-threshold parameter stay together; large groups are split so
+        there are enough units to keep all workers busy.
+
+        :return: List of lists of parameter dictionaries
+        """
+        groups = {}
+        for params in self.param_sets:
+            key = tuple(sorted((name, repr(value)) for name, value in params.items()
+                               if name not in self.strategy_class.threshold_params))
+            groups.setdefault(key, []).append(params)
+
+        target_units = self.max_workers * 4
+        chunk = max(1, -(-len(self.param_sets) // target_units))
+        tasks = []
+        for group in groups.values():
+            for start in range(0, len(group), chunk):
+                tasks.append(group[start:start + chunk])
+        return tasks
+
+    def run(self, data, rank_by="net_profit", ascending=False):
+        """
+        Backtest every parameter set.
+
+        :param data: DataFrame with open/high/low/close columns, or a dictionary of highs/lows/closes(/opens) arrays
+        :param rank_by: Result column to rank by (default: net_profit)
+        :param ascending: Rank in ascending order (default: best net profit first)
+        :return: DataFrame with one row per parameter set and the backtest metrics, ranked
+        """
+        arrays = price_arrays(data)
+        tasks = self.make_tasks()
+        run_task = partial(_run_parameter_sets, self.strategy_class, self.strategy_kwargs, self.initial_balance, self.fill)
+        if self.max_workers == 1:
+            _set_worker_arrays(arrays, self.cache_size)
+            try:
+                results = [run_task(task) for task in tasks]
+            finally:
+                _worker_state.clear()
+        else:
+            shared = SharedArrays(arrays)
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                         initargs=(shared.descriptors, self.cache_size)) as executor:
+                    results = list(executor.map(run_task, tasks))
+            finally:
+                shared.close()
+
+        table = pd.DataFrame([row for rows in results for row in rows])
+        if table.empty:
+            return table
+        return table.sort_values(rank_by, ascending=ascending, kind="stable").reset_index(drop=True)
@@ -0,0 +1,296 @@
+import copy
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+import pandas as pd
+from backtesting.engine import BacktestEngine
+from backtesting.sweep import SharedArrays, expand_grid, price_arrays
+from indicators.cache import IndicatorCache
+
+# Arrays mapped by a walk-forward worker process (set by _init_worker)
+_worker_arrays = {}
+
+
+def walk_forward_windows(n_bars, train_size, test_size, step=None, anchored=False):
+    """
+    Split a history into consecutive train/test windows.
+
+    :param n_bars: Number of bars in the history
+    :param train_size: Number of bars in each training window
+    :param test_size: Number of bars in each test window
+    :param step: Bars to slide between folds (default: test_size, i.e. non-overlapping test windows)
+    :param anchored: Keep every training window starting at bar 0 (expanding window)
+    :return: List of (train_start, train_end, test_start, test_end) tuples (end exclusive)
+    """
+    step = step or test_size
+    windows = []
+    train_start = 0
+    while train_start + train_size + test_size <= n_bars:
+        train_end = train_start + train_size
+        windows.append((0 if anchored else train_start, train_end, train_end, train_end + test_size))
+        train_start += step
+    return windows
+
+
+def _init_worker(descriptors):
+    arrays, blocks = SharedArrays.attach(descriptors)
+    _worker_arrays.update(arrays)
+    _worker_arrays["_blocks"] = blocks
+
+
+def _evaluate_strategy_fold(initial_balance, fill, rank_by, ascending, window):
+    """
+    Pick the best parameter set on the training window and backtest it on the test window.
+    """
+    train_start, train_end, test_start, test_end = window
+    signals, closes, opens = _worker_arrays["signals"], _worker_arrays["closes"], _worker_arrays.get("opens")
+    engine = BacktestEngine(initial_balance, fill=fill)
+
+    def run(row, start, end):
+        return engine.run(signals[row, start:end], closes[start:end], None if opens is None else opens[start:end])
+
+    scores = np.array([run(row, train_start, train_end).metrics()[rank_by] for row in range(len(signals))])
+    best = int(np.argmin(scores) if ascending else np.argmax(scores))
+    return best, scores[best], run(best, test_start, test_end).metrics()
+
+
+class StrategyWalkForward:
+    """
+    Rolling walk-forward optimization of strategy parameters.
+
+    For every fold the parameter grid is backtested on the training window, the best set is
+    kept and then backtested on the following test window. Indicators are causal, so the
+    signals of each parameter set are computed once over the whole history and every fold
+    only slices them. Folds are independent and run in parallel worker processes that map
+    the signal matrix and prices from shared memory.
+    """
+
+    def __init__(self, strategy_class, param_grid, train_size, test_size, step=None, anchored=False,
+                 strategy_kwargs=None, initial_balance=1000, fill="close", rank_by="net_profit", ascending=False,
+                 max_workers=None):
+        """
+        :param strategy_class: Strategy class derived from BaseStrategy
+        :param param_grid: Dictionary mapping constructor parameters to lists of values
+        :param train_size: Number of bars in each training window
+        :param test_size: Number of bars in each test window
+        :param step: Bars to slide between folds (default: test_size)
+        :param anchored: Keep every training window starting at bar 0
+        :param strategy_kwargs: Fixed constructor arguments (symbol, lot_size, stop_loss, take_profit, ...)
+        :param initial_balance: Starting balance of every backtest
+        :param fill: Fill mode of the backtest engine ('close' or 'next_open')
+        :param rank_by: Metric used to pick the best parameter set (default: net_profit)
+        :param ascending: Pick the lowest value of rank_by instead of the highest
+        :param max_workers: Number of worker processes (default: one per CPU; 1 runs in-process)
+        """
+        self.strategy_class = strategy_class
+        self.param_sets = expand_grid(param_grid)
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step
+        self.anchored = anchored
+        self.strategy_kwargs = strategy_kwargs or {}
+        self.initial_balance = initial_balance
+        self.fill = fill
+        self.rank_by = rank_by
+        self.ascending = ascending
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def compute_signals(self, arrays):
+        """
+        Signals of every parameter set over the whole history, sharing one indicator cache.
+
+        :return: Numpy array of shape (parameter sets, bars)
+        """
+        market_data = {"highs": arrays["highs"], "lows": arrays["lows"], "closes": arrays["closes"]}
+        cache = IndicatorCache.from_market_data(market_data)
+        return np.vstack([
+            self.strategy_class(**self.strategy_kwargs, **params).generate_signals(market_data, cache=cache)
+            for params in self.param_sets
+        ])
+
+    def run(self, data):
+        """
+        Run every fold.
+
+        :param data: DataFrame with open/high/low/close columns, or a dictionary of highs/lows/closes(/opens) arrays
+        :return: DataFrame with one row per fold: windows, chosen parameters, training score and test metrics
+        """
+        arrays = price_arrays(data)
+        windows = walk_forward_windows(len(arrays["closes"]), self.train_size, self.test_size, self.step, self.anchored)
+        if not windows:
+            raise ValueError("Not enough data for a single walk-forward fold")
+
+        shared_arrays = {"signals": self.compute_signals(arrays), "closes": arrays["closes"]}
+        if "opens" in arrays:
+            shared_arrays["opens"] = arrays["opens"]
+
+        evaluate = partial(_evaluate_strategy_fold, self.initial_balance, self.fill, self.rank_by, self.ascending)
+        if self.max_workers == 1:
+            _worker_arrays.update(shared_arrays)
+            try:
+                results = [evaluate(window) for window in windows]
+            finally:
+                _worker_arrays.clear()
+        else:
+            shared = SharedArrays(shared_arrays)
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                         initargs=(shared.descriptors,)) as executor:
+                    results = list(executor.map(evaluate, windows))
+            finally:
+                shared.close()
+
+        rows = []
+        for fold, (window, (best, score, test_metrics)) in enumerate(zip(windows, results)):
+            train_start, train_end, test_start, test_end = window
+            row = {"fold": fold, "train_start": train_start, "train_end": train_end,
+                   "test_start": test_start, "test_end": test_end}
+            row.update(self.param_sets[best])
+            row[f"train_{self.rank_by}"] = score
+            row.update({f"test_{name}": value for name, value in test_metrics.items()})
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def _fit_model_fold(model_factory, feature_names, labels, window):
+    """
+    Fit a model on the training window of the shared feature matrix.
+    """
+    train_start, train_end, _, _ = window
+    features = pd.DataFrame(_worker_arrays["features"][train_start:train_end], columns=feature_names)
+    return model_factory().fit(features, labels[_worker_arrays["target"][train_start:train_end]])
+
+
+def _window_fingerprint(feature_names, labels, matrix, target_codes, start, end):
+    """
+    Digest of the rows (features and labels) a model is trained on.
+    """
+    digest = hashlib.sha256(json.dumps([feature_names, [str(label) for label in labels]]).encode())
+    digest.update(np.ascontiguousarray(matrix[start:end]).tobytes())
+    digest.update(np.ascontiguousarray(target_codes[start:end]).tobytes())
+    return digest.hexdigest()
+
+
+class ModelWalkForward:
+    """
+    Rolling walk-forward training and out-of-sample evaluation of an MLModel.
+
+    Features are prepared once for the whole history and sliced per fold. Fitted models are
+    kept by a fingerprint of their training rows, so folds (or later runs) that train on the
+    same rows reuse the model instead of refitting, and a run on different data never picks up
+    a stale one. Folds are fitted in parallel worker processes that map the feature matrix from
+    shared memory; with incremental=True they are instead trained in order, each one growing the
+    previous fold's model (MLModel.update) so a window that only moved by a step is not refitted
+    from scratch.
+    """
+
+    def __init__(self, train_size, test_size, step=None, anchored=False, model_factory=None, max_workers=None,
+                 incremental=False):
+        """
+        :param train_size: Number of rows in each training window
+        :param test_size: Number of rows in each test window
+        :param step: Rows to slide between folds (default: test_size)
+        :param anchored: Keep every training window starting at row 0
+        :param model_factory: Callable returning an unfitted MLModel (default: MLModel, single-core per fold
+                              when folds run in worker processes)
+        :param max_workers: Number of worker processes (default: one per CPU; 1 runs in-process)
+        :param incremental: Grow the previous fold's model on each new window instead of fitting every fold
+                            from scratch (folds are then trained one after the other)
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        if model_factory is None:
+            from models.ml_model import MLModel
+            # Folds already use every core; threads inside each fit would only compete with them
+            parallel_folds = self.max_workers > 1 and not incremental
+            model_factory = partial(MLModel, n_jobs=1) if parallel_folds else MLModel
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step
+        self.anchored = anchored
+        self.model_factory = model_factory
+        self.incremental = incremental
+        self.models = {}  # Fitted models by fingerprint of their training rows
+
+    def run(self, data, target_column="target", drop_columns=("Date", "date")):
+        """
+        Train and evaluate every fold.
+
+        :param data: DataFrame with feature columns and a target column, in time order
+        :param target_column: Name of the label column
+        :param drop_columns: Columns that are not model inputs
+        :return: (DataFrame with one row per fold and its test accuracy, numpy array of out-of-sample predictions)
+        """
+        features = data.drop(columns=[target_column, *drop_columns], errors="ignore")
+        feature_names = features.columns.tolist()
+        matrix = features.to_numpy(dtype=float)
+        target = data[target_column].to_numpy()
+        # Labels are shared as integer codes so any label type fits in shared memory
+        labels, target_codes = np.unique(target, return_inverse=True)
+
+        windows = walk_forward_windows(len(data), self.train_size, self.test_size, self.step, self.anchored)
+        if not windows:
+            raise ValueError("Not enough data for a single walk-forward fold")
+
+        keys = [_window_fingerprint(feature_names, labels, matrix, target_codes, window[0], window[1])
+                for window in windows]
+        if self.incremental:
+            self._grow_models(windows, keys, feature_names, labels, matrix, target_codes)
+        else:
+            self._fit_models(windows, keys, feature_names, labels, matrix, target_codes)
+
+        predictions = np.full(len(data), None, dtype=object)
+        rows = []
+        for fold, window in enumerate(windows):
+            train_start, train_end, test_start, test_end = window
+            model = self.models[keys[fold]]
+            fold_predictions = model.predict(
+                pd.DataFrame(matrix[test_start:test_end], columns=feature_names)
+            )
+            predictions[test_start:test_end] = fold_predictions
+            rows.append({"fold": fold, "train_start": train_start, "train_end": train_end,
+                         "test_start": test_start, "test_end": test_end,
+                         "accuracy": float(np.mean(fold_predictions == target[test_start:test_end]))})
+        return pd.DataFrame(rows), predictions
+
+    def _fit_models(self, windows, keys, feature_names, labels, matrix, target_codes):
+        """
+        Fit a model from scratch for every training window without one, in parallel.
+        """
+        missing = list({key: window for key, window in zip(keys, windows) if key not in self.models}.items())
+        if not missing:
+            return
+        fit = partial(_fit_model_fold, self.model_factory, feature_names, labels)
+        if self.max_workers == 1 or len(missing) == 1:
+            _worker_arrays.update({"features": matrix, "target": target_codes})
+            try:
+                fitted = [fit(window) for _, window in missing]
+            finally:
+                _worker_arrays.clear()
+        else:
+            shared = SharedArrays({"features": matrix, "target": target_codes})
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                         initargs=(shared.descriptors,)) as executor:
+                    fitted = list(executor.map(fit, [window for _, window in missing]))
+            finally:
+                shared.close()
+        for (key, _), model in zip(missing, fitted):
+            self.models[key] = model
+
+    def _grow_models(self, windows, keys, feature_names, labels, matrix, target_codes):
+        """
+        Train the folds in order, growing a copy of the previous fold's model on each new window.
+        """
+        previous = None
+        for key, (train_start, train_end, _, _) in zip(keys, windows):
+            if key not in self.models:
+                features = pd.DataFrame(matrix[train_start:train_end], columns=feature_names)
+                target = labels[target_codes[train_start:train_end]]
+                if previous is None:
+                    self.models[key] = self.model_factory().fit(features, target)
+                else:
+                    self.models[key] = copy.deepcopy(previous).update(features, target)
+            previous = self.models[key]
@@ -0,0 +1,53 @@
+"""
+Benchmark suite.
+
+    python -m benchmarks run --sizes 1k,100k --output benchmarks/results/baseline.json
+    python -m benchmarks run --only rsi,backtest_run --output benchmarks/results/current.json
+    python -m benchmarks compare benchmarks/results/baseline.json benchmarks/results/current.json --threshold 0.1
+
+compare exits with status 1 when any benchmark is slower than the baseline by more than the threshold.
+"""
+import argparse
+import sys
+from benchmarks.suite import (BENCHMARKS, DEFAULT_SIZES, SIZES, compare, format_seconds, load_results,
+                              run_benchmarks, save_results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="NeuralAgent benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks and save the results as JSON")
+    run.add_argument("--sizes", default=",".join(DEFAULT_SIZES),
+                     help=f"Comma-separated data sizes ({', '.join(SIZES)} or a number of bars)")
+    run.add_argument("--only", help=f"Comma-separated benchmarks (default: all of {', '.join(BENCHMARKS)})")
+    run.add_argument("--output", default="benchmarks/results/latest.json", help="Results file")
+    run.add_argument("--min-time", type=float, default=0.5, help="Seconds of samples per benchmark")
+    run.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data")
+
+    diff = commands.add_parser("compare", help="Compare two results files and flag regressions")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown (0.1 = 10%%)")
+    diff.add_argument("--metric", choices=("median", "min", "mean"), default="median")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run_benchmarks(args.sizes.split(","), args.only.split(",") if args.only else None,
+                                 min_time=args.min_time, seed=args.seed)
+        save_results(results, args.output)
+        print(f"Results saved to {args.output}")
+        return 0
+
+    comparison = compare(load_results(args.baseline), load_results(args.current), args.threshold, args.metric)
+    for row in comparison.itertuples():
+        ratio = "-" if row.ratio is None or row.ratio != row.ratio else f"{row.ratio:.2f}x"
+        print(f"{row.benchmark:32} {format_seconds(row.baseline):>10} {format_seconds(row.current):>10} "
+              f"{ratio:>8}  {row.status}")
+    regressions = int((comparison["status"] == "regression").sum())
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
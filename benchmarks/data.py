@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_ohlc(bars, seed=0, start="2000-01-03", freq="min", price=1.1, volatility=0.0002):
+    """
+    Random-walk OHLC bars for benchmarks.
+
+    Closes follow a Gaussian random walk in log space; every bar opens at the previous close and
+    its high/low extend beyond the open and close by a random amount, so the bars are valid
+    candles for every indicator.
+
+    :param bars: Number of bars
+    :param seed: Random seed (the same seed always gives the same bars)
+    :param start: Time of the first bar
+    :param freq: Bar frequency (pandas offset alias)
+    :param price: First open price
+    :param volatility: Standard deviation of the log return of a bar
+    :return: DataFrame with date, open, high, low, close and volume columns
+    """
+    rng = np.random.default_rng(seed)
+    closes = price * np.exp(np.cumsum(rng.normal(0.0, volatility, bars)))
+    opens = np.concatenate(([price], closes[:-1]))
+    wicks = np.abs(rng.normal(0.0, volatility / 2, (2, bars))) * closes
+    return pd.DataFrame({
+        "date": pd.date_range(start, periods=bars, freq=freq),
+        "open": opens,
+        "high": np.maximum(opens, closes) + wicks[0],
+        "low": np.minimum(opens, closes) - wicks[1],
+        "close": closes,
+        "volume": rng.integers(1, 1000, bars),
+    })
+
+
+def market_data(data):
+    """
+    The price arrays strategies are set up with (see BaseStrategy.setup).
+    """
+    return {"highs": data["high"].to_numpy(), "lows": data["low"].to_numpy(), "closes": data["close"].to_numpy()}
@@ -0,0 +1,397 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from benchmarks.data import market_data, synthetic_ohlc
+
+# Scales of the synthetic data; 10m needs a few GB of memory and minutes per benchmark, so it is opt-in
+SIZES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+DEFAULT_SIZES = ("1k", "100k")
+
+# Bars the benchmark model is trained on (prediction cost depends on the forest, not on the data size)
+TRAINING_BARS = 20_000
+
+BENCHMARKS = {}
+
+
+class Benchmark:
+    """
+    One timed operation.
+
+    `setup(context)` prepares everything the operation needs outside the timing and returns the
+    zero-argument callable that is timed.
+    """
+
+    def __init__(self, name, setup, max_bars=None, description=None):
+        """
+        :param name: Benchmark name
+        :param setup: Function of a BenchmarkContext returning the callable to time
+        :param max_bars: Largest data size the benchmark runs at (None for all)
+        :param description: What is timed
+        """
+        self.name = name
+        self.setup = setup
+        self.max_bars = max_bars
+        self.description = description or (setup.__doc__ or "").strip()
+
+
+def benchmark(name, max_bars=None):
+    """
+    Register a benchmark setup function (see Benchmark).
+    """
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, max_bars)
+        return setup
+
+    return register
+
+
+class BenchmarkContext:
+    """
+    The synthetic data of one size, a scratch directory and a cache for setup work shared by
+    several benchmarks (e.g. the trained model).
+    """
+
+    def __init__(self, data, directory):
+        self.data = data
+        self.directory = directory
+        self.prices = market_data(data)
+        self._shared = {}
+
+    @property
+    def bars(self):
+        return len(self.data)
+
+    def shared(self, key, factory):
+        if key not in self._shared:
+            self._shared[key] = factory()
+        return self._shared[key]
+
+
+# Indicators
+@benchmark("rsi")
+def rsi(context):
+    """RSI.calculate (latest value)"""
+    from indicators.rsi import RSI
+    closes = context.prices["closes"]
+    return lambda: RSI.calculate(closes, 14)
+
+
+@benchmark("ema")
+def ema(context):
+    """EMA.calculate (latest value)"""
+    from indicators.ema import EMA
+    closes = context.prices["closes"]
+    return lambda: EMA.calculate(closes, 14)
+
+
+@benchmark("atr")
+def atr(context):
+    """ATR.calculate (latest value)"""
+    from indicators.atr import ATR
+    prices = context.prices
+    return lambda: ATR.calculate(prices["highs"], prices["lows"], prices["closes"], 14)
+
+
+@benchmark("sar")
+def sar(context):
+    """SAR.calculate (latest value)"""
+    from indicators.sar import SAR
+    prices = context.prices
+    return lambda: SAR.calculate(prices["highs"], prices["lows"])
+
+
+@benchmark("indicator_series")
+def indicator_series(context):
+    """RSI, EMA, ATR and SAR series over every bar"""
+    from indicators.atr import ATR
+    from indicators.ema import EMA
+    from indicators.rsi import RSI
+    from indicators.sar import SAR
+    highs, lows, closes = context.prices["highs"], context.prices["lows"], context.prices["closes"]
+
+    def run():
+        RSI.calculate(closes, 14, series=True)
+        EMA.calculate(closes, 14, series=True)
+        ATR.calculate(highs, lows, closes, 14, series=True)
+        SAR.calculate(highs, lows, series=True)
+
+    return run
+
+
+# Strategies
+def _mean_reversion():
+    from strategies.mean_reversion import MeanReversionStrategy
+    return MeanReversionStrategy(symbol="BENCH", lot_size=0.1, stop_loss=50, take_profit=100)
+
+
+@benchmark("bollinger_bands")
+def bollinger_bands(context):
+    """MeanReversionStrategy.calculate_bollinger_bands"""
+    strategy = _mean_reversion()
+    closes = context.prices["closes"]
+    return lambda: strategy.calculate_bollinger_bands(closes)
+
+
+@benchmark("strategy_setup")
+def strategy_setup(context):
+    """MeanReversionStrategy.setup (BaseStrategy.setup plus Bollinger bands)"""
+    strategy = _mean_reversion()
+    prices = context.prices
+    return lambda: strategy.setup(prices)
+
+
+@benchmark("backtest_run")
+def backtest_run(context):
+    """Backtest.run with MeanReversionStrategy on one timeframe (without plotting)"""
+    from backtest import Backtest
+    backtest = Backtest(symbol="BENCH", timeframes=["1m"])
+    backtest.display_performance = lambda: None
+    strategy = _mean_reversion()
+    data_dict = {"1m": context.data}
+    return lambda: backtest.run(strategy, data_dict, base_timeframe="1m")
+
+
+# Model inference
+def _trained_model(context):
+    """
+    A random forest with the default settings, trained on the first TRAINING_BARS bars.
+
+    :return: (MLModel, DataFrame of the features of every bar)
+    """
+    from indicators.features import compute_features
+    from models.ml_model import MLModel
+    from models.model_trainer import forward_return_labels
+
+    def train():
+        prices = context.prices
+        features = pd.DataFrame(compute_features(prices["highs"], prices["lows"], prices["closes"]))
+        features = features.bfill().fillna(0.0)
+        labels = forward_return_labels(prices["closes"])
+        rows = min(TRAINING_BARS, len(features)) - 1
+        model = MLModel(n_jobs=1).fit(features[:rows], labels[:rows].astype(str))
+        model.compile()
+        return model, features
+
+    return context.shared("model", train)
+
+
+@benchmark("ml_predict_single")
+def ml_predict_single(context):
+    """MLModel.predict on one DataFrame row"""
+    model, features = _trained_model(context)
+    row = features.iloc[[-1]]
+    return lambda: model.predict(row)
+
+
+@benchmark("ml_predict_one")
+def ml_predict_one(context):
+    """MLModel.predict_one on one feature vector (compiled forest)"""
+    model, features = _trained_model(context)
+    vector = features.iloc[-1].to_numpy()
+    return lambda: model.predict_one(vector)
+
+
+@benchmark("ml_predict_batch", max_bars=1_000_000)
+def ml_predict_batch(context):
+    """MLModel.predict on the features of every bar"""
+    model, features = _trained_model(context)
+    return lambda: model.predict(features)
+
+
+# Data loading
+@benchmark("store_read")
+def store_read(context):
+    """MarketDataStore.read of a whole dataset"""
+    from utils.market_data_store import MarketDataStore
+    store = MarketDataStore(os.path.join(context.directory, "store"))
+    store.write("BENCH", "1m", context.data)
+    return lambda: store.read("BENCH", "1m")
+
+
+@benchmark("csv_load", max_bars=1_000_000)
+def csv_load(context):
+    """Backtest.load_data of a prepared CSV file"""
+    from backtest import Backtest
+    context.data.to_csv(os.path.join(context.directory, "BENCH_1m.csv"), index=False)
+    backtest = Backtest(symbol="BENCH", timeframes=["1m"])
+    return lambda: backtest.load_data(context.directory)
+
+
+# Instrumentation (independent of the data size, so only run at the smallest one)
+@benchmark("metrics_span", max_bars=1_000)
+def metrics_span(context):
+    """An enabled LatencyMetrics span around an empty block"""
+    from live.latency import LatencyMetrics
+    metrics = LatencyMetrics(enabled=True)
+
+    def run():
+        with metrics.span("bench"):
+            pass
+
+    return run
+
+
+@benchmark("metrics_timed", max_bars=1_000)
+def metrics_timed(context):
+    """A call of an empty function decorated with an enabled LatencyMetrics.timed"""
+    from live.latency import LatencyMetrics
+    metrics = LatencyMetrics(enabled=True)
+    return metrics.timed("bench")(lambda: None)
+
+
+def time_callable(func, min_time=0.5, max_repeats=50):
+    """
+    Time a callable like timeit: calls are batched so one sample takes at least a millisecond,
+    and samples are taken until `min_time` seconds have passed (at least 3, unless a single call
+    already takes longer than `min_time`). The first call is a warm-up and never counts, so
+    one-off costs such as lazy imports do not depend on which benchmarks ran before.
+
+    :return: Dictionary with the median, min and mean seconds per call, the samples taken and the calls per sample
+    """
+    func()  # Warm-up (imports, caches, lazy compilation)
+    started = time.perf_counter()
+    func()
+    first = time.perf_counter() - started
+    if first >= min_time:
+        samples, number = [first], 1
+    else:
+        number = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            elapsed = time.perf_counter() - started
+            if elapsed >= 1e-3 or number >= 1_000_000:
+                break
+            number *= 10
+        samples = [elapsed / number]
+        total = elapsed
+        while len(samples) < max_repeats and (total < min_time or len(samples) < 3):
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            elapsed = time.perf_counter() - started
+            samples.append(elapsed / number)
+            total += elapsed
+
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "samples": len(samples),
+        "number": number,
+    }
+
+
+def environment():
+    """
+    Where the results were measured, to judge whether two result files are comparable.
+    """
+    import sklearn
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, names=None, min_time=0.5, max_repeats=50, seed=0, progress=print):
+    """
+    Run benchmarks at every data size.
+
+    :param sizes: Size labels (see SIZES) or numbers of bars
+    :param names: Benchmarks to run (default: all)
+    :param min_time: Seconds of samples per benchmark
+    :param max_repeats: Maximum number of samples per benchmark
+    :param seed: Seed of the synthetic data
+    :param progress: Function called with a line per finished benchmark (None for silence)
+    :return: Dictionary with the environment and one result per benchmark and size, keyed NAME@SIZE
+    """
+    names = list(BENCHMARKS) if names is None else list(names)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {unknown}")
+
+    results = {}
+    for size in sizes:
+        bars = SIZES[size] if size in SIZES else int(size)
+        label = size if size in SIZES else str(bars)
+        data = synthetic_ohlc(bars, seed=seed)
+        with tempfile.TemporaryDirectory() as directory:
+            context = BenchmarkContext(data, directory)
+            for name in names:
+                definition = BENCHMARKS[name]
+                if definition.max_bars is not None and bars > definition.max_bars:
+                    continue
+                timing = time_callable(definition.setup(context), min_time, max_repeats)
+                results[f"{name}@{label}"] = {"benchmark": name, "size": label, "bars": bars, **timing}
+                if progress is not None:
+                    progress(f"{name}@{label}: {format_seconds(timing['median'])} "
+                             f"(min {format_seconds(timing['min'])}, {timing['samples']} samples)")
+    return {"environment": environment(), "results": results}
+
+
+def save_results(results, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def load_results(path):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def compare(baseline, current, threshold=0.1, metric="median"):
+    """
+    Compare two result sets benchmark by benchmark.
+
+    :param baseline: Results of run_benchmarks (or load_results) to compare against
+    :param current: New results
+    :param threshold: Relative slowdown above which a benchmark is a regression (0.1 = 10% slower)
+    :param metric: Timing compared ('median', 'min' or 'mean')
+    :return: DataFrame with the baseline and current seconds, their ratio and a status per benchmark:
+             'regression', 'improvement' (faster by more than the threshold), 'ok', 'new' or 'missing'
+    """
+    before, after = baseline["results"], current["results"]
+    rows = []
+    for key in list(before) + [key for key in after if key not in before]:
+        old = before.get(key, {}).get(metric)
+        new = after.get(key, {}).get(metric)
+        if old is None or new is None:
+            rows.append({"benchmark": key, "baseline": old, "current": new, "ratio": None,
+                         "status": "new" if old is None else "missing"})
+            continue
+        ratio = new / old if old > 0 else float("inf")
+        status = "regression" if ratio > 1 + threshold else "improvement" if ratio < 1 / (1 + threshold) else "ok"
+        rows.append({"benchmark": key, "baseline": old, "current": new, "ratio": ratio, "status": status})
+    return pd.DataFrame(rows, columns=["benchmark", "baseline", "current", "ratio", "status"])
+
+
+def format_seconds(seconds):
+    if seconds is None or seconds != seconds:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
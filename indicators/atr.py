@@ -1,9 +1,25 @@
 import numpy as np
+from indicators.smoothing import wilder_series
 
 
 class ATR:
     @staticmethod
-    def calculate(highs, lows, closes, period=14):
+    def true_ranges(highs, lows, closes):
+        """
+        Calculate the True Range of every bar after the first.
+
+        :param highs: Numpy array of high prices
+        :param lows: Numpy array of low prices
+        :param closes: Numpy array of close prices
+        :return: Numpy array of true ranges (one shorter than the inputs)
+        """
+        high_low = highs[1:] - lows[1:]
+        high_close = np.abs(highs[1:] - closes[:-1])
+        low_close = np.abs(lows[1:] - closes[:-1])
+        return np.maximum(np.maximum(high_low, high_close), low_close)
+
+    @staticmethod
+    def calculate(highs, lows, closes, period=14, series=False):
         """
         Calculate the Average True Range (ATR).
 
@@ -11,7 +27,9 @@ class ATR:
         :param lows: List or numpy array of low prices
         :param closes: List or numpy array of close prices
         :param period: The period for calculating ATR (default: 14)
-        :return: ATR value
+        :param series: Return the ATR for every bar instead of only the last one (default: False)
+        :return: ATR value, or a numpy array where element i is the ATR of the first i + 1 bars
+                 (NaN while there is not enough data)
         """
         if len(highs) != len(lows) or len(lows) != len(closes):
             raise ValueError("Highs, Lows, and Closes must have the same length")
@@ -21,19 +39,17 @@ class ATR:
         highs, lows, closes = np.array(highs), np.array(lows), np.array(closes)
 
         # Compute True Range
-        true_ranges = []
-        for i in range(1, len(highs)):
-            high_low = highs[i] - lows[i]
-            high_close = abs(highs[i] - closes[i - 1])
-            low_close = abs(lows[i] - closes[i - 1])
-            true_range = max(high_low, high_close, low_close)
-            true_ranges.append(true_range)
+        true_ranges = ATR.true_ranges(highs, lows, closes)
+
+        if series:
+            return wilder_series(true_ranges, period)
 
         # Calculate ATR
-        true_ranges = np.array(true_ranges)
         atr = np.mean(true_ranges[:period])
 
-        for i in range(period, len(true_ranges)):
-            atr = (atr * (period - 1) + true_ranges[i]) / period
+        # Plain floats keep the arithmetic identical to numpy scalars without the per-element overhead
+        atr = float(atr)
+        for true_range in true_ranges[period:].tolist():
+            atr = (atr * (period - 1) + true_range) / period
 
-        return atr
+        return np.float64(atr)
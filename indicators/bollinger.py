@@ -0,0 +1,36 @@
+# indicators/bollinger.py
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class BollingerBands:
+    @staticmethod
+    def calculate(prices, period=20, std_dev=2, series=False):
+        """
+        Calculate Bollinger Bands.
+
+        :param prices: List or numpy array of closing prices
+        :param period: The period for the moving average (default: 20)
+        :param std_dev: Number of standard deviations for the bands (default: 2)
+        :param series: Return the bands for every bar instead of only the last one (default: False)
+        :return: (lower_band, upper_band), or a pair of numpy arrays where element i is the band
+                 of prices[:i + 1] (NaN while there is not enough data)
+        """
+        prices = np.array(prices)
+        if len(prices) < period:
+            raise ValueError("Not enough data to calculate Bollinger Bands")
+
+        if series:
+            windows = sliding_window_view(prices.astype(float), period)
+            sma = np.full(len(prices), np.nan)
+            std = np.full(len(prices), np.nan)
+            sma[period - 1:] = windows.mean(axis=1)
+            std[period - 1:] = windows.std(axis=1)
+            return sma - (std_dev * std), sma + (std_dev * std)
+
+        sma = np.mean(prices[-period:])
+        std = np.std(prices[-period:])
+        lower_band = sma - (std_dev * std)
+        upper_band = sma + (std_dev * std)
+
+        return lower_band, upper_band
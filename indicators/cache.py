@@ -0,0 +1,91 @@
+# indicators/cache.py
+from collections import OrderedDict
+import numpy as np
+from indicators.rsi import RSI
+from indicators.ema import EMA
+from indicators.atr import ATR
+from indicators.sar import SAR
+from indicators.bollinger import BollingerBands
+
+# Series calculations by indicator name; each takes the price arrays and the indicator parameters
+SERIES_CALCULATIONS = {
+    "rsi": lambda highs, lows, closes, period=14: RSI.calculate(closes, period, series=True),
+    "ema": lambda highs, lows, closes, period=14: EMA.calculate(closes, period, series=True),
+    "atr": lambda highs, lows, closes, period=14: ATR.calculate(highs, lows, closes, period, series=True),
+    "sar": lambda highs, lows, closes, af=0.02, max_af=0.2: SAR.calculate(highs, lows, af, max_af, series=True),
+    "bollinger": lambda highs, lows, closes, period=20, std_dev=2: BollingerBands.calculate(
+        closes, period, std_dev, series=True
+    ),
+}
+
+# Latest-value calculations, with the same parameters as SERIES_CALCULATIONS (what setup() needs on every bar)
+LATEST_CALCULATIONS = {
+    "rsi": lambda highs, lows, closes, period=14: RSI.calculate(closes, period),
+    "ema": lambda highs, lows, closes, period=14: EMA.calculate(closes, period),
+    "atr": lambda highs, lows, closes, period=14: ATR.calculate(highs, lows, closes, period),
+    "sar": lambda highs, lows, closes, af=0.02, max_af=0.2: SAR.calculate(highs, lows, af, max_af),
+    "bollinger": lambda highs, lows, closes, period=20, std_dev=2: BollingerBands.calculate(closes, period, std_dev),
+}
+
+
+class IndicatorCache:
+    """
+    Computes indicator series (or latest values) over one set of price arrays, each distinct
+    (indicator, parameters) pair only once.
+    """
+
+    def __init__(self, highs, lows, closes, max_entries=None):
+        """
+        :param highs: Numpy array of high prices
+        :param lows: Numpy array of low prices
+        :param closes: Numpy array of close prices
+        :param max_entries: Maximum number of cached series, least recently used first out (default: unlimited)
+        """
+        self.highs = np.asarray(highs, dtype=float)
+        self.lows = np.asarray(lows, dtype=float)
+        self.closes = np.asarray(closes, dtype=float)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.computed = 0  # Number of series actually calculated (cache misses)
+
+    @classmethod
+    def from_market_data(cls, market_data, max_entries=None):
+        """
+        :param market_data: A dictionary with price data (e.g., highs, lows, closes)
+        """
+        return cls(market_data["highs"], market_data["lows"], market_data["closes"], max_entries)
+
+    def series(self, name, **params):
+        """
+        Get the full series of an indicator.
+
+        :param name: Indicator name (see SERIES_CALCULATIONS)
+        :param params: Indicator parameters
+        :return: Numpy array (or tuple of arrays for Bollinger bands)
+        """
+        return self._get(SERIES_CALCULATIONS, (name, tuple(sorted(params.items()))), name, params)
+
+    def latest(self, name, **params):
+        """
+        Get the value of an indicator after the last bar.
+
+        :param name: Indicator name (see LATEST_CALCULATIONS)
+        :param params: Indicator parameters
+        :return: Indicator value (or (lower, upper) for Bollinger bands)
+        """
+        return self._get(LATEST_CALCULATIONS, (name, tuple(sorted(params.items())), "latest"), name, params)
+
+    def _get(self, calculations, key, name, params):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        if name not in calculations:
+            raise ValueError(f"Unknown indicator: {name}")
+        values = calculations[name](self.highs, self.lows, self.closes, **params)
+        self.computed += 1
+
+        self.entries[key] = values
+        if self.max_entries is not None and len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return values
@@ -1,24 +1,36 @@
 # indicators/ema.py
 import numpy as np
+from indicators.smoothing import exponential_smooth
 
 class EMA:
     @staticmethod
-    def calculate(prices, period):
+    def calculate(prices, period, series=False):
         """
         Calculate the Exponential Moving Average (EMA).
 
         :param prices: List or numpy array of prices
         :param period: The period for calculating EMA
-        :return: EMA value
+        :param series: Return the EMA for every bar instead of only the last one (default: False)
+        :return: EMA value, or a numpy array where element i is the EMA of prices[:i + 1]
+                 (NaN while there is not enough data)
         """
         prices = np.array(prices)
         if len(prices) < period:
             raise ValueError("Not enough data to calculate EMA")
 
         multiplier = 2 / (period + 1)
-        ema = prices[0]
 
-        for price in prices[1:]:
+        if series:
+            ema = np.empty(len(prices))
+            ema[0] = prices[0]
+            ema[1:] = exponential_smooth(prices[1:], multiplier, prices[0])
+            ema[:period - 1] = np.nan
+            return ema
+
+        # Plain floats keep the arithmetic identical to numpy scalars without the per-element overhead
+        ema = prices[0].item()
+
+        for price in prices[1:].tolist():
             ema = (price - ema) * multiplier + ema
 
-        return ema
+        return np.float64(ema)
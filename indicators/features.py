@@ -0,0 +1,197 @@
+# indicators/features.py
+import hashlib
+import inspect
+import json
+import numpy as np
+from indicators.cache import SERIES_CALCULATIONS, IndicatorCache
+from indicators.streaming import (StreamingRSI, StreamingEMA, StreamingATR, StreamingSAR,
+                                  StreamingBollingerBands)
+
+# Incremental counterparts of indicators.cache.SERIES_CALCULATIONS, taking the same parameters
+STREAM_CLASSES = {
+    "rsi": StreamingRSI,
+    "ema": StreamingEMA,
+    "atr": StreamingATR,
+    "sar": StreamingSAR,
+    "bollinger": StreamingBollingerBands,
+}
+
+# Default parameters of every indicator
+INDICATOR_DEFAULTS = {
+    name: {param.name: param.default for param in inspect.signature(calculation).parameters.values()
+           if param.default is not param.empty}
+    for name, calculation in SERIES_CALCULATIONS.items()
+}
+
+# Parts of a multi-valued indicator (Bollinger bands are a (lower, upper) pair)
+OUTPUTS = {
+    "lower": lambda value: value[0],
+    "upper": lambda value: value[1],
+    "mid": lambda value: (value[0] + value[1]) / 2,
+}
+
+# Model features: column name -> (indicator, parameters[, output]); the names match training_data.csv
+DEFAULT_FEATURES = {
+    "RSI": ("rsi", {"period": 14}),
+    "EMA": ("ema", {"period": 14}),
+    "ATR": ("atr", {"period": 14}),
+    "Bollinger_Mid": ("bollinger", {"period": 20, "std_dev": 2}, "mid"),
+    "Bollinger_Upper": ("bollinger", {"period": 20, "std_dev": 2}, "upper"),
+    "Bollinger_Lower": ("bollinger", {"period": 20, "std_dev": 2}, "lower"),
+}
+
+# Bump when a calculation changes without its definition changing, so cached matrices are rebuilt
+FEATURES_VERSION = 1
+
+
+def _parts(definition):
+    indicator, params = definition[0], definition[1]
+    return indicator, params, definition[2] if len(definition) > 2 else None
+
+
+def _stream_key(indicator, params):
+    return indicator + json.dumps(params, sort_keys=True)
+
+
+def features_hash(features=None, version=FEATURES_VERSION):
+    """
+    Fingerprint of a set of feature definitions.
+
+    :param features: Dictionary of feature definitions (default: DEFAULT_FEATURES)
+    :param version: Calculation version
+    :return: Hex digest that changes whenever a definition, the column order or the version changes
+    """
+    features = DEFAULT_FEATURES if features is None else features
+    payload = json.dumps({"version": version, "features": [[name, *features[name]] for name in features]},
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def compute_features(highs, lows, closes, features=None, cache=None):
+    """
+    Calculate every feature for every bar.
+
+    Element i of a column is the value after bar i (NaN while the indicator warms up), which is
+    what the streams of create_feature_streams() give after seeing the same bars.
+
+    :param highs: Numpy array of high prices
+    :param lows: Numpy array of low prices
+    :param closes: Numpy array of close prices
+    :param features: Dictionary of feature definitions (default: DEFAULT_FEATURES)
+    :param cache: Optional IndicatorCache over the same prices, shared with strategies
+    :return: Dictionary of float numpy arrays, in definition order
+    """
+    features = DEFAULT_FEATURES if features is None else features
+    cache = cache or IndicatorCache(highs, lows, closes)
+    columns = {}
+    for name, definition in features.items():
+        indicator, params, output = _parts(definition)
+        if len(cache.closes) == 0:
+            columns[name] = np.empty(0)
+            continue
+        try:
+            values = cache.series(indicator, **params)
+        except ValueError:
+            # Fewer bars than the indicator period: nothing is known yet
+            columns[name] = np.full(len(cache.closes), np.nan)
+            continue
+        columns[name] = np.asarray(OUTPUTS[output](values) if output else values, dtype=float)
+    return columns
+
+
+def create_feature_streams(features=None):
+    """
+    Create the incremental indicators behind a set of features, one per distinct indicator.
+
+    :param features: Dictionary of feature definitions (default: DEFAULT_FEATURES)
+    :return: Dictionary of StreamingIndicator objects
+    """
+    features = DEFAULT_FEATURES if features is None else features
+    streams = {}
+    for definition in features.values():
+        indicator, params, _ = _parts(definition)
+        key = _stream_key(indicator, params)
+        if key not in streams:
+            streams[key] = STREAM_CLASSES[indicator](**params)
+    return streams
+
+
+def feature_vector(streams, features=None):
+    """
+    Current feature values of streams that have seen every bar so far.
+
+    :param streams: Dictionary returned by create_feature_streams()
+    :param features: Dictionary of feature definitions (default: DEFAULT_FEATURES)
+    :return: List of floats in definition order (NaN while an indicator warms up)
+    """
+    features = DEFAULT_FEATURES if features is None else features
+    vector = []
+    for definition in features.values():
+        indicator, params, output = _parts(definition)
+        value = streams[_stream_key(indicator, params)].value
+        if value is None:
+            vector.append(float("nan"))
+        else:
+            vector.append(float(OUTPUTS[output](value) if output else value))
+    return vector
+
+
+def indicator_key(indicator, params):
+    """
+    Readable name of one parameterization of an indicator: the indicator name, followed by the
+    parameters that differ from its defaults (e.g. 'rsi' for RSI(14) and 'rsi(period=7)' for RSI(7)).
+    """
+    defaults = INDICATOR_DEFAULTS.get(indicator, {})
+    changed = [f"{name}={value}" for name, value in sorted(params.items()) if defaults.get(name, None) != value]
+    return f"{indicator}({', '.join(changed)})" if changed else indicator
+
+
+def create_indicator_streams(definitions):
+    """
+    Create one incremental indicator per distinct (indicator, parameters) of a set of definitions.
+
+    :param definitions: Dictionary of definitions (name -> (indicator, parameters[, output]))
+    :return: Dictionary of StreamingIndicator objects keyed by indicator_key()
+    """
+    streams = {}
+    for definition in definitions.values():
+        indicator, params, _ = _parts(definition)
+        key = indicator_key(indicator, params)
+        if key not in streams:
+            streams[key] = STREAM_CLASSES[indicator](**params)
+    return streams
+
+
+def latest_indicators(cache, definitions):
+    """
+    Values of a set of definitions after the last bar of an IndicatorCache's prices.
+
+    :param cache: IndicatorCache (shared by every strategy set up on the same prices)
+    :param definitions: Dictionary of definitions (name -> (indicator, parameters[, output]))
+    :return: Dictionary of values by definition name
+    :raises ValueError: If there are too few bars for an indicator
+    """
+    values = {}
+    for name, definition in definitions.items():
+        indicator, params, output = _parts(definition)
+        value = cache.latest(indicator, **params)
+        values[name] = OUTPUTS[output](value) if output else value
+    return values
+
+
+def stream_indicators(streams, definitions):
+    """
+    Current values of a set of definitions from streams that have seen every bar so far.
+
+    :param streams: Dictionary returned by create_indicator_streams()
+    :param definitions: Dictionary of definitions (name -> (indicator, parameters[, output]))
+    :return: Dictionary of values by definition name, or None while any indicator is warming up
+    """
+    values = {}
+    for name, definition in definitions.items():
+        indicator, params, output = _parts(definition)
+        value = streams[indicator_key(indicator, params)].value
+        if value is None:
+            return None
+        values[name] = OUTPUTS[output](value) if output else value
+    return values
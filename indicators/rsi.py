@@ -1,15 +1,18 @@
 # indicators/rsi.py
 import numpy as np
+from indicators.smoothing import wilder_series
 
 class RSI:
     @staticmethod
-    def calculate(prices, period=14):
+    def calculate(prices, period=14, series=False):
         """
         Calculate the Relative Strength Index (RSI).
 
         :param prices: List or numpy array of closing prices
         :param period: The period for calculating RSI (default: 14)
-        :return: RSI value
+        :param series: Return the RSI for every bar instead of only the last one (default: False)
+        :return: RSI value, or a numpy array where element i is the RSI of prices[:i + 1]
+                 (NaN while there is not enough data)
         """
         prices = np.array(prices)
         if len(prices) < period:
@@ -19,13 +22,22 @@ class RSI:
         gains = np.where(deltas > 0, deltas, 0)
         losses = np.where(deltas < 0, -deltas, 0)
 
+        if series:
+            avg_gains = wilder_series(gains, period)
+            avg_losses = wilder_series(losses, period)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rs = np.where(avg_losses != 0, avg_gains / avg_losses, np.inf)
+            return 100 - (100 / (1 + rs))
+
         avg_gain = np.mean(gains[:period])
         avg_loss = np.mean(losses[:period])
 
-        for i in range(period, len(prices) - 1):
-            avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-            avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+        # Plain floats keep the arithmetic identical to numpy scalars without the per-element overhead
+        avg_gain, avg_loss = float(avg_gain), float(avg_loss)
+        for gain, loss in zip(gains[period:].tolist(), losses[period:].tolist()):
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
 
         rs = avg_gain / avg_loss if avg_loss != 0 else float('inf')
         rsi = 100 - (100 / (1 + rs))
-        return rsi
+        return np.float64(rsi)
@@ -1,10 +1,13 @@
+import numpy as np
+
+
 class SAR:
     """
     Implements the Parabolic SAR indicator.
     """
 
     @staticmethod
-    def calculate(highs, lows, af=0.02, max_af=0.2):
+    def calculate(highs, lows, af=0.02, max_af=0.2, series=False):
         """
         Calculate Parabolic SAR.
 
@@ -12,11 +15,27 @@ class SAR:
         :param lows: List or numpy array of low prices
         :param af: Acceleration factor (default: 0.02)
         :param max_af: Maximum acceleration factor (default: 0.2)
-        :return: SAR value as a float
+        :param series: Return the SAR for every bar instead of only the last one (default: False)
+        :return: SAR value as a float, or a numpy array where element i is the SAR of the
+                 first i + 1 bars (NaN for the first bar)
         """
         if len(highs) < 2 or len(lows) < 2:
             raise ValueError("Not enough data to calculate SAR")
 
+        if series:
+            # SAR is path dependent, so the series is built in a single pass over plain floats
+            values = np.empty(len(highs))
+            values[0] = np.nan
+            SAR._run(np.asarray(highs).tolist(), np.asarray(lows).tolist(), af, max_af, values)
+            return values
+
+        return SAR._run(highs, lows, af, max_af)
+
+    @staticmethod
+    def _run(highs, lows, af, max_af, out=None):
+        """
+        Walk the SAR recursion over the bars, optionally recording every value in out.
+        """
         sar = lows[0] - af * (highs[0] - lows[0])
         trend_up = True  # Assuming the initial trend is upward
 
@@ -33,5 +52,7 @@ class SAR:
                     sar = lows[i]
                     af = min(af + 0.02, max_af)
                     trend_up = True
+            if out is not None:
+                out[i] = sar
 
         return sar
@@ -0,0 +1,64 @@
+# indicators/smoothing.py
+import numpy as np
+from utils.lazy import lazy_import
+
+# scipy.signal takes longer to import than pandas, so it is loaded by the first smoothing call
+signal = lazy_import("scipy.signal")
+
+
+def exponential_smooth(values, alpha, seed):
+    """
+    Run the recursion y[k] = alpha * x[k] + (1 - alpha) * y[k - 1] over a whole array.
+
+    :param values: Numpy array of input values
+    :param alpha: Smoothing factor
+    :param seed: Value of y[-1] the recursion starts from
+    :return: Numpy array of smoothed values (same length as values)
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return values.copy()
+
+    decay = 1.0 - alpha
+    smoothed, _ = signal.lfilter([alpha], [1.0, -decay], values, zi=[decay * seed])
+    return smoothed
+
+
+def wilder_smooth(values, period, seed):
+    """
+    Run Wilder's smoothing y[k] = (y[k - 1] * (period - 1) + x[k]) / period over a whole array.
+
+    :param values: Numpy array of input values
+    :param period: Smoothing period
+    :param seed: Value of y[-1] the recursion starts from
+    :return: Numpy array of smoothed values (same length as values)
+    """
+    return exponential_smooth(values, 1.0 / period, seed)
+
+
+def wilder_series(values, period):
+    """
+    Wilder-smoothed series of per-bar values (gains, losses or true ranges) laid out the
+    way the scalar RSI and ATR calculations consume them.
+
+    Element i of the result is the smoothed value available once values[:i] have been
+    seen, i.e. after bar i of the underlying price series. Elements before period - 1
+    are NaN, element period - 1 is the mean of the first period - 1 values and element
+    period is the mean of the first period values; Wilder's recursion takes over after that.
+
+    :param values: Numpy array of per-bar values (one shorter than the price series)
+    :param period: Smoothing period
+    :return: Numpy array of length len(values) + 1
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(len(values) + 1, np.nan)
+    if len(values) < period - 1:
+        return result
+
+    if period > 1:
+        result[period - 1] = np.mean(values[:period - 1])
+    if len(values) >= period:
+        seed = np.mean(values[:period])
+        result[period] = seed
+        result[period + 1:] = wilder_smooth(values[period:], period, seed)
+    return result
@@ -0,0 +1,377 @@
+# indicators/streaming.py
+import numpy as np
+from collections import deque
+from indicators.smoothing import exponential_smooth, wilder_smooth
+from indicators.atr import ATR
+
+
+class StreamingIndicator:
+    """
+    Base class for indicators that are updated one bar at a time.
+
+    Each update costs O(1) and, once enough bars have been seen, `value` equals what the
+    matching `calculate` function returns for all bars seen so far. `value` is None
+    until then.
+    """
+
+    # Names of the attributes that make up the indicator state
+    state_fields = ()
+
+    def __init__(self):
+        self.value = None
+
+    def update(self, high, low, close):
+        """
+        Feed one closed bar into the indicator.
+
+        :param high: High price of the bar
+        :param low: Low price of the bar
+        :param close: Close price of the bar
+        :return: The new indicator value (None while warming up)
+        """
+        raise NotImplementedError
+
+    def warm_up(self, highs, lows, closes):
+        """
+        Feed a history of bars into the indicator.
+
+        :param highs: List or numpy array of high prices
+        :param lows: List or numpy array of low prices
+        :param closes: List or numpy array of close prices
+        :return: The indicator value after the last bar
+        """
+        for high, low, close in zip(np.asarray(highs).tolist(), np.asarray(lows).tolist(),
+                                    np.asarray(closes).tolist()):
+            self.update(high, low, close)
+        return self.value
+
+    def snapshot(self):
+        """
+        Capture the indicator state as a JSON-serializable dictionary.
+
+        :return: Dictionary with the indicator type and its state
+        """
+        state = {"type": type(self).__name__, "value": self.value}
+        for field in self.state_fields:
+            value = getattr(self, field)
+            state[field] = list(value) if isinstance(value, deque) else value
+        return state
+
+    def restore(self, state):
+        """
+        Restore the indicator state from a snapshot.
+
+        :param state: Dictionary produced by snapshot()
+        :return: The indicator itself
+        """
+        if state.get("type") != type(self).__name__:
+            raise ValueError(f"Cannot restore {type(self).__name__} from a {state.get('type')} snapshot")
+
+        for field in self.state_fields:
+            current = getattr(self, field)
+            value = state[field]
+            if isinstance(current, deque):
+                value = deque(value, maxlen=current.maxlen)
+            setattr(self, field, value)
+        value = state["value"]
+        self.value = tuple(value) if isinstance(value, list) else value
+        return self
+
+
+class StreamingEMA(StreamingIndicator):
+    """
+    Incremental Exponential Moving Average of the close price.
+    """
+
+    state_fields = ("period", "count", "ema")
+
+    def __init__(self, period):
+        """
+        :param period: The period for calculating EMA
+        """
+        super().__init__()
+        self.period = period
+        self.count = 0
+        self.ema = None
+
+    def update(self, high, low, close):
+        if self.count == 0:
+            self.ema = float(close)
+        else:
+            self.ema = (float(close) - self.ema) * (2 / (self.period + 1)) + self.ema
+        self.count += 1
+        self.value = self.ema if self.count >= self.period else None
+        return self.value
+
+    def warm_up(self, highs, lows, closes):
+        closes = np.asarray(closes, dtype=float)
+        if len(closes) == 0:
+            return self.value
+        if self.count == 0:
+            self.ema = float(closes[0])
+            self.count = 1
+            closes = closes[1:]
+        if len(closes):
+            self.ema = float(exponential_smooth(closes, 2 / (self.period + 1), self.ema)[-1])
+            self.count += len(closes)
+        self.value = self.ema if self.count >= self.period else None
+        return self.value
+
+
+class StreamingWilderAverage(StreamingIndicator):
+    """
+    Shared bookkeeping for indicators that Wilder-smooth a per-bar quantity (RSI, ATR).
+
+    The first `period` quantities are averaged; every later one goes through Wilder's
+    recursion, exactly as in the batch calculations.
+    """
+
+    def __init__(self, period):
+        super().__init__()
+        self.period = period
+        self.count = 0  # Number of smoothed quantities seen so far
+        self.prev_close = None
+
+    def _push(self, averages, quantities):
+        """
+        Fold one quantity per smoothed average into the running state.
+        """
+        self.count += 1
+        if self.count <= self.period:
+            return [average + quantity for average, quantity in zip(averages, quantities)]
+        if self.count == self.period + 1:
+            averages = [total / self.period for total in averages]
+        return [(average * (self.period - 1) + quantity) / self.period
+                for average, quantity in zip(averages, quantities)]
+
+    def _averages(self, sums_or_averages):
+        """
+        Turn the running state into averages (the state holds sums while seeding).
+        """
+        if self.count <= self.period:
+            return [total / self.count for total in sums_or_averages]
+        return list(sums_or_averages)
+
+    def _warm_up_sums(self, averages, quantities):
+        """
+        Vectorized equivalent of calling _push for every row of quantities.
+        """
+        seeding = min(max(self.period - self.count, 0), len(quantities))
+        for row in quantities[:seeding].tolist():
+            averages = self._push(averages, row)
+        rest = quantities[seeding:]
+        if len(rest):
+            if self.count == self.period:
+                averages = [total / self.period for total in averages]
+            averages = [float(wilder_smooth(rest[:, column], self.period, average)[-1])
+                        for column, average in enumerate(averages)]
+            self.count += len(rest)
+        return averages
+
+
+class StreamingRSI(StreamingWilderAverage):
+    """
+    Incremental Relative Strength Index of the close price.
+    """
+
+    state_fields = ("period", "count", "prev_close", "avg_gain", "avg_loss")
+
+    def __init__(self, period=14):
+        """
+        :param period: The period for calculating RSI (default: 14)
+        """
+        super().__init__(period)
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def update(self, high, low, close):
+        close = float(close)
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            self.avg_gain, self.avg_loss = self._push(
+                [self.avg_gain, self.avg_loss], [max(delta, 0.0), max(-delta, 0.0)]
+            )
+        self.prev_close = close
+        self._refresh()
+        return self.value
+
+    def warm_up(self, highs, lows, closes):
+        closes = np.asarray(closes, dtype=float)
+        if len(closes) == 0:
+            return self.value
+        if self.prev_close is not None:
+            closes = np.concatenate(([self.prev_close], closes))
+        deltas = np.diff(closes)
+        quantities = np.column_stack((np.where(deltas > 0, deltas, 0), np.where(deltas < 0, -deltas, 0)))
+        self.avg_gain, self.avg_loss = self._warm_up_sums([self.avg_gain, self.avg_loss], quantities)
+        self.prev_close = float(closes[-1])
+        self._refresh()
+        return self.value
+
+    def _refresh(self):
+        if self.count < self.period - 1 or self.count == 0:
+            self.value = None
+            return
+        avg_gain, avg_loss = self._averages([self.avg_gain, self.avg_loss])
+        rs = avg_gain / avg_loss if avg_loss != 0 else float('inf')
+        self.value = 100 - (100 / (1 + rs))
+
+
+class StreamingATR(StreamingWilderAverage):
+    """
+    Incremental Average True Range.
+    """
+
+    state_fields = ("period", "count", "prev_close", "atr")
+
+    def __init__(self, period=14):
+        """
+        :param period: The period for calculating ATR (default: 14)
+        """
+        super().__init__(period)
+        self.atr = 0.0
+
+    def update(self, high, low, close):
+        high, low, close = float(high), float(low), float(close)
+        if self.prev_close is not None:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+            self.atr, = self._push([self.atr], [true_range])
+        self.prev_close = close
+        self._refresh()
+        return self.value
+
+    def warm_up(self, highs, lows, closes):
+        highs, lows, closes = (np.asarray(values, dtype=float) for values in (highs, lows, closes))
+        if len(closes) == 0:
+            return self.value
+        if self.prev_close is not None:
+            true_ranges = np.concatenate((
+                [max(highs[0] - lows[0], abs(highs[0] - self.prev_close), abs(lows[0] - self.prev_close))],
+                ATR.true_ranges(highs, lows, closes),
+            ))
+        else:
+            true_ranges = ATR.true_ranges(highs, lows, closes)
+        self.atr, = self._warm_up_sums([self.atr], true_ranges[:, None])
+        self.prev_close = float(closes[-1])
+        self._refresh()
+        return self.value
+
+    def _refresh(self):
+        if self.count < self.period - 1 or self.count == 0:
+            self.value = None
+            return
+        self.value, = self._averages([self.atr])
+
+
+class StreamingSAR(StreamingIndicator):
+    """
+    Incremental Parabolic SAR.
+    """
+
+    state_fields = ("initial_af", "max_af", "af", "sar", "trend_up", "prev_high", "prev_low", "count")
+
+    def __init__(self, af=0.02, max_af=0.2):
+        """
+        :param af: Acceleration factor (default: 0.02)
+        :param max_af: Maximum acceleration factor (default: 0.2)
+        """
+        super().__init__()
+        self.initial_af = af
+        self.max_af = max_af
+        self.af = af
+        self.sar = None
+        self.trend_up = True  # Assuming the initial trend is upward
+        self.prev_high = None
+        self.prev_low = None
+        self.count = 0
+
+    def update(self, high, low, close=None):
+        high, low = float(high), float(low)
+        if self.count == 0:
+            self.sar = low - self.af * (high - low)
+        elif self.trend_up:
+            self.sar = self.sar + self.af * (self.prev_high - self.sar)
+            if self.sar > low:
+                self.sar = high
+                self.af = min(self.af + 0.02, self.max_af)
+                self.trend_up = False
+        else:
+            self.sar = self.sar + self.af * (self.prev_low - self.sar)
+            if self.sar < high:
+                self.sar = low
+                self.af = min(self.af + 0.02, self.max_af)
+                self.trend_up = True
+        self.prev_high, self.prev_low = high, low
+        self.count += 1
+        self.value = self.sar if self.count >= 2 else None
+        return self.value
+
+
+class StreamingBollingerBands(StreamingIndicator):
+    """
+    Incremental Bollinger Bands of the close price.
+
+    Running sums are kept relative to an anchor price so the variance does not suffer
+    from cancellation when prices are large compared to their spread.
+    """
+
+    state_fields = ("period", "std_dev", "window", "anchor", "total", "total_sq", "since_anchor")
+
+    def __init__(self, period=20, std_dev=2):
+        """
+        :param period: The period for the moving average (default: 20)
+        :param std_dev: Number of standard deviations for the bands (default: 2)
+        """
+        super().__init__()
+        self.period = period
+        self.std_dev = std_dev
+        self.window = deque(maxlen=period)
+        self.anchor = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.since_anchor = 0
+
+    def update(self, high, low, close):
+        close = float(close)
+        if len(self.window) == self.period:
+            dropped = self.window[0] - self.anchor
+            self.total -= dropped
+            self.total_sq -= dropped * dropped
+        self.window.append(close)
+        self.since_anchor += 1
+        if self.anchor is None or self.since_anchor >= self.period:
+            # Once per window, re-anchor and recompute the sums exactly to stop rounding drift
+            self._reanchor()
+        else:
+            shifted = close - self.anchor
+            self.total += shifted
+            self.total_sq += shifted * shifted
+        self._refresh()
+        return self.value
+
+    def warm_up(self, highs, lows, closes):
+        closes = np.asarray(closes, dtype=float)
+        if len(closes) == 0:
+            return self.value
+        # Only the last `period` closes matter
+        self.window.extend(closes[-self.period:].tolist())
+        self._reanchor()
+        self._refresh()
+        return self.value
+
+    def _reanchor(self):
+        self.anchor = self.window[0]
+        shifted = np.asarray(self.window) - self.anchor
+        self.total = float(shifted.sum())
+        self.total_sq = float((shifted * shifted).sum())
+        self.since_anchor = 0
+
+    def _refresh(self):
+        if len(self.window) < self.period:
+            self.value = None
+            return
+        mean_shift = self.total / self.period
+        variance = max(self.total_sq / self.period - mean_shift * mean_shift, 0.0)
+        sma = self.anchor + mean_shift
+        std = variance ** 0.5
+        self.value = (sma - (self.std_dev * std), sma + (self.std_dev * std))
@@ -0,0 +1,82 @@
+import numpy as np
+from live.connection import MT5Connection
+from utils.lazy import lazy_import
+
+mt5 = lazy_import("MetaTrader5")
+
+
+class MT5BarFeed:
+    """
+    Hands out the closed bars of one symbol/timeframe as they appear, over an MT5Connection
+    that stays open between polls.
+
+    Every poll only asks for the last few closed bars and returns the ones newer than the last
+    bar handed out; if all of them are new (e.g. after a reconnect), it looks further back until
+    the gap is filled.
+    """
+
+    def __init__(self, symbol, timeframe=None, connection=None, poll_bars=3, max_backfill=10_000):
+        """
+        :param symbol: Trading symbol (e.g., "EURUSD")
+        :param timeframe: MT5 timeframe constant (default: M1)
+        :param connection: MT5Connection making the terminal calls (default: a private one)
+        :param poll_bars: Number of closed bars requested per poll
+        :param max_backfill: Maximum number of bars requested to fill a gap
+        """
+        self.symbol = symbol
+        self.timeframe = mt5.TIMEFRAME_M1 if timeframe is None else timeframe
+        self.connection = connection or MT5Connection()
+        self.poll_bars = poll_bars
+        self.max_backfill = max_backfill
+        self.last_time = None  # Open time (unix seconds) of the last bar handed out
+
+    def connect(self):
+        return self.connection.connect()
+
+    def disconnect(self):
+        self.connection.disconnect()
+
+    def reconnect(self, stop_event=None):
+        return self.connection.reconnect(stop_event)
+
+    def history(self, count):
+        """
+        Fetch the last closed bars and start polling after them.
+
+        :param count: Number of closed bars
+        :return: Structured numpy array of MT5 rates (time, open, high, low, close, ...)
+        """
+        rates = self._closed_rates(count)
+        if len(rates):
+            self.last_time = int(rates["time"][-1])
+        return rates
+
+    def poll(self):
+        """
+        Fetch the bars that closed since the last call.
+
+        :return: Structured numpy array of the new closed bars (possibly empty)
+        """
+        if self.last_time is None:
+            return self.history(self.poll_bars)
+
+        count = self.poll_bars
+        rates = self._closed_rates(count)
+        # All requested bars are new: look further back until the last known bar is included
+        while len(rates) == count and rates["time"][0] > self.last_time and count < self.max_backfill:
+            count = min(count * 4, self.max_backfill)
+            rates = self._closed_rates(count)
+
+        rates = rates[rates["time"] > self.last_time]
+        if len(rates):
+            self.last_time = int(rates["time"][-1])
+        return rates
+
+    def _closed_rates(self, count):
+        # Position 0 is the bar still forming, so closed bars start at position 1
+        rates = self.connection.call(mt5.copy_rates_from_pos, self.symbol, self.timeframe, 1, count)
+        if rates is None:
+            self.connection.connected = False
+            raise ConnectionError(f"Failed to fetch bars for {self.symbol}: {self.connection.call(mt5.last_error)}")
+        return np.asarray(rates)
+
@@ -0,0 +1,100 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from utils.lazy import lazy_import
+
+mt5 = lazy_import("MetaTrader5")
+
+
+class MT5Connection:
+    """
+    Owns the MetaTrader 5 session.
+
+    The terminal API is not thread-safe, so every call goes through call()/submit(): in threaded
+    mode they all run, in order, on one dedicated thread, and any number of threads can share
+    the connection. Without threading, calls run directly in the caller's thread.
+    """
+
+    def __init__(self, threaded=False, reconnect_delay=1.0, max_reconnect_delay=60.0):
+        """
+        :param threaded: Run the terminal calls on a dedicated owner thread
+        :param reconnect_delay: Initial delay between reconnection attempts in seconds (doubled after every failure)
+        :param max_reconnect_delay: Maximum delay between reconnection attempts in seconds
+        """
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = False
+        self.calls = 0
+        self._owner = None
+        self._executor = None
+        if threaded:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5",
+                                                initializer=self._register_owner)
+
+    def _register_owner(self):
+        self._owner = threading.current_thread()
+
+    def submit(self, function, *args):
+        """
+        Schedule a terminal call.
+
+        :param function: Function of the MetaTrader5 module (or any function making terminal calls)
+        :return: Future with the result
+        """
+        if self._executor is None or threading.current_thread() is self._owner:
+            future = Future()
+            try:
+                future.set_result(self._run(function, *args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._executor.submit(self._run, function, *args)
+
+    def call(self, function, *args):
+        """
+        Make a terminal call and wait for its result.
+        """
+        return self.submit(function, *args).result()
+
+    def _run(self, function, *args):
+        self.calls += 1
+        return function(*args)
+
+    def connect(self):
+        """
+        Open the MT5 session.
+
+        :return: True if the terminal is connected
+        """
+        self.connected = bool(self.call(mt5.initialize))
+        return self.connected
+
+    def disconnect(self):
+        if self.connected:
+            self.call(mt5.shutdown)
+        self.connected = False
+
+    def reconnect(self, stop_event=None):
+        """
+        Re-open the MT5 session, backing off between attempts.
+
+        :param stop_event: Optional threading.Event that aborts the attempts when set
+        :return: True once connected, False if stopped first
+        """
+        stop_event = stop_event or threading.Event()
+        delay = self.reconnect_delay
+        while not stop_event.is_set():
+            self.disconnect()
+            if self.connect():
+                return True
+            stop_event.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+        return False
+
+    def close(self):
+        """
+        Shut the session down and stop the owner thread.
+        """
+        self.disconnect()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,432 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DecisionLatencyLog:
+    """
+    Records how long every live decision took and exports the records as JSON lines.
+
+    A decision runs from the poll that found the new bar to the signal being handed to the
+    executor; its stages are the bar fetch, the indicator update + signal, and the execution.
+    """
+
+    def __init__(self, budget, path=None, max_records=10_000):
+        """
+        :param budget: Latency budget of a decision in seconds
+        :param path: Optional JSON lines file every record is appended to
+        :param max_records: Number of recent records kept in memory for summary()
+        """
+        self.budget = budget
+        self.path = path
+        self.records = deque(maxlen=max_records)
+        self.over_budget = 0
+        self.file = open(path, "a") if path else None
+
+    def record(self, symbol, bar_time, signal, fetch, compute, execute):
+        """
+        Record one decision.
+
+        :param symbol: Trading symbol
+        :param bar_time: Open time of the decided bar (unix seconds)
+        :param signal: The signal ('buy', 'sell' or 'hold')
+        :param fetch: Seconds spent fetching the bar
+        :param compute: Seconds spent updating indicators and generating the signal
+        :param execute: Seconds spent handing the signal to the executor
+        :return: The record dictionary
+        """
+        total = fetch + compute + execute
+        record = {
+            "timestamp": time.time(),
+            "symbol": symbol,
+            "bar_time": bar_time,
+            "signal": signal,
+            "fetch_ms": fetch * 1000,
+            "compute_ms": compute * 1000,
+            "execute_ms": execute * 1000,
+            "total_ms": total * 1000,
+            "over_budget": total > self.budget,
+        }
+        self.records.append(record)
+        self.over_budget += record["over_budget"]
+        if METRICS.enabled:
+            for stage, seconds in (("fetch", fetch), ("compute", compute), ("execute", execute), ("total", total)):
+                METRICS.histogram(f"decision_{stage}").record(int(seconds * 1e9))
+        if self.file is not None:
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+        return record
+
+    def summary(self):
+        """
+        Latency percentiles of the recorded decisions.
+
+        :return: Dictionary with count, p50_ms, p99_ms, max_ms and over_budget
+        """
+        totals = np.array([record["total_ms"] for record in self.records])
+        if len(totals) == 0:
+            return {"count": 0, "p50_ms": None, "p99_ms": None, "max_ms": None, "over_budget": 0}
+        return {
+            "count": len(totals),
+            "p50_ms": float(np.percentile(totals, 50)),
+            "p99_ms": float(np.percentile(totals, 99)),
+            "max_ms": float(totals.max()),
+            "over_budget": self.over_budget,
+        }
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+# Latency histograms: values are bucketed with 16 sub-buckets per power of two of nanoseconds,
+# so any percentile is within ~6% of the true value. Recording only stores the value, and every
+# BUFFER_SIZE values are bucketed together.
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKETS = 64 * SUB_BUCKETS
+BUFFER_SIZE = 1024
+
+# Quantiles exported to Prometheus and the log summary
+EXPORT_QUANTILES = (0.5, 0.9, 0.99)
+
+_perf_counter_ns = time.perf_counter_ns
+
+
+def bucket_index(nanoseconds):
+    """
+    Histogram bucket of a duration in nanoseconds.
+    """
+    bits = nanoseconds.bit_length()
+    if bits <= SUB_BUCKET_BITS + 1:
+        return nanoseconds
+    shift = bits - SUB_BUCKET_BITS - 1
+    return (shift << SUB_BUCKET_BITS) + (nanoseconds >> shift)
+
+
+def bucket_upper(index):
+    """
+    Largest duration in nanoseconds that falls into a bucket.
+    """
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    return ((SUB_BUCKETS | (index & (SUB_BUCKETS - 1))) + 1 << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram of durations in nanoseconds.
+
+    record() only stores the duration in a preallocated buffer; the buffer is bucketed with numpy
+    when it is full or the histogram is read (count, total, max, percentile(), ...). Recording from
+    several threads may occasionally race and lose or repeat a sample, which is acceptable for
+    monitoring.
+    """
+
+    __slots__ = ("name", "buffer", "pending", "counts", "_count", "_total", "_max")
+
+    def __init__(self, name):
+        self.name = name
+        self.buffer = [0] * BUFFER_SIZE
+        self.pending = 0
+        self.counts = np.zeros(BUCKETS, dtype=np.int64)
+        self._count = self._total = self._max = 0
+
+    def record(self, nanoseconds):
+        """
+        :param nanoseconds: Duration as an int (e.g. a difference of time.perf_counter_ns() values)
+        """
+        pending = self.pending
+        if pending >= BUFFER_SIZE:
+            self.drain()
+            pending = 0
+        self.buffer[pending] = nanoseconds
+        self.pending = pending + 1
+
+    def drain(self):
+        """
+        Bucket the buffered durations into the counts.
+        """
+        pending = self.pending
+        if not pending:
+            return
+        self.pending = 0
+        values = np.array(self.buffer[:pending], dtype=np.int64)
+        # Vectorized bucket_index(): frexp() returns the bit length of the values as the exponent
+        shift = np.maximum(np.frexp(values)[1] - SUB_BUCKET_BITS - 1, 0)
+        self.counts += np.bincount((shift << SUB_BUCKET_BITS) + (values >> shift), minlength=BUCKETS)
+        self._count += pending
+        self._total += int(values.sum())
+        self._max = max(self._max, int(values.max()))
+
+    @property
+    def count(self):
+        self.drain()
+        return self._count
+
+    @property
+    def total(self):
+        self.drain()
+        return self._total
+
+    @property
+    def max(self):
+        self.drain()
+        return self._max
+
+    def percentile(self, quantile):
+        """
+        :param quantile: Quantile between 0 and 1 (e.g. 0.99)
+        :return: Upper bound of the bucket holding the quantile, in nanoseconds (0 if empty)
+        """
+        count = self.count
+        if count == 0:
+            return 0
+        rank = max(int(quantile * count + 0.5), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(bucket_upper(index), self._max)
+
+    def summary(self):
+        """
+        :return: Dictionary with count, mean_us, p50_us, p90_us, p99_us and max_us
+        """
+        count = self.count
+        summary = {"count": count, "mean_us": self._total / count / 1000 if count else 0.0}
+        for quantile in EXPORT_QUANTILES:
+            summary[f"p{quantile * 100:g}_us"] = self.percentile(quantile) / 1000
+        summary["max_us"] = self._max / 1000
+        return summary
+
+    def reset(self):
+        self.pending = 0
+        self.counts = np.zeros(BUCKETS, dtype=np.int64)
+        self._count = self._total = self._max = 0
+
+
+class _Span:
+    """
+    Reusable context manager timing a block into a histogram.
+
+    Each thread keeps one per span name (see LatencyMetrics.span), so entering a span allocates
+    nothing; start is 0 while the span is not running.
+    """
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0
+
+    def __enter__(self):
+        self.start = _perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        nanoseconds = _perf_counter_ns() - self.start
+        self.start = 0
+        # Same as LatencyHistogram.record(), inlined to save a call on the hot path
+        histogram = self.histogram
+        pending = histogram.pending
+        if pending >= BUFFER_SIZE:
+            histogram.drain()
+            pending = 0
+        histogram.buffer[pending] = nanoseconds
+        histogram.pending = pending + 1
+        return False
+
+
+class _NoSpan:
+    """
+    Shared do-nothing span returned while instrumentation is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class LatencyMetrics:
+    """
+    Named latency histograms for the hot path (fetch, setup, signal, execution, ...).
+
+    Time a block with `with metrics.span("name"):` or a function with `@metrics.timed("name")`.
+    Spans check `enabled` when they run; while disabled a span is a shared no-op object.
+    timed() checks it when it decorates and returns the function unwrapped while disabled, so
+    enable metrics before importing the decorated modules (enable() warns about the functions
+    it missed).
+    """
+
+    def __init__(self, enabled=False, prefix="neuralagent"):
+        """
+        :param enabled: Record spans from the start
+        :param prefix: Prefix of the exported Prometheus metric names
+        """
+        self.enabled = enabled
+        self.prefix = prefix
+        self.histograms = {}
+        self._spans = threading.local()  # Reusable _Span objects of the current thread by name
+        self.untimed = []  # Names of the functions decorated while disabled (left unwrapped)
+        self._reporter = None
+        self._stop = threading.Event()
+
+    def enable(self):
+        self.enabled = True
+        if self.untimed:
+            logger.warning("Metrics enabled after %d functions were decorated; they stay untimed: %s",
+                           len(self.untimed), ", ".join(self.untimed))
+
+    def disable(self):
+        self.enabled = False
+
+    def histogram(self, name):
+        """
+        The histogram of a span name, created on first use.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, LatencyHistogram(name))
+        return histogram
+
+    def span(self, name):
+        """
+        Context manager timing a block into the histogram of `name`.
+        """
+        if not self.enabled:
+            return _NO_SPAN
+        spans = self._spans.__dict__
+        span = spans.get(name)
+        if span is None or span.start:
+            # First use in this thread, or a span nested in another of the same name
+            span = _Span(self.histogram(name))
+            spans.setdefault(name, span)
+        return span
+
+    def timed(self, name=None):
+        """
+        Decorator timing every call of a function (default name: its qualified name).
+
+        While metrics are disabled the function is returned unwrapped, so it costs nothing.
+        """
+        def decorate(func):
+            label = name or func.__qualname__
+            if not self.enabled:
+                self.untimed.append(label)
+                return func
+            histogram = self.histogram(label)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = _perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    nanoseconds = _perf_counter_ns() - start
+                    # Same as LatencyHistogram.record(), inlined to save a call on the hot path
+                    pending = histogram.pending
+                    if pending >= BUFFER_SIZE:
+                        histogram.drain()
+                        pending = 0
+                    histogram.buffer[pending] = nanoseconds
+                    histogram.pending = pending + 1
+
+            return wrapper
+
+        return decorate
+
+    def summary(self):
+        """
+        :return: Dictionary of histogram summaries by span name
+        """
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def format_summary(self):
+        """
+        One line per span with its count and p50/p99 latency, for logs.
+        """
+        lines = []
+        for name, summary in self.summary().items():
+            if summary["count"]:
+                lines.append(f"{name}: n={summary['count']} p50={summary['p50_us']:.1f}us "
+                             f"p99={summary['p99_us']:.1f}us max={summary['max_us']:.1f}us")
+        return "\n".join(lines)
+
+    def prometheus(self):
+        """
+        Export every histogram in the Prometheus text format, as a summary in seconds.
+        """
+        metric = f"{self.prefix}_span_seconds"
+        lines = [f"# HELP {metric} Latency of instrumented spans", f"# TYPE {metric} summary"]
+        for name, histogram in sorted(self.histograms.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for quantile in EXPORT_QUANTILES:
+                lines.append(f'{metric}{{span="{label}",quantile="{quantile:g}"}} '
+                             f'{histogram.percentile(quantile) / 1e9:.9g}')
+            lines.append(f'{metric}_sum{{span="{label}"}} {histogram.total / 1e9:.9g}')
+            lines.append(f'{metric}_count{{span="{label}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Write the Prometheus export to a file (e.g. for the node exporter's textfile collector).
+        """
+        staging = f"{path}.tmp"
+        with open(staging, "w") as file:
+            file.write(self.prometheus())
+        os.replace(staging, path)
+
+    def start_reporter(self, logger, interval=60.0, prometheus_path=None):
+        """
+        Log the summary (and optionally rewrite the Prometheus file) every `interval` seconds.
+        """
+        if self._reporter is not None:
+            return
+        self._stop.clear()
+
+        def report():
+            while not self._stop.wait(interval):
+                self.report(logger, prometheus_path)
+
+        self._reporter = threading.Thread(target=report, name="latency-reporter", daemon=True)
+        self._reporter.start()
+
+    def stop_reporter(self):
+        self._stop.set()
+        if self._reporter is not None:
+            self._reporter.join()
+            self._reporter = None
+
+    def report(self, logger, prometheus_path=None):
+        """
+        Log the summary once (and optionally write the Prometheus file).
+        """
+        summary = self.format_summary()
+        if summary:
+            logger.info(f"Latency summary:\n{summary}")
+        if prometheus_path:
+            self.write_prometheus(prometheus_path)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+
+# Process-wide metrics shared by the bot, strategies and indicators
+METRICS = LatencyMetrics(enabled=os.environ.get("NEURALAGENT_METRICS", "") not in ("", "0"))
+span = METRICS.span
+timed = METRICS.timed
@@ -0,0 +1,146 @@
+import logging
+import signal
+import threading
+import time
+from live.latency import DecisionLatencyLog
+
+
+class LiveTradingLoop:
+    """
+    Long-running decision loop for one symbol.
+
+    The MT5 session stays open for the life of the loop. After a one-off warm-up on recent
+    history, every poll only fetches the bars that closed since the previous one and feeds them
+    into the strategy's incremental indicators, so a decision costs O(1) in the history length.
+    The delay between a bar closing and its decision is at most the poll interval plus the
+    recorded decision latency.
+    """
+
+    def __init__(self, feed, strategy, execute, poll_interval=0.5, history_bars=500, latency_log=None, logger=None,
+                 before_disconnect=None):
+        """
+        :param feed: MT5BarFeed of the traded symbol/timeframe
+        :param strategy: Strategy derived from BaseStrategy (or anything with create_streams, setup_from_streams
+                         and generate_signal, e.g. MultiTimeframeStrategy)
+        :param execute: Callable (signal, bar) receiving every decision
+        :param poll_interval: Seconds between polls for new bars
+        :param history_bars: Number of closed bars used to warm up the indicators
+        :param latency_log: DecisionLatencyLog receiving every decision (default: 1 second budget, not exported)
+        :param logger: Logger (default: the module logger)
+        :param before_disconnect: Optional callable run when the loop ends, before MT5 is disconnected
+                                  (e.g. to flush the order queue)
+        """
+        self.feed = feed
+        self.strategy = strategy
+        self.execute = execute
+        self.poll_interval = poll_interval
+        self.history_bars = history_bars
+        self.latency_log = latency_log or DecisionLatencyLog(budget=1.0)
+        self.logger = logger or logging.getLogger(__name__)
+        self.before_disconnect = before_disconnect
+        self.streams = strategy.create_streams()
+        self.stop_event = threading.Event()
+
+    def start(self):
+        """
+        Connect (unless the session is already open) and warm up the indicators on recent history.
+        """
+        if not self.feed.connection.connected and not self.feed.connect():
+            raise ConnectionError("MetaTrader5 initialization failed")
+        rates = self.feed.history(self.history_bars)
+        for stream in self.streams.values():
+            stream.warm_up(rates["high"], rates["low"], rates["close"])
+        self.logger.info(f"Live loop warmed up on {len(rates)} bars of {self.feed.symbol}")
+
+    def step(self):
+        """
+        Poll once and decide on the newest closed bar, if there is one.
+
+        :return: The signal, or None if no bar closed since the last poll
+        """
+        started = time.perf_counter()
+        bars = self.feed.poll()
+        fetched = time.perf_counter()
+        if len(bars) == 0:
+            return None
+
+        # Bars missed since the last poll only move the indicators; only the newest bar is traded
+        highs, lows, closes = bars["high"].tolist(), bars["low"].tolist(), bars["close"].tolist()
+        for high, low, close in zip(highs, lows, closes):
+            for stream in self.streams.values():
+                stream.update(high, low, close)
+        signal_name = "hold"
+        if self.strategy.setup_from_streams(self.streams, closes[-1]):
+            signal_name = self.strategy.generate_signal()
+        computed = time.perf_counter()
+
+        try:
+            self.execute(signal_name, bars[-1])
+        except Exception as e:
+            self.logger.error(f"Error executing {signal_name} for {self.feed.symbol}: {e}")
+        executed = time.perf_counter()
+
+        record = self.latency_log.record(self.feed.symbol, int(bars["time"][-1]), signal_name,
+                                         fetched - started, computed - fetched, executed - computed)
+        if record["over_budget"]:
+            self.logger.warning(f"Decision for {self.feed.symbol} took {record['total_ms']:.1f} ms "
+                                f"(budget {self.latency_log.budget * 1000:.1f} ms)")
+        return signal_name
+
+    def run(self, max_iterations=None):
+        """
+        Poll until stop() is called (or max_iterations polls), reconnecting when the terminal drops.
+
+        Starting up retries like polling does, and the session and before_disconnect are torn
+        down however the loop ends, including a failed start.
+
+        :param max_iterations: Optional number of polls after which the loop ends
+        """
+        iterations = 0
+        try:
+            if not self._start_with_retries():
+                return
+            while not self.stop_event.is_set():
+                try:
+                    self.step()
+                except ConnectionError as e:
+                    self.logger.warning(f"{e}; reconnecting...")
+                    if not self.feed.reconnect(self.stop_event):
+                        break
+                    self.logger.info("MetaTrader5 reconnected")
+                iterations += 1
+                if max_iterations is not None and iterations >= max_iterations:
+                    break
+                self.stop_event.wait(self.poll_interval)
+        finally:
+            if self.before_disconnect is not None:
+                self.before_disconnect()
+            self.feed.connection.close()
+            self.latency_log.close()
+            self.logger.info(f"Live loop stopped. Decision latency: {self.latency_log.summary()}")
+
+    def _start_with_retries(self):
+        """
+        :return: True once started, False if stop() was called first
+        """
+        while True:
+            try:
+                self.start()
+                return True
+            except ConnectionError as e:
+                self.logger.warning(f"{e}; reconnecting...")
+                if not self.feed.reconnect(self.stop_event):
+                    return False
+
+    def stop(self):
+        """
+        Ask the loop to finish after the current poll (safe to call from any thread or signal handler).
+        """
+        self.stop_event.set()
+
+    def install_signal_handlers(self):
+        """
+        Stop the loop cleanly on SIGINT/SIGTERM (only possible from the main thread).
+        """
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signal_number, lambda number, frame: self.stop())
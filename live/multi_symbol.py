@@ -0,0 +1,274 @@
+import logging
+import pickle
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from live.bar_feed import MT5BarFeed
+from live.connection import MT5Connection
+from live.latency import DecisionLatencyLog
+
+# Strategy state of the symbols assigned to a worker process (see _worker_add_symbol)
+_worker_symbols = {}
+
+
+def _add_symbol(symbols, symbol, strategy, highs, lows, closes):
+    """
+    Register a symbol's strategy and warm its incremental indicators up on history.
+
+    :return: Serialized size in bytes of the symbol's strategy state
+    """
+    streams = strategy.create_streams()
+    for stream in streams.values():
+        stream.warm_up(highs, lows, closes)
+    symbols[symbol] = (strategy, streams)
+    return len(pickle.dumps((strategy, streams)))
+
+
+def _decide(symbols, symbol, highs, lows, closes):
+    """
+    Feed new closed bars into a symbol's indicators and generate the signal of the newest one.
+
+    :return: (signal, seconds spent)
+    """
+    started = time.perf_counter()
+    strategy, streams = symbols[symbol]
+    for high, low, close in zip(highs, lows, closes):
+        for stream in streams.values():
+            stream.update(high, low, close)
+    signal_name = strategy.generate_signal() if strategy.setup_from_streams(streams, closes[-1]) else "hold"
+    return signal_name, time.perf_counter() - started
+
+
+def _worker_add_symbol(*args):
+    return _add_symbol(_worker_symbols, *args)
+
+
+def _worker_decide(*args):
+    return _decide(_worker_symbols, *args)
+
+
+class _InProcessShard:
+    """
+    Runs the symbol work in the calling thread, with the same interface as a worker process.
+    """
+
+    def __init__(self):
+        self.symbols = {}
+
+    def add_symbol(self, *args):
+        return self._completed(_add_symbol, *args)
+
+    def decide(self, *args):
+        return self._completed(_decide, *args)
+
+    def _completed(self, function, *args):
+        future = Future()
+        future.set_result(function(self.symbols, *args))
+        return future
+
+    def shutdown(self):
+        self.symbols.clear()
+
+
+class _ProcessShard:
+    """
+    One worker process holding the strategy state of the symbols assigned to it.
+    """
+
+    def __init__(self):
+        self.executor = ProcessPoolExecutor(max_workers=1)
+
+    def add_symbol(self, *args):
+        return self.executor.submit(_worker_add_symbol, *args)
+
+    def decide(self, *args):
+        return self.executor.submit(_worker_decide, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class MultiSymbolLoop:
+    """
+    Trades many symbols from one process.
+
+    One MT5Connection owns the terminal and serializes every MT5 call. Each symbol's strategy
+    and incremental indicators live in one of `workers` worker processes, so indicator and
+    signal work for different symbols runs in parallel: while the connection fetches the next
+    symbol's bars, the workers are already deciding on the previous ones. A symbol only keeps
+    its O(period) indicator state, so adding one costs a few kilobytes (see state_bytes) and
+    one short fetch per cycle (see last_cycle).
+    """
+
+    def __init__(self, symbols, make_strategy, execute, timeframe=None, workers=1, poll_interval=0.5,
+                 history_bars=500, connection=None, latency_log=None, logger=None,
+                 before_disconnect=None):
+        """
+        :param symbols: List of trading symbols
+        :param make_strategy: Callable returning the strategy for a symbol (strategies must be picklable when workers > 1)
+        :param execute: Callable (symbol, signal, bar) receiving every decision, in the loop's thread
+        :param timeframe: MT5 timeframe constant (default: M1)
+        :param workers: Number of worker processes for the strategy work (1 runs in-process)
+        :param poll_interval: Seconds between polling cycles
+        :param history_bars: Number of closed bars used to warm up the indicators
+        :param connection: MT5Connection shared by all symbols (default: a threaded one)
+        :param latency_log: DecisionLatencyLog receiving every decision (default: 1 second budget, not exported)
+        :param logger: Logger (default: the module logger)
+        :param before_disconnect: Optional callable run when the loop ends, before MT5 is disconnected
+                                  (e.g. to flush the order queue)
+        """
+        self.connection = connection or MT5Connection(threaded=True)
+        self.feeds = {symbol: MT5BarFeed(symbol, timeframe, self.connection) for symbol in symbols}
+        self.make_strategy = make_strategy
+        self.execute = execute
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.history_bars = history_bars
+        self.latency_log = latency_log or DecisionLatencyLog(budget=1.0)
+        self.logger = logger or logging.getLogger(__name__)
+        self.before_disconnect = before_disconnect
+        self.shards = []
+        self.assignment = {}   # Shard index of every symbol
+        self.state_bytes = {}  # Serialized size of every symbol's strategy state
+        self.last_cycle = {}
+        self.stop_event = threading.Event()
+
+    def start(self):
+        """
+        Connect, start the workers and warm every symbol up on recent history.
+
+        Calling it again after a failure reuses the workers and the open session.
+        """
+        # Workers are started before the connection's owner thread exists
+        if not self.shards:
+            if self.workers == 1:
+                self.shards = [_InProcessShard()]
+            else:
+                self.shards = [_ProcessShard() for _ in range(self.workers)]
+        if not self.connection.connected and not self.connection.connect():
+            raise ConnectionError("MetaTrader5 initialization failed")
+
+        pending = {}
+        for position, (symbol, feed) in enumerate(self.feeds.items()):
+            rates = feed.history(self.history_bars)
+            self.assignment[symbol] = position % len(self.shards)
+            pending[symbol] = self.shards[self.assignment[symbol]].add_symbol(
+                symbol, self.make_strategy(symbol), rates["high"], rates["low"], rates["close"]
+            )
+        for symbol, future in pending.items():
+            self.state_bytes[symbol] = future.result()
+        self.logger.info(f"Multi-symbol loop warmed up {len(self.feeds)} symbols on {len(self.shards)} worker(s)")
+
+    def run_cycle(self):
+        """
+        Poll every symbol once and act on the symbols that have a new closed bar.
+
+        :return: Dictionary mapping symbols to their signal (only symbols with a new bar)
+        """
+        started = time.perf_counter()
+        pending = []
+        fetch_total = 0.0
+        error = None
+        for symbol, feed in self.feeds.items():
+            fetch_started = time.perf_counter()
+            try:
+                bars = feed.poll()
+            except ConnectionError as e:
+                # Still act on the symbols fetched so far, then let run() reconnect
+                error = e
+                break
+            fetch_time = time.perf_counter() - fetch_started
+            fetch_total += fetch_time
+            if len(bars):
+                future = self.shards[self.assignment[symbol]].decide(
+                    symbol, bars["high"].tolist(), bars["low"].tolist(), bars["close"].tolist()
+                )
+                pending.append((symbol, bars[-1], fetch_time, future))
+
+        signals = {}
+        for symbol, bar, fetch_time, future in pending:
+            signal_name, compute_time = future.result()
+            execute_started = time.perf_counter()
+            try:
+                self.execute(symbol, signal_name, bar)
+            except Exception as e:
+                self.logger.error(f"Error executing {signal_name} for {symbol}: {e}")
+            record = self.latency_log.record(symbol, int(bar["time"]), signal_name, fetch_time, compute_time,
+                                             time.perf_counter() - execute_started)
+            if record["over_budget"]:
+                self.logger.warning(f"Decision for {symbol} took {record['total_ms']:.1f} ms "
+                                    f"(budget {self.latency_log.budget * 1000:.1f} ms)")
+            signals[symbol] = signal_name
+
+        self.last_cycle = {
+            "symbols": len(self.feeds),
+            "decisions": len(signals),
+            "fetch_ms": fetch_total * 1000,
+            "cycle_ms": (time.perf_counter() - started) * 1000,
+        }
+        if error is not None:
+            raise error
+        return signals
+
+    def run(self, max_iterations=None):
+        """
+        Run polling cycles until stop() is called (or max_iterations cycles), reconnecting when the
+        terminal drops.
+
+        Starting up retries like polling does, and the workers, the session and before_disconnect
+        are torn down however the loop ends, including a failed start.
+
+        :param max_iterations: Optional number of cycles after which the loop ends
+        """
+        iterations = 0
+        try:
+            if not self._start_with_retries():
+                return
+            while not self.stop_event.is_set():
+                try:
+                    self.run_cycle()
+                except ConnectionError as e:
+                    self.logger.warning(f"{e}; reconnecting...")
+                    if not self.connection.reconnect(self.stop_event):
+                        break
+                    self.logger.info("MetaTrader5 reconnected")
+                iterations += 1
+                if max_iterations is not None and iterations >= max_iterations:
+                    break
+                self.stop_event.wait(self.poll_interval)
+        finally:
+            for shard in self.shards:
+                shard.shutdown()
+            self.shards = []
+            if self.before_disconnect is not None:
+                self.before_disconnect()
+            self.connection.close()
+            self.latency_log.close()
+            self.logger.info(f"Multi-symbol loop stopped. Decision latency: {self.latency_log.summary()}")
+
+    def _start_with_retries(self):
+        """
+        :return: True once started, False if stop() was called first
+        """
+        while True:
+            try:
+                self.start()
+                return True
+            except ConnectionError as e:
+                self.logger.warning(f"{e}; reconnecting...")
+                if not self.connection.reconnect(self.stop_event):
+                    return False
+
+    def stop(self):
+        """
+        Ask the loop to finish after the current cycle (safe to call from any thread or signal handler).
+        """
+        self.stop_event.set()
+
+    def install_signal_handlers(self):
+        """
+        Stop the loop cleanly on SIGINT/SIGTERM (only possible from the main thread).
+        """
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signal_number, lambda number, frame: self.stop())
@@ -1,13 +1,22 @@
-import MetaTrader5 as mt5
-import pandas as pd
-from utils.logger import Logger
+from utils.logger import Logger, configure_logging
 from utils.config_loader import ConfigLoader
 from utils.data_fetcher import DataFetcher
-from strategies.trend_following import TrendFollowingStrategy
-from strategies.mean_reversion import MeanReversionStrategy
+from strategies.registry import DEFAULT_STRATEGY, build_strategy
+from trade_management.brokers import BrokerError
 from trade_management.trade_executor import TradeExecutor
+from trade_management.mt5_broker import MT5Broker
+from trade_management.simulated_broker import SimulatedBroker
+from trade_management.portfolio_risk import PortfolioRisk, RiskCheckedExecutor
 from trade_management.risk_manager import RiskManager
 from trade_management.trailing_stop import TrailingStopManager
+from live.bar_feed import MT5BarFeed
+from live.connection import MT5Connection
+from live.latency import METRICS, DecisionLatencyLog, span
+from live.loop import LiveTradingLoop
+from live.multi_symbol import MultiSymbolLoop
+from utils.lazy import lazy_import
+
+mt5 = lazy_import("MetaTrader5")
 
 
 class NeuralAgentBot:
@@ -28,42 +37,62 @@ class NeuralAgentBot:
         if not self.config:
             self.logger.error("Failed to load configuration file")
             raise ValueError("Failed to load configuration file")
+        # Optional logging configuration, e.g. {"levels": {"live.loop": "DEBUG"}, "rate_limit": {"rate": 5}}
+        # (arguments of utils.logger.configure_logging)
+        if self.config.get("logging"):
+            configure_logging(force=True, **self.config["logging"])
 
         self.symbol = self.config["symbol"]
         self.account_balance = self.config["account_balance"]
         self.risk_per_trade = self.config["risk_per_trade"]
 
         # Initialize components
-        self.trade_executor = TradeExecutor(self.symbol)
+        # Orders are only printed unless the configuration asks for the MT5 broker, or for paper
+        # trading, where a SimulatedBroker fills them on the live bars
+        if self.config.get("broker") == "paper":
+            self.trade_executor = SimulatedBroker(
+                initial_balance=self.account_balance,
+                spread=self.config.get("paper_spread", 1.0),
+                slippage=self.config.get("paper_slippage", 0.0),
+                commission=self.config.get("paper_commission", 0.0),
+                symbol=self.symbol
+            )
+        else:
+            broker = MT5Broker() if self.config.get("broker") == "mt5" else None
+            self.trade_executor = TradeExecutor(self.symbol, broker=broker)
         self.risk_manager = RiskManager(self.account_balance, self.risk_per_trade)
+        # Strategies send their orders through the portfolio limits (optional "risk_limits" configuration,
+        # e.g. {"max_open_positions": 10, "max_drawdown": 0.2})
+        self.portfolio_risk = PortfolioRisk(self.account_balance, **self.config.get("risk_limits", {}))
+        self.order_gateway = RiskCheckedExecutor(self.trade_executor, self.portfolio_risk)
         self.trailing_stop_manager = TrailingStopManager(atr_multiplier=1.5)
 
+        # Optional latency histograms of every phase, e.g. {"enabled": true, "summary_interval": 60,
+        # "prometheus_file": "metrics.prom"}; NEURALAGENT_METRICS=1 in the environment also enables them.
+        # Enabled before the strategy is imported, so that its @timed functions are wrapped
+        self.metrics_config = self.config.get("metrics", {})
+        if self.metrics_config.get("enabled"):
+            METRICS.enable()
+
         # Select a strategy
-        strategy_type = self.config.get("strategy_type", "trend_following")
-        self.logger.info(f"Selected strategy type: {strategy_type}")
-        if strategy_type == "trend_following":
-            self.strategy = TrendFollowingStrategy(
-                symbol=self.symbol,
-                lot_size=0.1,  # Placeholder; calculated dynamically later
-                stop_loss=self.config["stop_loss"],
-                take_profit=self.config["take_profit"],
-                rsi_threshold=self.config["rsi_threshold"],
-                ema_period=self.config["ema_period"]
-            )
-        elif strategy_type == "mean_reversion":
-            self.strategy = MeanReversionStrategy(
-                symbol=self.symbol,
-                lot_size=0.1,  # Placeholder; calculated dynamically later
-                stop_loss=self.config["stop_loss"],
-                take_profit=self.config["take_profit"],
-                rsi_threshold=self.config["rsi_threshold"],
-                ema_period=self.config["ema_period"],
-                bollinger_period=self.config["bollinger_period"],
-                bollinger_std_dev=self.config["bollinger_std_dev"]
-            )
-        else:
-            self.logger.error(f"Unsupported strategy type: {strategy_type}")
-            raise ValueError(f"Unsupported strategy type: {strategy_type}")
+        self.strategy_type = self.config.get("strategy_type", DEFAULT_STRATEGY)
+        self.logger.info(f"Selected strategy type: {self.strategy_type}")
+        self.strategy = self.create_strategy(self.symbol)
+
+
+    def create_strategy(self, symbol):
+        """
+        Create the configured strategy for a symbol.
+
+        :param symbol: The trading symbol (e.g., "EURUSD")
+        :return: Strategy instance
+        """
+        try:
+            # Lot size is a placeholder; calculated dynamically later
+            return build_strategy(self.config, symbol, lot_size=0.1)
+        except (ValueError, ImportError) as e:
+            self.logger.error(str(e))
+            raise
 
     def connect_to_mt5(self):
         """
@@ -102,6 +131,7 @@ class NeuralAgentBot:
         :param num_candles: Number of historical candles to fetch
         """
         self.logger.info("Starting NeuralAgentBot...")
+        self.start_metrics()
 
         # Connect to MetaTrader 5
         if not self.connect_to_mt5():
@@ -116,7 +146,11 @@ class NeuralAgentBot:
             return
 
         # Setup strategy with market data
-        self.strategy.setup(market_data)
+        with span("setup"):
+            self.strategy.setup(market_data)
+        if isinstance(self.trade_executor, SimulatedBroker):
+            self.trade_executor.update_price(self.symbol, market_data["closes"][-1])
+        self.portfolio_risk.on_price(self.symbol, market_data["closes"][-1])
 
         # Log indicator values (for debugging)
         self.logger.info(f"Indicator Values: {self.strategy.indicators}")
@@ -130,18 +164,208 @@ class NeuralAgentBot:
         self.logger.info(f"Calculated Lot Size: {lot_size}")
 
         # Generate a trading signal
-        signal = self.strategy.generate_signal()
+        with span("generate_signal"):
+            signal = self.strategy.generate_signal()
         self.logger.info(f"Generated Signal: {signal}")
 
         # Execute trade based on the signal
-        self.strategy.execute_trade(signal, self.trade_executor)
+        with span("execute_trade"):
+            self.strategy.execute_trade(signal, self.order_gateway)
 
-        # Disconnect from MetaTrader 5
+        # Wait for the order to reach the broker, then disconnect from MetaTrader 5
+        self.trade_executor.shutdown(timeout=30)
         mt5.shutdown()
+        self.stop_metrics()
+        self.logger.info("NeuralAgentBot finished.")
+
+    def start_metrics(self):
+        """
+        Start the periodic latency summary (log and Prometheus file) if metrics are enabled.
+        """
+        if METRICS.enabled:
+            METRICS.start_reporter(self.logger, interval=self.metrics_config.get("summary_interval", 60),
+                                   prometheus_path=self.metrics_config.get("prometheus_file"))
+
+    def stop_metrics(self):
+        """
+        Stop the periodic summary and report the final latencies.
+        """
+        if METRICS.enabled:
+            METRICS.stop_reporter()
+            METRICS.report(self.logger, self.metrics_config.get("prometheus_file"))
+
+    def run_live(self, num_candles=500, max_iterations=None):
+        """
+        Trade continuously: keep MT5 connected and decide on every new closed bar.
+
+        Optional configuration keys: poll_interval (seconds between polls, default 0.5),
+        latency_budget_ms (default 100) and latency_log (JSON lines file for per-decision latency).
+
+        :param num_candles: Number of historical candles used to warm up the indicators
+        :param max_iterations: Optional number of polls after which the bot stops
+        """
+        self.logger.info("Starting NeuralAgentBot in live mode...")
+
+        # Position size does not depend on the bar, so it is calculated once
+        self.strategy.lot_size = self.risk_manager.calculate_lot_size(
+            stop_loss_pips=self.strategy.stop_loss,
+            pip_value=10  # Placeholder pip value
+        )
+        self.logger.info(f"Calculated Lot Size: {self.strategy.lot_size}")
+
+        latency_log = DecisionLatencyLog(
+            budget=self.config.get("latency_budget_ms", 100) / 1000,
+            path=self.config.get("latency_log")
+        )
+        connection = self.share_connection(MT5Connection(threaded=True))
+        self.live_loop = LiveTradingLoop(
+            MT5BarFeed(self.symbol, connection=connection),
+            self.strategy,
+            self.execute_signal,
+            poll_interval=self.config.get("poll_interval", 0.5),
+            history_bars=num_candles,
+            latency_log=latency_log,
+            logger=self.logger,
+            before_disconnect=lambda: self.trade_executor.shutdown(timeout=30)
+        )
+        self.live_loop.install_signal_handlers()
+        self.start_metrics()
+        try:
+            self.live_loop.run(max_iterations=max_iterations)
+        except ConnectionError as e:
+            self.logger.error(f"Failed to start live trading: {e}")
+        self.stop_metrics()
+        self.logger.info("NeuralAgentBot finished.")
+
+    def run_portfolio(self, num_candles=500, max_iterations=None):
+        """
+        Trade every symbol of the configuration's "symbols" list from this process.
+
+        Optional configuration keys: workers (worker processes for the strategy work, default 1),
+        poll_interval, latency_budget_ms and latency_log (see run_live).
+
+        :param num_candles: Number of historical candles used to warm up the indicators
+        :param max_iterations: Optional number of polling cycles after which the bot stops
+        """
+        symbols = self.config.get("symbols", [self.symbol])
+        self.logger.info(f"Starting NeuralAgentBot for {len(symbols)} symbols...")
+
+        lot_size = self.risk_manager.calculate_lot_size(
+            stop_loss_pips=self.config["stop_loss"],
+            pip_value=10  # Placeholder pip value
+        )
+        self.logger.info(f"Calculated Lot Size: {lot_size}")
+        self.portfolio_strategies = {}
+
+        def make_strategy(symbol):
+            strategy = self.create_strategy(symbol)
+            strategy.lot_size = lot_size
+            self.portfolio_strategies[symbol] = strategy
+            return strategy
+
+        latency_log = DecisionLatencyLog(
+            budget=self.config.get("latency_budget_ms", 100) / 1000,
+            path=self.config.get("latency_log")
+        )
+        self.live_loop = MultiSymbolLoop(
+            symbols,
+            make_strategy,
+            self.execute_portfolio_signal,
+            workers=self.config.get("workers", 1),
+            connection=self.share_connection(MT5Connection(threaded=True)),
+            poll_interval=self.config.get("poll_interval", 0.5),
+            history_bars=num_candles,
+            latency_log=latency_log,
+            logger=self.logger,
+            before_disconnect=lambda: self.trade_executor.shutdown(timeout=30)
+        )
+        self.live_loop.install_signal_handlers()
+        self.start_metrics()
+        try:
+            self.live_loop.run(max_iterations=max_iterations)
+        except ConnectionError as e:
+            self.logger.error(f"Failed to start live trading: {e}")
+        self.stop_metrics()
         self.logger.info("NeuralAgentBot finished.")
 
+    def share_connection(self, connection):
+        """
+        Route the broker's terminal calls through the given connection too, so a single thread
+        talks to MT5.
+
+        :return: The connection
+        """
+        if isinstance(getattr(self.trade_executor, "broker", None), MT5Broker):
+            self.trade_executor.broker.connection = connection
+        return connection
+
+    def execute_portfolio_signal(self, symbol, signal, bar):
+        """
+        Act on a live decision for one of the portfolio's symbols.
+        """
+        if signal != "hold":
+            self.logger.info(f"Generated Signal for {symbol}: {signal}")
+        self.paper_fill(symbol, bar)
+        self.sync_positions(symbol)
+        self.portfolio_risk.on_price(symbol, bar["close"])
+        self.portfolio_strategies[symbol].execute_trade(signal, self.order_gateway)
+
+    def execute_signal(self, signal, bar):
+        """
+        Act on a live decision.
+
+        :param signal: The signal ('buy', 'sell', or 'hold')
+        :param bar: The closed bar the signal was generated on
+        """
+        if signal != "hold":
+            self.logger.info(f"Generated Signal: {signal}")
+        self.paper_fill(self.symbol, bar)
+        self.sync_positions(self.symbol)
+        self.portfolio_risk.on_price(self.symbol, bar["close"])
+        self.strategy.execute_trade(signal, self.order_gateway)
+
+    def sync_positions(self, symbol):
+        """
+        When trading on MT5, remove the positions the broker closed itself (stop-loss, take-profit)
+        from the portfolio risk, so they stop counting towards its limits.
+        """
+        broker = getattr(self.trade_executor, "broker", None)
+        if not isinstance(broker, MT5Broker):
+            return
+        try:
+            closed = self.order_gateway.reconcile(symbol, broker.open_positions(symbol), broker.closed_position)
+        except BrokerError as e:
+            self.logger.warning(f"Could not reconcile the {symbol} positions with MT5: {e}")
+            return
+        if closed:
+            self.logger.info(f"{closed} position(s) of {symbol} closed by the broker")
+
+    def paper_fill(self, symbol, bar):
+        """
+        When paper trading, let the SimulatedBroker fill the stop-losses/take-profits reached by a
+        closed bar and move its price to the bar's close, before the bar's decision is executed.
+        """
+        if not isinstance(self.trade_executor, SimulatedBroker):
+            return
+        broker = self.trade_executor
+        first_trade = len(broker.trades)
+        closed = broker.on_bar(symbol, bar["open"], bar["high"], bar["low"], bar["close"], int(bar["time"]))
+        for ticket, exit_price, commission in zip(broker.trades["ticket"][first_trade:].tolist(),
+                                                  broker.trades["exit_price"][first_trade:].tolist(),
+                                                  broker.trades["commission"][first_trade:].tolist()):
+            self.order_gateway.position_closed(ticket, exit_price, costs=2 * commission)
+        if closed:
+            self.logger.info(f"Paper trading: {closed} position(s) of {symbol} closed, "
+                             f"equity {self.trade_executor.equity():.2f}")
+
 
 # Run the bot
 if __name__ == "__main__":
+    import sys
     bot = NeuralAgentBot(config_file="config.json")
-    bot.run(use_historical=True, num_candles=500)  # Fetch last 500 candles
+    if "--portfolio" in sys.argv:
+        bot.run_portfolio(num_candles=500)
+    elif "--live" in sys.argv:
+        bot.run_live(num_candles=500)
+    else:
+        bot.run(use_historical=True, num_candles=500)  # Fetch last 500 candles
@@ -0,0 +1,255 @@
+import os
+import numpy as np
+
+
+class CompiledForest:
+    """
+    A fitted sklearn tree ensemble (e.g. RandomForestClassifier) flattened into NumPy node arrays.
+
+    All trees share one set of node arrays; a leaf has left == right == -1. Inputs are compared
+    as float32, like sklearn does, so the outputs match the original model exactly. Scoring
+    needs neither pandas nor sklearn: predict_one walks the trees of a single feature vector
+    with plain Python lists, and predict walks many rows level by level on arrays. Arrays saved
+    with save_arrays can be memory-mapped, so processes serving the same model share them;
+    such forests walk single vectors on the shared arrays too, unless private lists are asked for.
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, values, roots, classes, feature_names=None,
+                 private_lists=True):
+        """
+        :param feature: Numpy array with the feature index tested by every node
+        :param threshold: Numpy array with the threshold of every node (go left if value <= threshold)
+        :param left: Numpy array with the left child of every node (-1 for leaves)
+        :param right: Numpy array with the right child of every node (-1 for leaves)
+        :param missing_left: Numpy boolean array, True where NaN values go to the left child
+        :param values: Numpy array (nodes x classes) with the class probabilities of every leaf
+        :param roots: Numpy array with the root node of every tree
+        :param classes: Numpy array of class labels
+        :param feature_names: Optional list of the feature names, in input order
+        :param private_lists: Walk single vectors on plain-list copies of the arrays (faster, but a private
+                              copy per process) rather than on the arrays themselves
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.values = values
+        self.roots = roots
+        self.classes = classes
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.private_lists = private_lists
+        self._nodes = None  # Lists for predict_one, built on first use (see node_lists)
+
+    @classmethod
+    def from_sklearn(cls, model, feature_names=None):
+        """
+        Flatten a fitted forest classifier.
+
+        :param model: Fitted RandomForestClassifier (or any classifier with estimators_ of decision trees)
+        :param feature_names: Feature names (default: the model's feature_names_in_, if any)
+        :return: CompiledForest
+        """
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+
+        def children(tree, offset, side):
+            nodes = getattr(tree, side).astype(np.int32)
+            return np.where(nodes >= 0, nodes + offset, -1)
+
+        values = np.concatenate([tree.value[:, 0, :] for tree in trees]).astype(np.float64)
+        totals = values.sum(axis=1, keepdims=True)
+        values = np.divide(values, totals, out=np.zeros_like(values), where=totals > 0)
+        missing_left = np.concatenate([
+            np.asarray(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)), dtype=bool) for tree in trees
+        ])
+        if feature_names is None and hasattr(model, "feature_names_in_"):
+            feature_names = model.feature_names_in_
+        return cls(
+            feature=np.concatenate([np.maximum(tree.feature, 0) for tree in trees]).astype(np.int32),
+            threshold=np.concatenate([tree.threshold for tree in trees]).astype(np.float64),
+            left=np.concatenate([children(tree, offset, "children_left") for tree, offset in zip(trees, offsets)]),
+            right=np.concatenate([children(tree, offset, "children_right") for tree, offset in zip(trees, offsets)]),
+            missing_left=missing_left,
+            values=values,
+            roots=offsets[:-1].astype(np.int32),
+            classes=np.asarray(model.classes_),
+            feature_names=feature_names,
+        )
+
+    def save(self, path):
+        """
+        Save the node arrays to a .npz file.
+        """
+        arrays = {"feature": self.feature, "threshold": self.threshold, "left": self.left, "right": self.right,
+                  "missing_left": self.missing_left, "values": self.values, "roots": self.roots,
+                  "classes": np.asarray(self.classes.tolist())}  # Object arrays (e.g. from pandas) need pickle
+        if self.feature_names is not None:
+            arrays["feature_names"] = np.asarray(self.feature_names)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load node arrays saved with save().
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            names = arrays["feature_names"].tolist() if "feature_names" in arrays.files else None
+            return cls(*(arrays[name] for name in ("feature", "threshold", "left", "right", "missing_left",
+                                                   "values", "roots", "classes")), feature_names=names)
+
+    # Names of the node arrays, in constructor order
+    ARRAYS = ("feature", "threshold", "left", "right", "missing_left", "values", "roots", "classes")
+
+    def save_arrays(self, directory):
+        """
+        Save the node arrays as one .npy file each, so load_arrays can memory-map them.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            values = getattr(self, name)
+            np.save(os.path.join(directory, f"{name}.npy"), values.astype(str) if values.dtype == object else values)
+        if self.feature_names is not None:
+            np.save(os.path.join(directory, "feature_names.npy"), np.asarray(self.feature_names, dtype=str))
+
+    @classmethod
+    def load_arrays(cls, directory, mmap_mode="r", private_lists=None):
+        """
+        Load node arrays saved with save_arrays().
+
+        :param mmap_mode: Memory-map mode of the node arrays (default: read-only, shared by every process
+                          that maps the same files); None reads them into memory
+        :param private_lists: See __init__ (default: only for arrays read into memory, so mapped arrays
+                              stay shared)
+        """
+        def load(name, mode=None):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode, allow_pickle=False)
+
+        arrays = [load(name, None if name == "classes" else mmap_mode) for name in cls.ARRAYS]
+        names_path = os.path.join(directory, "feature_names.npy")
+        names = load("feature_names").tolist() if os.path.exists(names_path) else None
+        private_lists = mmap_mode is None if private_lists is None else private_lists
+        return cls(*arrays, feature_names=names, private_lists=private_lists)
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    def leaves_one(self, x):
+        """
+        :param x: 1-D feature vector (list, tuple or numpy array), in feature_names order
+        :return: List with the leaf reached in every tree
+        """
+        # Round to float32 first, as sklearn does before comparing with the thresholds
+        if not self.private_lists:
+            return self._walk_arrays(np.asarray(x, dtype=np.float32))
+        x = np.asarray(x, dtype=np.float32).tolist()
+        feature, threshold, left, right, missing_left, roots, _ = self.node_lists()
+        leaves = []
+        for node in roots:
+            child = left[node]
+            while child >= 0:
+                value = x[feature[node]]
+                if value <= threshold[node] or (value != value and missing_left[node]):
+                    node = child
+                else:
+                    node = right[node]
+                child = left[node]
+            leaves.append(node)
+        return leaves
+
+    def _walk_arrays(self, x):
+        # Every tree at once, one level per step; trees whose leaf is reached drop out of the walk.
+        # Plain ndarray views of the (mapped) arrays share their memory without the memmap overhead.
+        feature, threshold, left, right, missing_left = (np.asarray(array) for array in (
+            self.feature, self.threshold, self.left, self.right, self.missing_left))
+        leaves = np.array(self.roots)
+        active = np.arange(len(leaves))
+        nodes = leaves
+        while True:
+            children = left[nodes]
+            inner = children >= 0
+            if not inner.all():
+                leaves[active[~inner]] = nodes[~inner]
+                active, nodes, children = active[inner], nodes[inner], children[inner]
+                if len(nodes) == 0:
+                    return leaves.tolist()
+            values = x[feature[nodes]]
+            go_left = (values <= threshold[nodes]) | (np.isnan(values) & missing_left[nodes])
+            nodes = np.where(go_left, children, right[nodes])
+
+    def predict_proba_one(self, x):
+        """
+        :param x: 1-D feature vector
+        :return: Numpy array with the probability of every class
+        """
+        # Trees are added in order, then divided, as sklearn does, so even exact ties resolve the same way
+        return self.values[self.leaves_one(x)].cumsum(axis=0)[-1] / len(self.roots)
+
+    def predict_one(self, x):
+        """
+        :param x: 1-D feature vector
+        :return: Predicted class label
+        """
+        index = int(np.argmax(self.predict_proba_one(x)))
+        return (self.node_lists()[-1] if self.private_lists else self.classes.tolist())[index]
+
+    def node_lists(self):
+        """
+        Plain-list copies of the node arrays: walking lists is much faster than indexing arrays one
+        element at a time, at the cost of a private copy per process.
+        """
+        if self._nodes is None:
+            self._nodes = (self.feature.tolist(), self.threshold.tolist(), self.left.tolist(), self.right.tolist(),
+                           self.missing_left.tolist(), self.roots.tolist(), self.classes.tolist())
+        return self._nodes
+
+    def predict_proba(self, features, chunk_size=10_000):
+        """
+        :param features: 2-D array-like (rows x features); DataFrames are reordered to feature_names
+        :param chunk_size: Rows walked at once (bounds the rows x trees working arrays)
+        :return: Numpy array (rows x classes) of class probabilities
+        """
+        if hasattr(features, "columns") and self.feature_names is not None:
+            features = features[self.feature_names]
+        matrix = np.asarray(features, dtype=np.float32)
+        proba = np.empty((len(matrix), len(self.classes)))
+        for start in range(0, len(matrix), chunk_size):
+            chunk = matrix[start:start + chunk_size]
+            rows = np.arange(len(chunk))[:, None]
+            nodes = np.broadcast_to(self.roots, (len(chunk), len(self.roots))).copy()
+            while True:
+                children = self.left[nodes]
+                inner = children >= 0
+                if not inner.any():
+                    break
+                values = chunk[rows, self.feature[nodes]]
+                go_left = (values <= self.threshold[nodes]) | (np.isnan(values) & self.missing_left[nodes])
+                nodes = np.where(inner, np.where(go_left, children, self.right[nodes]), nodes)
+            total = np.zeros((len(chunk), len(self.classes)))
+            for tree in range(len(self.roots)):
+                total += self.values[nodes[:, tree]]
+            proba[start:start + len(chunk)] = total / len(self.roots)
+        return proba
+
+    def predict(self, features):
+        """
+        :param features: 2-D array-like (rows x features)
+        :return: Numpy array of predicted class labels
+        """
+        return self.classes[np.argmax(self.predict_proba(features), axis=1)]
+
+    def verify(self, model, features):
+        """
+        Check that the compiled forest gives the same outputs as the sklearn model.
+
+        :param model: The sklearn model it was compiled from
+        :param features: Rows to compare on (DataFrame or 2-D array)
+        :raises ValueError: If a probability or a prediction differs
+        """
+        expected = model.predict_proba(features)
+        proba = self.predict_proba(features)
+        if not np.allclose(proba, expected, rtol=0, atol=1e-9):
+            raise ValueError("Compiled forest probabilities differ from the sklearn model")
+        if not np.array_equal(self.classes[np.argmax(proba, axis=1)], model.predict(features)):
+            raise ValueError("Compiled forest predictions differ from the sklearn model")
@@ -1,15 +1,58 @@
 import pickle
 import os
+import sys
+import time
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, classification_report
+from models.compiled_forest import CompiledForest
+from utils.lazy import import_object
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+# Model classes selectable with MLModel(backend=...); sklearn is only imported when a model is fitted or loaded
+BACKENDS = {
+    "random_forest": "sklearn.ensemble:RandomForestClassifier",
+    "hist_gradient_boosting": "sklearn.ensemble:HistGradientBoostingClassifier",
+}
+
+
+def _peak_rss_mb():
+    """
+    Peak resident memory of the process in MB, or None if unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3  # Bytes on macOS, kilobytes on Linux
+
 
 class MLModel:
-    def __init__(self):
+    def __init__(self, backend="random_forest", n_jobs=-1, n_estimators=100, growth=20, max_estimators=None,
+                 **model_params):
+        """
+        :param backend: 'random_forest' or 'hist_gradient_boosting'
+        :param n_jobs: Cores used by a random forest (-1: all); gradient boosting always uses every core
+        :param n_estimators: Trees of a new random forest, or boosting iterations
+        :param growth: Trees (or boosting iterations) added by update()
+        :param max_estimators: Keep at most this many trees after update(), the oldest go first (random forest only)
+        :param model_params: Extra parameters of the sklearn model
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}. Choose from {list(BACKENDS)}")
         self.model_path = os.path.join(os.path.dirname(__file__), "ml_model.pkl")
+        self.backend = backend
+        self.n_jobs = n_jobs
+        self.n_estimators = n_estimators
+        self.growth = growth
+        self.max_estimators = max_estimators
+        self.model_params = model_params
         self.model = None
         self.feature_names = None  # To track feature names during training
+        self.compiled = None  # CompiledForest used by predict_one
+        self.fit_stats = None  # Timing and memory of the last fit or update
 
     def train(self, data):
         """
@@ -17,7 +60,7 @@ class MLModel:
         """
         print("Training the model...")
         # Prepare features and target
-        features = data.drop(columns=["target", "Date"])  # Exclude target and Date
+        features = data.drop(columns=["target", "Date"], errors="ignore")  # Exclude target and Date
         self.feature_names = features.columns.tolist()  # Save feature names
         target = data["target"]
 
@@ -25,6 +68,9 @@ class MLModel:
         if len(features) < 2:
             raise ValueError("Insufficient data for training. Provide a dataset with at least 2 samples.")
 
+        from sklearn.metrics import accuracy_score, classification_report
+        from sklearn.model_selection import train_test_split
+
         # Train-test split
         if len(features) > 5:  # Split if enough samples are available
             X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=42)
@@ -32,15 +78,143 @@ class MLModel:
             print("Dataset is small; using entire data for training.")
             X_train, X_test, y_train, y_test = features, features, target, target
 
-        # Train the RandomForest model
-        self.model = RandomForestClassifier(random_state=42)
-        self.model.fit(X_train, y_train)
+        # Train the model
+        self.fit(X_train, y_train)
+        stats = self.fit_stats
+        print(f"Fitted {stats['estimators']} {self.backend} estimators on {stats['rows']} rows in "
+              f"{stats['seconds']:.2f}s (CPU {stats['cpu_seconds']:.2f}s, peak RSS {stats['peak_rss_mb']} MB, "
+              f"model {stats['model_size_mb']:.1f} MB)")
 
         # Evaluate the model
         predictions = self.model.predict(X_test)
         print(f"Accuracy: {accuracy_score(y_test, predictions)}")
         print(f"Classification Report:\n{classification_report(y_test, predictions)}")
 
+        # Export the fast predictor, checked against the sklearn model on the test rows
+        if self.backend == "random_forest":
+            self.compile(check_features=X_test)
+
+    def fit(self, features, target):
+        """
+        Fit the model on exactly the given rows, without an internal train/test split.
+        Used when the caller already controls the split (e.g. walk-forward folds).
+        """
+        model_class = import_object(BACKENDS[self.backend])
+        if self.backend == "random_forest":
+            self.model = model_class(n_estimators=self.n_estimators, n_jobs=self.n_jobs, random_state=42,
+                                     **self.model_params)
+        else:
+            self.model = model_class(max_iter=self.n_estimators, random_state=42, **self.model_params)
+        self._timed_fit(features, target, added=None)
+        self.feature_names = list(features.columns)
+        return self
+
+    def update(self, features, target, growth=None):
+        """
+        Grow the trained model on new data instead of refitting it from scratch.
+
+        A random forest keeps its trees and adds `growth` trees fitted on the given rows (dropping
+        the oldest beyond max_estimators); gradient boosting continues for `growth` more
+        iterations. Without a compatible trained model (same features and classes) this fits a
+        new one.
+
+        :param features: DataFrame of feature rows (e.g. the whole history, or only the recent part)
+        :param target: Labels of the rows
+        :param growth: Trees or iterations to add (default: self.growth)
+        """
+        growth = growth or self.growth
+        if self.model is None or list(features.columns) != list(self.feature_names) or \
+                set(np.unique(target)) != set(self.model.classes_):
+            print("No compatible trained model to update; fitting a new one.")
+            return self.fit(features, target)
+
+        if self.backend == "random_forest":
+            # Warm-started trees take their seeds from their position in the forest, so after
+            # max_estimators trimmed the oldest ones the same seeds would come round again; a new
+            # random_state on every update keeps the added trees distinct
+            self.model.set_params(warm_start=True, n_estimators=len(self.model.estimators_) + growth,
+                                  random_state=self.model.random_state + 1)
+        else:
+            self.model.set_params(warm_start=True, max_iter=self.model.n_iter_ + growth)
+        self._timed_fit(features, target, added=growth)
+
+        too_many = self.max_estimators and self._estimator_count() > self.max_estimators
+        if self.backend == "random_forest" and too_many:
+            self.model.estimators_ = self.model.estimators_[-self.max_estimators:]
+            self.model.set_params(n_estimators=self.max_estimators)
+            self.fit_stats.update(estimators=self.max_estimators, model_size_mb=self._model_size_mb())
+        return self
+
+    def _timed_fit(self, features, target, added):
+        """
+        Fit self.model and record its wall time, CPU time and memory in fit_stats.
+
+        Memory is the peak resident size of the process (None where the OS does not report it)
+        and how much the fit raised it; the size of the pickled model stands for what the trees keep.
+        """
+        peak_before = _peak_rss_mb()
+        wall, cpu = time.perf_counter(), time.process_time()
+        self.model.fit(features, target)
+        seconds, cpu_seconds = time.perf_counter() - wall, time.process_time() - cpu
+        peak_after = _peak_rss_mb()
+        self.compiled = None
+        self.fit_stats = {
+            "backend": self.backend,
+            "rows": len(features),
+            "features": features.shape[1],
+            "estimators": self._estimator_count(),
+            "added": self._estimator_count() if added is None else added,
+            "seconds": seconds,
+            "cpu_seconds": cpu_seconds,
+            "peak_rss_mb": peak_after,
+            "rss_growth_mb": None if peak_after is None else peak_after - peak_before,
+            "model_size_mb": self._model_size_mb(),
+        }
+
+    def _estimator_count(self):
+        if self.backend == "random_forest":
+            return len(self.model.estimators_)
+        return self.model.n_iter_
+
+    def _model_size_mb(self):
+        return len(pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL)) / 1e6
+
+    def compile(self, check_features=None):
+        """
+        Flatten the trained forest into NumPy node arrays for predict_one.
+
+        :param check_features: Optional rows on which the compiled forest must match the sklearn model
+        :return: CompiledForest
+        """
+        if self.model is None:
+            raise ValueError("Model is not loaded. Load or train the model first.")
+        if self.backend != "random_forest":
+            raise ValueError("Only random forest models can be compiled")
+        compiled = CompiledForest.from_sklearn(self.model, feature_names=self.feature_names)
+        if check_features is not None:
+            compiled.verify(self.model, check_features)
+        self.compiled = compiled
+        return compiled
+
+    def export_compiled(self, path=None):
+        """
+        Save the compiled forest (default: next to the pickled model, with a .npz extension).
+        """
+        path = path or os.path.splitext(self.model_path)[0] + ".npz"
+        (self.compiled or self.compile()).save(path)
+        print(f"Compiled model saved to {path}")
+        return path
+
+    def load_compiled(self, path=None):
+        """
+        Load a compiled forest saved with export_compiled(); sklearn is not needed to use it.
+        """
+        path = path or os.path.splitext(self.model_path)[0] + ".npz"
+        self.compiled = CompiledForest.load(path)
+        if self.feature_names is None:
+            self.feature_names = self.compiled.feature_names
+        return self.compiled
+
     def save_model(self, model_path=None):
         """
         Save the trained model to a file.
@@ -57,6 +231,9 @@ class MLModel:
         path = model_path or self.model_path
         with open(path, "rb") as file:
             self.model = pickle.load(file)
+        self.compiled = None
+        self.backend = "hist_gradient_boosting" if isinstance(
+            self.model, import_object(BACKENDS["hist_gradient_boosting"])) else "random_forest"
         print("Model loaded successfully.")
 
         # Check if feature names are available
@@ -83,6 +260,20 @@ class MLModel:
             raise ValueError("Model is not loaded. Load or train the model first.")
         return self.model.predict(features)
 
+    def predict_one(self, vector):
+        """
+        Predict the class of a single feature vector with the compiled forest (no pandas, no sklearn).
+        Other backends go through sklearn.
+
+        :param vector: 1-D sequence of feature values, in get_feature_names() order
+        :return: Predicted class label
+        """
+        if self.backend != "random_forest":
+            return self.predict(pd.DataFrame([list(vector)], columns=self.feature_names))[0]
+        if self.compiled is None:
+            self.compile()
+        return self.compiled.predict_one(vector)
+
 if __name__ == "__main__":
     # Example usage
     # Assuming data.csv has features and a 'target' column
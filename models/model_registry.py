@@ -0,0 +1,329 @@
+import json
+import os
+import pickle
+import shutil
+import threading
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from models.compiled_forest import CompiledForest
+
+
+class RegisteredModel:
+    """
+    One version of a registered model, loaded on first use.
+
+    Random forests are served from the compiled node arrays, memory-mapped read-only so every
+    process using the same version shares one copy (single predictions walk the mapped arrays
+    too, unless private_lists asks for faster per-process list copies); the pickled sklearn
+    model is only unpickled for other backends or when `estimator` is asked for.
+    """
+
+    def __init__(self, directory, private_lists=False):
+        """
+        :param directory: Version directory written by ModelRegistry.register
+        :param private_lists: Walk single predictions on plain-list copies of the node arrays
+                              (see CompiledForest.node_lists)
+        """
+        self.directory = directory
+        self.private_lists = private_lists
+        with open(os.path.join(directory, ModelRegistry.METADATA_FILE), "r") as file:
+            self.metadata = json.load(file)
+        self.version = self.metadata["version"]
+        self.feature_names = self.metadata["feature_names"]
+        self._compiled = None
+        self._estimator = None
+        self._lock = threading.Lock()
+
+    @property
+    def compiled(self):
+        """
+        The memory-mapped CompiledForest, or None if the model is not a random forest.
+        """
+        forest = os.path.join(self.directory, ModelRegistry.FOREST_DIR)
+        if self._compiled is None and os.path.isdir(forest):
+            with self._lock:
+                if self._compiled is None:
+                    self._compiled = CompiledForest.load_arrays(forest, private_lists=self.private_lists)
+        return self._compiled
+
+    @property
+    def estimator(self):
+        """
+        The unpickled sklearn model (a private copy in this process).
+        """
+        if self._estimator is None:
+            with self._lock:
+                if self._estimator is None:
+                    with open(os.path.join(self.directory, ModelRegistry.MODEL_FILE), "rb") as file:
+                        self._estimator = pickle.load(file)
+        return self._estimator
+
+    def load(self):
+        """
+        Do the loading work of the first prediction now (mapping the arrays, and building the
+        private lists when asked for, or unpickling the estimator).
+
+        :return: The model itself
+        """
+        if self.compiled is not None:
+            if self.private_lists:
+                self.compiled.node_lists()
+        elif self.estimator is None:
+            raise ValueError(f"No model in {self.directory}")
+        return self
+
+    def get_feature_names(self):
+        return self.feature_names
+
+    def predict(self, features):
+        """
+        Make predictions for a DataFrame (or 2-D array in feature_names order) of feature rows.
+        """
+        compiled = self.compiled
+        if compiled is None:
+            return self.estimator.predict(features)
+        if len(features) == 1:
+            row = features[self.feature_names] if hasattr(features, "columns") else features
+            return np.array([compiled.predict_one(np.asarray(row, dtype=float)[0])], dtype=compiled.classes.dtype)
+        return compiled.predict(features)
+
+    def predict_one(self, vector):
+        """
+        Predict the class of a single feature vector, in feature_names order.
+        """
+        compiled = self.compiled
+        if compiled is None:
+            return self.estimator.predict(pd.DataFrame([list(vector)], columns=self.feature_names))[0]
+        return compiled.predict_one(vector)
+
+
+class ModelHandle:
+    """
+    The active version of a registered model, swapped atomically when another version is activated.
+
+    Readers take `model` and use that object for a whole prediction; refresh() (or the background
+    watcher) loads a newly activated version next to the old one and then replaces the reference,
+    so signal generation never waits for a load and never sees a half-loaded model.
+    """
+
+    def __init__(self, registry, name):
+        """
+        :param registry: ModelRegistry holding the model
+        :param name: Registered model name
+        """
+        self.registry = registry
+        self.name = name
+        self._model = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    @property
+    def model(self):
+        """
+        The active RegisteredModel (loaded on first access).
+        """
+        model = self._model
+        if model is None:
+            self.refresh()
+            model = self._model
+        return model
+
+    @property
+    def version(self):
+        return self.model.version
+
+    def refresh(self):
+        """
+        Switch to the active version if it changed.
+
+        :return: True if a new version was swapped in
+        """
+        with self._lock:
+            version = self.registry.active_version(self.name)
+            if version is None:
+                raise ValueError(f"No active version of model {self.name}")
+            if self._model is not None and self._model.version == version:
+                return False
+            model = self.registry.load(self.name, version).load()
+            self._model = model
+        print(f"Model {self.name} now serving version {version}")
+        return True
+
+    def start(self, interval=5.0):
+        """
+        Watch the registry in a background thread and swap in newly activated versions.
+
+        :param interval: Seconds between checks
+        """
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Error refreshing model {self.name}: {e}")
+
+        self._watcher = threading.Thread(target=watch, name=f"model-{self.name}", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        """
+        Stop the background watcher.
+        """
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def predict(self, features):
+        return self.model.predict(features)
+
+    def predict_one(self, vector):
+        return self.model.predict_one(vector)
+
+    def get_feature_names(self):
+        return self.model.get_feature_names()
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts on disk.
+
+    Every version of a model is a directory NAME/VERSION holding the pickled sklearn model, the
+    compiled forest as .npy arrays (random forests) and metadata.json: feature names, classes,
+    training range, metrics and fit statistics. A version is written under a temporary name and
+    renamed into place, and the ACTIVE file naming the served version is replaced atomically, so
+    readers only ever see complete versions.
+    """
+
+    MODEL_FILE = "model.pkl"
+    FOREST_DIR = "forest"
+    METADATA_FILE = "metadata.json"
+    ACTIVE_FILE = "ACTIVE"
+
+    def __init__(self, root="models/registry"):
+        """
+        :param root: Directory holding the registered models
+        """
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, name, version=None):
+        directory = os.path.join(self.root, name)
+        return directory if version is None else os.path.join(directory, f"{int(version):04d}")
+
+    def versions(self, name):
+        """
+        :return: Sorted list of the registered versions of a model
+        """
+        directory = self.path(name)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(entry) for entry in os.listdir(directory) if entry.isdigit())
+
+    def register(self, name, model, training_range=None, metrics=None, metadata=None, activate=True):
+        """
+        Store a trained MLModel as the next version of a model.
+
+        :param name: Model name (e.g., "EURUSD_1h")
+        :param model: Trained MLModel
+        :param training_range: Optional (start, end) of the training data
+        :param metrics: Optional dictionary of evaluation metrics
+        :param metadata: Optional dictionary of extra metadata
+        :param activate: Make the new version the served one
+        :return: The new version number
+        """
+        if model.model is None:
+            raise ValueError("Model is not trained. Train or load the model first.")
+        os.makedirs(self.path(name), exist_ok=True)
+        staging = os.path.join(self.path(name), f".tmp-{os.getpid()}-{threading.get_ident()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        with open(os.path.join(staging, self.MODEL_FILE), "wb") as file:
+            pickle.dump(model.model, file)
+        if model.backend == "random_forest":
+            (model.compiled or model.compile()).save_arrays(os.path.join(staging, self.FOREST_DIR))
+        start, end = training_range or (None, None)
+        info = {
+            "name": name,
+            "backend": model.backend,
+            "feature_names": [str(feature) for feature in model.feature_names],
+            "classes": np.asarray(model.model.classes_).tolist(),
+            "training_range": {"start": None if start is None else pd.Timestamp(start).isoformat(),
+                               "end": None if end is None else pd.Timestamp(end).isoformat()},
+            "metrics": metrics or {},
+            "fit_stats": model.fit_stats,
+            "created": datetime.now(timezone.utc).isoformat(),
+            **(metadata or {}),
+        }
+
+        # Claim the next free version number; rename fails if another writer took it first
+        while True:
+            version = (self.versions(name) or [0])[-1] + 1
+            info["version"] = version
+            with open(os.path.join(staging, self.METADATA_FILE), "w") as file:
+                json.dump(info, file, indent=2, default=float)
+            try:
+                os.rename(staging, self.path(name, version))
+                break
+            except OSError:
+                if not os.path.exists(self.path(name, version)):
+                    raise
+
+        if activate:
+            self.activate(name, version)
+        print(f"Model {name} registered as version {version}")
+        return version
+
+    def activate(self, name, version):
+        """
+        Serve another version of a model (e.g. a new one, or a rollback).
+        """
+        if not os.path.isdir(self.path(name, version)):
+            raise ValueError(f"Model {name} has no version {version}")
+        staging = os.path.join(self.path(name), f"{self.ACTIVE_FILE}.tmp-{os.getpid()}-{threading.get_ident()}")
+        with open(staging, "w") as file:
+            file.write(str(int(version)))
+        os.replace(staging, os.path.join(self.path(name), self.ACTIVE_FILE))
+
+    def active_version(self, name):
+        """
+        :return: The served version of a model, or None if none is active
+        """
+        try:
+            with open(os.path.join(self.path(name), self.ACTIVE_FILE), "r") as file:
+                return int(file.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def metadata(self, name, version=None):
+        """
+        Metadata of a version (default: the active one).
+        """
+        version = self.active_version(name) if version is None else version
+        with open(os.path.join(self.path(name, version), self.METADATA_FILE), "r") as file:
+            return json.load(file)
+
+    def load(self, name, version=None, private_lists=False):
+        """
+        A version of a model (default: the active one); files are opened on first use.
+
+        :param private_lists: See RegisteredModel
+        :return: RegisteredModel
+        """
+        version = self.active_version(name) if version is None else int(version)
+        if version is None:
+            raise ValueError(f"No active version of model {name}")
+        return RegisteredModel(self.path(name, version), private_lists=private_lists)
+
+    def handle(self, name):
+        """
+        A ModelHandle serving the active version of a model and following later activations.
+        """
+        return ModelHandle(self, name)
@@ -0,0 +1,143 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+import pandas as pd
+from indicators.features import DEFAULT_FEATURES, FEATURES_VERSION, features_hash
+from models.ml_model import MLModel
+
+
+def forward_return_labels(closes, horizon=1, threshold=0.0):
+    """
+    Label every bar by the return of the next `horizon` bars.
+
+    :param closes: Numpy array of close prices
+    :param horizon: Number of bars ahead
+    :param threshold: Minimum absolute return for 'buy' or 'sell'
+    :return: Numpy array of 'buy', 'sell' or 'hold' (None for the last horizon bars, which have no label yet)
+    """
+    closes = np.asarray(closes, dtype=float)
+    labels = np.full(len(closes), None, dtype=object)
+    if len(closes) <= horizon:
+        return labels
+    returns = closes[horizon:] / closes[:-horizon] - 1
+    labels[:-horizon] = np.where(returns > threshold, "buy", np.where(returns < -threshold, "sell", "hold"))
+    return labels
+
+
+def _train_market(trainer, n_jobs, market):
+    """
+    Train the model of one symbol/timeframe (module level so worker processes can run it).
+
+    :return: Dictionary with the market, the model path and the fit statistics (or the error)
+    """
+    symbol, timeframe = market
+    try:
+        return trainer.train(symbol, timeframe, n_jobs=n_jobs)
+    except Exception as e:
+        print(f"Error training {symbol} {timeframe}: {e}")
+        return {"symbol": symbol, "timeframe": timeframe, "error": str(e)}
+
+
+class ModelTrainer:
+    """
+    Trains one MLModel per symbol/timeframe from the feature store.
+
+    Features are materialized incrementally from a MarketDataStore and labelled with `labeler`.
+    With warm_start, an existing model is grown on the new history (see MLModel.update) instead
+    of being refitted. train_all runs several markets at once in worker processes and splits the
+    cores between them.
+    """
+
+    def __init__(self, market_store, feature_store, model_dir="models", features=None, version=FEATURES_VERSION,
+                 labeler=forward_return_labels, warm_start=False, max_workers=None, registry=None, **model_kwargs):
+        """
+        :param market_store: MarketDataStore with the price datasets
+        :param feature_store: FeatureStore caching the feature matrices
+        :param model_dir: Directory for the models (SYMBOL_TIMEFRAME.pkl and .npz)
+        :param features: Dictionary of feature definitions (default: DEFAULT_FEATURES)
+        :param version: Feature calculation version
+        :param labeler: Module-level function of the close prices returning one label per bar (None where unknown)
+        :param warm_start: Grow existing models instead of refitting them
+        :param max_workers: Number of markets trained at once (default: one per CPU; 1 runs in-process)
+        :param registry: Optional ModelRegistry where every trained model is registered as SYMBOL_TIMEFRAME
+        :param model_kwargs: Arguments of MLModel (backend, n_estimators, growth, max_estimators, ...)
+        """
+        self.market_store = market_store
+        self.feature_store = feature_store
+        self.model_dir = model_dir
+        self.features = DEFAULT_FEATURES if features is None else features
+        self.version = version
+        self.labeler = labeler
+        self.warm_start = warm_start
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.registry = registry
+        self.model_kwargs = model_kwargs
+        os.makedirs(model_dir, exist_ok=True)
+
+    def model_path(self, symbol, timeframe):
+        return os.path.join(self.model_dir, f"{symbol}_{timeframe}.pkl")
+
+    def training_data(self, symbol, timeframe):
+        """
+        Feature rows and labels of one market, without the rows still warming up or unlabelled.
+
+        :return: (DataFrame of features, numpy array of labels)
+        """
+        self.feature_store.materialize_from_store(self.market_store, symbol, timeframe, self.features, self.version)
+        prices = self.market_store.read_arrays(symbol, timeframe, columns=["close"])
+        times = prices[self.market_store.info(symbol, timeframe)["time_column"]]
+        features = self.feature_store.read(symbol, timeframe, self.features, self.version, start=times[0],
+                                           end=times[-1]).drop(columns=["date"])
+        labels = self.labeler(prices["close"])
+        usable = features.notna().all(axis=1).to_numpy() & pd.notna(labels)
+        return features[usable].reset_index(drop=True), labels[usable].astype(str)
+
+    def train(self, symbol, timeframe, n_jobs=-1):
+        """
+        Train (or grow) and save the model of one market.
+
+        :param n_jobs: Cores used by the model
+        :return: Dictionary with the market, the model path and the fit statistics
+        """
+        features, labels = self.training_data(symbol, timeframe)
+        path = self.model_path(symbol, timeframe)
+        model = MLModel(n_jobs=n_jobs, **self.model_kwargs)
+        if self.warm_start and os.path.exists(path):
+            model.load_model(path)
+            if model.backend == "random_forest":
+                model.model.set_params(n_jobs=n_jobs)
+            model.update(features, labels)
+        else:
+            model.fit(features, labels)
+
+        model.save_model(path)
+        if model.backend == "random_forest":
+            model.export_compiled(os.path.splitext(path)[0] + ".npz")
+        result = {"symbol": symbol, "timeframe": timeframe, "path": path, **model.fit_stats}
+        if self.registry is not None:
+            index = self.market_store.info(symbol, timeframe)
+            result["version"] = self.registry.register(
+                f"{symbol}_{timeframe}", model, training_range=(index["start"], index["end"]),
+                metadata={"features_hash": features_hash(self.features, self.version)},
+            )
+        return result
+
+    def train_all(self, markets):
+        """
+        Train every market, several at a time.
+
+        :param markets: List of (symbol, timeframe) pairs
+        :return: DataFrame with one row of fit statistics per market
+        """
+        markets = list(markets)
+        workers = min(self.max_workers, len(markets)) or 1
+        # Share the cores between the markets trained at once instead of oversubscribing them
+        n_jobs = max((os.cpu_count() or 1) // workers, 1)
+        train = partial(_train_market, self, n_jobs)
+        if workers == 1:
+            results = [train(market) for market in markets]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(train, markets))
+        return pd.DataFrame(results)
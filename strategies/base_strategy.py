@@ -1,4 +1,8 @@
 from abc import ABC, abstractmethod
+import numpy as np
+
+# Numeric codes used for signal arrays (backtests, batch signal generation)
+SIGNAL_CODES = {'hold': 0, 'buy': 1, 'sell': -1}
 
 class BaseStrategy(ABC):
     """
@@ -6,6 +10,9 @@ class BaseStrategy(ABC):
     Provides the structure and common functionality for derived strategies.
     """
 
+    # Parameters that only move signal thresholds and never change an indicator series
+    threshold_params = ()
+
     def __init__(self, symbol, lot_size, stop_loss, take_profit, atr_multiplier=1.5):
         """
         Initialize the base strategy.
@@ -23,15 +30,33 @@ class BaseStrategy(ABC):
         self.atr_multiplier = atr_multiplier
         self.indicators = {}  # Dictionary to store indicator values
 
-    def setup(self, market_data):
+    def indicator_definitions(self):
+        """
+        Declare the indicators the strategy reads from self.indicators.
+
+        Definitions have the format of indicators.features (name -> (indicator, parameters[, output])),
+        so the indicators of several strategies on one symbol can be merged and each distinct one
+        computed once per bar, from a shared IndicatorCache or one set of streams.
+
+        :return: Dictionary of indicator definitions
+        """
+        return {
+            'rsi': ('rsi', {'period': 14}),
+            'ema': ('ema', {'period': 14}),
+            'atr': ('atr', {'period': 14}),
+        }
+
+    def setup(self, market_data, cache=None):
         """
         Setup the strategy by calculating required indicators.
 
         :param market_data: A dictionary with price data (e.g., highs, lows, closes)
+        :param cache: Optional IndicatorCache over the same prices, shared between strategies
         """
-        self.indicators['rsi'] = self.calculate_rsi(market_data['closes'])
-        self.indicators['ema'] = self.calculate_ema(market_data['closes'])
-        self.indicators['atr'] = self.calculate_atr(market_data['highs'], market_data['lows'], market_data['closes'])
+        from indicators.cache import IndicatorCache
+        from indicators.features import latest_indicators
+        cache = cache or IndicatorCache.from_market_data(market_data)
+        self.indicators.update(latest_indicators(cache, self.indicator_definitions()))
 
     @abstractmethod
     def generate_signal(self):
@@ -41,17 +66,68 @@ class BaseStrategy(ABC):
         """
         pass
 
+    def generate_signals(self, market_data, cache=None):
+        """
+        Generate the signal for every bar of a price history.
+
+        Element i is the signal the strategy gives after setup() on the first i + 1 bars,
+        encoded with SIGNAL_CODES; bars without enough data to set up are 'hold'. This
+        default replays setup() on every prefix, so strategies should override it with a
+        vectorized version built on the indicators' series mode.
+
+        :param market_data: A dictionary with price data (e.g., highs, lows, closes)
+        :param cache: Optional IndicatorCache over the same prices, shared between strategies
+        :return: Numpy array of signal codes
+        """
+        signals = np.zeros(len(market_data['closes']), dtype=np.int8)
+        for end in range(1, len(signals) + 1):
+            try:
+                self.setup({key: values[:end] for key, values in market_data.items()})
+            except ValueError:
+                continue
+            signals[end - 1] = SIGNAL_CODES[self.generate_signal()]
+        return signals
+
+    def create_streams(self):
+        """
+        Create the incremental indicators behind setup(), for live trading bar by bar.
+
+        :return: Dictionary of StreamingIndicator objects, one per distinct declared indicator
+        """
+        from indicators.features import create_indicator_streams
+        return create_indicator_streams(self.indicator_definitions())
+
+    def setup_from_streams(self, streams, close):
+        """
+        Set the indicators from incremental indicators that have seen every bar so far,
+        instead of recalculating them over the whole history like setup().
+
+        :param streams: Dictionary returned by create_streams(), updated with the latest bar
+        :param close: Close price of the latest bar
+        :return: False while any indicator is still warming up
+        """
+        from indicators.features import stream_indicators
+        values = stream_indicators(streams, self.indicator_definitions())
+        if values is None:
+            return False
+        self.indicators.update(values)
+        return True
+
     def execute_trade(self, signal, trade_executor):
         """
         Execute a trade based on the generated signal.
 
         :param signal: The signal ('buy', 'sell', or 'hold')
         :param trade_executor: An instance of the TradeExecutor class
+        :return: The order placed (None on 'hold')
         """
         if signal == 'buy':
-            trade_executor.open_buy(self.symbol, self.lot_size, self.stop_loss, self.take_profit)
+            return trade_executor.open_buy(lot_size=self.lot_size, stop_loss=self.stop_loss,
+                                           take_profit=self.take_profit, symbol=self.symbol)
         elif signal == 'sell':
-            trade_executor.open_sell(self.symbol, self.lot_size, self.stop_loss, self.take_profit)
+            return trade_executor.open_sell(lot_size=self.lot_size, stop_loss=self.stop_loss,
+                                            take_profit=self.take_profit, symbol=self.symbol)
+        return None
 
     # Indicator calculations
     def calculate_rsi(self, prices, period=14):
@@ -0,0 +1,117 @@
+import numpy as np
+from strategies.base_strategy import BaseStrategy, SIGNAL_CODES
+
+
+class StrategyGroup(BaseStrategy):
+    """
+    Runs several strategies on one symbol and trades their majority vote.
+
+    The members declare their indicators (indicator_definitions()); the group computes the union
+    once per bar, from one IndicatorCache when set up on a price history or one set of streams in
+    live trading, so an indicator used by several members (e.g. RSI(14)) is only calculated once.
+    """
+
+    def __init__(self, strategies, lot_size=None, stop_loss=None, take_profit=None, quorum=None):
+        """
+        Initialize the strategy group.
+
+        :param strategies: Dictionary of strategies by name, or a list of strategies
+        :param lot_size: Lot size for trades (default: the first strategy's)
+        :param stop_loss: Stop-loss in pips (default: the first strategy's)
+        :param take_profit: Take-profit in pips (default: the first strategy's)
+        :param quorum: Number of votes a buy or sell needs (default: more than half of the strategies)
+        """
+        if not isinstance(strategies, dict):
+            strategies = {f"{type(strategy).__name__}_{i}": strategy for i, strategy in enumerate(strategies)}
+        if not strategies:
+            raise ValueError("A strategy group needs at least one strategy")
+        first = next(iter(strategies.values()))
+        super().__init__(first.symbol,
+                         first.lot_size if lot_size is None else lot_size,
+                         first.stop_loss if stop_loss is None else stop_loss,
+                         first.take_profit if take_profit is None else take_profit)
+        self.strategies = strategies
+        self.quorum = len(strategies) // 2 + 1 if quorum is None else quorum
+        self.signals = {}  # Latest signal of every strategy, by name
+
+    def indicator_definitions(self):
+        """
+        :return: Every strategy's indicator definitions, prefixed with the strategy name
+        """
+        return {f"{name}.{key}": definition
+                for name, strategy in self.strategies.items()
+                for key, definition in strategy.indicator_definitions().items()}
+
+    def required_indicators(self):
+        """
+        The distinct indicators computed for the group.
+
+        :return: Dictionary of (indicator, parameters) by indicators.features.indicator_key()
+        """
+        from indicators.features import indicator_key
+        return {indicator_key(definition[0], definition[1]): (definition[0], definition[1])
+                for definition in self.indicator_definitions().values()}
+
+    def setup(self, market_data, cache=None):
+        """
+        Set up every strategy from one shared IndicatorCache.
+
+        :param market_data: A dictionary with price data (e.g., highs, lows, closes)
+        :param cache: Optional IndicatorCache over the same prices, shared between strategies
+        """
+        from indicators.cache import IndicatorCache
+        cache = cache or IndicatorCache.from_market_data(market_data)
+        for strategy in self.strategies.values():
+            strategy.setup(market_data, cache)
+
+    def setup_from_streams(self, streams, close):
+        """
+        Set up every strategy from one set of streams (see create_streams()).
+
+        :return: False while any strategy's indicators are still warming up
+        """
+        ready = [strategy.setup_from_streams(streams, close) for strategy in self.strategies.values()]
+        return all(ready)
+
+    def _vote(self, buys, sells):
+        if buys >= self.quorum and buys > sells:
+            return 'buy'
+        if sells >= self.quorum and sells > buys:
+            return 'sell'
+        return 'hold'
+
+    def generate_signal(self):
+        """
+        Generate every strategy's signal and combine them.
+        :return: 'buy', 'sell', or 'hold'
+        """
+        self.signals = {name: strategy.generate_signal() for name, strategy in self.strategies.items()}
+        votes = list(self.signals.values())
+        return self._vote(votes.count('buy'), votes.count('sell'))
+
+    def generate_signals(self, market_data, cache=None):
+        """
+        Vectorized equivalent of calling setup() and generate_signal() on every prefix of the data.
+        :param market_data: A dictionary with price data (e.g., highs, lows, closes)
+        :param cache: Optional IndicatorCache over the same prices, shared between strategies
+        :return: Numpy array of signal codes
+        """
+        from indicators.cache import IndicatorCache
+        from indicators.features import compute_features
+
+        cache = cache or IndicatorCache.from_market_data(market_data)
+        codes = np.array([strategy.generate_signals(market_data, cache=cache)
+                          for strategy in self.strategies.values()])
+        buys = (codes == SIGNAL_CODES['buy']).sum(axis=0)
+        sells = (codes == SIGNAL_CODES['sell']).sum(axis=0)
+
+        signals = np.zeros(len(cache.closes), dtype=np.int8)
+        signals[(buys >= self.quorum) & (buys > sells)] = SIGNAL_CODES['buy']
+        signals[(sells >= self.quorum) & (sells > buys)] = SIGNAL_CODES['sell']
+
+        # setup() fails until every strategy's indicators are warm, and the group holds until then
+        columns = compute_features(None, None, None, self.indicator_definitions(), cache=cache)
+        warm = np.all([~np.isnan(column) for column in columns.values()], axis=0)
+        ready = np.flatnonzero(warm)
+        signals[:ready[0] if len(ready) else len(signals)] = SIGNAL_CODES['hold']
+        return signals
@@ -1,10 +1,13 @@
-from strategies.base_strategy import BaseStrategy
+import numpy as np
+from strategies.base_strategy import BaseStrategy, SIGNAL_CODES
 
 class MeanReversionStrategy(BaseStrategy):
     """
     Implements a Mean Reversion Strategy using RSI and Bollinger Bands.
     """
 
+    threshold_params = ('rsi_threshold',)
+
     def __init__(self, symbol, lot_size, stop_loss, take_profit, rsi_threshold=30, ema_period=14, bollinger_period=20, bollinger_std_dev=2):
         """
         Initialize the mean reversion strategy.
@@ -14,7 +17,7 @@ class MeanReversionStrategy(BaseStrategy):
         :param stop_loss: Stop-loss in pips
         :param take_profit: Take-profit in pips
         :param rsi_threshold: RSI threshold for buy/sell signals
-        :param ema_period: EMA period for trend confirmation
+        :param ema_period: EMA period for trend confirmation (not used by the signal, so no EMA is computed)
         :param bollinger_period: Bollinger Band period
         :param bollinger_std_dev: Standard deviation for Bollinger Bands
         """
@@ -45,17 +48,56 @@ class MeanReversionStrategy(BaseStrategy):
         # Otherwise, hold
         return 'hold'
 
-    def setup(self, market_data):
+    def indicator_definitions(self):
+        bollinger = {'period': self.bollinger_period, 'std_dev': self.bollinger_std_dev}
+        return {
+            'rsi': ('rsi', {'period': 14}),
+            'lower_band': ('bollinger', bollinger, 'lower'),
+            'upper_band': ('bollinger', bollinger, 'upper'),
+        }
+
+    def setup(self, market_data, cache=None):
         """
         Calculate indicators required for the strategy.
         :param market_data: A dictionary with price data (e.g., highs, lows, closes)
+        :param cache: Optional IndicatorCache over the same prices, shared between strategies
         """
-        super().setup(market_data)
+        super().setup(market_data, cache)
         # Store the most recent price as 'current_price'
         self.indicators['current_price'] = market_data['closes'][-1]
 
-        # Calculate Bollinger Bands
-        self.indicators['lower_band'], self.indicators['upper_band'] = self.calculate_bollinger_bands(market_data['closes'])
+    def setup_from_streams(self, streams, close):
+        if not super().setup_from_streams(streams, close):
+            return False
+        self.indicators['current_price'] = close
+        return True
+
+    def generate_signals(self, market_data, cache=None):
+        """
+        Vectorized equivalent of calling setup() and generate_signal() on every prefix of the data.
+        :param market_data: A dictionary with price data (e.g., highs, lows, closes)
+        :param cache: Optional IndicatorCache over the same prices, shared between strategies
+        :return: Numpy array of signal codes
+        """
+        from indicators.cache import IndicatorCache
+
+        closes = np.asarray(market_data['closes'], dtype=float)
+        signals = np.zeros(len(closes), dtype=np.int8)
+        # setup() needs 14 bars for RSI and a full Bollinger window
+        warmup = max(14, self.bollinger_period)
+        if len(closes) < warmup:
+            return signals
+
+        cache = cache or IndicatorCache.from_market_data(market_data)
+        rsi = cache.series('rsi', period=14)
+        lower_band, upper_band = cache.series('bollinger', period=self.bollinger_period, std_dev=self.bollinger_std_dev)
+
+        buy = (rsi < self.rsi_threshold) & (closes < lower_band)
+        sell = ~buy & (rsi > (100 - self.rsi_threshold)) & (closes > upper_band)
+        signals[buy] = SIGNAL_CODES['buy']
+        signals[sell] = SIGNAL_CODES['sell']
+        signals[:warmup - 1] = SIGNAL_CODES['hold']
+        return signals
 
     def calculate_bollinger_bands(self, closes):
         """
@@ -64,15 +106,5 @@ class MeanReversionStrategy(BaseStrategy):
         :param closes: List or numpy array of closing prices
         :return: (lower_band, upper_band)
         """
-        import numpy as np
-
-        closes = np.array(closes)
-        if len(closes) < self.bollinger_period:
-            raise ValueError("Not enough data to calculate Bollinger Bands")
-
-        sma = np.mean(closes[-self.bollinger_period:])
-        std_dev = np.std(closes[-self.bollinger_period:])
-        lower_band = sma - (self.bollinger_std_dev * std_dev)
-        upper_band = sma + (self.bollinger_std_dev * std_dev)
-
-        return lower_band, upper_band
+        from indicators.bollinger import BollingerBands
+        return BollingerBands.calculate(closes, self.bollinger_period, self.bollinger_std_dev)
@@ -1,39 +1,253 @@
+import logging
+import numpy as np
 import pandas as pd
+from indicators.features import DEFAULT_FEATURES, compute_features, create_feature_streams, feature_vector
 from models.ml_model import MLModel
+from strategies.base_strategy import SIGNAL_CODES
+
+# Per-bar diagnostics are debug records; see utils.logger.RateLimitFilter to keep them on in long runs
+logger = logging.getLogger(__name__)
+
+
+def _price_arrays(columns):
+    """
+    High, low and close arrays of a frame's columns, whatever their case.
+    """
+    names = {str(column).lower(): column for column in columns}
+    if not all(name in names for name in ("high", "low", "close")):
+        raise ValueError("Feature calculation needs high, low and close prices")
+    return tuple(np.asarray(columns[names[name]], dtype=float) for name in ("high", "low", "close"))
 
 
 class MultiTimeframeStrategy:
-    def __init__(self, symbol, model_path="models/ml_model.pkl"):
+    """
+    Votes with an ML model on several timeframes.
+
+    The model's inputs are always calculated from the high, low and close prices with the same
+    feature definitions as training (indicators.features): compute_features for whole histories
+    (backtests, DataFrames) and create_feature_streams/feature_vector for live bars.
+    """
+
+    def __init__(self, symbol, model_path="models/ml_model.pkl", model_handle=None, features=None):
+        """
+        :param symbol: The trading symbol (e.g., "EURUSD")
+        :param model_path: Pickled model, loaded on first use
+        :param model_handle: Optional ModelHandle (see models.model_registry) serving the active registered
+                             version instead; new versions are picked up between predictions
+        :param features: Dictionary of feature definitions the model was trained on (default: DEFAULT_FEATURES)
+        """
         self.symbol = symbol
-        self.model = MLModel()
-        self.model.load_model(model_path)
+        self.model_path = model_path
+        self.model_handle = model_handle
+        self._model = None
+        self.features = DEFAULT_FEATURES if features is None else features
+        self.vector = None  # Features of the latest live bar (see setup_from_streams)
+        self.feature_matrices = {}  # Cached per-timeframe features for a backtest
+        self.features_source = None
+        self.predictions = {}  # Cached per-timeframe predictions for a backtest
+        self.predictions_source = None
+        self.predictions_model = None
+
+    @property
+    def model(self):
+        """
+        The model used for the next prediction.
+        """
+        if self._model is not None:
+            return self._model
+        if self.model_handle is not None:
+            return self.model_handle.model
+        self._model = MLModel()
+        self._model.load_model(self.model_path)
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    def feature_frame(self, data):
+        """
+        Model features of every bar of a price history.
+        :param data: DataFrame with high, low and close columns, oldest bar first
+        :return: DataFrame with one column per feature, in definition order (NaN while warming up)
+        """
+        highs, lows, closes = _price_arrays(data)
+        return pd.DataFrame(compute_features(highs, lows, closes, self.features), index=data.index)
 
-    def generate_signal(self, data_dict):
+    def create_streams(self):
+        """
+        Create the incremental indicators behind the features, for a live loop on one timeframe.
+        """
+        return create_feature_streams(self.features)
+
+    def setup_from_streams(self, streams, current_price=None):
+        """
+        Read the features of the latest bar from streams that have seen every bar so far.
+        :param streams: Dictionary returned by create_streams()
+        :param current_price: Unused; the features only depend on the bars
+        :return: True if every feature is known, False while an indicator is still warming up
+        """
+        self.vector = feature_vector(streams, self.features)
+        return bool(np.isfinite(self.vector).all())
+
+    def generate_signal(self, data_dict=None):
         """
         Generate a signal by analyzing multiple timeframes.
-        :param data_dict: Dictionary of DataFrames for each timeframe
+        :param data_dict: Dictionary of price DataFrames for each timeframe (default: vote on the features of
+                          the latest live bar, see setup_from_streams)
         :return: Aggregated signal ('buy', 'sell', 'hold')
         """
+        model = self.model  # Every timeframe votes with the same model version
+        if data_dict is None:
+            if self.vector is None:
+                return "hold"
+            features = pd.DataFrame([self.vector], columns=list(self.features))
+            return self.aggregate_signals({"live": self.predict_signal(features, "live", model)})
+
         signals = {}
         for timeframe, data in data_dict.items():
-            print(f"Analyzing {self.symbol} ({timeframe})...")
+            logger.debug("Analyzing %s (%s)...", self.symbol, timeframe)
 
             if not isinstance(data, pd.DataFrame) or data.empty:
-                print(f"No valid data for {timeframe}. Skipping.")
+                logger.debug("No valid data for %s. Skipping.", timeframe)
                 signals[timeframe] = "hold"
                 continue
 
-            # Prepare features
-            features = data.drop(columns=["date", "target"], errors="ignore")
             try:
-                signal = self.model.predict(features.tail(1))[0]  # Use last row for prediction
-                signals[timeframe] = signal
-            except Exception as e:
-                print(f"Error generating signal for {timeframe}: {e}")
+                features = self.feature_frame(data)
+            except ValueError as e:
+                logger.warning("Error generating signal for %s: %s", timeframe, e)
+                signals[timeframe] = "hold"
+                continue
+            signals[timeframe] = self.predict_signal(features.tail(1), timeframe, model)  # Use last row for prediction
+
+        return self.aggregate_signals(signals)
+
+    def generate_signal_at(self, aligned, i):
+        """
+        Generate the signal for one bar of time-aligned data without slicing DataFrames.
+        :param aligned: AlignedData (see backtesting.alignment)
+        :param i: Index of the base timeframe bar
+        :return: Aggregated signal ('buy', 'sell', 'hold')
+        """
+        model = self.model
+        matrices = self.compute_feature_matrices(aligned)
+        signals = {}
+        for timeframe in aligned.timeframes:
+            row = aligned.index[timeframe][i]
+            if row < 0:
                 signals[timeframe] = "hold"
+                continue
+
+            features = pd.DataFrame(matrices[timeframe][row:row + 1], columns=list(self.features))
+            signals[timeframe] = self.predict_signal(features, timeframe, model)
 
         return self.aggregate_signals(signals)
 
+    def predict_signal(self, features, timeframe, model=None):
+        """
+        Predict the signal for a single row of features.
+        :param features: One-row DataFrame of model features
+        :param timeframe: Timeframe label (for error reporting)
+        :param model: Model to use (default: self.model)
+        :return: Predicted signal, or 'hold' if the model cannot score the row
+        """
+        try:
+            return (model or self.model).predict(features)[0]
+        except Exception as e:
+            logger.warning("Error generating signal for %s: %s", timeframe, e)
+            return "hold"
+
+    def compute_feature_matrices(self, aligned):
+        """
+        Calculate the features of every row of every timeframe once and cache them.
+        :param aligned: AlignedData (see backtesting.alignment)
+        :return: Dictionary of feature matrices for each timeframe (one row per native row)
+        """
+        if self.features_source is aligned:
+            return self.feature_matrices
+        matrices = {}
+        for timeframe in aligned.timeframes:
+            highs, lows, closes = _price_arrays(aligned.columns[timeframe])
+            columns = compute_features(highs, lows, closes, self.features)
+            matrices[timeframe] = np.column_stack([columns[name] for name in self.features]) if len(closes) \
+                else np.empty((0, len(self.features)))
+        self.feature_matrices = matrices
+        self.features_source = aligned
+        return matrices
+
+    def precompute_predictions(self, aligned):
+        """
+        Predict every row of every timeframe with one model call per timeframe and cache the result.
+
+        If the model cannot score a whole timeframe at once, the rows with non-finite features are
+        set to 'hold' and the rest are scored again; if that also fails, the whole timeframe is
+        'hold', as it would be bar by bar.
+
+        :param aligned: AlignedData (see backtesting.alignment)
+        :return: Dictionary of prediction arrays for each timeframe (one entry per native row)
+        """
+        model = self.model  # One model for the whole run, even if a new version is activated meanwhile
+        matrices = self.compute_feature_matrices(aligned)
+        predictions = {}
+        for timeframe in aligned.timeframes:
+            matrix = matrices[timeframe]
+            predictions[timeframe] = np.full(len(matrix), "hold", dtype=object)
+            if len(matrix) == 0:
+                continue
+
+            features = pd.DataFrame(matrix, columns=list(self.features))
+            try:
+                predictions[timeframe][:] = model.predict(features)
+                continue
+            except Exception as e:
+                logger.warning("Error generating signals for %s: %s", timeframe, e)
+
+            try:
+                finite = np.isfinite(matrix.astype(float)).all(axis=1)
+            except (TypeError, ValueError):
+                continue
+            if finite.any() and not finite.all():
+                try:
+                    predictions[timeframe][finite] = model.predict(features[finite])
+                except Exception as e:
+                    logger.warning("Error generating signals for %s: %s", timeframe, e)
+
+        self.predictions = predictions
+        self.predictions_source = aligned
+        self.predictions_model = model
+        return predictions
+
+    def generate_signals(self, aligned):
+        """
+        Generate the aggregated signal for every base bar of time-aligned data.
+
+        Equivalent to calling generate_signal_at for every bar, but the model runs once per
+        timeframe and the votes are counted on whole arrays.
+
+        :param aligned: AlignedData (see backtesting.alignment)
+        :return: Numpy array of signal codes (see SIGNAL_CODES)
+        """
+        if self.predictions_source is not aligned or self.predictions_model is not self.model:
+            self.precompute_predictions(aligned)
+
+        buy_count = np.zeros(len(aligned), dtype=np.int64)
+        sell_count = np.zeros(len(aligned), dtype=np.int64)
+        for timeframe in aligned.timeframes:
+            rows = aligned.index[timeframe]
+            predictions = self.predictions[timeframe]
+            if len(predictions) == 0:
+                continue
+            signals = predictions[np.maximum(rows, 0)]
+            available = rows >= 0
+            buy_count += available & (signals == "buy")
+            sell_count += available & (signals == "sell")
+
+        codes = np.full(len(aligned), SIGNAL_CODES["hold"], dtype=np.int8)
+        codes[buy_count > sell_count] = SIGNAL_CODES["buy"]
+        codes[sell_count > buy_count] = SIGNAL_CODES["sell"]
+        return codes
+
     def aggregate_signals(self, signals):
         """
         Combine signals from multiple timeframes.
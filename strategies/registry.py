@@ -0,0 +1,145 @@
+import inspect
+from importlib import metadata
+from utils.lazy import import_object
+
+# Entry point group under which installed packages can publish strategies
+ENTRY_POINT_GROUP = "neuralagent.strategies"
+
+# Built-in strategies, as "module:Class" paths so a strategy's module (and its dependencies) is
+# only imported when that strategy is used
+STRATEGIES = {
+    "trend_following": "strategies.trend_following:TrendFollowingStrategy",
+    "mean_reversion": "strategies.mean_reversion:MeanReversionStrategy",
+    "multi_timeframe": "strategies.multi_timeframe_strategy:MultiTimeframeStrategy",
+    "ml": "strategies.trend_following:MLStrategy",
+}
+
+# Strategy created when a configuration names none
+DEFAULT_STRATEGY = "trend_following"
+
+_loaded = {}
+_entry_points_scanned = False
+
+
+def register_strategy(name, strategy):
+    """
+    Make a strategy available by name.
+
+    :param name: Strategy name (e.g., the configuration's strategy_type)
+    :param strategy: Strategy class, or its "module:Class" path to import on first use
+    """
+    STRATEGIES[name] = strategy
+    _loaded.pop(name, None)
+
+
+def _scan_entry_points():
+    """
+    Add the strategies published by installed packages (entry point group neuralagent.strategies),
+    without importing them.
+    """
+    global _entry_points_scanned
+    if _entry_points_scanned:
+        return
+    _entry_points_scanned = True
+    for entry_point in metadata.entry_points(group=ENTRY_POINT_GROUP):
+        STRATEGIES.setdefault(entry_point.name, entry_point.value)
+
+
+def available_strategies():
+    """
+    :return: Sorted names of every registered strategy
+    """
+    _scan_entry_points()
+    return sorted(STRATEGIES)
+
+
+def strategy_class(name):
+    """
+    The class of a registered strategy, importing its module on first use.
+
+    :param name: Strategy name
+    :return: Strategy class
+    """
+    strategy = _loaded.get(name)
+    if strategy is not None:
+        return strategy
+    if name not in STRATEGIES:
+        _scan_entry_points()
+    if name not in STRATEGIES:
+        raise ValueError(f"Unsupported strategy type: {name}. Choose from {available_strategies()}")
+
+    strategy = STRATEGIES[name]
+    if isinstance(strategy, str):
+        try:
+            strategy = import_object(strategy)
+        except ImportError as e:
+            raise ImportError(f"Strategy {name} could not be loaded from {STRATEGIES[name]}: {e}") from e
+    _loaded[name] = strategy
+    return strategy
+
+
+def create_strategy(name, *args, **kwargs):
+    """
+    Instantiate a registered strategy.
+    """
+    return strategy_class(name)(*args, **kwargs)
+
+
+def strategy_from_config(name, symbol, config, **overrides):
+    """
+    Instantiate a registered strategy with the configuration values its constructor takes.
+
+    :param name: Strategy name
+    :param symbol: The trading symbol (e.g., "EURUSD")
+    :param config: Configuration dictionary (e.g., stop_loss, take_profit, rsi_threshold)
+    :param overrides: Arguments that take precedence over the configuration (e.g., lot_size)
+    :return: Strategy instance
+    :raises ValueError: If the strategy is unknown or a required argument is missing
+    """
+    strategy = strategy_class(name)
+    values = {**config, "symbol": symbol, **overrides}
+    kwargs = {}
+    for parameter in inspect.signature(strategy).parameters.values():
+        if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+            continue
+        if parameter.name in values:
+            kwargs[parameter.name] = values[parameter.name]
+        elif parameter.default is parameter.empty:
+            raise ValueError(f"Strategy {name} needs a value for {parameter.name}")
+    return strategy(**kwargs)
+
+
+def build_strategy(config, symbol, **overrides):
+    """
+    Create the strategy a configuration asks for.
+
+    A "strategies" list runs several strategies as one StrategyGroup, which computes the indicators
+    they share only once; entries are strategy names or dictionaries with a "type", an optional
+    "name" and values that take precedence over the rest of the configuration, e.g.
+    ["mean_reversion", {"type": "mean_reversion", "name": "fast", "rsi_threshold": 40}].
+    Otherwise the configuration's strategy_type is created.
+
+    :param config: Configuration dictionary
+    :param symbol: The trading symbol (e.g., "EURUSD")
+    :param overrides: Arguments that take precedence over the configuration (e.g., lot_size)
+    :return: Strategy instance
+    :raises ValueError: If a strategy is unknown or misconfigured
+    :raises ImportError: If a strategy's module cannot be imported
+    """
+    entries = config.get("strategies")
+    if not entries:
+        return strategy_from_config(config.get("strategy_type", DEFAULT_STRATEGY), symbol, config, **overrides)
+
+    from strategies.group import StrategyGroup
+    shared = {key: value for key, value in config.items() if key not in ("strategies", "strategy_type")}
+    strategies = {}
+    for entry in entries:
+        entry = {"type": entry} if isinstance(entry, str) else dict(entry)
+        if "type" not in entry:
+            raise ValueError(f"Strategy entry without a type: {entry}")
+        name = base = entry.pop("name", entry["type"])
+        suffix = 2
+        while name in strategies:
+            name, suffix = f"{base}_{suffix}", suffix + 1
+        strategies[name] = strategy_from_config(entry.pop("type"), symbol, {**shared, **entry}, **overrides)
+    return StrategyGroup(strategies)
@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+import pandas as pd
+from backtesting.alignment import align_timeframes, timeframe_to_timedelta
+from strategies.multi_timeframe_strategy import MultiTimeframeStrategy
+
+
+class SignModel:
+    """
+    Stand-in model: 'buy' when the 20-bar mean is above the EMA, 'sell' otherwise (and while warming up).
+    """
+    def predict(self, features):
+        return np.where(features["Bollinger_Mid"].to_numpy() > features["EMA"].to_numpy(), "buy", "sell")
+
+
+def make_frame(start, periods, freq, seed):
+    rng = np.random.default_rng(seed)
+    opens = 1 + rng.normal(0, 0.01, periods)
+    closes = opens + rng.normal(0, 0.01, periods)
+    return pd.DataFrame({
+        "date": pd.date_range(start, periods=periods, freq=freq),
+        "open": opens,
+        "high": np.maximum(opens, closes) + 0.001,
+        "low": np.minimum(opens, closes) - 0.001,
+        "close": closes,
+        "target": rng.integers(0, 2, periods),
+    })
+
+
+class TestAlignment(unittest.TestCase):
+    def setUp(self):
+        self.data_dict = {
+            "1h": make_frame("2020-01-01", 72, "h", 1),
+            "4h": make_frame("2020-01-01", 18, "4h", 2),
+            "1d": make_frame("2020-01-01", 3, "D", 3).sample(frac=1, random_state=0),  # Unsorted on purpose
+        }
+
+    def test_timeframe_labels(self):
+        self.assertEqual(timeframe_to_timedelta("90m"), pd.Timedelta(minutes=90))
+        self.assertEqual(timeframe_to_timedelta("4h"), pd.Timedelta(hours=4))
+        self.assertEqual(timeframe_to_timedelta("1d"), pd.Timedelta(days=1))
+        with self.assertRaises(ValueError):
+            timeframe_to_timedelta("1fortnight")
+
+    def test_higher_timeframes_only_visible_after_close(self):
+        """
+        Test that every base bar sees the latest higher-timeframe bar that had closed by its own close.
+        """
+        aligned = align_timeframes(self.data_dict, base_timeframe="1h")
+        self.assertEqual(len(aligned), 72)
+
+        base_close = aligned.dates + np.timedelta64(1, "h")
+        for timeframe, duration in (("4h", np.timedelta64(4, "h")), ("1d", np.timedelta64(1, "D"))):
+            dates = aligned.columns[timeframe]["date"]
+            for i in range(len(aligned)):
+                closed = np.flatnonzero(dates + duration <= base_close[i])
+                expected = closed[-1] if len(closed) else -1
+                self.assertEqual(aligned.index[timeframe][i], expected)
+
+        # The first daily bar becomes visible on the last hour of the day
+        self.assertIsNone(aligned.value("1d", "close", 22))
+        self.assertEqual(aligned.value("1d", "close", 23), aligned.columns["1d"]["close"][0])
+        self.assertTrue(np.isnan(aligned.column("1d", "close")[:23]).all())
+
+    def test_generate_signal_at_matches_dataframe_rows(self):
+        """
+        Test that the O(1) aligned lookup gives the same signal as passing the history up to the matching rows.
+        """
+        aligned = align_timeframes(self.data_dict, base_timeframe="1h")
+        strategy = MultiTimeframeStrategy("EURUSD")
+        strategy.model = SignModel()
+
+        for i in range(len(aligned)):
+            rows = {}
+            for timeframe, df in aligned.frames.items():
+                row = aligned.index[timeframe][i]
+                rows[timeframe] = df.iloc[:row + 1] if row >= 0 else df.iloc[0:0]
+            self.assertEqual(strategy.generate_signal_at(aligned, i), strategy.generate_signal(rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
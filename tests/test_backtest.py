@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from backtest import Backtest
+from backtesting.engine import BacktestEngine
+from strategies.base_strategy import BaseStrategy, SIGNAL_CODES
+from strategies.mean_reversion import MeanReversionStrategy
+
+
+class ThresholdStrategy:
+    """
+    Per-bar strategy that reads the latest 1h close from one-row slices.
+    """
+    def generate_signal(self, data_dict):
+        close = data_dict["1h"]["close"].iloc[-1]
+        if close < 0.99:
+            return "buy"
+        elif close > 1.01:
+            return "sell"
+        return "hold"
+
+
+def make_data(bars=400, seed=5):
+    rng = np.random.default_rng(seed)
+    closes = 1 + 0.02 * np.sin(np.arange(bars) / 15) + np.cumsum(rng.normal(0, 0.0005, bars))
+    return pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=bars, freq="h"),
+        "open": np.concatenate(([1.0], closes[:-1])),
+        "high": closes + 0.002,
+        "low": closes - 0.002,
+        "close": closes,
+    })
+
+
+class TestBacktestEngine(unittest.TestCase):
+    def test_sells_close_most_recent_buy(self):
+        """
+        Test that sells pair with the latest open buy and sells without an open buy are ignored.
+        """
+        signals = np.array([-1, 1, 1, 0, -1, -1, -1, 1])
+        closes = np.array([5.0, 1.0, 2.0, 3.0, 4.0, 6.0, 7.0, 8.0])
+        result = BacktestEngine(initial_balance=100).run(signals, closes)
+
+        np.testing.assert_array_equal(result.entries, [2, 1])
+        np.testing.assert_array_equal(result.exits, [4, 5])
+        np.testing.assert_array_equal(result.open_entries, [7])
+        np.testing.assert_array_equal(result.equity_curve, [100, 100, 100, 100, 100, 102, 107, 107, 107])
+        self.assertEqual(result.final_balance, 107)
+
+    def test_next_open_fills(self):
+        """
+        Test that next-open fills use the following bar's open and skip a signal on the last bar.
+        """
+        signals = np.array([1, -1, 0, 1])
+        closes = np.array([1.0, 2.0, 3.0, 4.0])
+        opens = np.array([0.5, 1.5, 2.5, 3.5])
+        result = BacktestEngine(initial_balance=0, fill="next_open").run(signals, closes, opens)
+        np.testing.assert_array_equal(result.profits, [1.0])
+        self.assertEqual(len(result.open_entries), 0)
+
+    @patch.object(Backtest, "plot_equity_curve")
+    def test_run_matches_per_row_loop(self, _):
+        """
+        Test that Backtest.run gives the same trades and balances as the original per-row loop.
+        """
+        data_dict = {"1h": make_data()}
+        strategy = ThresholdStrategy()
+
+        balance, equity_curve, trades = 1000, [1000], []
+        for i in range(len(data_dict["1h"])):
+            current_data = {tf: df.iloc[i:i + 1] for tf, df in data_dict.items()}
+            signal = strategy.generate_signal(current_data)
+            if signal == "buy":
+                trades.append({"type": "buy", "price": current_data["1h"]["close"].iloc[-1]})
+            elif signal == "sell" and trades:
+                last_trade = trades.pop()
+                balance += current_data["1h"]["close"].iloc[-1] - last_trade["price"]
+            equity_curve.append(balance)
+
+        backtest = Backtest(symbol="EURUSD", timeframes=["1h"], initial_balance=1000)
+        result = backtest.run(strategy, data_dict)
+        self.assertGreater(len(result.exits), 0)
+        self.assertEqual(backtest.balance, balance)
+        self.assertEqual(backtest.equity_curve, equity_curve)
+        self.assertEqual(backtest.trades, trades)
+
+    def test_vectorized_signals_match_replayed_setup(self):
+        """
+        Test that the vectorized mean reversion signals match replaying setup() on every prefix.
+        """
+        data = make_data(bars=300, seed=9)
+        market_data = {"highs": data["high"].to_numpy(), "lows": data["low"].to_numpy(),
+                       "closes": data["close"].to_numpy()}
+        strategy = MeanReversionStrategy(symbol="EURUSD", lot_size=0.1, stop_loss=50, take_profit=100,
+                                         rsi_threshold=45, bollinger_period=20, bollinger_std_dev=1)
+        vectorized = strategy.generate_signals(market_data)
+        replayed = BaseStrategy.generate_signals(strategy, market_data)
+        self.assertTrue(np.any(vectorized != 0))
+        np.testing.assert_array_equal(vectorized, replayed)
+
+        # The signal never reads an EMA, so its period changes nothing (not even the warm-up)
+        strategy.ema_period = 500
+        np.testing.assert_array_equal(strategy.generate_signals(market_data), vectorized)
+        # setup() on a short prefix needs no EMA warm-up either, and gives the vectorized signal
+        end = int(np.flatnonzero(vectorized)[0]) + 1
+        self.assertLess(end, strategy.ema_period)
+        strategy.setup({key: values[:end] for key, values in market_data.items()})
+        self.assertEqual(SIGNAL_CODES[strategy.generate_signal()], vectorized[end - 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+from benchmarks.__main__ import main
+from benchmarks.data import synthetic_ohlc
+from benchmarks.suite import compare, run_benchmarks, time_callable
+
+
+def make_results(**seconds):
+    return {"results": {key: {"median": value} for key, value in seconds.items()}}
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_synthetic_bars_are_valid_candles(self):
+        data = synthetic_ohlc(1000, seed=4)
+        self.assertTrue((data["high"] >= data[["open", "close"]].max(axis=1)).all())
+        self.assertTrue((data["low"] <= data[["open", "close"]].min(axis=1)).all())
+        np.testing.assert_array_equal(data["open"].to_numpy()[1:], data["close"].to_numpy()[:-1])
+        self.assertTrue(data.equals(synthetic_ohlc(1000, seed=4)))
+
+    def test_runs_every_benchmark_on_small_data(self):
+        """
+        Test that every benchmark sets up and runs, and is skipped above its maximum size.
+        """
+        results = run_benchmarks(sizes=[300], min_time=0.0, max_repeats=3, progress=None)
+        self.assertIn("backtest_run@300", results["results"])
+        self.assertIn("ml_predict_one@300", results["results"])
+        for result in results["results"].values():
+            self.assertGreater(result["median"], 0)
+            self.assertEqual(result["bars"], 300)
+        with self.assertRaises(ValueError):
+            run_benchmarks(sizes=[300], names=["unknown"], progress=None)
+
+    def test_warm_up_call_is_never_a_sample(self):
+        """
+        Test that a slow first call (e.g. a lazy import) is not measured, even when it alone exceeds min_time.
+        """
+        calls = []
+
+        def operation():
+            calls.append(True)
+            if len(calls) == 1:
+                time.sleep(0.2)
+
+        timing = time_callable(operation, min_time=0.1)
+        self.assertLess(timing["median"], 0.01)
+        self.assertLess(timing["mean"], 0.01)
+        self.assertGreater(len(calls), 1)
+
+    def test_compare_flags_regressions(self):
+        """
+        Test that only slowdowns beyond the threshold are regressions, and that the CLI exits with 1 on them.
+        """
+        baseline = make_results(**{"rsi@1k": 1.0, "sar@1k": 1.0, "ema@1k": 1.0, "atr@1k": 1.0})
+        current = make_results(**{"rsi@1k": 1.05, "sar@1k": 1.5, "ema@1k": 0.5, "store_read@1k": 1.0})
+        statuses = dict(compare(baseline, current, threshold=0.1)[["benchmark", "status"]].values)
+        self.assertEqual(statuses, {"rsi@1k": "ok", "sar@1k": "regression", "ema@1k": "improvement",
+                                    "atr@1k": "missing", "store_read@1k": "new"})
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name) for name in ("baseline.json", "current.json")]
+            for path, results in zip(paths, (baseline, current)):
+                with open(path, "w") as file:
+                    json.dump(results, file)
+            self.assertEqual(main(["compare", *paths, "--threshold", "0.6"]), 0)
+            self.assertEqual(main(["compare", *paths]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
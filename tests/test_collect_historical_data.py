@@ -0,0 +1,117 @@
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+import numpy as np
+
+RATE_DTYPE = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+              ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")]
+
+
+class FakeMT5(types.ModuleType):
+    """
+    In-process stand-in for the MetaTrader5 package serving a fixed hourly history.
+    """
+    TIMEFRAME_H1 = 16385
+    TIMEFRAME_H4 = 16388
+    TIMEFRAME_D1 = 16408
+
+    def __init__(self, bars=200, delay=0.0):
+        super().__init__("MetaTrader5")
+        self.bars = bars
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        start = int(datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp())
+        self.times = start + 3600 * np.arange(bars)
+
+    def initialize(self):
+        return True
+
+    def shutdown(self):
+        return True
+
+    def last_error(self):
+        return (1, "Success")
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        self.requests.append((symbol, timeframe, date_from, date_to))
+        mask = (self.times >= int(date_from.timestamp())) & (self.times <= int(date_to.timestamp()))
+        rates = np.zeros(int(mask.sum()), dtype=RATE_DTYPE)
+        rates["time"] = self.times[mask]
+        rates["close"] = 1.1 + 0.0001 * np.flatnonzero(mask)
+        rates["open"] = rates["high"] = rates["low"] = rates["close"]
+        with self.lock:
+            self.active -= 1
+        return rates
+
+
+# The MetaTrader5 package is imported at module level; a fake stands in while importing
+_install_fake = "MetaTrader5" not in sys.modules
+if _install_fake:
+    sys.modules["MetaTrader5"] = FakeMT5()
+from utils import collect_historical_data as collector  # noqa: E402
+if _install_fake:
+    del sys.modules["MetaTrader5"]
+from utils.market_data_store import MarketDataStore  # noqa: E402
+
+
+class TestCollectHistoricalData(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = MarketDataStore(self.directory.name)
+        self.start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_second_sync_fetches_only_new_bars(self):
+        fake = FakeMT5(bars=200)
+        with patch.object(collector, "mt5", fake):
+            first_end = datetime.fromtimestamp(int(fake.times[99]), tz=timezone.utc)
+            self.assertEqual(collector.sync_series(self.store, "EURUSD", "1h", fake.TIMEFRAME_H1,
+                                                   self.start, first_end), 100)
+            end = datetime.fromtimestamp(int(fake.times[-1]), tz=timezone.utc)
+            self.assertEqual(collector.sync_series(self.store, "EURUSD", "1h", fake.TIMEFRAME_H1,
+                                                   self.start, end), 100)
+
+        # The second request starts at the last stored bar, not at the start date
+        self.assertEqual(fake.requests[1][2], first_end)
+        stored = self.store.read("EURUSD", "1h")
+        self.assertEqual(len(stored), 200)
+        self.assertTrue(stored["time"].is_unique)
+        self.assertTrue(stored["time"].is_monotonic_increasing)
+
+    def test_sync_all_runs_series_concurrently(self):
+        fake = FakeMT5(bars=50, delay=0.05)
+        timeframes = {"1h": fake.TIMEFRAME_H1, "4h": fake.TIMEFRAME_H4}
+        end = datetime.fromtimestamp(int(fake.times[-1]), tz=timezone.utc)
+        with patch.object(collector, "mt5", fake):
+            results = collector.sync_all(self.store, ["EURUSD", "GBPUSD"], timeframes, self.start, end,
+                                         max_concurrency=2)
+            self.assertEqual(set(results.values()), {50})
+            # Nothing new on the next run
+            results = collector.sync_all(self.store, ["EURUSD", "GBPUSD"], timeframes, self.start, end,
+                                         max_concurrency=2)
+            self.assertEqual(set(results.values()), {0})
+
+        self.assertEqual(len(fake.requests), 8)
+        # MT5 calls are serialized even though the series are synced by several threads
+        self.assertEqual(fake.max_active, 1)
+        for symbol in ("EURUSD", "GBPUSD"):
+            for label in timeframes:
+                self.assertEqual(self.store.info(symbol, label)["rows"], 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from models.compiled_forest import CompiledForest
+from models.ml_model import MLModel
+
+
+def make_data(rows=600, seed=5):
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame(rng.normal(size=(rows, 4)), columns=["rsi", "macd", "signal", "atr"])
+    score = features["rsi"] + 0.5 * features["macd"] * features["atr"] + rng.normal(0, 0.5, rows)
+    target = np.where(score > 0.5, "buy", np.where(score < -0.5, "sell", "hold"))
+    return features, target
+
+
+class TestCompiledForest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.features, cls.target = make_data()
+        cls.model = RandomForestClassifier(n_estimators=20, random_state=1).fit(cls.features, cls.target)
+        cls.compiled = CompiledForest.from_sklearn(cls.model)
+
+    def test_matches_sklearn(self):
+        """
+        Test that single-vector and batch outputs equal the sklearn model's, including on unseen rows.
+        """
+        rows, _ = make_data(rows=200, seed=6)
+        self.compiled.verify(self.model, rows)
+        expected = self.model.predict_proba(rows)
+        for i, vector in enumerate(rows.to_numpy()):
+            np.testing.assert_allclose(self.compiled.predict_proba_one(vector), expected[i], rtol=0, atol=1e-12)
+            self.assertEqual(self.compiled.predict_one(list(vector)), self.model.predict(rows.iloc[[i]])[0])
+
+    def test_save_and_load_round_trip(self):
+        """
+        Test that a saved compiled forest predicts the same after loading.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "forest.npz")
+            self.compiled.save(path)
+            loaded = CompiledForest.load(path)
+        self.assertEqual(loaded.feature_names, ["rsi", "macd", "signal", "atr"])
+        np.testing.assert_array_equal(loaded.predict(self.features), self.model.predict(self.features))
+
+    def test_verify_detects_mismatch(self):
+        """
+        Test that verify() raises when the compiled forest does not match the model.
+        """
+        other = RandomForestClassifier(n_estimators=20, random_state=2).fit(self.features, self.target)
+        with self.assertRaises(ValueError):
+            self.compiled.verify(other, self.features)
+
+
+class TestMLModelCompiled(unittest.TestCase):
+    def test_train_exports_a_checked_predictor(self):
+        """
+        Test that train() compiles the forest and predict_one() agrees with predict().
+        """
+        features, target = make_data(rows=300)
+        data = features.assign(target=target, Date=pd.date_range("2024-01-01", periods=len(features)))
+        model = MLModel()
+        model.train(data)
+        self.assertIsNotNone(model.compiled)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = model.export_compiled(os.path.join(directory, "ml_model.npz"))
+            served = MLModel()
+            served.load_compiled(path)
+        self.assertEqual(served.get_feature_names(), list(features.columns))
+        predictions = model.predict(features.iloc[:50])
+        for vector, expected in zip(features.iloc[:50].to_numpy(), predictions):
+            self.assertEqual(served.predict_one(vector), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from utils.data_pipeline import (CleanStage, CsvSink, FeatureStage, FrameSink, IndicatorStage, OutOfOrderError,
+                                 Pipeline, SortDedupeStage, StoreSink, preparation_pipeline, rolling_rsi)
+from utils.data_preparation import DataPreparer
+from utils.market_data_store import MarketDataStore
+
+
+def make_raw(rows=1000, seed=5):
+    rng = np.random.default_rng(seed)
+    closes = 1.1 + np.cumsum(rng.normal(0, 0.001, rows))
+    return pd.DataFrame({
+        "time": pd.date_range("2021-01-01", periods=rows, freq="h").strftime("%Y-%m-%d %H:%M:%S"),
+        "open": closes, "high": closes + 0.001, "low": closes - 0.001, "close": closes,
+        "tick_volume": rng.integers(100, 1000, rows),
+    })
+
+
+def prepare_whole(raw):
+    """
+    Reference result: the whole file cleaned, sorted and de-duplicated at once.
+    """
+    data = raw.rename(columns={"time": "date"})
+    data["date"] = pd.to_datetime(data["date"], errors="coerce")
+    data = data.dropna(subset=["date", "open", "high", "low", "close"])
+    data = data.sort_values("date", kind="stable").drop_duplicates(subset="date", keep="last").reset_index(drop=True)
+    data["RSI"] = rolling_rsi(data["close"], 14)
+    data["EMA"] = data["close"].ewm(span=14, adjust=False).mean()
+    return data
+
+
+def chunks(frame, size):
+    return (frame.iloc[start:start + size] for start in range(0, len(frame), size))
+
+
+class TestDataPipeline(unittest.TestCase):
+    def test_chunked_run_matches_whole_file(self):
+        raw = make_raw()
+        raw.loc[10, "close"] = np.nan                              # Dropped by the cleaner
+        raw.loc[20, "time"] = "not a date"                         # Dropped by the cleaner
+        raw = pd.concat([raw, raw.iloc[[299]]]).sort_index(kind="stable").reset_index(drop=True)  # Duplicate on a chunk edge
+        raw.iloc[[500, 501]] = raw.iloc[[501, 500]].to_numpy()    # Out of order across a chunk edge
+
+        sink = FrameSink()
+        rows = preparation_pipeline([sink]).run(chunks(raw, 100))
+        expected = prepare_whole(raw)
+
+        self.assertEqual(rows, len(expected))
+        pd.testing.assert_frame_equal(sink.frame.drop(columns=["RSI", "EMA"]), expected.drop(columns=["RSI", "EMA"]))
+        np.testing.assert_allclose(sink.frame["RSI"], expected["RSI"], rtol=1e-9)
+        np.testing.assert_allclose(sink.frame["EMA"], expected["EMA"], rtol=0, atol=0)
+
+    def test_feature_stage_carries_lookback(self):
+        data = prepare_whole(make_raw(300))
+        features = {"return_5": lambda frame: frame["close"].pct_change(5)}
+        sink = FrameSink()
+        Pipeline([FeatureStage(features, lookback=5)], [sink]).run(chunks(data, 7))
+        np.testing.assert_allclose(sink.frame["return_5"], data["close"].pct_change(5))
+
+    def test_failed_run_keeps_previous_outputs(self):
+        """
+        Test that sinks only publish complete runs and discard what a failing run wrote.
+        """
+        def failing(frames):
+            yield from frames
+            raise IOError("read failed")
+
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "EURUSD_1h.csv")
+            store = MarketDataStore(os.path.join(root, "store"))
+            preparation_pipeline([CsvSink(path), StoreSink(store, "EURUSD", "1h")]).run(chunks(make_raw(300), 100))
+
+            with self.assertRaises(IOError):
+                preparation_pipeline([CsvSink(path), StoreSink(store, "EURUSD", "1h")]).run(
+                    failing(chunks(make_raw(1000, seed=9), 100)))
+            self.assertEqual(len(pd.read_csv(path)), 300)
+            self.assertEqual(len(store.read("EURUSD", "1h")), 300)
+            self.assertEqual(sorted(os.listdir(root)), ["EURUSD_1h.csv", "store"])
+            self.assertEqual(sorted(os.listdir(store.path("EURUSD", "1h"))), ["1", "index.json"])
+
+    def test_late_rows_are_never_dropped(self):
+        """
+        Test that rows too late to sort while streaming (across chunk boundaries, and a correction
+        of an already written date) fail the streamed run, and that a CSV file is then sorted whole.
+        """
+        raw = make_raw(300)
+        late = raw.iloc[[50]].assign(close=2.0)                    # Correction of a written bar: it wins
+        raw = pd.concat([raw.iloc[:200], raw.iloc[[30]], raw.iloc[200:], late], ignore_index=True)
+        expected = prepare_whole(raw)
+
+        sink = FrameSink()
+        pipeline = Pipeline([CleanStage(), SortDedupeStage(holdback=10), IndicatorStage()], [sink])
+        with self.assertRaises(OutOfOrderError):
+            pipeline.run(chunks(raw, 100))
+        self.assertIsNone(sink.frame)
+
+        with tempfile.TemporaryDirectory() as root:
+            source, target = os.path.join(root, "raw.csv"), os.path.join(root, "EURUSD_1h.csv")
+            raw.to_csv(source, index=False)
+            pipeline = Pipeline([CleanStage(), SortDedupeStage(holdback=10), IndicatorStage()],
+                                [sink, CsvSink(target)])
+            with self.assertLogs("utils.data_pipeline", level="WARNING") as logs:
+                rows = pipeline.run_csv(source, chunksize=100)
+            self.assertIn("sorting the whole file", logs.output[0])
+            self.assertEqual(rows, len(expected))
+            self.assertEqual(len(pd.read_csv(target)), len(expected))
+        pd.testing.assert_frame_equal(sink.frame.drop(columns=["RSI", "EMA"]), expected.drop(columns=["RSI", "EMA"]))
+        self.assertEqual(sink.frame["close"].iloc[50], 2.0)
+        np.testing.assert_allclose(sink.frame["RSI"], expected["RSI"], rtol=1e-9)
+
+        # The default holdback absorbs the same disorder while streaming
+        sink = FrameSink()
+        self.assertEqual(preparation_pipeline([sink]).run(chunks(raw, 100)), len(expected))
+        pd.testing.assert_frame_equal(sink.frame.drop(columns=["RSI", "EMA"]), expected.drop(columns=["RSI", "EMA"]))
+
+    def test_prepare_all_in_parallel_without_temp_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            input_dir, output_dir = os.path.join(root, "data"), os.path.join(root, "prepared")
+            os.makedirs(input_dir)
+            raws = {"EURUSD_1h.csv": make_raw(seed=1), "GBPUSD_1h.csv": make_raw(seed=2)}
+            for name, raw in raws.items():
+                raw.to_csv(os.path.join(input_dir, name), index=False)
+            store = MarketDataStore(os.path.join(root, "store"))
+
+            preparer = DataPreparer(input_dir, output_dir, store=store, chunksize=128, max_workers=2)
+            results = preparer.prepare_all()
+
+            self.assertEqual(sorted(results.values()), [1000, 1000])
+            self.assertEqual(sorted(os.listdir(root)), ["data", "prepared", "store"])
+            for name, raw in raws.items():
+                prepared = pd.read_csv(os.path.join(output_dir, name))
+                expected = prepare_whole(raw)
+                self.assertEqual(prepared.columns.tolist(), expected.columns.tolist())
+                np.testing.assert_allclose(prepared["EMA"], expected["EMA"])
+                np.testing.assert_allclose(prepared["RSI"], expected["RSI"], rtol=1e-9)
+
+                stored = store.read(*os.path.splitext(name)[0].split("_"))
+                np.testing.assert_allclose(stored["RSI"], expected["RSI"], rtol=1e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from indicators.features import DEFAULT_FEATURES, compute_features, create_feature_streams, feature_vector
+from utils.feature_store import FeatureStore
+
+
+def make_prices(bars=600, seed=11):
+    rng = np.random.default_rng(seed)
+    closes = 1.1 + np.cumsum(rng.normal(0, 0.001, bars))
+    return pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=bars, freq="h"),
+        "high": closes + rng.uniform(0, 0.001, bars),
+        "low": closes - rng.uniform(0, 0.001, bars),
+        "close": closes,
+    })
+
+
+class TestFeatureStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = FeatureStore(os.path.join(self.directory.name, "features"))
+        self.prices = make_prices()
+        self.expected = compute_features(self.prices["high"], self.prices["low"], self.prices["close"])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_matches_full_computation(self, stored):
+        for name, values in self.expected.items():
+            np.testing.assert_allclose(stored[name], values[:len(stored)], rtol=1e-12, atol=1e-12)
+
+    def test_extends_incrementally_like_a_full_computation(self):
+        """
+        Test that new bars only compute new rows and give the values of a full recomputation.
+        """
+        self.assertEqual(self.store.materialize("EURUSD", "1h", self.prices.iloc[:400]), 400)
+        self.assertEqual(self.store.materialize("EURUSD", "1h", self.prices.iloc[:550]), 150)
+        rows = self.store.extend("EURUSD", "1h", self.prices["date"][500:], self.prices["high"][500:],
+                                 self.prices["low"][500:], self.prices["close"][500:])
+        self.assertEqual(len(rows), 50)
+        self.assertEqual(self.store.materialize("EURUSD", "1h", self.prices), 0)
+
+        stored = self.store.read("EURUSD", "1h")
+        self.assertEqual(len(stored), len(self.prices))
+        self.assertEqual(stored.columns.tolist(), ["date"] + list(DEFAULT_FEATURES))
+        self.assert_matches_full_computation(stored)
+
+    def test_ranges_inside_the_matrix_are_served_from_it(self):
+        """
+        Test that a later window reuses the stored values, and an earlier start rebuilds the matrix.
+        """
+        self.store.materialize("EURUSD", "1h", self.prices.iloc[100:])
+        window = self.prices.iloc[300:350]
+        self.assertEqual(self.store.materialize("EURUSD", "1h", window), 0)
+        with_features = self.store.with_features("EURUSD", "1h", window)
+        stored = self.store.read("EURUSD", "1h", start=window["date"].iloc[0], end=window["date"].iloc[-1])
+        np.testing.assert_array_equal(with_features["RSI"], stored["RSI"])
+
+        self.assertEqual(self.store.materialize("EURUSD", "1h", self.prices), len(self.prices))
+        self.assertEqual(self.store.info("EURUSD", "1h")["start"], self.prices["date"].iloc[0].isoformat())
+
+        # Other definitions are cached separately
+        rsi_only = {"RSI": ("rsi", {"period": 7})}
+        self.store.materialize("EURUSD", "1h", self.prices, features=rsi_only)
+        self.assertNotEqual(self.store.path("EURUSD", "1h", rsi_only), self.store.path("EURUSD", "1h"))
+        self.assertEqual(self.store.read("EURUSD", "1h", features=rsi_only).columns.tolist(), ["date", "RSI"])
+
+    def test_changed_history_is_recomputed(self):
+        """
+        Test that bars differing from the stored ones are not extended from the stale state.
+        """
+        self.store.materialize("EURUSD", "1h", self.prices.iloc[:300])
+        changed = self.prices.copy()
+        changed.loc[299, "close"] += 0.01
+        self.assertEqual(self.store.materialize("EURUSD", "1h", changed), len(changed))
+
+    def test_rebuilds_publish_a_new_generation(self):
+        """
+        Test that a rebuild leaves the arrays mapped by readers intact and keeps one previous generation,
+        and that matrices in the flat layout of older versions are still read and then replaced.
+        """
+        self.store.materialize("EURUSD", "1h", self.prices.iloc[:300])
+        path = self.store.path("EURUSD", "1h")
+        # Move the columns next to index.json, as older versions stored them
+        for name in os.listdir(os.path.join(path, "1")):
+            os.rename(os.path.join(path, "1", name), os.path.join(path, name))
+        os.rmdir(os.path.join(path, "1"))
+        index = self.store.info("EURUSD", "1h")
+        del index["generation"]
+        self.store._write_index(path, index)
+        mapped = self.store.read_arrays("EURUSD", "1h")["RSI"]
+        expected = np.array(mapped)
+        self.assert_matches_full_computation(self.store.read("EURUSD", "1h"))
+
+        for generation in (1, 2, 3):
+            self.store.materialize("EURUSD", "1h", self.prices, rebuild=True)
+            self.assertEqual(self.store.info("EURUSD", "1h")["generation"], generation)
+        np.testing.assert_array_equal(mapped, expected)
+        self.assertEqual(sorted(os.listdir(path)), ["2", "3", "index.json"])
+        self.assert_matches_full_computation(self.store.read("EURUSD", "1h"))
+
+    def test_live_streams_give_the_stored_row(self):
+        """
+        Test that the streams used live produce the same feature vector as the stored matrix.
+        """
+        streams = create_feature_streams()
+        for stream in streams.values():
+            stream.warm_up(self.prices["high"], self.prices["low"], self.prices["close"])
+        self.store.materialize("EURUSD", "1h", self.prices)
+        last = self.store.read("EURUSD", "1h").iloc[-1]
+        np.testing.assert_allclose(feature_vector(streams), last[list(DEFAULT_FEATURES)].to_numpy(float),
+                                   rtol=1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -59,6 +59,60 @@ class TestIndicators(unittest.TestCase):
         self.assertIsInstance(sar_value, float, "SAR should return a float value")
         print(f"SAR Value: {sar_value}")
 
+    def test_series_matches_scalar(self):
+        """
+        Test that every element of the series mode equals the scalar result on the prefix.
+        """
+        rng = np.random.default_rng(7)
+        closes = 1.1 + np.cumsum(rng.normal(0, 0.001, 60))
+        highs = closes + rng.uniform(0, 0.001, 60)
+        lows = closes - rng.uniform(0, 0.001, 60)
+
+        rsi = RSI.calculate(closes, 14, series=True)
+        ema = EMA.calculate(closes, 14, series=True)
+        atr = ATR.calculate(highs, lows, closes, 14, series=True)
+        sar = SAR.calculate(highs, lows, series=True)
+        self.assertTrue(np.isnan(rsi[:13]).all() and np.isnan(ema[:13]).all() and np.isnan(atr[:13]).all())
+        self.assertTrue(np.isnan(sar[0]))
+
+        for end in range(14, len(closes) + 1):
+            self.assertAlmostEqual(rsi[end - 1], RSI.calculate(closes[:end], 14), places=9)
+            self.assertAlmostEqual(ema[end - 1], EMA.calculate(closes[:end], 14), places=12)
+            self.assertAlmostEqual(atr[end - 1], ATR.calculate(highs[:end], lows[:end], closes[:end], 14), places=12)
+        for end in range(2, len(closes) + 1):
+            self.assertEqual(sar[end - 1], SAR.calculate(highs[:end], lows[:end]))
+
+    def test_scalar_matches_reference_loop(self):
+        """
+        Test that the scalar results are bit-for-bit identical to the element-by-element recursions.
+        """
+        rng = np.random.default_rng(11)
+        closes = 1.1 + np.cumsum(rng.normal(0, 0.001, 200))
+        highs = closes + rng.uniform(0, 0.001, 200)
+        lows = closes - rng.uniform(0, 0.001, 200)
+        period = 14
+
+        deltas = np.diff(closes)
+        gains = np.where(deltas > 0, deltas, 0)
+        losses = np.where(deltas < 0, -deltas, 0)
+        avg_gain, avg_loss = np.mean(gains[:period]), np.mean(losses[:period])
+        for i in range(period, len(closes) - 1):
+            avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+            avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+        self.assertEqual(RSI.calculate(closes, period), 100 - (100 / (1 + avg_gain / avg_loss)))
+
+        ema = closes[0]
+        for price in closes[1:]:
+            ema = (price - ema) * (2 / (period + 1)) + ema
+        self.assertEqual(EMA.calculate(closes, period), ema)
+
+        true_ranges = np.array([max(highs[i] - lows[i], abs(highs[i] - closes[i - 1]), abs(lows[i] - closes[i - 1]))
+                                for i in range(1, len(highs))])
+        atr = np.mean(true_ranges[:period])
+        for i in range(period, len(true_ranges)):
+            atr = (atr * (period - 1) + true_ranges[i]) / period
+        self.assertEqual(ATR.calculate(highs, lows, closes, period), atr)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from live.latency import DecisionLatencyLog, LatencyHistogram, LatencyMetrics, bucket_index, bucket_upper
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_buckets_cover_every_duration(self):
+        """
+        Test that every duration falls into the bucket whose range contains it.
+        """
+        rng = np.random.default_rng(0)
+        values = list(range(200)) + rng.integers(1, 1 << 40, 2000).tolist()
+        for value in values:
+            index = bucket_index(value)
+            self.assertLessEqual(value, bucket_upper(index))
+            if index:
+                self.assertGreater(value, bucket_upper(index - 1))
+
+        # The buffered values are bucketed the same way
+        histogram = LatencyHistogram("fetch")
+        for value in values:
+            histogram.record(value)
+        histogram.drain()
+        expected = np.bincount([bucket_index(value) for value in values], minlength=len(histogram.counts))
+        np.testing.assert_array_equal(histogram.counts, expected)
+
+    def test_percentiles_are_within_bucket_resolution(self):
+        """
+        Test that percentiles match numpy's within the 1/16 bucket width.
+        """
+        durations = np.random.default_rng(1).lognormal(11, 1, 20_000).astype(np.int64)
+        histogram = LatencyHistogram("fetch")
+        for duration in durations.tolist():
+            histogram.record(duration)
+
+        for quantile in (0.5, 0.9, 0.99):
+            expected = np.percentile(durations, quantile * 100)
+            self.assertAlmostEqual(histogram.percentile(quantile) / expected, 1, delta=1 / 16)
+        self.assertEqual(histogram.counts.sum(), 20_000)  # Every full buffer and the rest were bucketed
+        summary = histogram.summary()
+        self.assertEqual(summary["count"], 20_000)
+        self.assertEqual(summary["max_us"], durations.max() / 1000)
+        self.assertAlmostEqual(summary["mean_us"], durations.mean() / 1000)
+
+
+class TestLatencyMetrics(unittest.TestCase):
+    def test_disabled_metrics_record_nothing(self):
+        """
+        Test that disabled spans record nothing, that functions decorated while disabled are left
+        unwrapped, and that enabling metrics afterwards warns about them.
+        """
+        metrics = LatencyMetrics()
+
+        def signal():
+            return "buy"
+
+        self.assertIs(metrics.timed("signal")(signal), signal)
+        with metrics.span("setup"):
+            pass
+        self.assertIs(metrics.span("setup"), metrics.span("fetch"))
+        self.assertEqual(metrics.histograms, {})
+
+        with self.assertLogs("live.latency", "WARNING") as logs:
+            metrics.enable()
+        self.assertIn("signal", logs.output[0])
+        self.assertIsNot(metrics.timed("signal")(signal), signal)
+
+    def test_spans_are_reused_and_nest(self):
+        """
+        Test that a thread reuses its span objects, and that nested spans of one name time separately.
+        """
+        metrics = LatencyMetrics(enabled=True)
+        with metrics.span("setup") as outer:
+            with metrics.span("setup") as inner:
+                self.assertIsNot(inner, outer)
+        self.assertIs(metrics.span("setup"), outer)
+        self.assertEqual(metrics.histograms["setup"].count, 2)
+        self.assertGreaterEqual(metrics.histograms["setup"].max, metrics.histograms["setup"].total / 2)
+
+    def test_spans_decorators_and_exports(self):
+        """
+        Test that spans and decorated functions are recorded and exported to Prometheus and the log.
+        """
+        metrics = LatencyMetrics(enabled=True)
+
+        @metrics.timed()
+        def signal():
+            return "buy"
+
+        for _ in range(10):
+            with metrics.span("setup"):
+                self.assertEqual(signal(), "buy")
+        with self.assertRaises(ValueError):
+            with metrics.span("setup"):
+                raise ValueError("failed setup")
+
+        summary = metrics.summary()
+        self.assertEqual(summary["setup"]["count"], 11)
+        self.assertEqual(summary[signal.__qualname__]["count"], 10)
+        self.assertIn("setup: n=11", metrics.format_summary())
+
+        text = metrics.prometheus()
+        self.assertIn("# TYPE neuralagent_span_seconds summary", text)
+        self.assertIn('neuralagent_span_seconds{span="setup",quantile="0.99"} ', text)
+        self.assertIn('neuralagent_span_seconds_count{span="setup"} 11', text)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.prom")
+            metrics.write_prometheus(path)
+            with open(path) as file:
+                self.assertEqual(file.read(), text)
+
+    def test_decision_latencies_feed_the_histograms(self):
+        """
+        Test that live decisions recorded by DecisionLatencyLog also land in the shared histograms.
+        """
+        from live import latency
+        metrics, latency.METRICS = latency.METRICS, LatencyMetrics(enabled=True)
+        try:
+            DecisionLatencyLog(budget=0.1).record("EURUSD", 0, "buy", 0.002, 0.001, 0.0005)
+            self.assertEqual(latency.METRICS.histograms["decision_total"].count, 1)
+            self.assertAlmostEqual(latency.METRICS.histograms["decision_fetch"].max, 2_000_000, delta=1)
+        finally:
+            latency.METRICS = metrics
+
+
+if __name__ == "__main__":
+    unittest.main()
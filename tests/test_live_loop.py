@@ -0,0 +1,167 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from unittest.mock import patch
+import numpy as np
+from strategies.mean_reversion import MeanReversionStrategy
+
+RATE_DTYPE = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+              ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")]
+
+
+class FakeTerminal(types.ModuleType):
+    """
+    In-process stand-in for the MetaTrader5 package with a minute-bar history that grows on demand.
+    """
+    TIMEFRAME_M1 = 1
+
+    def __init__(self, bars=2000, closed=600):
+        super().__init__("MetaTrader5")
+        rng = np.random.default_rng(11)
+        self.rates = np.zeros(bars, dtype=RATE_DTYPE)
+        self.rates["time"] = 1_600_000_000 + 60 * np.arange(bars)
+        # Strong oscillation so the mean reversion strategy trades
+        closes = 1.1 + 0.01 * np.sin(np.arange(bars) / 15) + rng.normal(0, 0.0005, bars)
+        self.rates["close"] = closes
+        self.rates["open"] = np.concatenate([[closes[0]], closes[:-1]])
+        self.rates["high"] = closes + rng.uniform(0, 0.0005, bars)
+        self.rates["low"] = closes - rng.uniform(0, 0.0005, bars)
+        self.closed = closed  # Number of closed bars; the next one is still forming
+        self.failures = 0     # Number of upcoming copy calls that fail
+        self.initialized = 0
+        self.requested = []
+
+    def initialize(self):
+        self.initialized += 1
+        return True
+
+    def shutdown(self):
+        return True
+
+    def last_error(self):
+        return (-10004, "No IPC connection")
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        if self.failures:
+            self.failures -= 1
+            return None
+        self.requested.append(count)
+        end = self.closed + 1 - start_pos
+        return self.rates[max(end - count, 0):end].copy()
+
+
+# The MetaTrader5 package is imported at module level; a fake stands in while importing
+_install_fake = "MetaTrader5" not in sys.modules
+if _install_fake:
+    sys.modules["MetaTrader5"] = FakeTerminal()
+from live import bar_feed, connection  # noqa: E402
+from live.latency import DecisionLatencyLog  # noqa: E402
+from live.loop import LiveTradingLoop  # noqa: E402
+if _install_fake:
+    del sys.modules["MetaTrader5"]
+
+
+def make_strategy():
+    return MeanReversionStrategy("EURUSD", 0.1, 50, 100, rsi_threshold=40)
+
+
+class TestLiveTradingLoop(unittest.TestCase):
+    def setUp(self):
+        self.terminal = FakeTerminal()
+        for module in (bar_feed, connection):
+            patcher = patch.object(module, "mt5", self.terminal)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.decisions = []
+
+    def make_loop(self, **kwargs):
+        feed = bar_feed.MT5BarFeed("EURUSD", connection=connection.MT5Connection(reconnect_delay=0))
+        return LiveTradingLoop(feed, make_strategy(), lambda signal, bar: self.decisions.append((signal, int(bar["time"]))),
+                               poll_interval=0, **kwargs)
+
+    def test_decisions_match_full_recalculation(self):
+        loop = self.make_loop(history_bars=600)
+        loop.start()
+        self.assertIsNone(loop.step())  # No new bar yet
+
+        reference = make_strategy()
+        for _ in range(300):
+            self.terminal.closed += 1
+            signal = loop.step()
+            rates = self.terminal.rates[:self.terminal.closed]
+            reference.setup({"highs": rates["high"], "lows": rates["low"], "closes": rates["close"]})
+            self.assertEqual(signal, reference.generate_signal())
+        self.assertEqual(len(self.decisions), 300)
+        self.assertGreater(sum(signal != "hold" for signal, _ in self.decisions), 0)
+        # After the warm-up only the last few bars are requested per poll
+        self.assertEqual(set(self.terminal.requested[1:]), {loop.feed.poll_bars})
+
+    def test_gap_is_backfilled_and_only_newest_bar_traded(self):
+        loop = self.make_loop(history_bars=100)
+        loop.start()
+        self.terminal.closed += 50
+        loop.step()
+        newest = int(self.terminal.rates["time"][self.terminal.closed - 1])
+        self.assertEqual([bar_time for _, bar_time in self.decisions], [newest])
+        self.assertEqual(loop.feed.last_time, newest)
+        self.assertEqual(loop.streams["rsi"].count, 149)  # Price changes: one fewer than the bars
+
+    def test_reconnects_and_exports_latency(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "latency.jsonl")
+            loop = self.make_loop(history_bars=100, latency_log=DecisionLatencyLog(budget=1.0, path=path))
+            self.terminal.closed = 100
+            original = self.terminal.copy_rates_from_pos
+
+            def advancing(*args):
+                if self.terminal.failures == 0 and args[3] == loop.feed.poll_bars:
+                    self.terminal.closed += 1
+                    if self.terminal.closed == 105:
+                        self.terminal.failures = 1
+                return original(*args)
+
+            self.terminal.copy_rates_from_pos = advancing
+            loop.run(max_iterations=10)
+
+            self.assertEqual(self.terminal.initialized, 2)
+            with open(path) as file:
+                records = [json.loads(line) for line in file]
+            self.assertEqual(len(records), 9)  # One poll was lost to the dropped connection
+            self.assertEqual(len({record["bar_time"] for record in records}), 9)
+            self.assertEqual(loop.latency_log.summary()["count"], 9)
+            self.assertFalse(any(record["over_budget"] for record in records))
+
+    def test_start_retries_and_always_tears_down(self):
+        """
+        Test that a failed warm-up fetch reconnects, and that a failing start still closes the session.
+        """
+        flushed = []
+        loop = self.make_loop(history_bars=100, before_disconnect=lambda: flushed.append(True))
+        self.terminal.failures = 1
+        loop.run(max_iterations=1)
+        self.assertEqual(self.terminal.initialized, 2)
+        self.assertEqual(loop.streams["rsi"].count, 99)  # Price changes: one fewer than the bars
+
+        loop = self.make_loop(history_bars=100, before_disconnect=lambda: flushed.append(True))
+        with patch.object(loop.feed, "history", side_effect=RuntimeError("bad rates")):
+            with self.assertRaises(RuntimeError):
+                loop.run()
+        self.assertEqual(flushed, [True, True])
+        self.assertFalse(loop.feed.connection.connected)
+
+    def test_stop_ends_the_loop(self):
+        loop = self.make_loop(history_bars=100)
+        loop.poll_interval = 0.01
+        thread = threading.Thread(target=loop.run)
+        thread.start()
+        loop.stop()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from utils.logger import JsonFormatter, RateLimitFilter, configure_logging, shutdown_logging
+
+
+def make_record(message, *args, level=logging.DEBUG, name="strategies.multi_timeframe_strategy"):
+    return logging.LogRecord(name, level, __file__, 1, message, args, None)
+
+
+class TestRateLimitFilter(unittest.TestCase):
+    def test_limits_each_message_per_period(self):
+        """
+        Test that every message template gets `rate` records per period and reports the dropped ones.
+        """
+        log_filter = RateLimitFilter(rate=2, period=1.0)
+        with patch("utils.logger.time.monotonic", return_value=100.0):
+            passed = [log_filter.filter(make_record("Analyzing %s", bar)) for bar in range(5)]
+            self.assertTrue(log_filter.filter(make_record("No valid data for %s", "1d")))
+            self.assertTrue(log_filter.filter(make_record("Error %s", "x", level=logging.WARNING)))
+        self.assertEqual(passed, [True, True, False, False, False])
+
+        with patch("utils.logger.time.monotonic", return_value=101.5):
+            record = make_record("Analyzing %s", 5)
+            self.assertTrue(log_filter.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    def test_sampling(self):
+        log_filter = RateLimitFilter(rate=None, sample=10)
+        passed = [log_filter.filter(make_record("Analyzing %s", bar)) for bar in range(25)]
+        self.assertEqual([bar for bar, kept in enumerate(passed) if kept], [0, 10, 20])
+
+
+class TestStructuredLogging(unittest.TestCase):
+    def test_json_records_with_extra_fields(self):
+        record = make_record("Closed Trades: %d", 3, level=logging.INFO, name="backtest")
+        record.symbol = "EURUSD"
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["message"], "Closed Trades: 3")
+        self.assertEqual((entry["level"], entry["logger"], entry["symbol"]), ("INFO", "backtest", "EURUSD"))
+
+    def test_queue_writer_and_module_levels(self):
+        """
+        Test that records reach the file through the background writer with per-module levels applied.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bot.log")
+            root_level = logging.getLogger().level
+            try:
+                configure_logging(path, console=False, levels={"tests.quiet": logging.ERROR}, force=True)
+                logging.getLogger("tests.loud").info("Signal %s", "buy", extra={"bar": 7})
+                logging.getLogger("tests.quiet").warning("Dropped")
+            finally:
+                shutdown_logging()
+                logging.getLogger().setLevel(root_level)
+                logging.getLogger("tests.quiet").setLevel(logging.NOTSET)
+
+            with open(path) as file:
+                entries = [json.loads(line) for line in file]
+        self.assertEqual([(entry["logger"], entry["message"]) for entry in entries], [("tests.loud", "Signal buy")])
+        self.assertEqual(entries[0]["bar"], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from utils.market_data_store import MarketDataStore
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "utils", "data")
+
+
+def make_frame(rows=500):
+    rng = np.random.default_rng(2)
+    closes = 1.1 + np.cumsum(rng.normal(0, 0.001, rows))
+    return pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=rows, freq="h"),
+        "open": closes, "high": closes + 0.001, "low": closes - 0.001, "close": closes,
+        "tick_volume": rng.integers(100, 1000, rows),
+    })
+
+
+class TestMarketDataStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = MarketDataStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip_and_index(self):
+        data = make_frame()
+        self.store.write("EURUSD", "1h", data.sample(frac=1, random_state=1))  # Sorted on write
+        self.assertTrue(self.store.exists("EURUSD", "1h"))
+        self.assertFalse(self.store.exists("EURUSD", "4h"))
+        pd.testing.assert_frame_equal(self.store.read("EURUSD", "1h"), data.astype({"date": "datetime64[ns]"}))
+
+        info = self.store.info("EURUSD", "1h")
+        self.assertEqual(info["rows"], 500)
+        self.assertEqual(info["start"], "2020-01-01T00:00:00")
+
+    def test_date_range_and_column_projection(self):
+        """
+        Test that range reads are inclusive and column reads return memory-mapped arrays.
+        """
+        data = make_frame()
+        self.store.write("EURUSD", "1h", data)
+        subset = self.store.read("EURUSD", "1h", start="2020-01-02 00:00", end="2020-01-02 05:00", columns=["close"])
+        self.assertEqual(subset.columns.tolist(), ["date", "close"])
+        expected = data[(data["date"] >= "2020-01-02 00:00") & (data["date"] <= "2020-01-02 05:00")]
+        np.testing.assert_array_equal(subset["close"].to_numpy(), expected["close"].to_numpy())
+
+        arrays = self.store.read_arrays("EURUSD", "1h", columns=["high"])
+        self.assertIsInstance(arrays["high"], np.memmap)
+        with self.assertRaises(ValueError):
+            self.store.read("EURUSD", "1h", columns=["volume"])
+
+    def test_rewrite_replaces_dataset(self):
+        self.store.write("EURUSD", "1h", make_frame(500))
+        self.store.write("EURUSD", "1h", make_frame(100))
+        self.assertEqual(len(self.store.read("EURUSD", "1h")), 100)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["EURUSD_1h"])
+
+    def test_rewrite_keeps_the_dataset_readable(self):
+        """
+        Test that a rewrite switches the index atomically and keeps the files of the previous generation.
+        """
+        self.store.write("EURUSD", "1h", make_frame(500))
+        before = self.store.read_arrays("EURUSD", "1h", columns=["close"])
+        index = self.store.info("EURUSD", "1h")  # A reader that loaded the index just before the rewrite
+
+        self.store.write("EURUSD", "1h", make_frame(100))
+        self.assertEqual(len(before["close"]), 500)
+        self.assertTrue(os.path.exists(os.path.join(self.store._directory("EURUSD", "1h", index), "close.bin")))
+        self.assertEqual(self.store.info("EURUSD", "1h")["generation"], index["generation"] + 1)
+
+        self.store.write("EURUSD", "1h", make_frame(200))
+        self.assertEqual(sorted(os.listdir(self.store.path("EURUSD", "1h"))), ["2", "3", "index.json"])
+
+    def test_append_adds_only_new_bars(self):
+        data = make_frame(500)
+        self.assertEqual(self.store.append("EURUSD", "1h", data.iloc[:300]), 300)
+        self.assertEqual(self.store.last_timestamp("EURUSD", "1h"), data["date"].iloc[299])
+
+        # Overlapping batch: the re-fetched bars replace the stored ones instead of duplicating them
+        revised = data.iloc[290:].copy()
+        revised.loc[299, "close"] += 0.01
+        self.assertEqual(self.store.append("EURUSD", "1h", revised), 200)
+
+        stored = self.store.read("EURUSD", "1h")
+        self.assertEqual(len(stored), 500)
+        self.assertTrue(stored["date"].is_unique)
+        self.assertAlmostEqual(stored["close"].iloc[299], data["close"].iloc[299] + 0.01)
+        self.assertEqual(self.store.append("EURUSD", "1h", data.iloc[-1:]), 0)
+
+    def test_append_writes_in_place(self):
+        """
+        Test that appends past the stored bars extend the current column files, and that batches
+        replacing stored bars never change the rows a reader already mapped.
+        """
+        data = make_frame(500)
+        self.store.write("EURUSD", "1h", data.iloc[:300])
+        before = self.store.read_arrays("EURUSD", "1h")
+        closes = np.array(before["close"])
+        generation = self.store.info("EURUSD", "1h")["generation"]
+
+        self.assertEqual(self.store.append("EURUSD", "1h", data.iloc[300:]), 200)
+        self.assertEqual(self.store.info("EURUSD", "1h")["generation"], generation)
+        self.assertEqual(len(before["close"]), 300)
+        pd.testing.assert_frame_equal(self.store.read("EURUSD", "1h"), data.astype({"date": "datetime64[ns]"}))
+
+        # A revised last bar: written to a new generation, the mapped rows stay as they were
+        mapped = self.store.read_arrays("EURUSD", "1h")
+        revised = data.iloc[499:].copy()
+        revised["close"] = 99.0
+        self.assertEqual(self.store.append("EURUSD", "1h", revised), 0)
+        self.assertEqual(self.store.info("EURUSD", "1h")["generation"], generation + 1)
+        self.assertEqual(self.store.read("EURUSD", "1h")["close"].iloc[-1], 99.0)
+        np.testing.assert_array_equal(mapped["close"], data["close"].to_numpy())
+        np.testing.assert_array_equal(before["close"], closes)
+
+        # Fewer bars than the ones they replace: rewritten, not truncated under the readers' maps
+        self.assertEqual(self.store.append("EURUSD", "1h", data.iloc[[100, 400]]), 0)
+        self.assertEqual(len(self.store.read("EURUSD", "1h")), 102)
+        self.assertEqual(self.store.info("EURUSD", "1h")["generation"], generation + 2)
+
+    def test_last_timestamp_of_missing_dataset(self):
+        self.assertIsNone(self.store.last_timestamp("EURUSD", "1h"))
+
+    def test_import_csv(self):
+        self.store.import_csv(os.path.join(DATA_DIR, "EURUSD_1d.csv"))
+        original = pd.read_csv(os.path.join(DATA_DIR, "EURUSD_1d.csv"))
+        stored = self.store.read("EURUSD", "1d")
+        self.assertEqual(len(stored), len(original))
+        np.testing.assert_array_equal(stored["close"].to_numpy(), original["close"].to_numpy())
+        self.assertEqual(self.store.info("EURUSD", "1d")["time_column"], "time")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from models.ml_model import MLModel
+from models.model_registry import ModelRegistry
+from strategies.multi_timeframe_strategy import MultiTimeframeStrategy
+
+
+def make_data(rows=300, seed=3):
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame(rng.normal(size=(rows, 3)), columns=["rsi", "ema", "atr"])
+    target = np.where(features["rsi"] > 0, "buy", "sell")
+    return features, target
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(os.path.join(self.directory.name, "registry"))
+        self.features, self.target = make_data()
+        self.model = MLModel(n_estimators=10).fit(self.features, self.target)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_versions_metadata_and_rollback(self):
+        """
+        Test that every registration gets the next version with its metadata, and that activate() rolls back.
+        """
+        first = self.registry.register("EURUSD_1h", self.model, training_range=("2024-01-01", "2024-06-30"),
+                                       metrics={"accuracy": np.float64(0.75)})
+        second = self.registry.register("EURUSD_1h", MLModel(n_estimators=5).fit(self.features, self.target),
+                                        activate=False)
+        self.assertEqual((first, second), (1, 2))
+        self.assertEqual(self.registry.versions("EURUSD_1h"), [1, 2])
+        self.assertEqual(self.registry.active_version("EURUSD_1h"), 1)
+
+        metadata = self.registry.metadata("EURUSD_1h")
+        self.assertEqual(metadata["feature_names"], ["rsi", "ema", "atr"])
+        self.assertEqual(metadata["classes"], ["buy", "sell"])
+        self.assertEqual(metadata["training_range"]["end"], "2024-06-30T00:00:00")
+        self.assertEqual(metadata["metrics"], {"accuracy": 0.75})
+        self.assertEqual(metadata["fit_stats"]["estimators"], 10)
+
+        self.registry.activate("EURUSD_1h", 2)
+        self.assertEqual(self.registry.load("EURUSD_1h").version, 2)
+        with self.assertRaises(ValueError):
+            self.registry.activate("EURUSD_1h", 3)
+
+    def test_forests_are_served_from_memory_mapped_arrays(self):
+        """
+        Test that a registered forest predicts like the original without unpickling it.
+        """
+        self.registry.register("EURUSD_1h", self.model)
+        loaded = self.registry.load("EURUSD_1h")
+        np.testing.assert_array_equal(loaded.predict(self.features), self.model.predict(self.features))
+        self.assertEqual(loaded.predict(self.features.iloc[[4]])[0], self.model.predict(self.features.iloc[[4]])[0])
+        self.assertEqual(loaded.predict_one(self.features.iloc[5].to_numpy()),
+                         self.model.predict(self.features.iloc[[5]])[0])
+        self.assertIsInstance(loaded.compiled.threshold, np.memmap)
+        self.assertIsNone(loaded._estimator)
+        # Single predictions walk the shared arrays: no private copy of the forest
+        self.assertIsNone(loaded.load().compiled._nodes)
+
+        private = self.registry.load("EURUSD_1h", private_lists=True).load()
+        self.assertIsNotNone(private.compiled._nodes)
+        for i in range(len(self.features)):
+            vector = self.features.iloc[i].to_numpy()
+            self.assertEqual(private.predict_one(vector), loaded.predict_one(vector))
+
+        boosted = MLModel(backend="hist_gradient_boosting", n_estimators=5).fit(self.features, self.target)
+        self.registry.register("GBPUSD_1h", boosted)
+        np.testing.assert_array_equal(self.registry.load("GBPUSD_1h").predict(self.features),
+                                      boosted.predict(self.features))
+
+    def test_hot_swap_while_predicting(self):
+        """
+        Test that a watched handle switches to a newly activated version while predictions keep running.
+        """
+        self.registry.register("EURUSD_1h", self.model)
+        handle = self.registry.handle("EURUSD_1h")
+        strategy = MultiTimeframeStrategy("EURUSD", model_handle=handle)
+        self.assertEqual(handle.version, 1)
+
+        errors, versions, stop = [], set(), threading.Event()
+
+        def predict():
+            row = self.features.iloc[:1]
+            while not stop.is_set():
+                try:
+                    model = strategy.model
+                    model.predict(row)
+                    versions.add(model.version)
+                except Exception as e:
+                    errors.append(e)
+
+        worker = threading.Thread(target=predict)
+        worker.start()
+        handle.start(interval=0.01)
+        try:
+            self.registry.register("EURUSD_1h", MLModel(n_estimators=5).fit(self.features, self.target))
+            deadline = time.time() + 5
+            while handle.version != 2 and time.time() < deadline:
+                time.sleep(0.01)
+            time.sleep(0.05)
+        finally:
+            handle.stop()
+            stop.set()
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(handle.version, 2)
+        self.assertEqual(versions, {1, 2})
+        self.assertFalse(handle.refresh())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from models.ml_model import MLModel
+from models.model_trainer import ModelTrainer, forward_return_labels
+from utils.feature_store import FeatureStore
+from utils.market_data_store import MarketDataStore
+
+
+def make_features(rows=400, seed=2):
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame(rng.normal(size=(rows, 3)), columns=["x1", "x2", "x3"])
+    target = np.where(features["x1"] + 0.3 * rng.normal(size=rows) > 0, "buy", "sell")
+    return features, target
+
+
+def make_bars(bars, seed=7):
+    rng = np.random.default_rng(seed)
+    closes = 1.2 + np.cumsum(rng.normal(0, 0.001, bars))
+    return pd.DataFrame({"time": pd.date_range("2023-01-01", periods=bars, freq="h"), "open": closes,
+                         "high": closes + 0.0005, "low": closes - 0.0005, "close": closes})
+
+
+class TestMLModelTraining(unittest.TestCase):
+    def test_update_grows_the_forest_and_keeps_the_newest_trees(self):
+        """
+        Test that update() adds trees to the trained forest and drops the oldest past max_estimators.
+        """
+        features, target = make_features()
+        model = MLModel(n_estimators=10, growth=5, max_estimators=12).fit(features[:300], target[:300])
+        first_trees = list(model.model.estimators_)
+        self.assertEqual(model.fit_stats["estimators"], 10)
+        self.assertGreater(model.fit_stats["seconds"], 0)
+        self.assertGreater(model.fit_stats["model_size_mb"], 0)
+
+        model.update(features, target)
+        self.assertEqual(len(model.model.estimators_), 12)
+        self.assertEqual(model.fit_stats["added"], 5)
+        self.assertEqual(model.fit_stats["rows"], 400)
+        self.assertEqual(model.model.estimators_[:7], first_trees[3:])
+        model.compile(check_features=features)
+
+    def test_updates_add_trees_with_fresh_seeds(self):
+        """
+        Test that trees added after max_estimators trimmed the forest do not repeat the seeds of kept trees.
+        """
+        features, target = make_features()
+        model = MLModel(n_estimators=10, growth=5, max_estimators=10).fit(features, target)
+        for _ in range(3):
+            model.update(features, target)
+            seeds = [tree.random_state for tree in model.model.estimators_]
+            self.assertEqual(len(seeds), 10)
+            self.assertEqual(len(set(seeds)), 10)
+
+    def test_gradient_boosting_backend(self):
+        """
+        Test that the histogram gradient boosting backend trains, grows and predicts single vectors.
+        """
+        features, target = make_features()
+        model = MLModel(backend="hist_gradient_boosting", n_estimators=10, growth=5).fit(features, target)
+        model.update(features, target)
+        self.assertEqual(model.fit_stats["estimators"], 15)
+        self.assertEqual(model.predict_one(features.iloc[0].to_numpy()), model.predict(features.iloc[:1])[0])
+        with self.assertRaises(ValueError):
+            MLModel(backend="svm")
+
+
+class TestModelTrainer(unittest.TestCase):
+    def test_labels(self):
+        labels = forward_return_labels([1.0, 1.1, 1.1, 1.0], threshold=0.01)
+        self.assertEqual(labels.tolist(), ["buy", "hold", "sell", None])
+
+    def test_trains_markets_concurrently_and_grows_them_on_new_history(self):
+        """
+        Test that every market gets a model from the feature store, and warm starts add trees.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            market_store = MarketDataStore(os.path.join(directory, "store"))
+            for seed, symbol in enumerate(("EURUSD", "GBPUSD")):
+                market_store.write(symbol, "1h", make_bars(500, seed))
+            trainer = ModelTrainer(market_store, FeatureStore(os.path.join(directory, "features")),
+                                   model_dir=os.path.join(directory, "models"), warm_start=True, max_workers=2,
+                                   n_estimators=8, growth=4)
+
+            stats = trainer.train_all([("EURUSD", "1h"), ("GBPUSD", "1h")])
+            self.assertEqual(stats["symbol"].tolist(), ["EURUSD", "GBPUSD"])
+            self.assertEqual(stats["estimators"].tolist(), [8, 8])
+            self.assertTrue((stats["rows"] == 500 - 20).all())  # Bollinger warm-up and the unlabelled last bar
+
+            market_store.append("EURUSD", "1h", make_bars(600, 0).iloc[500:])
+            grown = trainer.train("EURUSD", "1h")
+            self.assertEqual(grown["estimators"], 12)
+            self.assertEqual(grown["rows"], 600 - 20)
+            self.assertTrue(os.path.exists(os.path.join(directory, "models", "EURUSD_1h.npz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import multiprocessing
+import sys
+import threading
+import types
+import unittest
+from unittest.mock import patch
+import numpy as np
+from strategies.mean_reversion import MeanReversionStrategy
+
+RATE_DTYPE = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+              ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")]
+
+
+class FakeTerminal(types.ModuleType):
+    """
+    In-process stand-in for the MetaTrader5 package serving minute bars for any symbol.
+    Records the thread every call is made from.
+    """
+    TIMEFRAME_M1 = 1
+
+    def __init__(self, bars=800, closed=500):
+        super().__init__("MetaTrader5")
+        self.bars = bars
+        self.closed = closed
+        self.histories = {}
+        self.threads = set()
+
+    def history(self, symbol):
+        if symbol not in self.histories:
+            rng = np.random.default_rng(sum(map(ord, symbol)))
+            rates = np.zeros(self.bars, dtype=RATE_DTYPE)
+            rates["time"] = 1_600_000_000 + 60 * np.arange(self.bars)
+            closes = 1.1 + 0.01 * np.sin(np.arange(self.bars) / rng.uniform(8, 20)) + rng.normal(0, 0.0005, self.bars)
+            rates["close"] = rates["open"] = closes
+            rates["high"] = closes + rng.uniform(0, 0.0005, self.bars)
+            rates["low"] = closes - rng.uniform(0, 0.0005, self.bars)
+            self.histories[symbol] = rates
+        return self.histories[symbol]
+
+    def initialize(self):
+        self.threads.add(threading.current_thread().name)
+        self.initialized = getattr(self, "initialized", 0) + 1
+        return self.initialized > getattr(self, "failed_connects", 0)
+
+    def shutdown(self):
+        self.threads.add(threading.current_thread().name)
+        return True
+
+    def last_error(self):
+        return (1, "Success")
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        self.threads.add(threading.current_thread().name)
+        end = self.closed + 1 - start_pos
+        return self.history(symbol)[max(end - count, 0):end].copy()
+
+
+# The MetaTrader5 package is imported at module level; a fake stands in while importing
+_install_fake = "MetaTrader5" not in sys.modules
+if _install_fake:
+    sys.modules["MetaTrader5"] = FakeTerminal()
+from live import bar_feed, connection  # noqa: E402
+from live.multi_symbol import MultiSymbolLoop  # noqa: E402
+if _install_fake:
+    del sys.modules["MetaTrader5"]
+
+SYMBOLS = [f"SYM{number:02d}" for number in range(32)]
+
+
+def make_strategy(symbol):
+    return MeanReversionStrategy(symbol, 0.1, 50, 100, rsi_threshold=40)
+
+
+class TestMultiSymbolLoop(unittest.TestCase):
+    def setUp(self):
+        self.terminal = FakeTerminal()
+        for module in (bar_feed, connection):
+            patcher = patch.object(module, "mt5", self.terminal)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_loop(self, workers, cycles=40):
+        decisions = []
+        loop = MultiSymbolLoop(SYMBOLS, make_strategy, lambda symbol, signal, bar: decisions.append(
+            (symbol, signal, int(bar["time"]))), workers=workers, poll_interval=0)
+        original_cycle = loop.run_cycle
+
+        def advancing_cycle():
+            self.terminal.closed += 1
+            return original_cycle()
+
+        loop.run_cycle = advancing_cycle
+        loop.run(max_iterations=cycles)
+        return loop, decisions
+
+    def test_every_symbol_decides_on_every_bar(self):
+        loop, decisions = self.run_loop(workers=1)
+        self.assertEqual(len(decisions), 40 * len(SYMBOLS))
+        self.assertEqual(loop.last_cycle["symbols"], len(SYMBOLS))
+        self.assertEqual(loop.last_cycle["decisions"], len(SYMBOLS))
+
+        # Same signals as recalculating every indicator over the full history
+        for symbol in SYMBOLS[:3]:
+            reference = make_strategy(symbol)
+            rates = self.terminal.history(symbol)
+            expected = []
+            for end in range(501, 541):
+                reference.setup({"highs": rates["high"][:end], "lows": rates["low"][:end], "closes": rates["close"][:end]})
+                expected.append(reference.generate_signal())
+            self.assertEqual([signal for name, signal, _ in decisions if name == symbol], expected)
+        self.assertGreater(sum(signal != "hold" for _, signal, _ in decisions), 0)
+
+    def test_mt5_calls_stay_on_one_thread(self):
+        loop, _ = self.run_loop(workers=1, cycles=5)
+        self.assertEqual(len(self.terminal.threads), 1)
+        self.assertTrue(next(iter(self.terminal.threads)).startswith("mt5"))
+        self.assertNotIn(threading.current_thread().name, self.terminal.threads)
+
+    def test_per_symbol_state_is_small(self):
+        loop, _ = self.run_loop(workers=1, cycles=1)
+        self.assertEqual(set(loop.state_bytes), set(SYMBOLS))
+        self.assertLess(max(loop.state_bytes.values()), 16 * 1024)
+
+    def test_start_retries_and_always_tears_down(self):
+        """
+        Test that a failed connection at startup is retried and that a failing start stops the workers.
+        """
+        self.terminal.failed_connects = 1
+        loop, decisions = self.run_loop(workers=1, cycles=2)
+        self.assertEqual(self.terminal.initialized, 2)
+        self.assertEqual(len(decisions), 2 * len(SYMBOLS))
+
+        def failing_strategy(symbol):
+            if symbol == SYMBOLS[-1]:
+                raise RuntimeError("bad configuration")
+            return make_strategy(symbol)
+
+        flushed = []
+        loop = MultiSymbolLoop(SYMBOLS, failing_strategy, lambda *args: None, workers=2, poll_interval=0,
+                               before_disconnect=lambda: flushed.append(True))
+        with self.assertRaises(RuntimeError):
+            loop.run()
+        self.assertEqual(flushed, [True])
+        self.assertEqual(loop.shards, [])
+        self.assertEqual(multiprocessing.active_children(), [])
+        self.assertFalse(loop.connection.connected)
+
+    def test_worker_processes_match_in_process(self):
+        _, in_process = self.run_loop(workers=1, cycles=10)
+        self.terminal.closed = 500
+        _, workers = self.run_loop(workers=2, cycles=10)
+        self.assertEqual(sorted(workers), sorted(in_process))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from backtesting.alignment import align_timeframes
+from indicators.features import DEFAULT_FEATURES
+from strategies.multi_timeframe_strategy import MultiTimeframeStrategy
+from utils.feature_store import FeatureStore
+
+
+class SignModel:
+    """
+    Stand-in model: 'buy' when the RSI is above 55, 'sell' below 45, 'hold' in between.
+    Rejects any input containing NaN, like older scikit-learn forests.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.rows = []
+
+    def predict(self, features):
+        self.calls += 1
+        self.rows.append(features)
+        values = features.to_numpy(dtype=float)
+        if np.isnan(values).any():
+            raise ValueError("Input contains NaN")
+        rsi = features["RSI"].to_numpy()
+        return np.where(rsi > 55, "buy", np.where(rsi < 45, "sell", "hold"))
+
+
+class BrokenModel:
+    def predict(self, features):
+        raise ValueError("Feature names mismatch")
+
+
+def make_frame(start, periods, freq, seed):
+    rng = np.random.default_rng(seed)
+    closes = 1 + np.cumsum(rng.normal(0, 0.003, periods))
+    return pd.DataFrame({
+        "date": pd.date_range(start, periods=periods, freq=freq),
+        "open": closes + rng.normal(0, 0.001, periods),
+        "high": closes + 0.002,
+        "low": closes - 0.002,
+        "close": closes,
+        "target": rng.integers(0, 2, periods),
+    })
+
+
+def make_strategy(model):
+    strategy = MultiTimeframeStrategy("EURUSD")
+    strategy.model = model
+    return strategy
+
+
+class TestMultiTimeframeBatchSignals(unittest.TestCase):
+    def setUp(self):
+        data_dict = {
+            "1h": make_frame("2020-01-01", 120, "h", 1),
+            "4h": make_frame("2020-01-01", 30, "4h", 2),
+            "1d": make_frame("2020-01-01", 5, "D", 3),
+        }
+        self.aligned = align_timeframes(data_dict, base_timeframe="1h")
+
+    def per_bar_codes(self, strategy):
+        codes = {"buy": 1, "sell": -1, "hold": 0}
+        return np.array([codes[strategy.generate_signal_at(self.aligned, i)] for i in range(len(self.aligned))])
+
+    def test_batch_matches_per_bar(self):
+        """
+        Test that batch inference gives the per-bar signals, including rows the model rejects.
+        """
+        model = SignModel()
+        strategy = make_strategy(model)
+        batch = strategy.generate_signals(self.aligned)
+        self.assertTrue((batch == 1).any() and (batch == -1).any())
+        # Every timeframe fails on its warm-up rows; the 1h and 4h ones are scored again without them
+        self.assertEqual(model.calls, 5)
+
+        # Predictions are cached for the same aligned data
+        strategy.generate_signals(self.aligned)
+        self.assertEqual(model.calls, 5)
+
+        np.testing.assert_array_equal(batch, self.per_bar_codes(strategy))
+
+    def test_unusable_model_holds(self):
+        strategy = make_strategy(BrokenModel())
+        batch = strategy.generate_signals(self.aligned)
+        self.assertTrue((batch == 0).all())
+        np.testing.assert_array_equal(batch, self.per_bar_codes(strategy))
+
+
+class TestTrainServeFeatures(unittest.TestCase):
+    """
+    The model must see the same feature vector for a bar in training, backtests and live trading.
+    """
+
+    def setUp(self):
+        self.data = make_frame("2020-01-01", 200, "h", 4)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_train_and_serve_vectors_are_equal(self):
+        # Training: the feature store's columns (training/train_ml.py)
+        trained = FeatureStore(self.directory.name).with_features("EURUSD", "1h", self.data)
+        train_vectors = trained[list(DEFAULT_FEATURES)].to_numpy()
+
+        # Backtest: the strategy's features of the aligned data
+        strategy = make_strategy(SignModel())
+        aligned = align_timeframes({"1h": self.data}, base_timeframe="1h")
+        np.testing.assert_allclose(strategy.compute_feature_matrices(aligned)["1h"], train_vectors, equal_nan=True)
+        np.testing.assert_allclose(strategy.feature_frame(self.data).to_numpy(), train_vectors, equal_nan=True)
+
+        # Live: streams fed one bar at a time
+        streams = strategy.create_streams()
+        for i, (high, low, close) in enumerate(self.data[["high", "low", "close"]].to_numpy()):
+            for stream in streams.values():
+                stream.update(high, low, close)
+            ready = strategy.setup_from_streams(streams, close)
+            self.assertEqual(ready, bool(np.isfinite(train_vectors[i]).all()))
+            np.testing.assert_allclose(strategy.vector, train_vectors[i], rtol=1e-9, equal_nan=True)
+
+        # The live signal is the model's vote on exactly that vector, under the training column names
+        model = strategy.model
+        self.assertIn(strategy.generate_signal(), ("buy", "sell", "hold"))
+        self.assertEqual(list(model.rows[-1].columns), list(DEFAULT_FEATURES))
+        np.testing.assert_allclose(model.rows[-1].to_numpy()[0], train_vectors[-1], rtol=1e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import random
+import unittest
+from trade_management.orders import FILLED, REJECTED, Order
+from trade_management.portfolio_risk import PortfolioRisk, RiskCheckedExecutor, RiskLimitError
+from trade_management.simulated_broker import SimulatedBroker
+
+
+def recompute(risk, positions, prices):
+    """
+    Equity, margin and currency exposures of a USD account computed from scratch.
+    """
+    def rate(currency):
+        if currency == "USD":
+            return 1.0
+        if currency + "USD" in prices:
+            return prices[currency + "USD"]
+        return 1 / prices["USD" + currency]
+
+    unrealized = margin = 0.0
+    exposures = {}
+    for symbol, direction, lot_size, entry in positions:
+        units = lot_size * risk.contract_size
+        base, quote = symbol[:3], symbol[3:]
+        unrealized += direction * units * (prices[symbol] - entry) * rate(quote)
+        margin += units * prices[symbol] * rate(quote) / risk.leverage
+        exposures[base] = exposures.get(base, 0.0) + direction * units * rate(base)
+        exposures[quote] = exposures.get(quote, 0.0) - direction * units * entry * rate(quote)
+    return unrealized, margin, exposures
+
+
+class TestPortfolioRisk(unittest.TestCase):
+    def test_running_totals_match_recomputation(self):
+        """
+        Test that the incremental totals equal a from-scratch computation after random events.
+        """
+        rng = random.Random(4)
+        risk = PortfolioRisk(10000, leverage=50)
+        prices = {"EURUSD": 1.1, "GBPUSD": 1.3, "USDJPY": 150.0}
+        for symbol, price in prices.items():
+            risk.on_price(symbol, price)
+        positions, balance = [], 10000.0
+        for _ in range(2000):
+            symbol = rng.choice(list(prices))
+            event = rng.random()
+            if event < 0.5:
+                prices[symbol] *= 1 + rng.gauss(0, 0.001)
+                risk.on_price(symbol, prices[symbol])
+            elif event < 0.8 or not positions:
+                position = (symbol, rng.choice((1, -1)), rng.choice((0.1, 0.5, 1.0)), prices[symbol])
+                positions.append(position)
+                risk.on_fill(*position)
+            else:
+                symbol, direction, lot_size, entry = positions.pop(rng.randrange(len(positions)))
+                risk.on_close(symbol, direction, lot_size, entry, prices[symbol], costs=1.0)
+                rate = 1 / prices[symbol] if symbol == "USDJPY" else 1.0
+                balance += direction * lot_size * 100_000 * (prices[symbol] - entry) * rate - 1.0
+
+        unrealized, margin, exposures = recompute(risk, positions, prices)
+        snapshot = risk.snapshot()
+        self.assertAlmostEqual(snapshot["balance"], balance, places=4)
+        self.assertAlmostEqual(snapshot["unrealized"], unrealized, places=4)
+        self.assertAlmostEqual(snapshot["margin"], margin, places=4)
+        self.assertEqual(snapshot["open_positions"], len(positions))
+        for currency, exposure in exposures.items():
+            self.assertAlmostEqual(snapshot["exposures"][currency], exposure, places=3)
+
+    def test_drawdown_follows_the_equity_peak(self):
+        """
+        Test that the drawdown is measured from the highest equity reached.
+        """
+        risk = PortfolioRisk(10000)
+        risk.on_fill("EURUSD", 1, 1.0, 1.1000)
+        risk.on_price("EURUSD", 1.1200)  # Equity 12000
+        risk.on_price("EURUSD", 1.0900)  # Equity 9000
+        self.assertAlmostEqual(risk.peak_equity, 12000)
+        self.assertAlmostEqual(risk.drawdown, 0.25)
+        risk.on_price("EURUSD", 1.1100)
+        self.assertAlmostEqual(risk.drawdown, 1 / 12)
+        self.assertAlmostEqual(risk.max_drawdown, 0.25)
+
+    def test_limits(self):
+        """
+        Test that each limit refuses the order that would break it.
+        """
+        risk = PortfolioRisk(10000, leverage=100, max_open_positions=2, max_currency_exposure=150_000,
+                             max_margin_usage=0.5)
+        risk.on_price("EURUSD", 1.1)
+        risk.on_price("GBPUSD", 1.3)
+        self.assertIsNone(risk.check_order("EURUSD", 1, 1.0))
+        self.assertIn("No price", risk.check_order("AUDUSD", 1, 0.1))
+        self.assertIn("Margin", risk.check_order("EURUSD", 1, 5.0))
+
+        risk.on_fill("EURUSD", 1, 1.0, 1.1)
+        self.assertIn("EUR", risk.check_order("EURUSD", 1, 0.5))
+        # Reducing an exposure over the limit is allowed
+        self.assertIsNone(risk.check_order("EURUSD", -1, 0.5))
+        risk.on_fill("GBPUSD", -1, 0.1, 1.3)
+        self.assertIn("positions already open", risk.check_order("EURUSD", -1, 0.1))
+
+        risk = PortfolioRisk(10000, max_drawdown=0.1)
+        risk.on_fill("EURUSD", 1, 1.0, 1.1)
+        risk.on_price("EURUSD", 1.085)
+        self.assertIn("Drawdown", risk.check_order("GBPUSD", 1, 0.1, price=1.3))
+
+
+class TestRiskCheckedExecutor(unittest.TestCase):
+    def setUp(self):
+        self.broker = SimulatedBroker(spread=0, symbol="EURUSD")
+        self.risk = PortfolioRisk(10000, max_open_positions=2)
+        self.executor = RiskCheckedExecutor(self.broker, self.risk)
+        for symbol, price in (("EURUSD", 1.1), ("GBPUSD", 1.3)):
+            self.broker.update_price(symbol, price)
+            self.risk.on_price(symbol, price)
+
+    def test_orders_over_the_limit_never_reach_the_executor(self):
+        first = self.executor.open_buy(0.1, 50, 100)
+        self.executor.open_sell(0.1, 50, 100, symbol="GBPUSD")
+        refused = self.executor.open_buy(0.1, 50, 100)
+        self.assertEqual(first.state, FILLED)
+        self.assertEqual(refused.state, REJECTED)
+        self.assertIsInstance(refused.error, RiskLimitError)
+        self.assertEqual(len(self.broker.positions), 2)
+
+        # Closing a position gives the room back
+        self.executor.close_position(first.ticket)
+        self.assertEqual(self.risk.positions, 1)
+        self.assertEqual(self.executor.open_buy(0.1, 50, 100).state, FILLED)
+
+    def test_executor_rejections_and_broker_closes_are_released(self):
+        self.risk.on_price("USDJPY", 150.0)
+        rejected = self.executor.open_buy(0.1, 50, 100, symbol="USDJPY")  # The broker has no price for it
+        self.assertNotIsInstance(rejected.error, RiskLimitError)
+        self.assertEqual(rejected.state, REJECTED)
+        order = self.executor.open_buy(0.1, 50, 100)
+        self.assertEqual(self.risk.positions, 1)
+
+        self.broker.on_bar("EURUSD", 1.1, 1.1, 1.09, 1.095)
+        trade = self.broker.trades.row(0)
+        self.executor.position_closed(order.ticket, trade["exit_price"])
+        self.assertEqual(self.risk.positions, 0)
+        self.assertAlmostEqual(self.risk.balance, 10000 + trade["profit"])
+
+    def test_positions_stay_until_their_close_is_filled(self):
+        order = self.executor.open_buy(0.1, 50, 100)
+        refused = self.executor.close_position(order.ticket + 1000)  # The broker does not know it
+        self.assertEqual(refused.state, REJECTED)
+        self.assertEqual(self.risk.positions, 1)
+
+        pending = Order("close", "EURUSD", position_id=order.ticket)
+        self.broker.close_position = lambda position_id, symbol=None: pending
+        self.executor.close_position(order.ticket)
+        self.assertEqual(self.risk.positions, 1)
+        pending.finish(REJECTED)
+        self.executor.position_closed(-1)  # Settles the finished orders
+        self.assertEqual(self.risk.positions, 1)
+
+        del self.broker.close_position
+        self.assertEqual(self.executor.close_position(order.ticket).state, FILLED)
+        self.assertEqual(self.risk.positions, 0)
+
+    def test_reconcile_removes_positions_the_broker_closed(self):
+        kept = self.executor.open_buy(0.1, 50, 100)
+        gone = self.executor.open_sell(0.1, 50, 100)
+        self.assertEqual(self.executor.open_buy(0.1, 50, 100, symbol="GBPUSD").state, REJECTED)
+
+        closed = self.executor.reconcile("EURUSD", {kept.ticket}, lambda ticket: (1.09, 1.5))
+        self.assertEqual(closed, 1)
+        self.assertEqual(self.risk.positions, 1)
+        self.assertAlmostEqual(self.risk.balance, 10000 + 0.1 * 100000 * 0.01 - 1.5)
+        self.assertNotIn(gone.ticket, self.executor.filled)
+
+        # The room is back; unknown exits close at the latest price
+        other = self.executor.open_buy(0.1, 50, 100, symbol="GBPUSD")
+        self.assertEqual(other.state, FILLED)
+        self.assertEqual(self.risk.positions, 2)
+        self.assertEqual(self.executor.reconcile("GBPUSD", set(), lambda ticket: None), 1)
+        self.assertEqual(self.risk.positions, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
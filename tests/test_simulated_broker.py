@@ -0,0 +1,195 @@
+import unittest
+import numpy as np
+from backtesting.engine import BrokerBacktest
+from trade_management.orders import FILLED, REJECTED
+from trade_management.simulated_broker import (SimulatedBroker, ColumnBook, CLOSE_MANUAL, CLOSE_STOP_LOSS,
+                                               CLOSE_TAKE_PROFIT)
+
+
+def make_bars(bars=3000, seed=3):
+    rng = np.random.default_rng(seed)
+    closes = 1.1 + np.cumsum(rng.normal(0, 0.0008, bars))
+    opens = np.concatenate(([1.1], closes[:-1])) + rng.normal(0, 0.0002, bars)
+    highs = np.maximum(opens, closes) + rng.uniform(0, 0.001, bars)
+    lows = np.minimum(opens, closes) - rng.uniform(0, 0.001, bars)
+    signals = rng.choice([-1, 0, 0, 0, 0, 1], bars)
+    return signals, opens, highs, lows, closes
+
+
+def reference_backtest(signals, opens, highs, lows, closes, lot_size, stop_loss, take_profit, spread, slippage,
+                       commission, fill, pip=0.0001, contract_size=100_000):
+    """
+    Straightforward bar-by-bar simulation with the same fill rules as SimulatedBroker.
+    """
+    units = lot_size * contract_size
+    balance, positions, equity, profits = 10000.0, [], [10000.0], []
+    pending = None
+    for i in range(len(closes)):
+        if pending is not None:
+            balance -= commission * lot_size
+            positions.append(pending(opens[i]))
+            pending = None
+        for position in list(positions):
+            direction, entry, sl, tp = position
+            if direction > 0:
+                stop_hit, profit_hit = lows[i] <= sl, highs[i] >= tp
+            else:
+                stop_hit, profit_hit = highs[i] + spread >= sl, lows[i] + spread <= tp
+            if stop_hit:
+                price = min(sl, opens[i]) - slippage if direction > 0 else max(sl, opens[i] + spread) + slippage
+            elif profit_hit:
+                price = max(tp, opens[i]) if direction > 0 else min(tp, opens[i] + spread)
+            else:
+                continue
+            positions.remove(position)
+            gross = direction * (price - entry) * units
+            balance += gross - commission * lot_size
+            profits.append(gross - 2 * commission * lot_size)
+
+        def open_at(bid, direction=int(np.sign(signals[i]))):
+            entry = bid + spread + slippage if direction > 0 else bid - slippage
+            return (direction, entry, entry - direction * (stop_loss or np.nan) * pip,
+                    entry + direction * (take_profit or np.nan) * pip)
+
+        if signals[i] != 0:
+            if fill == "close":
+                balance -= commission * lot_size
+                positions.append(open_at(closes[i]))
+            elif i + 1 < len(closes):
+                pending = open_at
+        marks = [d * (closes[i] + (spread if d < 0 else 0) - e) * units for d, e, _, _ in positions]
+        equity.append(balance + sum(marks))
+    return np.array(equity), sorted(profits)
+
+
+class TestColumnBook(unittest.TestCase):
+    def test_append_grows_and_remove_keeps_rows_contiguous(self):
+        """
+        Test that the book grows past its capacity and remove() moves the last row into the hole.
+        """
+        book = ColumnBook({"ticket": np.int64, "price": np.float64}, capacity=2)
+        for ticket in range(5):
+            book.append(ticket=ticket, price=ticket / 10)
+        self.assertEqual(len(book), 5)
+
+        self.assertEqual(book.remove(1), 4)
+        np.testing.assert_array_equal(book["ticket"], [0, 4, 2, 3])
+        self.assertEqual(book.row(1), {"ticket": 4, "price": 0.4})
+
+
+class TestSimulatedBroker(unittest.TestCase):
+    def setUp(self):
+        self.broker = SimulatedBroker(initial_balance=1000, spread=2, slippage=1, commission=7, symbol="EURUSD")
+        self.broker.update_price("EURUSD", 1.1000)
+
+    def test_buy_fills_at_ask_plus_slippage_and_pays_commission(self):
+        """
+        Test that a buy fills at bid + spread + slippage with stop-loss/take-profit levels in pips.
+        """
+        order = self.broker.open_buy(lot_size=1, stop_loss=20, take_profit=40)
+        self.assertEqual(order.state, FILLED)
+        self.assertTrue(order.wait(0))
+        position = self.broker.positions.row(0)
+        self.assertAlmostEqual(position["entry_price"], 1.1003)
+        self.assertAlmostEqual(position["stop_loss"], 1.0983)
+        self.assertAlmostEqual(position["take_profit"], 1.1043)
+        self.assertAlmostEqual(self.broker.balance, 993)
+        self.assertAlmostEqual(self.broker.equity(), 993 - 30)
+
+    def test_stop_loss_hit_intrabar_and_gap_fills_at_open(self):
+        """
+        Test that a long's stop-loss fills at its level within a bar, and at the open after a gap.
+        """
+        first = self.broker.open_buy(lot_size=1, stop_loss=20, take_profit=None).ticket
+        self.assertEqual(self.broker.on_bar("EURUSD", 1.0995, 1.1010, 1.0990, 1.0992, time=1), 0)
+        self.assertEqual(self.broker.on_bar("EURUSD", 1.0990, 1.0995, 1.0980, 1.0985, time=2), 1)
+        trade = self.broker.trades.row(0)
+        self.assertEqual(trade["ticket"], first)
+        self.assertEqual(trade["reason"], CLOSE_STOP_LOSS)
+        self.assertEqual(trade["exit_time"], 2)
+        self.assertAlmostEqual(trade["exit_price"], 1.0982)
+        self.assertAlmostEqual(trade["profit"], (1.0982 - 1.1003) * 100_000 - 14)
+
+        self.broker.open_buy(lot_size=1, stop_loss=20, take_profit=None)
+        self.broker.on_bar("EURUSD", 1.0900, 1.0910, 1.0890, 1.0905, time=3)
+        self.assertAlmostEqual(self.broker.trades.row(1)["exit_price"], 1.0899)
+
+    def test_take_profit_and_short_positions_use_the_ask(self):
+        """
+        Test that a short is filled at the bid and reaches its take-profit when the ask touches it.
+        """
+        self.broker.open_sell(lot_size=0.5, stop_loss=50, take_profit=10)
+        position = self.broker.positions.row(0)
+        self.assertAlmostEqual(position["entry_price"], 1.0999)
+        self.assertAlmostEqual(position["take_profit"], 1.0989)
+
+        # The low bid plus the spread (1.0990) does not reach the take-profit yet
+        self.broker.on_bar("EURUSD", 1.1000, 1.1001, 1.0988, 1.0995)
+        self.assertEqual(len(self.broker.trades), 0)
+        self.broker.on_bar("EURUSD", 1.0995, 1.0996, 1.0985, 1.0990)
+        trade = self.broker.trades.row(0)
+        self.assertEqual(trade["reason"], CLOSE_TAKE_PROFIT)
+        self.assertAlmostEqual(trade["exit_price"], 1.0989)
+
+    def test_bar_reaching_both_levels_hits_stop_loss_first(self):
+        """
+        Test that a bar spanning both the stop-loss and the take-profit is counted as a loss.
+        """
+        self.broker.open_buy(lot_size=1, stop_loss=10, take_profit=10)
+        self.broker.on_bar("EURUSD", 1.1000, 1.1100, 1.0900, 1.1000)
+        self.assertEqual(self.broker.trades.row(0)["reason"], CLOSE_STOP_LOSS)
+
+    def test_modify_and_close_position(self):
+        """
+        Test that a modified stop-loss is used, and that manual closes fill at the current price.
+        """
+        first = self.broker.open_buy(lot_size=1, stop_loss=20, take_profit=None).ticket
+        second = self.broker.open_buy(lot_size=1, stop_loss=20, take_profit=None).ticket
+        self.broker.modify_position(second, stop_loss=1.1001)
+        self.broker.on_bar("EURUSD", 1.1005, 1.1010, 1.1000, 1.1008)
+        self.assertEqual(self.broker.trades.row(0)["ticket"], second)
+
+        order = self.broker.close_position(first)
+        self.assertEqual(order.state, FILLED)
+        trade = self.broker.trades.row(1)
+        self.assertEqual(trade["reason"], CLOSE_MANUAL)
+        self.assertAlmostEqual(trade["exit_price"], 1.1007)
+        self.assertEqual(len(self.broker.positions), 0)
+        self.assertAlmostEqual(self.broker.equity(), self.broker.balance)
+
+        self.assertEqual(self.broker.close_position(first).state, REJECTED)
+        self.assertEqual(self.broker.open_buy(0.1, 10, 10, symbol="GBPUSD").state, REJECTED)
+
+    def test_positions_of_other_symbols_are_not_touched(self):
+        """
+        Test that a bar only fills the positions of its own symbol.
+        """
+        self.broker.update_price("GBPUSD", 1.3000)
+        self.broker.open_buy(lot_size=1, stop_loss=10, take_profit=None, symbol="GBPUSD")
+        self.broker.on_bar("EURUSD", 1.0, 1.0, 1.0, 1.0)
+        self.assertEqual(len(self.broker.trades), 0)
+
+
+class TestBrokerBacktest(unittest.TestCase):
+    def test_matches_bar_by_bar_simulation(self):
+        """
+        Test that the block-wise backtest gives the same trades and equity as a bar-by-bar loop.
+        """
+        signals, opens, highs, lows, closes = make_bars()
+        # Far one-sided stops keep positions open for hundreds of bars, which exercises the block search
+        for fill, stop_loss, take_profit in (("close", 15, 25), ("next_open", 15, 25), ("close", 150, None)):
+            broker = SimulatedBroker(initial_balance=10000, spread=1.5, slippage=0.5, commission=7, symbol="EURUSD")
+            result = BrokerBacktest(broker, "EURUSD", lot_size=0.2, stop_loss=stop_loss, take_profit=take_profit,
+                                    fill=fill).run(signals, opens, highs, lows, closes)
+            equity, profits = reference_backtest(signals, opens, highs, lows, closes, 0.2, stop_loss, take_profit,
+                                                 1.5e-4, 0.5e-4, 7, fill)
+
+            self.assertGreater(len(result.profits), 100)
+            np.testing.assert_allclose(np.sort(result.profits), profits)
+            np.testing.assert_allclose(result.equity_curve, equity)
+            self.assertAlmostEqual(result.final_balance, broker.equity())
+            self.assertEqual(result.metrics()["closed_trades"], len(profits))
+
+
+if __name__ == "__main__":
+    unittest.main()
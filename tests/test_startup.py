@@ -0,0 +1,107 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from strategies import registry
+from utils.lazy import LazyModule
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points of the bot and the tooling (supervised restarts, sweep and training workers)
+ENTRY_POINTS = ["main", "backtest", "backtesting.sweep", "backtesting.walk_forward", "live.loop", "live.multi_symbol",
+                "models.model_registry", "models.model_trainer", "utils.collect_historical_data", "benchmarks.suite"]
+
+# Dependencies that must only be imported on first use
+HEAVY_MODULES = ["MetaTrader5", "matplotlib", "sklearn", "scipy", "tensorflow", "stable_baselines3"]
+
+# Import time an entry point may add on top of pandas (which all of them need), as a fraction of the
+# time pandas itself takes to import, so the budget scales with the speed of the machine
+IMPORT_BUDGET = 0.5
+
+# Imports pandas, then one entry point, in a fresh interpreter, and reports both import times and
+# the heavy modules loaded by then
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import pandas
+pandas_seconds = time.perf_counter() - started
+started = time.perf_counter()
+__import__(sys.argv[2])
+seconds = time.perf_counter() - started
+heavy = [module for module in json.loads(sys.argv[1]) if module in sys.modules]
+print(json.dumps({"pandas": pandas_seconds, "seconds": seconds, "heavy": heavy}))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # One interpreter per entry point, so none is measured with modules another one already imported
+        cls.report = {}
+        for name in ENTRY_POINTS:
+            output = subprocess.run([sys.executable, "-c", PROBE, json.dumps(HEAVY_MODULES), name],
+                                    cwd=ROOT, capture_output=True, text=True, timeout=300,
+                                    env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+            if output.returncode != 0:
+                raise AssertionError(f"Importing {name} failed:\n{output.stderr}")
+            cls.report[name] = json.loads(output.stdout.strip().splitlines()[-1])
+
+    def test_heavy_dependencies_are_not_imported_at_startup(self):
+        for name, entry_point in self.report.items():
+            self.assertEqual(entry_point["heavy"], [], f"{name} imports {entry_point['heavy']} at startup")
+
+    def test_import_time_budget(self):
+        for name, entry_point in self.report.items():
+            budget = IMPORT_BUDGET * entry_point["pandas"]
+            self.assertLess(entry_point["seconds"], budget,
+                            f"{name} takes {entry_point['seconds']:.3f}s to import (budget {budget:.3f}s)")
+
+
+class TestLazyLoading(unittest.TestCase):
+    def test_lazy_module_imports_on_first_use(self):
+        module = LazyModule("json.decoder")
+        self.assertFalse(module.loaded)
+        self.assertIs(module.JSONDecodeError, json.JSONDecodeError)
+        self.assertTrue(module.loaded)
+        with self.assertRaises(ImportError):
+            LazyModule("not_an_installed_module").anything
+
+    def test_strategy_registry_imports_plugins_on_demand(self):
+        """
+        Test that strategies are resolved by name on first use and that missing plugins fail clearly.
+        """
+        from strategies.mean_reversion import MeanReversionStrategy
+        self.assertIs(registry.strategy_class("mean_reversion"), MeanReversionStrategy)
+        self.assertIn("multi_timeframe", registry.available_strategies())
+
+        registry.register_strategy("threshold", "tests.test_backtest:ThresholdStrategy")
+        registry.register_strategy("missing", "strategies.not_a_module:Strategy")
+        try:
+            self.assertEqual(type(registry.create_strategy("threshold")).__name__, "ThresholdStrategy")
+            with self.assertRaises(ImportError):
+                registry.strategy_class("missing")
+        finally:
+            del registry.STRATEGIES["threshold"], registry.STRATEGIES["missing"]
+            registry._loaded.pop("threshold", None)
+        with self.assertRaises(ValueError):
+            registry.strategy_class("unknown")
+
+    def test_unloadable_configured_strategy_fails_clearly(self):
+        """
+        Test that a configured strategy whose class cannot be imported fails with an error naming it,
+        instead of another strategy being traded.
+        """
+        with open(os.path.join(ROOT, "config.json")) as file:
+            config = json.load(file)
+        self.assertEqual(config["strategy_type"], registry.DEFAULT_STRATEGY)
+        registry.register_strategy("broken", "strategies.mean_reversion:NotAStrategy")
+        try:
+            with self.assertRaisesRegex(ImportError, "Strategy broken could not be loaded"):
+                registry.build_strategy({**config, "strategy_type": "broken"}, "EURUSD", lot_size=0.1)
+        finally:
+            del registry.STRATEGIES["broken"]
+
+
+if __name__ == "__main__":
+    unittest.main()
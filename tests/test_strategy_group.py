@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+from indicators.cache import IndicatorCache
+from strategies.base_strategy import BaseStrategy
+from strategies.group import StrategyGroup
+from strategies.mean_reversion import MeanReversionStrategy
+from strategies.registry import build_strategy
+
+CONFIG = {"symbol": "EURUSD", "stop_loss": 50, "take_profit": 100, "rsi_threshold": 40, "ema_period": 14,
+          "bollinger_period": 20, "bollinger_std_dev": 2}
+
+
+def make_market_data(bars=300, seed=8):
+    rng = np.random.default_rng(seed)
+    closes = 1 + 0.01 * np.sin(np.arange(bars) / 10) + np.cumsum(rng.normal(0, 0.0005, bars))
+    return {"highs": closes + 0.001, "lows": closes - 0.001, "closes": closes}
+
+
+def make_group():
+    # Five strategies that all read RSI(14), with three distinct Bollinger bands
+    return StrategyGroup({
+        f"mr{i}": MeanReversionStrategy("EURUSD", 0.1, 50, 100, rsi_threshold=threshold,
+                                        bollinger_period=period, bollinger_std_dev=std_dev)
+        for i, (threshold, period, std_dev) in enumerate([(35, 20, 2), (40, 20, 2), (45, 20, 2),
+                                                          (40, 10, 1), (40, 30, 1.5)])
+    })
+
+
+class TestStrategyGroup(unittest.TestCase):
+    def test_shared_indicators_are_computed_once(self):
+        """
+        Test that an indicator declared by several strategies is computed once per bar and streamed once.
+        """
+        group = make_group()
+        self.assertEqual(sorted(group.required_indicators()),
+                         ["bollinger", "bollinger(period=10, std_dev=1)", "bollinger(period=30, std_dev=1.5)",
+                          "rsi"])
+
+        market_data = make_market_data()
+        cache = IndicatorCache.from_market_data(market_data)
+        group.setup(market_data, cache)
+        self.assertEqual(cache.computed, 4)
+        for strategy in group.strategies.values():
+            self.assertEqual(strategy.indicators["rsi"], cache.latest("rsi", period=14))
+
+        streams = group.create_streams()
+        self.assertEqual(sorted(streams), sorted(group.required_indicators()))
+        for high, low, close in zip(market_data["highs"], market_data["lows"], market_data["closes"]):
+            for stream in streams.values():
+                stream.update(high, low, close)
+        self.assertTrue(group.setup_from_streams(streams, market_data["closes"][-1]))
+        for strategy in group.strategies.values():
+            self.assertAlmostEqual(strategy.indicators["rsi"], cache.latest("rsi", period=14))
+
+    def test_vectorized_signals_match_replayed_setup(self):
+        """
+        Test that the group's vectorized majority vote matches replaying setup() on every prefix.
+        """
+        group = make_group()
+        market_data = make_market_data()
+        vectorized = group.generate_signals(market_data)
+        replayed = BaseStrategy.generate_signals(group, market_data)
+        np.testing.assert_array_equal(vectorized, replayed)
+        self.assertTrue(np.any(vectorized != 0))
+        self.assertTrue(np.all(vectorized[:29] == 0))
+
+    def test_build_strategy_from_config(self):
+        """
+        Test that configurations create single strategies or groups without naming strategy classes.
+        """
+        strategy = build_strategy({**CONFIG, "strategy_type": "mean_reversion"}, "GBPUSD", lot_size=0.2)
+        self.assertIsInstance(strategy, MeanReversionStrategy)
+        self.assertEqual((strategy.symbol, strategy.lot_size, strategy.rsi_threshold), ("GBPUSD", 0.2, 40))
+
+        group = build_strategy({**CONFIG, "strategies": [
+            "mean_reversion", "mean_reversion", {"type": "mean_reversion", "name": "fast", "bollinger_period": 10},
+        ]}, "EURUSD", lot_size=0.1)
+        self.assertEqual(list(group.strategies), ["mean_reversion", "mean_reversion_2", "fast"])
+        self.assertEqual(group.strategies["fast"].bollinger_period, 10)
+        self.assertEqual(group.quorum, 2)
+
+        with self.assertRaises(ValueError):
+            build_strategy({"strategy_type": "mean_reversion"}, "EURUSD")
+        with self.assertRaises(ValueError):
+            build_strategy({**CONFIG, "strategy_type": "unknown"}, "EURUSD")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import unittest
+import numpy as np
+from indicators.rsi import RSI
+from indicators.ema import EMA
+from indicators.atr import ATR
+from indicators.sar import SAR
+from indicators.bollinger import BollingerBands
+from indicators.streaming import (
+    StreamingRSI, StreamingEMA, StreamingATR, StreamingSAR, StreamingBollingerBands
+)
+
+
+class TestStreamingIndicators(unittest.TestCase):
+    """
+    Unit tests for the incremental indicator state objects.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.closes = 1.1 + np.cumsum(rng.normal(0, 0.001, 120))
+        self.highs = self.closes + rng.uniform(0, 0.001, 120)
+        self.lows = self.closes - rng.uniform(0, 0.001, 120)
+
+    def make_indicators(self):
+        return {
+            "rsi": StreamingRSI(14),
+            "ema": StreamingEMA(14),
+            "atr": StreamingATR(14),
+            "sar": StreamingSAR(),
+            "bollinger": StreamingBollingerBands(20, 2),
+        }
+
+    def batch_values(self, end):
+        highs, lows, closes = self.highs[:end], self.lows[:end], self.closes[:end]
+        return {
+            "rsi": RSI.calculate(closes, 14),
+            "ema": EMA.calculate(closes, 14),
+            "atr": ATR.calculate(highs, lows, closes, 14),
+            "sar": SAR.calculate(highs, lows),
+            "bollinger": BollingerBands.calculate(closes, 20, 2),
+        }
+
+    def assert_matches_batch(self, indicators, end):
+        for name, expected in self.batch_values(end).items():
+            np.testing.assert_allclose(indicators[name].value, expected, rtol=1e-9, err_msg=name)
+
+    def test_update_matches_batch_calculation(self):
+        """
+        Test that bar-by-bar updates give the same values as the batch calculations.
+        """
+        indicators = self.make_indicators()
+        for i, (high, low, close) in enumerate(zip(self.highs, self.lows, self.closes)):
+            for indicator in indicators.values():
+                indicator.update(high, low, close)
+            if i < 12:
+                self.assertIsNone(indicators["rsi"].value)
+            if i >= 19:
+                self.assert_matches_batch(indicators, i + 1)
+
+    def test_warm_up_then_update(self):
+        """
+        Test that warming up from history and continuing with updates matches the batch values.
+        """
+        for split in (5, 13, 14, 15, 60):
+            indicators = self.make_indicators()
+            for indicator in indicators.values():
+                indicator.warm_up(self.highs[:split], self.lows[:split], self.closes[:split])
+                indicator.warm_up(self.highs[split:100], self.lows[split:100], self.closes[split:100])
+                for i in range(100, 120):
+                    indicator.update(self.highs[i], self.lows[i], self.closes[i])
+            self.assert_matches_batch(indicators, 120)
+
+    def test_snapshot_and_restore(self):
+        """
+        Test that a restored indicator continues exactly where the snapshot was taken.
+        """
+        indicators = self.make_indicators()
+        for indicator in indicators.values():
+            indicator.warm_up(self.highs[:80], self.lows[:80], self.closes[:80])
+
+        snapshots = json.loads(json.dumps({name: ind.snapshot() for name, ind in indicators.items()}))
+        restored = {name: ind.restore(snapshots[name]) for name, ind in self.make_indicators().items()}
+
+        for i in range(80, 120):
+            for name in indicators:
+                self.assertEqual(indicators[name].update(self.highs[i], self.lows[i], self.closes[i]),
+                                 restored[name].update(self.highs[i], self.lows[i], self.closes[i]))
+
+        with self.assertRaises(ValueError):
+            StreamingEMA(14).restore(snapshots["rsi"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+from backtesting.engine import BacktestEngine
+from backtesting.sweep import ParameterSweep, expand_grid
+from indicators.cache import IndicatorCache
+from strategies.mean_reversion import MeanReversionStrategy
+
+STRATEGY_KWARGS = dict(symbol="EURUSD", lot_size=0.1, stop_loss=50, take_profit=100)
+PARAM_GRID = {"rsi_threshold": [35, 40, 45], "bollinger_period": [10, 20], "bollinger_std_dev": [1, 2]}
+
+
+def make_market_data(bars=3000, seed=4):
+    rng = np.random.default_rng(seed)
+    closes = 1 + 0.02 * np.sin(np.arange(bars) / 15) + np.cumsum(rng.normal(0, 0.0005, bars))
+    return {"highs": closes + 0.001, "lows": closes - 0.001, "closes": closes}
+
+
+class TestParameterSweep(unittest.TestCase):
+    def test_expand_grid(self):
+        param_sets = expand_grid({"a": [1, 2], "b": ["x", "y", "z"]})
+        self.assertEqual(len(param_sets), 6)
+        self.assertIn({"a": 2, "b": "z"}, param_sets)
+
+    def test_threshold_variants_share_a_task(self):
+        """
+        Test that parameter sets differing only in thresholds are grouped into the same work unit.
+        """
+        sweep = ParameterSweep(MeanReversionStrategy, PARAM_GRID, STRATEGY_KWARGS, max_workers=1)
+        tasks = sweep.make_tasks()
+        self.assertEqual(len(tasks), 4)
+        for task in tasks:
+            self.assertEqual(sorted(params["rsi_threshold"] for params in task), [35, 40, 45])
+            self.assertEqual(len({(params["bollinger_period"], params["bollinger_std_dev"]) for params in task}), 1)
+
+    def test_indicator_cache_reuses_series(self):
+        market_data = make_market_data()
+        cache = IndicatorCache.from_market_data(market_data)
+        for threshold in (35, 40, 45):
+            MeanReversionStrategy(**STRATEGY_KWARGS, rsi_threshold=threshold).generate_signals(market_data, cache=cache)
+        self.assertEqual(cache.computed, 2)  # One RSI(14) and one set of bands
+
+    def test_results_match_individual_backtests(self):
+        """
+        Test that the ranked table matches running each backtest on its own, in-process and in parallel.
+        """
+        market_data = make_market_data()
+        serial = ParameterSweep(MeanReversionStrategy, PARAM_GRID, STRATEGY_KWARGS, max_workers=1).run(market_data)
+        parallel = ParameterSweep(MeanReversionStrategy, PARAM_GRID, STRATEGY_KWARGS, max_workers=2).run(market_data)
+
+        self.assertEqual(len(serial), 12)
+        self.assertTrue((np.diff(serial["net_profit"].to_numpy()) <= 0).all())
+        np.testing.assert_array_equal(serial.to_numpy(), parallel.to_numpy())
+
+        for row in serial.itertuples(index=False):
+            strategy = MeanReversionStrategy(**STRATEGY_KWARGS, rsi_threshold=row.rsi_threshold,
+                                             bollinger_period=row.bollinger_period,
+                                             bollinger_std_dev=row.bollinger_std_dev)
+            result = BacktestEngine(1000).run(strategy.generate_signals(market_data), market_data["closes"])
+            self.assertEqual(row.net_profit, result.net_profit)
+            self.assertEqual(row.closed_trades, len(result.exits))
+
+
+if __name__ == "__main__":
+    unittest.main()
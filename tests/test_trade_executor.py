@@ -0,0 +1,163 @@
+import itertools
+import threading
+import time
+import types
+import unittest
+from unittest.mock import patch
+import numpy as np
+from strategies.mean_reversion import MeanReversionStrategy
+from trade_management.brokers import BrokerError, TransientBrokerError
+from trade_management import mt5_broker
+from trade_management.orders import CANCELLED, FILLED, Order, REJECTED
+from trade_management.trade_executor import TradeExecutor
+from trade_management.trailing_stop import TrailingStopManager
+
+
+class FakeBroker:
+    """
+    In-process broker with a fixed round-trip latency and scripted failures.
+    """
+
+    def __init__(self, latency=0.01, failures=None, modify_failures=0):
+        """
+        :param latency: Seconds every request takes
+        :param failures: Dictionary mapping symbols to a list of exceptions raised by their next orders
+        :param modify_failures: Number of modification batches that fail temporarily
+        """
+        self.latency = latency
+        self.failures = failures or {}
+        self.modify_failures = modify_failures
+        self.tickets = itertools.count(1000)
+        self.orders = []
+        self.batches = []
+        self.stops = {}
+        self.lock = threading.Lock()
+
+    def send_order(self, order):
+        time.sleep(self.latency)
+        pending = self.failures.get(order.symbol)
+        if pending:
+            raise pending.pop(0)
+        with self.lock:
+            self.orders.append((order.symbol, order.side, order.lot_size))
+        return next(self.tickets)
+
+    def close_position(self, order):
+        time.sleep(self.latency)
+        return order.position_id
+
+    def modify_positions(self, modifications):
+        time.sleep(self.latency)
+        self.batches.append(len(modifications))
+        if self.modify_failures:
+            self.modify_failures -= 1
+            return [TransientBrokerError("Requote")] * len(modifications)
+        for modification in modifications:
+            self.stops[modification["position_id"]] = modification["stop_loss"]
+        return [None] * len(modifications)
+
+
+class TestTradeExecutor(unittest.TestCase):
+    def make_executor(self, broker, **kwargs):
+        executor = TradeExecutor("EURUSD", broker=broker, retry_delay=0.005, **kwargs)
+        self.addCleanup(executor.shutdown, 5)
+        return executor
+
+    def test_orders_do_not_block_the_caller(self):
+        broker = FakeBroker(latency=0.02)
+        executor = self.make_executor(broker)
+        started = time.perf_counter()
+        orders = [executor.open_buy(0.1, 50, 100) for _ in range(10)]
+        self.assertLess(time.perf_counter() - started, 0.1)  # Sending them takes at least 0.2 s
+
+        self.assertTrue(executor.flush(timeout=5))
+        self.assertEqual([order.state for order in orders], [FILLED] * 10)
+        self.assertEqual(len({order.ticket for order in orders}), 10)
+        self.assertEqual(executor.close_position(orders[0].ticket).wait(5), True)
+
+    def test_transient_failures_are_retried_with_backoff(self):
+        broker = FakeBroker(latency=0, failures={
+            "EURUSD": [TransientBrokerError("Requote"), TransientBrokerError("Timeout")],
+            "GBPUSD": [TransientBrokerError("Requote")] * 10,
+            "USDJPY": [BrokerError("Invalid volume")],
+        })
+        executor = self.make_executor(broker, max_retries=3)
+        recovered = executor.open_buy(0.1, 50, 100)
+        exhausted = executor.open_sell(0.1, 50, 100, symbol="GBPUSD")
+        invalid = executor.open_buy(0.1, 50, 100, symbol="USDJPY")
+        self.assertTrue(executor.flush(timeout=5))
+
+        self.assertEqual((recovered.state, recovered.attempts), (FILLED, 3))
+        self.assertEqual((exhausted.state, exhausted.attempts), (REJECTED, 4))
+        self.assertIsInstance(exhausted.error, TransientBrokerError)
+        self.assertEqual((invalid.state, invalid.attempts), (REJECTED, 1))
+        self.assertEqual(broker.orders, [("EURUSD", "buy", 0.1)])
+        self.assertEqual(executor.stats["retries"], 5)
+
+    def test_shutdown_cancels_orders_waiting_for_a_retry(self):
+        broker = FakeBroker(latency=0, failures={"EURUSD": [TransientBrokerError("Requote")]})
+        executor = TradeExecutor("EURUSD", broker=broker, retry_delay=10)
+        order = executor.open_buy(0.1, 50, 100)
+        self.assertFalse(executor.shutdown(timeout=0.1))
+        self.assertTrue(order.wait(0))
+        self.assertEqual(order.state, CANCELLED)
+        self.assertIsInstance(order.error, TransientBrokerError)
+        self.assertTrue(executor.flush(timeout=0))
+
+    def test_mt5_broker_retries_missing_prices(self):
+        """
+        Test that the MT5 broker reports a symbol without info or price as a temporary failure.
+        """
+        terminal = types.SimpleNamespace(symbol_info=lambda symbol: None, symbol_info_tick=lambda symbol: None,
+                                         last_error=lambda: (-1, "Terminal: Not found"))
+        with patch.object(mt5_broker, "mt5", terminal):
+            broker = mt5_broker.MT5Broker()
+            order = Order("open", "EURUSD", "buy", 0.1, 50, 100)
+            with self.assertRaises(TransientBrokerError):
+                broker.send_order(order)
+            terminal.symbol_info = lambda symbol: types.SimpleNamespace(point=0.00001, digits=5)
+            with self.assertRaises(TransientBrokerError):
+                broker.send_order(order)
+
+    def test_modifications_are_coalesced_and_batched(self):
+        broker = FakeBroker(latency=0.05)
+        executor = self.make_executor(broker)
+        executor.open_buy(0.1, 50, 100)  # Keeps the worker busy while the stops move
+        for step in range(100):
+            executor.modify_position(position_id=step % 5, stop_loss=1.1 + step / 10000)
+        self.assertTrue(executor.flush(timeout=5))
+
+        self.assertEqual(broker.stops, {position: 1.1 + (95 + position) / 10000 for position in range(5)})
+        self.assertLessEqual(len(broker.batches), 2)
+        self.assertEqual(executor.stats["modifications_sent"], sum(broker.batches))
+        self.assertGreaterEqual(executor.stats["modifications_coalesced"], 90)
+
+    def test_trailing_stops_go_out_in_one_batch(self):
+        broker = FakeBroker(latency=0)
+        executor = self.make_executor(broker)
+        ids, stops = TrailingStopManager(atr_multiplier=2).update_stop_losses(
+            np.arange(300), np.full(300, 1.2), np.full(300, 0.001), np.ones(300), np.full(300, 1.19))
+        executor.modify_positions(ids, stops)
+        self.assertTrue(executor.flush(timeout=5))
+        self.assertEqual(broker.batches, [300])
+        self.assertEqual(broker.stops, {position: 1.198 for position in range(300)})
+
+    def test_failed_modification_batch_is_retried(self):
+        broker = FakeBroker(latency=0, modify_failures=2)
+        executor = self.make_executor(broker)
+        executor.modify_position(position_id=7, stop_loss=1.2)
+        self.assertTrue(executor.flush(timeout=5))
+        self.assertEqual(broker.stops, {7: 1.2})
+        self.assertEqual(broker.batches, [1, 1, 1])
+
+    def test_strategy_orders_carry_the_strategy_symbol(self):
+        executor = self.make_executor(FakeBroker(latency=0))
+        strategy = MeanReversionStrategy("GBPUSD", 0.3, 50, 100)
+        order = strategy.execute_trade("sell", executor)
+        self.assertTrue(order.wait(5))
+        self.assertEqual((order.symbol, order.side, order.lot_size, order.state), ("GBPUSD", "sell", 0.3, FILLED))
+        self.assertIsNone(strategy.execute_trade("hold", executor))
+
+
+if __name__ == "__main__":
+    unittest.main()
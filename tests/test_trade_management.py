@@ -1,5 +1,7 @@
 # Test Trade Management
 
+import numpy as np
+import pytest
 from trade_management.trade_executor import TradeExecutor
 from trade_management.risk_manager import RiskManager
 from trade_management.trailing_stop import TrailingStopManager
@@ -31,6 +33,66 @@ def test_trailing_stop_manager():
     )
     print(f"New Stop-Loss: {new_stop_loss}")
 
+def test_trailing_stops_ratchet():
+    """
+    Test that batch trailing stops only tighten, and only changed positions are returned.
+    """
+    trailing_manager = TrailingStopManager(atr_multiplier=2, min_step=0.0001)
+    ids, stops = trailing_manager.update_stop_losses(
+        position_ids=np.array([1, 2, 3, 4, 5]),
+        current_prices=np.array([1.1050, 1.1050, 1.2000, 1.2000, 1.3000]),
+        atr_values=np.array([0.0010, 0.0010, 0.0010, 0.0010, 0.0010]),
+        directions=np.array([1, 1, -1, -1, 1]),
+        current_stop_losses=np.array([1.1000, 1.1040, 1.2100, 1.2010, np.nan]),
+    )
+    # 2 would be loosened and 4 would be loosened; 5 gets its first stop
+    np.testing.assert_array_equal(ids, [1, 3, 5])
+    np.testing.assert_allclose(stops, [1.1030, 1.2020, 1.2980])
+
+    # Moves below min_step are not reported
+    ids, _ = trailing_manager.update_stop_losses([1], [1.10305], [0.0010], [1], [1.1030])
+    assert len(ids) == 0
+    assert trailing_manager.update_stop_loss(1, 1.1050, 0.0010, True, current_stop_loss=1.1040) == 1.1040
+
+
+def test_batch_lot_sizes_and_exposure():
+    """
+    Test batch lot sizing (with the portfolio risk cap) and exposure aggregation.
+    """
+    risk_manager = RiskManager(account_balance=10000, risk_per_trade=1)
+    lot_sizes = risk_manager.calculate_lot_sizes(np.array([50, 20, 100]), 10)
+    np.testing.assert_allclose(lot_sizes, [risk_manager.calculate_lot_size(sl, 10) for sl in (50, 20, 100)])
+
+    # Three trades risking 1% each are scaled down to 2% in total
+    capped = risk_manager.calculate_lot_sizes(np.array([50, 20, 100]), 10, max_total_risk=2)
+    assert np.sum(capped * np.array([50, 20, 100]) * 10) <= 200
+    np.testing.assert_allclose(capped, [0.13, 0.33, 0.06])
+
+    exposure = risk_manager.calculate_exposure(
+        symbols=np.array(["EURUSD", "GBPUSD", "EURUSD"]),
+        lot_sizes=np.array([1.0, 0.5, 0.25]),
+        directions=np.array([1, -1, -1]),
+        prices=np.array([1.1, 1.3, 1.1]),
+    )
+    assert exposure["net"] == {"EURUSD": pytest.approx(82500), "GBPUSD": pytest.approx(-65000)}
+    assert exposure["gross"] == pytest.approx(110000 + 65000 + 27500)
+    assert exposure["leverage"] == exposure["gross"] / 10000
+
+    # A USDJPY lot is worth 100,000 USD, not 100,000 x 150
+    exposure = risk_manager.calculate_exposure(
+        symbols=np.array(["EURUSD", "USDJPY"]), lot_sizes=np.array([1.0, 1.0]), directions=np.array([1, 1]),
+        prices=np.array([1.1, 150.0]), quote_rates={"JPY": 1 / 150},
+    )
+    assert exposure["net"]["USDJPY"] == pytest.approx(100000)
+    assert exposure["leverage"] == pytest.approx(21)
+    with pytest.raises(ValueError):
+        risk_manager.calculate_exposure(np.array(["USDJPY"]), np.array([1.0]), np.array([1]), np.array([150.0]))
+
+    # Rounding under a cap never exceeds it, even when no scaling is needed
+    lot_sizes = risk_manager.calculate_lot_sizes(np.array([15, 15]), 10, max_total_risk=2)
+    assert np.sum(lot_sizes * 15 * 10) <= 200
+
+
 # Run tests
 def test_trade_management():
     test_trade_executor()
@@ -0,0 +1,110 @@
+import unittest
+from functools import partial
+import numpy as np
+import pandas as pd
+from backtesting.engine import BacktestEngine
+from backtesting.walk_forward import ModelWalkForward, StrategyWalkForward, walk_forward_windows
+from models.ml_model import MLModel
+from strategies.mean_reversion import MeanReversionStrategy
+
+STRATEGY_KWARGS = dict(symbol="EURUSD", lot_size=0.1, stop_loss=50, take_profit=100)
+PARAM_GRID = {"rsi_threshold": [35, 45], "bollinger_period": [10, 20], "bollinger_std_dev": [1, 2]}
+
+
+def make_market_data(bars=2000, seed=4):
+    rng = np.random.default_rng(seed)
+    closes = 1 + 0.02 * np.sin(np.arange(bars) / 15) + np.cumsum(rng.normal(0, 0.0005, bars))
+    return {"highs": closes + 0.001, "lows": closes - 0.001, "closes": closes}
+
+
+class CountingModel(MLModel):
+    fits = 0
+
+    def fit(self, features, target):
+        CountingModel.fits += 1
+        return super().fit(features, target)
+
+
+class TestWalkForward(unittest.TestCase):
+    def test_windows(self):
+        self.assertEqual(walk_forward_windows(10, 4, 2), [(0, 4, 4, 6), (2, 6, 6, 8), (4, 8, 8, 10)])
+        self.assertEqual(walk_forward_windows(10, 4, 2, step=3, anchored=True), [(0, 4, 4, 6), (0, 7, 7, 9)])
+        self.assertEqual(walk_forward_windows(5, 4, 2), [])
+
+    def test_strategy_folds_pick_best_training_parameters(self):
+        """
+        Test that each fold keeps the best training parameters and reports their test-window backtest,
+        in-process and in parallel.
+        """
+        market_data = make_market_data()
+        walk_forward = StrategyWalkForward(MeanReversionStrategy, PARAM_GRID, train_size=800, test_size=400,
+                                           strategy_kwargs=STRATEGY_KWARGS, max_workers=1)
+        folds = walk_forward.run(market_data)
+        self.assertEqual(len(folds), 3)
+
+        parallel = StrategyWalkForward(MeanReversionStrategy, PARAM_GRID, train_size=800, test_size=400,
+                                       strategy_kwargs=STRATEGY_KWARGS, max_workers=2).run(market_data)
+        pd.testing.assert_frame_equal(folds, parallel)
+
+        engine = BacktestEngine(1000)
+        for fold in folds.itertuples(index=False):
+            train, test = slice(fold.train_start, fold.train_end), slice(fold.test_start, fold.test_end)
+            profits = {}
+            for params in walk_forward.param_sets:
+                signals = MeanReversionStrategy(**STRATEGY_KWARGS, **params).generate_signals(market_data)
+                profits[tuple(params.values())] = (engine.run(signals[train], market_data["closes"][train]).net_profit,
+                                                   engine.run(signals[test], market_data["closes"][test]).net_profit)
+            chosen = (fold.rsi_threshold, fold.bollinger_period, fold.bollinger_std_dev)
+            self.assertEqual(fold.train_net_profit, max(train for train, _ in profits.values()))
+            self.assertEqual(profits[chosen], (fold.train_net_profit, fold.test_net_profit))
+
+    def test_model_folds_reuse_fitted_windows(self):
+        """
+        Test that models are fitted once per training window and reused on later runs.
+        """
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({"Date": pd.date_range("2020-01-01", periods=300), "x1": rng.normal(size=300),
+                             "x2": rng.normal(size=300)})
+        data["target"] = (data["x1"] + 0.1 * data["x2"] > 0).astype(int)
+
+        CountingModel.fits = 0
+        walk_forward = ModelWalkForward(train_size=100, test_size=50, model_factory=CountingModel, max_workers=1)
+        folds, predictions = walk_forward.run(data)
+        self.assertEqual(len(folds), 4)
+        self.assertEqual(CountingModel.fits, 4)
+        self.assertTrue((folds["accuracy"] > 0.8).all())
+        self.assertTrue(all(prediction is None for prediction in predictions[:100]))
+
+        walk_forward.step = 25  # Every other window was already fitted
+        folds, _ = walk_forward.run(data)
+        self.assertEqual(len(folds), 7)
+        self.assertEqual(CountingModel.fits, 7)
+
+        data["x1"] = -data["x1"]  # Same windows over different data must not reuse the old models
+        data["target"] = (data["x1"] + 0.1 * data["x2"] > 0).astype(int)
+        folds, _ = walk_forward.run(data)
+        self.assertEqual(CountingModel.fits, 14)
+        self.assertTrue((folds["accuracy"] > 0.8).all())
+
+    def test_incremental_folds_grow_the_previous_model(self):
+        """
+        Test that incremental folds are fitted once and then grown window by window.
+        """
+        rng = np.random.default_rng(1)
+        data = pd.DataFrame({"x1": rng.normal(size=300), "x2": rng.normal(size=300)})
+        data["target"] = (data["x1"] > 0).astype(int)
+
+        CountingModel.fits = 0
+        factory = partial(CountingModel, n_estimators=10, growth=5, max_estimators=20)
+        walk_forward = ModelWalkForward(train_size=100, test_size=10, step=10, model_factory=factory,
+                                        max_workers=1, incremental=True)
+        folds, _ = walk_forward.run(data)
+        self.assertEqual(len(folds), 20)
+        self.assertEqual(CountingModel.fits, 1)
+        self.assertEqual([len(model.model.estimators_) for model in walk_forward.models.values()][:4],
+                         [10, 15, 20, 20])
+        self.assertTrue((folds["accuracy"] > 0.7).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
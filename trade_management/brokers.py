@@ -0,0 +1,54 @@
+import itertools
+
+
+class BrokerError(Exception):
+    """
+    The broker rejected a request; retrying it will not help.
+    """
+
+
+class TransientBrokerError(BrokerError):
+    """
+    The request failed for a temporary reason (requote, timeout, lost connection) and may be retried.
+    """
+
+
+class DryRunBroker:
+    """
+    Broker that only prints the requests it receives and accepts all of them.
+    """
+
+    def __init__(self):
+        self.tickets = itertools.count(1)
+
+    def send_order(self, order):
+        """
+        Open a market position.
+
+        :param order: Order to send
+        :return: Ticket of the new position
+        """
+        print(f"{order.side.upper()} Order: Symbol={order.symbol}, LotSize={order.lot_size}, "
+              f"SL={order.stop_loss}, TP={order.take_profit}")
+        return next(self.tickets)
+
+    def close_position(self, order):
+        """
+        Close an open position.
+
+        :param order: Close order (its position_id is the ticket to close)
+        """
+        print(f"Closing position: ID={order.position_id}")
+        return order.position_id
+
+    def modify_positions(self, modifications):
+        """
+        Move the stop-loss/take-profit of several positions.
+
+        :param modifications: List of dictionaries with position_id, symbol, stop_loss and take_profit
+        :return: List with None for every applied modification, or the BrokerError that failed it
+        """
+        for modification in modifications:
+            print(f"Modify position: ID={modification['position_id']}, "
+                  f"SL={modification['stop_loss']}, TP={modification['take_profit']}")
+        return [None] * len(modifications)
@@ -0,0 +1,162 @@
+from live.connection import MT5Connection
+from trade_management.brokers import BrokerError, TransientBrokerError
+from utils.lazy import lazy_import
+
+mt5 = lazy_import("MetaTrader5")
+
+# Return codes after which the same request may succeed when sent again
+TRANSIENT_RETCODES = ("TRADE_RETCODE_REQUOTE", "TRADE_RETCODE_PRICE_CHANGED", "TRADE_RETCODE_PRICE_OFF",
+                      "TRADE_RETCODE_TIMEOUT", "TRADE_RETCODE_CONNECTION", "TRADE_RETCODE_TOO_MANY_REQUESTS",
+                      "TRADE_RETCODE_LOCKED")
+
+
+class MT5Broker:
+    """
+    Sends TradeExecutor requests to MetaTrader 5.
+
+    Every terminal call goes through an MT5Connection, so the broker can share the session
+    (and its owner thread) with the bar feeds.
+    """
+
+    def __init__(self, connection=None, deviation=20, magic=0):
+        """
+        :param connection: MT5Connection making the terminal calls (default: a private one)
+        :param deviation: Maximum price deviation accepted for market orders, in points
+        :param magic: Magic number attached to the orders
+        """
+        self.connection = connection or MT5Connection()
+        self.deviation = deviation
+        self.magic = magic
+        self.transient_retcodes = {getattr(mt5, name) for name in TRANSIENT_RETCODES if hasattr(mt5, name)}
+
+    def send_order(self, order):
+        """
+        Open a market position, with stop-loss and take-profit given in pips.
+
+        :return: Ticket of the new position
+        """
+        info = self._call(mt5.symbol_info, order.symbol)
+        if info is None:
+            raise TransientBrokerError(f"No symbol info for {order.symbol}: {self._call(mt5.last_error)}")
+        tick = self._tick(order.symbol)
+        pip = info.point * (10 if info.digits in (3, 5) else 1)
+        if order.side == "buy":
+            order_type, price, direction = mt5.ORDER_TYPE_BUY, tick.ask, 1
+        else:
+            order_type, price, direction = mt5.ORDER_TYPE_SELL, tick.bid, -1
+        request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": order.symbol,
+            "volume": float(order.lot_size),
+            "type": order_type,
+            "price": price,
+            "sl": price - direction * order.stop_loss * pip if order.stop_loss else 0.0,
+            "tp": price + direction * order.take_profit * pip if order.take_profit else 0.0,
+            "deviation": self.deviation,
+            "magic": self.magic,
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+        return self._send(request).order
+
+    def close_position(self, order):
+        """
+        Close an open position with an opposite market deal.
+
+        :return: Ticket of the closing deal
+        """
+        positions = self._call(mt5.positions_get, ticket=order.position_id)
+        if not positions:
+            raise BrokerError(f"Position {order.position_id} not found")
+        position = positions[0]
+        tick = self._tick(position.symbol)
+        is_buy = position.type == mt5.POSITION_TYPE_BUY
+        request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": position.symbol,
+            "volume": position.volume,
+            "type": mt5.ORDER_TYPE_SELL if is_buy else mt5.ORDER_TYPE_BUY,
+            "position": position.ticket,
+            "price": tick.bid if is_buy else tick.ask,
+            "deviation": self.deviation,
+            "magic": self.magic,
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+        return self._send(request).order
+
+    def modify_positions(self, modifications):
+        """
+        Move the stop-loss/take-profit of several positions. MT5 has no batch request, so the
+        modifications are sent one after the other.
+
+        :return: List with None for every applied modification, or the BrokerError that failed it
+        """
+        results = []
+        for modification in modifications:
+            try:
+                take_profit = modification["take_profit"]
+                if take_profit is None:
+                    # The request sets both levels, so keep the current take-profit
+                    positions = self._call(mt5.positions_get, ticket=modification["position_id"])
+                    if not positions:
+                        raise BrokerError(f"Position {modification['position_id']} not found")
+                    take_profit = positions[0].tp
+                self._send({
+                    "action": mt5.TRADE_ACTION_SLTP,
+                    "symbol": modification["symbol"],
+                    "position": modification["position_id"],
+                    "sl": modification["stop_loss"],
+                    "tp": take_profit,
+                })
+                results.append(None)
+            except BrokerError as e:
+                results.append(e)
+        return results
+
+    def open_positions(self, symbol):
+        """
+        :return: Set of the tickets of the symbol's open positions carrying the broker's magic number
+        """
+        positions = self._call(mt5.positions_get, symbol=symbol)
+        if positions is None:
+            raise TransientBrokerError(f"positions_get failed: {self._call(mt5.last_error)}")
+        return {position.ticket for position in positions if position.magic == self.magic}
+
+    def closed_position(self, ticket):
+        """
+        Look up how a closed position ended in the deal history.
+
+        :param ticket: Ticket of the position
+        :return: (exit price, commissions, swaps and fees in account currency), or None when the
+                 closing deal is not in the history
+        """
+        deals = self._call(mt5.history_deals_get, position=ticket)
+        if not deals:
+            return None
+        exits = [deal for deal in deals if deal.entry in (mt5.DEAL_ENTRY_OUT, mt5.DEAL_ENTRY_OUT_BY)]
+        if not exits:
+            return None
+        costs = -sum(deal.commission + deal.swap + deal.fee for deal in deals)
+        return exits[-1].price, costs
+
+    def _tick(self, symbol):
+        # The terminal has no price yet right after connecting or selecting a symbol
+        tick = self._call(mt5.symbol_info_tick, symbol)
+        if tick is None:
+            raise TransientBrokerError(f"No price for {symbol}: {self._call(mt5.last_error)}")
+        return tick
+
+    def _call(self, function, *args, **kwargs):
+        if kwargs:
+            return self.connection.call(lambda: function(*args, **kwargs))
+        return self.connection.call(function, *args)
+
+    def _send(self, request):
+        result = self._call(mt5.order_send, request)
+        if result is None:
+            raise TransientBrokerError(f"order_send failed: {self._call(mt5.last_error)}")
+        if result.retcode != mt5.TRADE_RETCODE_DONE:
+            error = TransientBrokerError if result.retcode in self.transient_retcodes else BrokerError
+            raise error(f"order_send returned {result.retcode}: {result.comment}")
+        return result
@@ -0,0 +1,70 @@
+import itertools
+import threading
+import time
+
+# Order states
+PENDING = "pending"      # Queued, not sent yet
+SUBMITTED = "submitted"  # Being sent to the broker
+RETRYING = "retrying"    # Failed temporarily, waiting to be sent again
+FILLED = "filled"        # Accepted by the broker
+REJECTED = "rejected"    # Refused by the broker (or out of retries)
+CANCELLED = "cancelled"  # Dropped before it was sent
+
+FINAL_STATES = (FILLED, REJECTED, CANCELLED)
+
+_order_ids = itertools.count(1)
+
+
+class Order:
+    """
+    A request sent to the broker through the execution queue, with its lifecycle.
+    """
+
+    def __init__(self, kind, symbol, side=None, lot_size=None, stop_loss=None, take_profit=None, position_id=None):
+        """
+        :param kind: 'open' or 'close'
+        :param symbol: Trading symbol (e.g., "EURUSD")
+        :param side: 'buy' or 'sell' (open orders)
+        :param lot_size: Lot size (open orders)
+        :param stop_loss: Stop-loss in pips (open orders)
+        :param take_profit: Take-profit in pips (open orders)
+        :param position_id: Ticket of the position to close (close orders)
+        """
+        self.id = next(_order_ids)
+        self.kind = kind
+        self.symbol = symbol
+        self.side = side
+        self.lot_size = lot_size
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.position_id = position_id
+        self.state = PENDING
+        self.attempts = 0
+        self.ticket = None
+        self.error = None
+        self.created = time.monotonic()
+        self.finished = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self.state in FINAL_STATES
+
+    def wait(self, timeout=None):
+        """
+        Block until the order reaches a final state.
+
+        :param timeout: Maximum number of seconds to wait
+        :return: True if the order is done
+        """
+        return self._done.wait(timeout)
+
+    def finish(self, state, ticket=None, error=None):
+        self.state = state
+        self.ticket = ticket
+        self.error = error
+        self.finished = time.monotonic()
+        self._done.set()
+
+    def __repr__(self):
+        return f"Order(id={self.id}, {self.kind} {self.side or ''} {self.symbol}, state={self.state})"
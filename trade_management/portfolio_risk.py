@@ -0,0 +1,371 @@
+from trade_management.orders import Order, FILLED, REJECTED
+
+
+class RiskLimitError(Exception):
+    """
+    An order was refused by a portfolio risk limit.
+    """
+
+
+class _SymbolBook:
+    """
+    Running totals of the open positions of one symbol.
+    """
+    __slots__ = ("base", "quote", "price", "net_units", "gross_units", "cost", "positions", "unrealized",
+                 "margin", "notional")
+
+    def __init__(self, symbol):
+        self.base, self.quote = symbol[:3], symbol[3:6]
+        self.price = None
+        self.net_units = 0.0    # Signed units of the base currency
+        self.gross_units = 0.0  # Units of longs and shorts together
+        self.cost = 0.0         # Signed entry value in the quote currency
+        self.positions = 0
+        self.unrealized = 0.0   # Contributions to the portfolio totals, in account currency
+        self.margin = 0.0
+        self.notional = 0.0
+
+
+class PortfolioRisk:
+    """
+    Portfolio-wide exposure, margin and drawdown, kept up to date incrementally.
+
+    Every fill, close and price update only touches the totals of its own symbol and the two
+    currencies of the pair, so the work per event does not grow with the number of positions.
+    Values are converted to the account currency with the latest price of a pair of the
+    currency and the account currency; a cross pair's contribution is refreshed on its own
+    next price update.
+    """
+
+    def __init__(self, account_balance, account_currency="USD", leverage=100, contract_size=100_000,
+                 max_open_positions=None, max_gross_leverage=None, max_currency_exposure=None,
+                 max_margin_usage=None, max_drawdown=None):
+        """
+        :param account_balance: Account balance in account currency
+        :param account_currency: Currency of the account (e.g., "USD")
+        :param leverage: Account leverage, for the margin
+        :param contract_size: Units per lot
+        :param max_open_positions: Optional limit on the number of open positions
+        :param max_gross_leverage: Optional limit on gross exposure / equity
+        :param max_currency_exposure: Optional limit on the absolute net exposure to any currency, in account currency
+        :param max_margin_usage: Optional limit on used margin / equity (e.g., 0.5)
+        :param max_drawdown: Optional drawdown from the equity peak (e.g., 0.2) at which new orders are refused
+        """
+        self.account_currency = account_currency
+        self.leverage = leverage
+        self.contract_size = contract_size
+        self.limits = {
+            "max_open_positions": max_open_positions,
+            "max_gross_leverage": max_gross_leverage,
+            "max_currency_exposure": max_currency_exposure,
+            "max_margin_usage": max_margin_usage,
+            "max_drawdown": max_drawdown,
+        }
+        self.balance = float(account_balance)
+        self.books = {}
+        self.exposures = {}     # Net units by currency
+        self.rates = {account_currency: 1.0}  # Value of one unit of a currency in account currency
+        self.unrealized = 0.0
+        self.margin = 0.0
+        self.notional = 0.0
+        self.positions = 0
+        self.peak_equity = self.balance
+        self.max_drawdown = 0.0
+
+    # Events
+
+    def on_price(self, symbol, price):
+        """
+        Update the price of a symbol.
+        """
+        book = self._book(symbol)
+        book.price = float(price)
+        if book.quote == self.account_currency:
+            self.rates[book.base] = book.price
+        elif book.base == self.account_currency:
+            self.rates[book.quote] = 1 / book.price
+        self._revalue(book)
+
+    def on_fill(self, symbol, direction, lot_size, price):
+        """
+        Add an opened position.
+
+        :param symbol: Trading symbol (e.g., "EURUSD")
+        :param direction: 1 for a buy, -1 for a sell
+        :param lot_size: Lot size
+        :param price: Fill price
+        """
+        book = self._book(symbol)
+        if book.price is None:
+            self.on_price(symbol, price)
+        units = lot_size * self.contract_size
+        book.net_units += direction * units
+        book.gross_units += units
+        book.cost += direction * units * price
+        book.positions += 1
+        self.positions += 1
+        self._add_exposure(book, direction * units, -direction * units * price)
+        self._revalue(book)
+
+    def on_close(self, symbol, direction, lot_size, entry_price, exit_price, costs=0.0):
+        """
+        Remove a closed position and book its profit.
+
+        :param symbol: Trading symbol
+        :param direction: 1 for a buy, -1 for a sell
+        :param lot_size: Lot size
+        :param entry_price: Price the position was opened at
+        :param exit_price: Price the position was closed at
+        :param costs: Commissions and swaps of the trade, in account currency
+        """
+        book = self._book(symbol)
+        units = lot_size * self.contract_size
+        book.net_units -= direction * units
+        book.gross_units -= units
+        book.cost -= direction * units * entry_price
+        book.positions -= 1
+        self.positions -= 1
+        self._add_exposure(book, -direction * units, direction * units * entry_price)
+        self.balance += direction * units * (exit_price - entry_price) * self._rate(book.quote) - costs
+        self._revalue(book)
+
+    # Queries
+
+    @property
+    def equity(self):
+        return self.balance + self.unrealized
+
+    @property
+    def drawdown(self):
+        """
+        Current fall of the equity from its peak, as a fraction of the peak.
+        """
+        return (self.peak_equity - self.equity) / self.peak_equity if self.peak_equity > 0 else 0.0
+
+    def exposure(self, currency):
+        """
+        :return: Net exposure to a currency, in account currency
+        """
+        return self.exposures.get(currency, 0.0) * self._rate(currency)
+
+    def snapshot(self):
+        """
+        Current state of the portfolio from the running totals (nothing is recomputed).
+
+        :return: Dictionary with balance, equity, unrealized profit, used and free margin, gross exposure,
+                 leverage, current and maximum drawdown, open positions and net exposure by currency
+        """
+        equity = self.equity
+        return {
+            "balance": self.balance,
+            "equity": equity,
+            "unrealized": self.unrealized,
+            "margin": self.margin,
+            "free_margin": equity - self.margin,
+            "gross_exposure": self.notional,
+            "leverage": self.notional / equity if equity > 0 else float("inf"),
+            "drawdown": self.drawdown,
+            "max_drawdown": self.max_drawdown,
+            "open_positions": self.positions,
+            "exposures": {currency: self.exposure(currency) for currency in self.exposures},
+        }
+
+    def check_order(self, symbol, direction, lot_size, price=None):
+        """
+        Check an order against the limits, as if it were filled now.
+
+        :param symbol: Trading symbol
+        :param direction: 1 for a buy, -1 for a sell
+        :param lot_size: Lot size
+        :param price: Expected fill price (default: the symbol's latest price)
+        :return: None if the order is allowed, otherwise the reason it is refused
+        """
+        limits = self.limits
+        book = self._book(symbol)
+        price = book.price if price is None else price
+        if price is None:
+            return f"No price for {symbol}"
+        equity = self.equity
+        units = lot_size * self.contract_size
+        notional = units * price * self._rate(book.quote)
+
+        if limits["max_drawdown"] is not None and self.drawdown >= limits["max_drawdown"]:
+            return f"Drawdown {self.drawdown:.1%} reached the limit of {limits['max_drawdown']:.1%}"
+        if limits["max_open_positions"] is not None and self.positions >= limits["max_open_positions"]:
+            return f"{self.positions} positions already open"
+        if limits["max_gross_leverage"] is not None and \
+                self.notional + notional > limits["max_gross_leverage"] * equity:
+            return f"Gross exposure would exceed {limits['max_gross_leverage']}x equity"
+        if limits["max_margin_usage"] is not None and \
+                self.margin + notional / self.leverage > limits["max_margin_usage"] * equity:
+            return f"Margin would exceed {limits['max_margin_usage']:.0%} of equity"
+        if limits["max_currency_exposure"] is not None:
+            for currency, change in ((book.base, direction * units), (book.quote, -direction * units * price)):
+                before = self.exposure(currency)
+                after = before + change * self._rate(currency)
+                if abs(after) > limits["max_currency_exposure"] and abs(after) > abs(before):
+                    return f"Exposure to {currency} would reach {after:,.0f} {self.account_currency}"
+        return None
+
+    # Internals
+
+    def _book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = _SymbolBook(symbol)
+        return book
+
+    def _rate(self, currency):
+        # Unknown cross currencies count at par until a pair with the account currency is priced
+        return self.rates.get(currency, 1.0)
+
+    def _add_exposure(self, book, base_units, quote_units):
+        self.exposures[book.base] = self.exposures.get(book.base, 0.0) + base_units
+        self.exposures[book.quote] = self.exposures.get(book.quote, 0.0) + quote_units
+
+    def _revalue(self, book):
+        """
+        Replace the symbol's contribution to the unrealized profit, margin and exposure totals.
+        """
+        if book.price is None:
+            return
+        rate = self._rate(book.quote)
+        unrealized = (book.net_units * book.price - book.cost) * rate
+        notional = book.gross_units * book.price * rate
+        margin = notional / self.leverage
+        self.unrealized += unrealized - book.unrealized
+        self.notional += notional - book.notional
+        self.margin += margin - book.margin
+        book.unrealized, book.notional, book.margin = unrealized, notional, margin
+
+        equity = self.equity
+        if equity > self.peak_equity:
+            self.peak_equity = equity
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+
+
+class RiskCheckedExecutor:
+    """
+    Puts a PortfolioRisk in front of a TradeExecutor (or SimulatedBroker).
+
+    Orders that would break a limit are refused before they reach the executor: they come back
+    as REJECTED orders with a RiskLimitError. Accepted orders count towards the portfolio at
+    the symbol's latest price as soon as they are sent, so orders sent in the same instant
+    cannot exceed the limits together; the executor's later rejections give the room back.
+    Closed positions leave the portfolio once their close order is filled. Positions closed by
+    the broker itself (stop-loss, take-profit) are reported with position_closed, or found with
+    reconcile.
+    """
+
+    def __init__(self, executor, risk):
+        """
+        :param executor: TradeExecutor (or anything with the same interface) sending the orders
+        :param risk: PortfolioRisk checking them
+        """
+        self.executor = executor
+        self.risk = risk
+        self.symbol = executor.symbol
+        self.in_flight = {}  # Accepted open orders not finished yet by order id: (order, symbol, direction, lots, price)
+        self.filled = {}     # The same for filled orders, by position ticket
+        self.closing = {}    # Close orders not finished yet by order id: (order, position ticket)
+
+    def open_buy(self, lot_size, stop_loss, take_profit, symbol=None):
+        return self._open(1, lot_size, stop_loss, take_profit, symbol or self.symbol)
+
+    def open_sell(self, lot_size, stop_loss, take_profit, symbol=None):
+        return self._open(-1, lot_size, stop_loss, take_profit, symbol or self.symbol)
+
+    def close_position(self, position_id, symbol=None):
+        order = self.executor.close_position(position_id, symbol=symbol)
+        self.closing[order.id] = (order, position_id)
+        self._settle()
+        return order
+
+    def position_closed(self, position_id, exit_price=None, costs=0.0):
+        """
+        Remove a position from the portfolio, e.g. when the broker hit its stop-loss or take-profit.
+
+        :param position_id: Ticket of the position
+        :param exit_price: Price it was closed at (default: the symbol's latest price)
+        :param costs: Commissions and swaps of the trade, in account currency
+        """
+        self._settle()
+        self._remove(position_id, exit_price, costs)
+
+    def reconcile(self, symbol, open_tickets, closed_position=None):
+        """
+        Remove the symbol's positions the broker no longer holds, i.e. closed on its side.
+
+        :param symbol: Trading symbol
+        :param open_tickets: Tickets of the symbol's positions still open at the broker
+        :param closed_position: Function returning (exit price, costs) for a closed ticket, or None
+                                when unknown (default: close at the symbol's latest price)
+        :return: Number of positions removed
+        """
+        self._settle()
+        closing = {position_id for _, position_id in self.closing.values()}
+        gone = [ticket for ticket, opened in self.filled.items()
+                if opened[1] == symbol and ticket not in open_tickets and ticket not in closing]
+        for ticket in gone:
+            details = closed_position(ticket) if closed_position else None
+            exit_price, costs = details if details is not None else (None, 0.0)
+            self._remove(ticket, exit_price, costs)
+        return len(gone)
+
+    def modify_position(self, position_id, stop_loss, take_profit=None, symbol=None):
+        return self.executor.modify_position(position_id, stop_loss, take_profit, symbol=symbol)
+
+    def modify_positions(self, position_ids, stop_losses, take_profits=None, symbols=None):
+        return self.executor.modify_positions(position_ids, stop_losses, take_profits, symbols=symbols)
+
+    def flush(self, timeout=None):
+        return self.executor.flush(timeout)
+
+    def shutdown(self, timeout=None):
+        return self.executor.shutdown(timeout)
+
+    def _open(self, direction, lot_size, stop_loss, take_profit, symbol):
+        self._settle()
+        reason = self.risk.check_order(symbol, direction, lot_size)
+        if reason is not None:
+            order = Order("open", symbol, "buy" if direction > 0 else "sell", lot_size, stop_loss, take_profit)
+            order.finish(REJECTED, error=RiskLimitError(reason))
+            return order
+
+        price = self.risk.books[symbol].price
+        self.risk.on_fill(symbol, direction, lot_size, price)
+        if direction > 0:
+            order = self.executor.open_buy(lot_size, stop_loss, take_profit, symbol=symbol)
+        else:
+            order = self.executor.open_sell(lot_size, stop_loss, take_profit, symbol=symbol)
+        self.in_flight[order.id] = (order, symbol, direction, lot_size, price)
+        return order
+
+    def _settle(self):
+        """
+        Move finished open and close orders out of the in-flight sets (only orders still being sent
+        are visited).
+        """
+        for order_id, opened in list(self.in_flight.items()):
+            order, symbol, direction, lot_size, price = opened
+            if not order.done:
+                continue
+            del self.in_flight[order_id]
+            if order.state == FILLED:
+                self.filled[order.ticket] = opened
+            else:
+                self.risk.on_close(symbol, direction, lot_size, price, price)
+        # A close order that failed leaves the position open
+        for order_id, (order, position_id) in list(self.closing.items()):
+            if not order.done:
+                continue
+            del self.closing[order_id]
+            if order.state == FILLED:
+                self._remove(position_id)
+
+    def _remove(self, position_id, exit_price=None, costs=0.0):
+        opened = self.filled.pop(position_id, None)
+        if opened is not None:
+            _, symbol, direction, lot_size, price = opened
+            exit_price = self.risk.books[symbol].price if exit_price is None else exit_price
+            self.risk.on_close(symbol, direction, lot_size, price, exit_price, costs)
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class RiskManager:
     """
     Manages risk, including position sizing and stop-loss calculations.
@@ -24,3 +27,62 @@ class RiskManager:
         risk_amount = (self.risk_per_trade / 100) * self.account_balance
         lot_size = risk_amount / (stop_loss_pips * pip_value)
         return round(lot_size, 2)
+
+    def calculate_lot_sizes(self, stop_loss_pips, pip_values, max_total_risk=None):
+        """
+        Calculate the lot sizes of many trades at once.
+
+        :param stop_loss_pips: Numpy array of stop-losses in pips
+        :param pip_values: Numpy array (or scalar) of pip values per lot in the account's base currency
+        :param max_total_risk: Optional cap on the risk of all the trades together, as a percentage of the
+                               balance; when the trades would risk more, every lot size is scaled down equally
+        :return: Numpy array of lot sizes (rounded down to 0.01 under a cap, so rounding cannot break it)
+        """
+        risk_per_lot = np.asarray(stop_loss_pips, dtype=float) * np.asarray(pip_values, dtype=float)
+        risk_amount = (self.risk_per_trade / 100) * self.account_balance
+        lot_sizes = risk_amount / risk_per_lot
+
+        if max_total_risk is not None:
+            total_risk = float(np.sum(lot_sizes * risk_per_lot))
+            allowed = (max_total_risk / 100) * self.account_balance
+            if total_risk > allowed:
+                lot_sizes = lot_sizes * (allowed / total_risk)
+            return np.floor(lot_sizes * 100) / 100
+        return np.round(lot_sizes, 2)
+
+    def calculate_exposure(self, symbols, lot_sizes, directions, prices, contract_size=100_000,
+                           account_currency="USD", quote_rates=None):
+        """
+        Aggregate the exposure of open positions per symbol.
+
+        Notionals are in the quote currency of each symbol (e.g. JPY for USDJPY), so they are
+        converted to the account currency before being added up.
+
+        :param symbols: Numpy array of position symbols (e.g. "EURUSD": base currency, then quote currency)
+        :param lot_sizes: Numpy array of position lot sizes
+        :param directions: Numpy array with 1 for buys and -1 for sells
+        :param prices: Numpy array of current prices of the positions' symbols
+        :param contract_size: Units per lot
+        :param account_currency: Currency of the account balance
+        :param quote_rates: Dictionary mapping quote currencies to their price in the account currency
+                            (e.g. {"JPY": 1 / 150} for a USD account); needed for every quote currency
+                            other than the account currency
+        :return: Dictionary with the net exposure by symbol ("net"), the gross exposure ("gross"), both in the
+                 account currency, and the ratio of the gross exposure to the account balance ("leverage")
+        """
+        rates = {account_currency: 1.0, **(quote_rates or {})}
+        names, index = np.unique(np.asarray(symbols), return_inverse=True)
+        quotes = [str(name)[3:6] for name in names]
+        missing = sorted({quote for quote in quotes if quote not in rates})
+        if missing:
+            raise ValueError(f"No quote_rates to convert {missing} into {account_currency}")
+
+        to_account = np.array([rates[quote] for quote in quotes], dtype=float)[index]
+        notional = np.asarray(lot_sizes, dtype=float) * contract_size * np.asarray(prices, dtype=float) * to_account
+        net = np.bincount(index, weights=np.asarray(directions, dtype=float) * notional, minlength=len(names))
+        gross = float(np.sum(notional))
+        return {
+            "net": dict(zip(names.tolist(), net.tolist())),
+            "gross": gross,
+            "leverage": gross / self.account_balance,
+        }
@@ -0,0 +1,544 @@
+import numpy as np
+from trade_management.orders import Order, FILLED, REJECTED
+
+# Reasons a position was closed (reason column of the trade log)
+CLOSE_MANUAL = 0
+CLOSE_STOP_LOSS = 1
+CLOSE_TAKE_PROFIT = 2
+
+POSITION_COLUMNS = {
+    "ticket": np.int64,
+    "symbol": np.int32,       # Index into SimulatedBroker.symbols
+    "direction": np.int8,     # 1 = buy, -1 = sell
+    "volume": np.float64,     # Lots
+    "entry_price": np.float64,
+    "entry_time": np.int64,
+    "stop_loss": np.float64,  # Price level, NaN if none
+    "take_profit": np.float64,
+    "commission": np.float64,  # Commission paid at entry
+}
+TRADE_COLUMNS = dict(POSITION_COLUMNS, exit_price=np.float64, exit_time=np.int64, profit=np.float64, reason=np.int8)
+
+# Largest positions x bars hit matrix built at once
+MAX_HIT_CELLS = 1 << 20
+# Bars (or blocks) per block of the stop-loss/take-profit search of SimulatedBroker.simulate_orders
+SCAN_BLOCK = 64
+
+
+class ColumnBook:
+    """
+    Growable set of rows stored as one numpy array per column.
+
+    Rows are appended in amortized O(1); remove() moves the last row into the hole, so the
+    rows stay contiguous and every column is a plain array slice.
+    """
+
+    def __init__(self, columns, capacity=1024):
+        """
+        :param columns: Dictionary mapping column names to numpy dtypes
+        :param capacity: Initial number of rows allocated
+        """
+        self.arrays = {name: np.empty(capacity, dtype=dtype) for name, dtype in columns.items()}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self.arrays[name][:self.size]
+
+    def append(self, **values):
+        """
+        Add a row.
+
+        :return: Index of the new row
+        """
+        self._reserve(self.size + 1)
+        row = self.size
+        for name, array in self.arrays.items():
+            array[row] = values[name]
+        self.size += 1
+        return row
+
+    def extend(self, **columns):
+        """
+        Add several rows given as one array (or scalar) per column.
+        """
+        count = len(columns["ticket"])
+        self._reserve(self.size + count)
+        for name, array in self.arrays.items():
+            array[self.size:self.size + count] = columns[name]
+        self.size += count
+
+    def _reserve(self, size):
+        capacity = len(self.arrays["ticket"])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.arrays[name] = grown
+
+    def row(self, row):
+        """
+        :return: Dictionary with the values of a row
+        """
+        return {name: array[row].item() for name, array in self.arrays.items()}
+
+    def remove(self, row):
+        """
+        Remove a row by moving the last row into its place.
+
+        :return: Index the last row was moved from (equal to row if it was the last one)
+        """
+        last = self.size - 1
+        if row != last:
+            for array in self.arrays.values():
+                array[row] = array[last]
+        self.size = last
+        return last
+
+
+class SimulatedBroker:
+    """
+    In-process broker with the TradeExecutor interface, for backtests and paper trading.
+
+    Bar prices are bid prices. Buys fill at the ask (bid + spread) and close at the bid;
+    sells the other way round. Market fills also lose a fixed slippage, and every fill pays a
+    commission per lot. Stop-loss and take-profit levels are checked against each bar's high
+    and low; a bar that opens beyond a level fills at the open, and a bar that reaches both
+    levels is assumed to hit the stop-loss first.
+
+    Open positions and closed trades are kept in ColumnBooks, so simulating millions of
+    orders only costs a few numpy arrays.
+    """
+
+    def __init__(self, initial_balance=10000, spread=1.0, slippage=0.0, commission=0.0, pip_size=0.0001,
+                 contract_size=100_000, symbol=None):
+        """
+        :param initial_balance: Starting balance in account currency
+        :param spread: Bid/ask spread in pips
+        :param slippage: Adverse slippage of market fills (orders, stop-losses) in pips
+        :param commission: Commission per lot and per fill in account currency
+        :param pip_size: Price change of one pip
+        :param contract_size: Units per lot
+        :param symbol: Default trading symbol
+        """
+        self.initial_balance = initial_balance
+        self.balance = float(initial_balance)
+        self.spread = spread * pip_size
+        self.slippage = slippage * pip_size
+        self.commission = commission
+        self.pip_size = pip_size
+        self.contract_size = contract_size
+        self.symbol = symbol
+        self.symbols = []        # Symbol names by index
+        self.symbol_ids = {}
+        self.prices = {}         # Latest (bid, time) by symbol index
+        self.positions = ColumnBook(POSITION_COLUMNS)
+        self.trades = ColumnBook(TRADE_COLUMNS)
+        self.rows = {}           # Row of every open position by ticket
+        self.next_ticket = 1
+        self.orders = {}
+
+    # TradeExecutor interface
+
+    def open_buy(self, lot_size, stop_loss, take_profit, symbol=None):
+        """
+        Open a buy position at the ask.
+
+        :param lot_size: Lot size for the order
+        :param stop_loss: Stop-loss in pips (None or 0 for none)
+        :param take_profit: Take-profit in pips (None or 0 for none)
+        :param symbol: Trading symbol (default: the broker's symbol)
+        :return: Filled (or rejected) Order
+        """
+        return self._order(Order("open", symbol or self.symbol, "buy", lot_size, stop_loss, take_profit))
+
+    def open_sell(self, lot_size, stop_loss, take_profit, symbol=None):
+        """
+        Open a sell position at the bid.
+        """
+        return self._order(Order("open", symbol or self.symbol, "sell", lot_size, stop_loss, take_profit))
+
+    def close_position(self, position_id, symbol=None):
+        """
+        Close an open position at the current price.
+        """
+        return self._order(Order("close", symbol or self.symbol, position_id=position_id))
+
+    def modify_position(self, position_id, stop_loss, take_profit=None, symbol=None):
+        """
+        Move the stop-loss (and optionally the take-profit) of an open position.
+
+        :param position_id: Ticket of the position
+        :param stop_loss: New stop-loss price
+        :param take_profit: New take-profit price (default: unchanged)
+        """
+        row = self.rows.get(position_id)
+        if row is None:
+            return
+        self.positions.arrays["stop_loss"][row] = np.nan if stop_loss is None else stop_loss
+        if take_profit is not None:
+            self.positions.arrays["take_profit"][row] = take_profit
+
+    def modify_positions(self, position_ids, stop_losses, take_profits=None, symbols=None):
+        """
+        Move the stop-losses (and optionally the take-profits) of many open positions; unknown IDs are skipped.
+        """
+        rows = np.array([self.rows.get(int(position_id), -1) for position_id in position_ids], dtype=np.int64)
+        known = rows >= 0
+        self.positions.arrays["stop_loss"][rows[known]] = np.asarray(stop_losses, dtype=float)[known]
+        if take_profits is not None:
+            self.positions.arrays["take_profit"][rows[known]] = np.asarray(take_profits, dtype=float)[known]
+
+    def flush(self, timeout=None):
+        return True
+
+    def shutdown(self, timeout=None):
+        return True
+
+    # Prices
+
+    def symbol_id(self, symbol):
+        if symbol not in self.symbol_ids:
+            self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return self.symbol_ids[symbol]
+
+    def update_price(self, symbol, bid, time=0):
+        """
+        Set the current bid of a symbol without checking stop-loss/take-profit levels.
+        """
+        self.prices[self.symbol_id(symbol)] = (float(bid), int(time))
+
+    def on_bar(self, symbol, open_price, high, low, close, time=0):
+        """
+        Apply one closed bar: fill the stop-loss/take-profit levels it reached, then move the price to its close.
+
+        :return: Number of positions closed
+        """
+        return self.advance(symbol, [open_price], [high], [low], [close], [time])
+
+    def advance(self, symbol, opens, highs, lows, closes, times=None):
+        """
+        Apply a block of consecutive bars of one symbol.
+
+        All open positions of the symbol are checked against the whole block at once and closed
+        on the first bar that reaches their stop-loss or take-profit.
+
+        :param symbol: Trading symbol
+        :param opens: Open prices of the bars
+        :param highs: High prices of the bars
+        :param lows: Low prices of the bars
+        :param closes: Close prices of the bars
+        :param times: Bar times (default: 0 .. len - 1)
+        :return: Number of positions closed
+        """
+        symbol_id = self.symbol_id(symbol)
+        opens, highs, lows = (np.asarray(prices, dtype=float) for prices in (opens, highs, lows))
+        times = np.arange(len(opens)) if times is None else np.asarray(times)
+        if len(opens) == 0:
+            return 0
+
+        closed = 0
+        rows = np.flatnonzero(self.positions["symbol"] == symbol_id)
+        # Chunks of bars keep the positions x bars hit matrices small
+        step = max(1, MAX_HIT_CELLS // max(len(rows), 1))
+        for first in range(0, len(opens), step):
+            if len(rows) == 0:
+                break
+            bars = slice(first, first + step)
+            positions = self.positions.arrays
+            hit, hit_bars, prices, reasons = self._first_hits(
+                positions["direction"][rows], positions["stop_loss"][rows], positions["take_profit"][rows],
+                opens[bars], highs[bars], lows[bars])
+            if len(hit_bars):
+                self._close_rows(rows[hit], prices, times[bars][hit_bars], reasons)
+                closed += len(hit_bars)
+                rows = np.flatnonzero(self.positions["symbol"] == symbol_id)
+
+        self.prices[symbol_id] = (float(closes[-1]), int(times[-1]))
+        return closed
+
+    def simulate_orders(self, symbol, directions, volume, stop_loss_pips, take_profit_pips, fill_bids, entry_bars,
+                        opens, highs, lows, closes, check_from=None):
+        """
+        Fill a whole series of market orders on one symbol's bars at once (fast path for backtests).
+
+        Positions do not depend on each other, so every order is filled at its bar and followed
+        forward independently, with all positions searched together (see _search). Positions still open after the last bar stay in
+        the book, and the symbol's price moves to the last close. Bar indices are used as times.
+
+        :param symbol: Trading symbol
+        :param directions: Numpy array with 1 (buy) or -1 (sell) per order
+        :param volume: Lot size of the orders (scalar or one per order)
+        :param stop_loss_pips: Stop-loss distance in pips (None or 0 for none)
+        :param take_profit_pips: Take-profit distance in pips (None or 0 for none)
+        :param fill_bids: Bid price each order is filled at
+        :param entry_bars: Bar index of each fill, in ascending order
+        :param opens: Open prices of the bars
+        :param highs: High prices of the bars
+        :param lows: Low prices of the bars
+        :param closes: Close prices of the bars
+        :param check_from: First bar whose range is checked for each order (default: the bar after the fill)
+        :return: Slice of the trade log rows added for the closed trades
+        """
+        symbol_id = self.symbol_id(symbol)
+        opens, highs, lows, closes = (np.asarray(prices, dtype=float) for prices in (opens, highs, lows, closes))
+        directions = np.asarray(directions, dtype=np.int8)
+        entry_bars = np.asarray(entry_bars, dtype=np.int64)
+        count, bars = len(directions), len(closes)
+        buy = directions > 0
+        volume = np.broadcast_to(np.asarray(volume, dtype=float), count)
+        entry_prices = np.asarray(fill_bids, dtype=float) + np.where(buy, self.spread + self.slippage, -self.slippage)
+        sign = directions.astype(float)
+        stop_losses = entry_prices - sign * (stop_loss_pips or np.nan) * self.pip_size
+        take_profits = entry_prices + sign * (take_profit_pips or np.nan) * self.pip_size
+        commissions = self.commission * volume
+        tickets = np.arange(self.next_ticket, self.next_ticket + count, dtype=np.int64)
+        self.next_ticket += count
+        self.balance -= float(commissions.sum())
+
+        starts = entry_bars + 1 if check_from is None else np.array(check_from, dtype=np.int64)
+        # Positions without a stop-loss or take-profit stay open
+        starts[~(np.isfinite(stop_losses) | np.isfinite(take_profits))] = bars
+        exit_bars, exit_prices, reasons = self._search((directions, stop_losses, take_profits), opens, highs, lows,
+                                                       starts)
+
+        closed = np.flatnonzero(exit_bars < bars)
+        # The trade log stays in the order the trades were closed in
+        closed = closed[np.lexsort((tickets[closed], exit_bars[closed]))]
+        exit_commissions = commissions[closed]
+        gross = (sign[closed] * (exit_prices[closed] - entry_prices[closed]) * volume[closed]
+                 * self.contract_size)
+        self.balance += float(np.sum(gross - exit_commissions))
+        first_trade = len(self.trades)
+        self.trades.extend(
+            ticket=tickets[closed], symbol=symbol_id, direction=directions[closed], volume=volume[closed],
+            entry_price=entry_prices[closed], entry_time=entry_bars[closed], stop_loss=stop_losses[closed],
+            take_profit=take_profits[closed], commission=commissions[closed], exit_price=exit_prices[closed],
+            exit_time=exit_bars[closed], profit=gross - commissions[closed] - exit_commissions, reason=reasons[closed],
+        )
+
+        still_open = np.flatnonzero(exit_bars == bars)
+        first_row = len(self.positions)
+        self.positions.extend(
+            ticket=tickets[still_open], symbol=symbol_id, direction=directions[still_open],
+            volume=volume[still_open], entry_price=entry_prices[still_open], entry_time=entry_bars[still_open],
+            stop_loss=stop_losses[still_open], take_profit=take_profits[still_open],
+            commission=commissions[still_open],
+        )
+        self.rows.update(zip(tickets[still_open].tolist(), range(first_row, len(self.positions))))
+        self.prices[symbol_id] = (float(closes[-1]), bars - 1)
+        return slice(first_trade, len(self.trades))
+
+    def _search(self, levels, opens, highs, lows, starts):
+        """
+        Find each position's first stop-loss or take-profit hit at or after its start bar.
+
+        The bars up to the second block boundary are searched directly. Positions still open
+        after that search the series of block extremes (a block reaches a level if and only if
+        one of its bars does) the same way, recursively, and then only the bars of the block found.
+
+        :param levels: Tuple of numpy arrays (directions, stop-loss prices, take-profit prices)
+        :return: Tuple of numpy arrays (exit bar or len(opens) if none, fill price, close reason)
+        """
+        bars = len(lows)
+        if bars > 4 * SCAN_BLOCK:
+            ends = np.minimum((starts // SCAN_BLOCK + 2) * SCAN_BLOCK, bars)
+        else:
+            ends = np.full(len(starts), bars)
+        exit_bars, exit_prices, reasons = self._scan(*levels, opens, highs, lows, starts, ends)
+
+        later = np.flatnonzero((exit_bars == bars) & (ends < bars))
+        if len(later):
+            blocks = -(-bars // SCAN_BLOCK)
+            padding = blocks * SCAN_BLOCK - bars
+            block_lows = np.append(lows, np.full(padding, np.inf)).reshape(blocks, SCAN_BLOCK).min(axis=1)
+            block_highs = np.append(highs, np.full(padding, -np.inf)).reshape(blocks, SCAN_BLOCK).max(axis=1)
+            later_levels = tuple(level[later] for level in levels)
+            hit_blocks, _, _ = self._search(later_levels, block_lows, block_highs, block_lows,
+                                            ends[later] // SCAN_BLOCK)
+            found = hit_blocks < blocks
+            later, block_starts = later[found], hit_blocks[found] * SCAN_BLOCK
+            exit_bars[later], exit_prices[later], reasons[later] = self._scan(
+                *(level[found] for level in later_levels), opens, highs, lows, block_starts,
+                np.minimum(block_starts + SCAN_BLOCK, bars), window=SCAN_BLOCK)
+        return exit_bars, exit_prices, reasons
+
+    def _scan(self, directions, stop_losses, take_profits, opens, highs, lows, starts, ends, window=16):
+        """
+        Search each position's bars [start, end) for its first stop-loss or take-profit hit,
+        in windows that grow until every position is hit or out of bars.
+
+        :param window: Bars searched per position in the first round
+
+        :return: Tuple of numpy arrays (exit bar or len(opens) if none, fill price, close reason)
+        """
+        count, bars = len(starts), len(opens)
+        exit_bars = np.full(count, bars, dtype=np.int64)
+        exit_prices = np.full(count, np.nan)
+        reasons = np.zeros(count, dtype=np.int8)
+        starts = starts.copy()
+        pending = np.flatnonzero(starts < ends)
+        while len(pending):
+            offsets = np.arange(window)
+            for chunk in np.array_split(pending, max(1, len(pending) * window // MAX_HIT_CELLS)):
+                index = starts[chunk][:, None] + offsets
+                valid = index < ends[chunk][:, None]
+                index = np.minimum(index, bars - 1)
+                hit, hit_bars, prices, hit_reasons = self._first_hits(
+                    directions[chunk], stop_losses[chunk], take_profits[chunk],
+                    opens[index], highs[index], lows[index], valid)
+                closed = chunk[hit]
+                exit_bars[closed] = index[hit, hit_bars]
+                exit_prices[closed] = prices
+                reasons[closed] = hit_reasons
+            starts[pending] += window
+            pending = pending[(exit_bars[pending] == bars) & (starts[pending] < ends[pending])]
+            window = min(4 * window, bars)
+        return exit_bars, exit_prices, reasons
+
+    def _first_hits(self, directions, stop_losses, take_profits, opens, highs, lows, valid=None):
+        """
+        Find the first bar on which each position reaches its stop-loss or take-profit.
+
+        The bar prices are either one row of bars shared by all positions or one row per position.
+        Sells are compared on negated ask prices, so that both sides become "price <= level"
+        (stop-loss) and "price >= level" (take-profit) checks of one matrix.
+
+        :param valid: Optional boolean matrix of the bars that may be used
+        :return: Tuple (boolean mask of the positions hit, and for those: bar index, fill price, close reason)
+        """
+        buy = (directions > 0)[:, None]
+        sign = np.where(buy, 1.0, -1.0)
+        spread = np.where(buy, 0.0, self.spread)
+        stop_loss = sign * stop_losses[:, None]
+        take_profit = sign * take_profits[:, None]
+
+        stop_hits = np.where(buy, lows, -(highs + self.spread)) <= stop_loss
+        profit_hits = np.where(buy, highs, -(lows + self.spread)) >= take_profit
+        if valid is not None:
+            stop_hits &= valid
+            profit_hits &= valid
+        none = stop_hits.shape[1]
+        stop_bar = np.where(stop_hits.any(axis=1), stop_hits.argmax(axis=1), none)
+        profit_bar = np.where(profit_hits.any(axis=1), profit_hits.argmax(axis=1), none)
+        hit = (stop_bar < none) | (profit_bar < none)
+        if not hit.any():
+            return hit, np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int8)
+
+        # A bar reaching both levels is assumed to hit the stop-loss first
+        stopped = (stop_bar <= profit_bar)[hit]
+        bars = np.minimum(stop_bar, profit_bar)[hit]
+        sign, spread = sign[hit, 0], spread[hit, 0]
+        open_prices = sign * (np.broadcast_to(opens, stop_hits.shape)[hit, bars] + spread)
+        # Levels opened beyond fill at the open: stop-losses with slippage, take-profits (limits) without
+        stop_prices = np.minimum(stop_loss[hit, 0], open_prices) - self.slippage
+        profit_prices = np.maximum(take_profit[hit, 0], open_prices)
+        prices = sign * np.where(stopped, stop_prices, profit_prices)
+        return hit, bars, prices, np.where(stopped, CLOSE_STOP_LOSS, CLOSE_TAKE_PROFIT)
+
+    # Account
+
+    def equity(self):
+        """
+        Balance plus the profit of the open positions at the current prices.
+        """
+        return self.balance + float(self.unrealized_profits().sum())
+
+    def unrealized_profits(self):
+        """
+        :return: Numpy array with the profit of every open position at the current prices (commissions excluded)
+        """
+        symbols = self.positions["symbol"]
+        bids = np.array([self.prices.get(symbol_id, (np.nan, 0))[0] for symbol_id in range(len(self.symbols))])
+        direction = self.positions["direction"]
+        marks = bids[symbols] + np.where(direction < 0, self.spread, 0.0) if len(symbols) else np.empty(0)
+        return direction * (marks - self.positions["entry_price"]) * self.positions["volume"] * self.contract_size
+
+    def open_position(self, symbol, direction, volume, stop_loss_pips=None, take_profit_pips=None):
+        """
+        Open a position at the current price without creating an Order.
+
+        :param symbol: Trading symbol
+        :param direction: 1 to buy, -1 to sell
+        :param volume: Lot size
+        :param stop_loss_pips: Stop-loss distance in pips (None or 0 for none)
+        :param take_profit_pips: Take-profit distance in pips (None or 0 for none)
+        :return: Ticket of the position
+        """
+        symbol_id = self.symbol_id(symbol)
+        if symbol_id not in self.prices:
+            raise ValueError(f"No price for {symbol}")
+        bid, time = self.prices[symbol_id]
+        price = bid + self.spread + self.slippage if direction > 0 else bid - self.slippage
+        commission = self.commission * volume
+        self.balance -= commission
+
+        ticket = self.next_ticket
+        self.next_ticket += 1
+        self.rows[ticket] = self.positions.append(
+            ticket=ticket, symbol=symbol_id, direction=direction, volume=volume, entry_price=price, entry_time=time,
+            stop_loss=price - direction * stop_loss_pips * self.pip_size if stop_loss_pips else np.nan,
+            take_profit=price + direction * take_profit_pips * self.pip_size if take_profit_pips else np.nan,
+            commission=commission,
+        )
+        return ticket
+
+    def close_open_position(self, ticket):
+        """
+        Close a position at the current price without creating an Order.
+
+        :return: Net profit of the trade
+        """
+        row = self.rows[ticket]
+        bid, time = self.prices[int(self.positions.arrays["symbol"][row])]
+        if self.positions.arrays["direction"][row] > 0:
+            price = bid - self.slippage
+        else:
+            price = bid + self.spread + self.slippage
+        profits = self._close_rows(np.array([row]), np.array([price]), np.array([time]), np.array([CLOSE_MANUAL]))
+        return float(profits[0])
+
+    def _order(self, order):
+        self.orders[order.id] = order
+        try:
+            if order.kind == "open":
+                direction = 1 if order.side == "buy" else -1
+                ticket = self.open_position(order.symbol, direction, order.lot_size, order.stop_loss, order.take_profit)
+            else:
+                if order.position_id not in self.rows:
+                    raise ValueError(f"Position {order.position_id} not found")
+                self.close_open_position(order.position_id)
+                ticket = order.position_id
+        except ValueError as e:
+            order.finish(REJECTED, error=e)
+        else:
+            order.finish(FILLED, ticket=ticket)
+        return order
+
+    def _close_rows(self, rows, prices, times, reasons):
+        """
+        Close open positions, book their profits and move them to the trade log.
+
+        :return: Numpy array with the net profit of every closed trade
+        """
+        positions = self.positions.arrays
+        closing = {name: array[rows] for name, array in positions.items()}
+        commission = self.commission * closing["volume"]
+        gross = closing["direction"] * (prices - closing["entry_price"]) * closing["volume"] * self.contract_size
+        self.balance += float(np.sum(gross - commission))
+        profits = gross - closing["commission"] - commission
+        self.trades.extend(**closing, exit_price=prices, exit_time=times, profit=profits, reason=reasons)
+
+        # Removing from the highest row down never moves a row that is still to be removed
+        for ticket in closing["ticket"].tolist():
+            del self.rows[ticket]
+        for row in np.sort(rows)[::-1].tolist():
+            if self.positions.remove(row) != row:
+                self.rows[int(positions["ticket"][row])] = row
+        return profits
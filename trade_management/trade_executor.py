@@ -1,40 +1,274 @@
+import heapq
+import queue
+import threading
+import time
+from trade_management.brokers import DryRunBroker, TransientBrokerError
+from trade_management.orders import Order, CANCELLED, FILLED, REJECTED, RETRYING, SUBMITTED
+
+# Queue item that stops the worker
+_STOP = object()
+# Queue item that only wakes the worker up (new position modifications)
+_WAKE = object()
+
+
 class TradeExecutor:
     """
     Handles trade execution, including buy/sell orders, stop-loss, and take-profit.
+
+    Requests are queued and sent by a background worker, so callers never wait for a broker
+    round-trip: open_buy/open_sell/close_position return an Order that tracks its state.
+    Temporary broker failures are retried with exponential backoff. Stop-loss/take-profit
+    modifications are coalesced per position (only the latest values are sent) and sent in
+    batches.
     """
 
-    def __init__(self, symbol):
+    def __init__(self, symbol, broker=None, max_retries=3, retry_delay=0.1, max_retry_delay=2.0):
         """
         Initialize the trade executor.
 
         :param symbol: The trading symbol (e.g., "EURUSD")
+        :param broker: Broker receiving the requests (default: DryRunBroker, which only prints them)
+        :param max_retries: Number of times a temporarily failed order is sent again
+        :param retry_delay: Delay before the first retry in seconds (doubled after every failure)
+        :param max_retry_delay: Maximum delay between retries in seconds
         """
         self.symbol = symbol
+        self.broker = broker or DryRunBroker()
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.orders = {}          # Every order by id
+        self.modifications = {}   # Pending stop-loss/take-profit changes by position id (latest wins)
+        self.stats = {"orders_sent": 0, "retries": 0, "modification_batches": 0, "modifications_sent": 0,
+                      "modifications_coalesced": 0}
+        self._queue = queue.Queue()
+        self._retries = []        # Heap of (due time, order id, order)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = 0     # Orders and modifications not finished yet
+        self._modifications_due = 0.0   # Time before which modifications are held back after a failure
+        self._modification_failures = 0  # Consecutive temporarily failed batches
+        self._worker = None
 
-    def open_buy(self, lot_size, stop_loss, take_profit):
+    def open_buy(self, lot_size, stop_loss, take_profit, symbol=None):
         """
         Place a buy order.
 
         :param lot_size: Lot size for the order
         :param stop_loss: Stop-loss in pips
         :param take_profit: Take-profit in pips
+        :param symbol: Trading symbol (default: the executor's symbol)
+        :return: The queued Order
         """
-        print(f"BUY Order: Symbol={self.symbol}, LotSize={lot_size}, SL={stop_loss}, TP={take_profit}")
+        return self._submit(Order("open", symbol or self.symbol, "buy", lot_size, stop_loss, take_profit))
 
-    def open_sell(self, lot_size, stop_loss, take_profit):
+    def open_sell(self, lot_size, stop_loss, take_profit, symbol=None):
         """
         Place a sell order.
 
         :param lot_size: Lot size for the order
         :param stop_loss: Stop-loss in pips
         :param take_profit: Take-profit in pips
+        :param symbol: Trading symbol (default: the executor's symbol)
+        :return: The queued Order
         """
-        print(f"SELL Order: Symbol={self.symbol}, LotSize={lot_size}, SL={stop_loss}, TP={take_profit}")
+        return self._submit(Order("open", symbol or self.symbol, "sell", lot_size, stop_loss, take_profit))
 
-    def close_position(self, position_id):
+    def close_position(self, position_id, symbol=None):
         """
         Close an open position.
 
         :param position_id: ID of the position to close
+        :param symbol: Trading symbol (default: the executor's symbol)
+        :return: The queued Order
+        """
+        return self._submit(Order("close", symbol or self.symbol, position_id=position_id))
+
+    def modify_position(self, position_id, stop_loss, take_profit=None, symbol=None):
+        """
+        Move the stop-loss (and optionally the take-profit) of an open position, e.g. for a
+        trailing stop. A newer modification of the same position replaces one not sent yet.
+
+        :param position_id: ID of the position to modify
+        :param stop_loss: New stop-loss price
+        :param take_profit: New take-profit price (default: unchanged)
+        :param symbol: Trading symbol (default: the executor's symbol)
+        """
+        self.modify_positions([position_id], [stop_loss], None if take_profit is None else [take_profit],
+                              [symbol or self.symbol])
+
+    def modify_positions(self, position_ids, stop_losses, take_profits=None, symbols=None):
+        """
+        Queue the stop-loss (and optionally take-profit) changes of many positions in one go,
+        e.g. the result of TrailingStopManager.update_stop_losses. Same coalescing as modify_position.
+
+        :param position_ids: Sequence of position IDs
+        :param stop_losses: Sequence of new stop-loss prices
+        :param take_profits: Optional sequence of new take-profit prices (default: unchanged)
+        :param symbols: Optional sequence of trading symbols (default: the executor's symbol)
+        """
+        position_ids = [int(position_id) for position_id in position_ids]
+        stop_losses = [float(stop_loss) for stop_loss in stop_losses]
+        take_profits = [None] * len(position_ids) if take_profits is None else [float(tp) for tp in take_profits]
+        symbols = [self.symbol] * len(position_ids) if symbols is None else list(symbols)
+        if not position_ids:
+            return
+        with self._lock:
+            for position_id, stop_loss, take_profit, symbol in zip(position_ids, stop_losses, take_profits, symbols):
+                if position_id in self.modifications:
+                    self.stats["modifications_coalesced"] += 1
+                else:
+                    self._outstanding += 1
+                self.modifications[position_id] = {"position_id": position_id, "symbol": symbol,
+                                                   "stop_loss": stop_loss, "take_profit": take_profit}
+        self._ensure_worker()
+        self._queue.put(_WAKE)
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued order and modification has been handled.
+
+        :param timeout: Maximum number of seconds to wait
+        :return: True if nothing is outstanding
         """
-        print(f"Closing position: ID={position_id}")
+        with self._idle:
+            return self._idle.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def shutdown(self, timeout=None):
+        """
+        Handle everything still queued, then stop the worker.
+
+        Orders still waiting for a retry when the timeout expires are cancelled (their waiters
+        wake up) and modifications held back after a failure are dropped.
+
+        :param timeout: Maximum number of seconds to wait for outstanding requests
+        :return: True if nothing was left outstanding
+        """
+        flushed = self.flush(timeout)
+        if self._worker is not None:
+            self._queue.put(_STOP)
+            self._worker.join()
+            self._worker = None
+        self._cancel_outstanding()
+        return flushed
+
+    def _cancel_outstanding(self):
+        with self._lock:
+            retries, self._retries = self._retries, []
+            modifications, self.modifications = self.modifications, {}
+        for _, _, order in retries:
+            order.finish(CANCELLED, error=order.error)
+        for position_id in modifications:
+            print(f"Modification of position {position_id} dropped at shutdown")
+        if retries or modifications:
+            self._finished(len(retries) + len(modifications))
+
+    def _submit(self, order):
+        with self._lock:
+            self.orders[order.id] = order
+            self._outstanding += 1
+        self._ensure_worker()
+        self._queue.put(order)
+        return order
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, name="trade-executor", daemon=True)
+                self._worker.start()
+
+    def _finished(self, count=1):
+        with self._idle:
+            self._outstanding -= count
+            if self._outstanding == 0:
+                self._idle.notify_all()
+
+    def _work(self):
+        while True:
+            due = [self._retries[0][0]] if self._retries else []
+            if self.modifications:
+                due.append(self._modifications_due)
+            timeout = max(min(due) - time.monotonic(), 0) if due else None
+            try:
+                items = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                items = []
+            # Take everything queued meanwhile, so modifications go out in one batch
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in items:
+                if isinstance(item, Order):
+                    self._send(item)
+            now = time.monotonic()
+            while self._retries and self._retries[0][0] <= now:
+                self._send(heapq.heappop(self._retries)[2])
+            if now >= self._modifications_due:
+                self._send_modifications()
+            if _STOP in items:
+                return
+
+    def _send(self, order):
+        order.state = SUBMITTED
+        order.attempts += 1
+        self.stats["orders_sent"] += 1
+        try:
+            if order.kind == "open":
+                ticket = self.broker.send_order(order)
+            else:
+                ticket = self.broker.close_position(order)
+        except TransientBrokerError as e:
+            if order.attempts <= self.max_retries:
+                order.state = RETRYING
+                order.error = e
+                self.stats["retries"] += 1
+                delay = min(self.retry_delay * 2 ** (order.attempts - 1), self.max_retry_delay)
+                heapq.heappush(self._retries, (time.monotonic() + delay, order.id, order))
+                return
+            order.finish(REJECTED, error=e)
+        except Exception as e:
+            order.finish(REJECTED, error=e)
+        else:
+            order.finish(FILLED, ticket=ticket)
+        self._finished()
+
+    def _send_modifications(self):
+        with self._lock:
+            batch = list(self.modifications.values())
+            self.modifications = {}
+        if not batch:
+            return
+
+        try:
+            results = self.broker.modify_positions(batch)
+        except Exception as e:
+            results = [e] * len(batch)
+        self.stats["modification_batches"] += 1
+        self.stats["modifications_sent"] += len(batch)
+
+        done = 0
+        failed = False
+        with self._lock:
+            for modification, result in zip(batch, results):
+                position_id = modification["position_id"]
+                retry = isinstance(result, TransientBrokerError) and self._modification_failures < self.max_retries
+                failed = failed or isinstance(result, TransientBrokerError)
+                if retry and position_id not in self.modifications:
+                    # Send it again with a later batch, unless newer values arrived meanwhile
+                    self.modifications[position_id] = modification
+                    continue
+                if result is not None:
+                    print(f"Failed to modify position {position_id}: {result}")
+                done += 1
+
+        if failed and self._modification_failures < self.max_retries:
+            self._modification_failures += 1
+            delay = min(self.retry_delay * 2 ** (self._modification_failures - 1), self.max_retry_delay)
+            self._modifications_due = time.monotonic() + delay
+        else:
+            self._modification_failures = 0
+            self._modifications_due = 0.0
+        self._finished(done)
@@ -1,17 +1,22 @@
+import numpy as np
+
+
 class TrailingStopManager:
     """
     Dynamically manages trailing stops for active positions.
     """
 
-    def __init__(self, atr_multiplier):
+    def __init__(self, atr_multiplier, min_step=0.0):
         """
         Initialize the trailing stop manager.
 
         :param atr_multiplier: Multiplier for ATR-based trailing stop
+        :param min_step: Smallest stop-loss move worth sending to the broker, in price units
         """
         self.atr_multiplier = atr_multiplier
+        self.min_step = min_step
 
-    def update_stop_loss(self, position_id, current_price, atr_value, is_buy):
+    def update_stop_loss(self, position_id, current_price, atr_value, is_buy, current_stop_loss=None):
         """
         Update the stop-loss for an active position.
 
@@ -19,11 +24,37 @@ class TrailingStopManager:
         :param current_price: Current market price
         :param atr_value: ATR value for volatility
         :param is_buy: Whether the position is a buy order
+        :param current_stop_loss: Optional current stop-loss; the new one is never looser
         :return: New stop-loss price
         """
         trailing_distance = self.atr_multiplier * atr_value
         new_stop_loss = (
             current_price - trailing_distance if is_buy else current_price + trailing_distance
         )
-        print(f"Updated Stop-Loss for Position {position_id}: {new_stop_loss}")
+        if current_stop_loss is not None:
+            new_stop_loss = max(new_stop_loss, current_stop_loss) if is_buy else min(new_stop_loss, current_stop_loss)
         return new_stop_loss
+
+    def update_stop_losses(self, position_ids, current_prices, atr_values, directions, current_stop_losses):
+        """
+        Trail the stop-losses of many positions at once.
+
+        A stop only ever moves in the position's favour (up for buys, down for sells), and only
+        moves of at least min_step are reported, so the result can be sent to the broker as is.
+
+        :param position_ids: Numpy array of position IDs
+        :param current_prices: Numpy array of current market prices
+        :param atr_values: Numpy array of ATR values
+        :param directions: Numpy array with 1 for buys and -1 for sells
+        :param current_stop_losses: Numpy array of current stop-losses (NaN where a position has none)
+        :return: Tuple of numpy arrays (IDs of the positions whose stop changed, their new stop-losses)
+        """
+        directions = np.asarray(directions, dtype=float)
+        current_stop_losses = np.asarray(current_stop_losses, dtype=float)
+        candidates = np.asarray(current_prices, dtype=float) - directions * self.atr_multiplier * np.asarray(
+            atr_values, dtype=float)
+        # Positive when the candidate is tighter than the current stop, for buys and sells alike
+        improvement = directions * (candidates - current_stop_losses)
+        changed = np.isnan(current_stop_losses) | (improvement > 0) & (improvement >= self.min_step)
+        changed &= ~np.isnan(candidates)
+        return np.asarray(position_ids)[changed], candidates[changed]
@@ -1,18 +1,26 @@
 from models.ml_model import MLModel
+from indicators.features import DEFAULT_FEATURES
+from utils.feature_store import FeatureStore
 import pandas as pd
 
+# Market of training_data.csv, used to key its features in the feature store
+SYMBOL, TIMEFRAME = "EURUSD", "1d"
+
 def main():
     # Load historical data
     try:
         data = pd.read_csv("training_data.csv")  # Replace with your data file
+        # Recompute the indicator columns from the shared feature definitions, as backtests and live trading do
+        data = FeatureStore().with_features(SYMBOL, TIMEFRAME, data).dropna(subset=list(DEFAULT_FEATURES))
         if len(data) < 50:  # Minimum threshold
             raise ValueError("Insufficient data for training. Please collect more data.")
         ml_model = MLModel()
-        ml_model.train(data)
+        ml_model.train(data[[*DEFAULT_FEATURES, "target"]])  # Only the features backtests and live trading compute
 
         # Save the model
         ml_model.model.feature_names_in_ = ml_model.feature_names  # Attach feature names to the model
         ml_model.save_model("models/ml_model.pkl")
+        ml_model.export_compiled("models/ml_model.npz")
         print("Model training and saving completed successfully.")
     except Exception as e:
         print("Error during training:", str(e))
@@ -7,20 +7,28 @@ class HistoricalDataCleaner:
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def clean_file(self, file_path):
-        try:
-            print(f"Cleaning file: {file_path}...")
-            df = pd.read_csv(file_path)
+    @staticmethod
+    def clean_frame(df):
+        """
+        Normalize the columns of raw MT5 data and drop unusable rows.
+
+        :param df: DataFrame (or chunk) of raw rows
+        :return: DataFrame with a parsed date column and no missing dates or prices
+        """
+        # Ensure proper column names
+        expected_columns = {"time": "date", "open": "open", "high": "high", "low": "low", "close": "close"}
+        df = df.rename(columns=expected_columns)
 
-            # Ensure proper column names
-            expected_columns = {"time": "date", "open": "open", "high": "high", "low": "low", "close": "close"}
-            df.rename(columns=expected_columns, inplace=True)
+        # Parse the date column
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
 
-            # Parse the date column
-            df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        # Drop rows with missing dates or prices
+        return df.dropna(subset=["date", "open", "high", "low", "close"])
 
-            # Drop rows with missing dates or prices
-            df.dropna(subset=["date", "open", "high", "low", "close"], inplace=True)
+    def clean_file(self, file_path):
+        try:
+            print(f"Cleaning file: {file_path}...")
+            df = self.clean_frame(pd.read_csv(file_path))
 
             # Sort by date
             df.sort_values(by="date", inplace=True)
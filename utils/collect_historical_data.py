@@ -1,6 +1,17 @@
-import MetaTrader5 as mt5
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from datetime import datetime, timedelta
+from utils.market_data_store import MarketDataStore
+from utils.lazy import lazy_import
+
+mt5 = lazy_import("MetaTrader5")
+
+# Maximum number of series synced at the same time
+MAX_CONCURRENCY = 4
+
+# The MT5 terminal API is not thread-safe, so only one thread talks to it at a time
+_mt5_lock = threading.Lock()
 
 def initialize_mt5():
     """
@@ -25,13 +36,16 @@ def fetch_mt5_data(symbol, timeframe, start_date, end_date):
     Returns:
         pd.DataFrame: Historical data as a Pandas DataFrame.
     """
-    rates = mt5.copy_rates_range(symbol, timeframe, start_date, end_date)
-    if rates is None:
-        print(f"Failed to fetch data for {symbol}: {mt5.last_error()}")
-        return None
+    with _mt5_lock:
+        rates = mt5.copy_rates_range(symbol, timeframe, start_date, end_date)
+        if rates is None:
+            print(f"Failed to fetch data for {symbol}: {mt5.last_error()}")
+            return None
 
     # Convert to DataFrame
     df = pd.DataFrame(rates)
+    if df.empty:
+        return df
     df['time'] = pd.to_datetime(df['time'], unit='s')  # Convert UNIX time to datetime
     return df
 
@@ -49,7 +63,68 @@ def save_data_to_csv(data, symbol, timeframe_label, output_dir="data"):
     data.to_csv(file_path, index=False)
     print(f"Data saved to {file_path}")
 
-def main():
+def sync_series(store, symbol, timeframe_label, timeframe_const, start_date, end_date):
+    """
+    Bring one stored series up to date.
+
+    Only bars from the last stored timestamp onwards are fetched; the last stored bar is
+    fetched again because it may still have been forming, and the store replaces it.
+
+    Args:
+        store (MarketDataStore): Store holding the series.
+        symbol (str): Trading symbol.
+        timeframe_label (str): Timeframe label (e.g., '1h', '4h').
+        timeframe_const (int): MT5 timeframe constant.
+        start_date (datetime): Start date used when the series is not stored yet.
+        end_date (datetime): End date for historical data.
+
+    Returns:
+        int: Number of bars that were not stored before.
+    """
+    last_timestamp = store.last_timestamp(symbol, timeframe_label)
+    # Bar times are stored as naive UTC; MT5 reads timezone-aware datetimes as such
+    fetch_from = last_timestamp.tz_localize("UTC").to_pydatetime() if last_timestamp is not None else start_date
+    print(f"Fetching {symbol} ({timeframe_label}) from {fetch_from}...")
+
+    data = fetch_mt5_data(symbol, timeframe_const, fetch_from, end_date)
+    if data is None or data.empty:
+        return 0
+    new_bars = store.append(symbol, timeframe_label, data, time_column="time")
+    print(f"{symbol} ({timeframe_label}): {new_bars} new bars")
+    return new_bars
+
+def sync_all(store, symbols, timeframes, start_date, end_date, max_concurrency=MAX_CONCURRENCY):
+    """
+    Sync every symbol/timeframe series concurrently.
+
+    Args:
+        store (MarketDataStore): Store holding the series.
+        symbols (list): Trading symbols.
+        timeframes (dict): Timeframe labels mapped to MT5 timeframe constants.
+        start_date (datetime): Start date used for series that are not stored yet.
+        end_date (datetime): End date for historical data.
+        max_concurrency (int): Maximum number of series synced at the same time.
+
+    Returns:
+        dict: Number of new bars for each (symbol, timeframe label).
+    """
+    jobs = [(symbol, label, const) for symbol in symbols for label, const in timeframes.items()]
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        futures = {
+            (symbol, label): executor.submit(sync_series, store, symbol, label, const, start_date, end_date)
+            for symbol, label, const in jobs
+        }
+
+    results = {}
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            print(f"Error syncing {key[0]} ({key[1]}): {e}")
+            results[key] = 0
+    return results
+
+def main(store_dir="store", max_concurrency=MAX_CONCURRENCY):
     # Initialize MT5
     if not initialize_mt5():
         return
@@ -61,16 +136,11 @@ def main():
         "4h": mt5.TIMEFRAME_H4,
         "1d": mt5.TIMEFRAME_D1
     }
-    start_date = datetime.now() - timedelta(days=3650)  # 1 year of data
+    start_date = datetime.now() - timedelta(days=3650)  # 10 years of data for series not stored yet
     end_date = datetime.now()
 
-    # Fetch and save data
-    for symbol in symbols:
-        for timeframe_label, timeframe_const in timeframes.items():
-            print(f"Fetching {symbol} ({timeframe_label})...")
-            data = fetch_mt5_data(symbol, timeframe_const, start_date, end_date)
-            if data is not None:
-                save_data_to_csv(data, symbol, timeframe_label)
+    # Fetch only the bars that are missing from the store
+    sync_all(MarketDataStore(store_dir), symbols, timeframes, start_date, end_date, max_concurrency)
 
     # Shutdown MT5
     mt5.shutdown()
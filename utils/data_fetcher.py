@@ -1,5 +1,8 @@
-import MetaTrader5 as mt5
 import pandas as pd
+from live.latency import span
+from utils.lazy import lazy_import
+
+mt5 = lazy_import("MetaTrader5")
 
 
 class DataFetcher:
@@ -8,7 +11,7 @@ class DataFetcher:
     """
 
     @staticmethod
-    def fetch_data(symbol, num_candles=100, timeframe=mt5.TIMEFRAME_M1):
+    def fetch_data(symbol, num_candles=100, timeframe=None):
         """
         Fetch historical data from MetaTrader 5.
         :param symbol: Trading symbol (e.g., "EURUSD")
@@ -16,10 +19,13 @@ class DataFetcher:
         :param timeframe: Timeframe for historical data (default: M1)
         :return: DataFrame with market data
         """
-        rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, num_candles)
+        timeframe = mt5.TIMEFRAME_M1 if timeframe is None else timeframe
+        with span("mt5_fetch"):
+            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, num_candles)
         if rates is None or len(rates) == 0:
             raise ValueError(f"Failed to fetch data for {symbol}")
 
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
+        with span("dataframe"):
+            df = pd.DataFrame(rates)
+            df['time'] = pd.to_datetime(df['time'], unit='s')
         return df
@@ -0,0 +1,347 @@
+import logging
+import os
+import pandas as pd
+from utils.clean_historical_data import HistoricalDataCleaner
+
+logger = logging.getLogger(__name__)
+
+# Rows read from a CSV file at a time
+DEFAULT_CHUNKSIZE = 100_000
+
+# Trailing rows SortDedupeStage keeps back for the next chunk; covers the local disorder of MT5 exports
+DEFAULT_HOLDBACK = 1_000
+
+
+class OutOfOrderError(ValueError):
+    """
+    A row is dated at or before a row a streaming stage already passed on, so it cannot be put in place.
+    """
+
+
+def rolling_rsi(prices, period):
+    """
+    RSI with simple rolling means of the gains and losses, as used for the prepared datasets.
+
+    :param prices: Pandas Series of close prices
+    :param period: Number of price changes averaged
+    :return: Pandas Series of RSI values (NaN for the first period rows)
+    """
+    delta = prices.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+class CleanStage:
+    """
+    Normalizes column names, parses dates and drops rows with missing dates or prices.
+    """
+
+    def process(self, chunk):
+        return HistoricalDataCleaner.clean_frame(chunk)
+
+    def flush(self):
+        return None
+
+    def reset(self):
+        pass
+
+
+class SortDedupeStage:
+    """
+    Orders rows by date and removes duplicated dates (the last occurrence wins).
+
+    Input is expected in roughly chronological order, as exported by MT5: the last `holdback`
+    rows of every chunk are held back and merged with the next chunk, so local disorder and
+    duplicates across a chunk boundary are resolved. A row dated at or before a row that was
+    already emitted cannot be put in place any more; it raises OutOfOrderError rather than being
+    dropped (Pipeline.run_csv then sorts the whole file instead).
+    """
+
+    def __init__(self, holdback=DEFAULT_HOLDBACK):
+        """
+        :param holdback: Number of trailing rows kept back for the next chunk
+        """
+        self.holdback = holdback
+        self.reset()
+
+    def process(self, chunk):
+        if self.pending is not None:
+            chunk = pd.concat([self.pending, chunk], ignore_index=True)
+        chunk = chunk.sort_values("date", kind="stable").drop_duplicates(subset="date", keep="last")
+        if self.last_emitted is not None:
+            late = chunk["date"] <= self.last_emitted
+            if late.any():
+                raise OutOfOrderError(f"{int(late.sum())} rows dated at or before {self.last_emitted}, which was "
+                                      f"already written (first: {chunk['date'][late].iloc[0]})")
+
+        split = max(len(chunk) - self.holdback, 0)
+        self.pending = chunk.iloc[split:]
+        ready = chunk.iloc[:split].reset_index(drop=True)
+        if len(ready):
+            self.last_emitted = ready["date"].iloc[-1]
+        return ready
+
+    def flush(self):
+        pending, self.pending = self.pending, None
+        if pending is not None and len(pending):
+            self.last_emitted = pending["date"].iloc[-1]
+            return pending.reset_index(drop=True)
+        return None
+
+    def reset(self):
+        self.pending = None
+        self.last_emitted = None
+
+
+class IndicatorStage:
+    """
+    Adds the RSI and EMA columns of the prepared datasets.
+
+    The last closes and the last EMA value are carried from chunk to chunk, so the columns
+    match the ones computed over the whole file at once.
+    """
+
+    def __init__(self, rsi_period=14, ema_period=14):
+        """
+        :param rsi_period: Period of the rolling RSI
+        :param ema_period: Span of the EMA
+        """
+        self.rsi_period = rsi_period
+        self.ema_period = ema_period
+        self.reset()
+
+    def process(self, chunk):
+        if chunk.empty:
+            return chunk.assign(RSI=pd.Series(dtype=float), EMA=pd.Series(dtype=float))
+        chunk = chunk.copy()
+        closes = chunk["close"].reset_index(drop=True)
+
+        history = closes if self.closes is None else pd.concat([self.closes, closes], ignore_index=True)
+        chunk["RSI"] = rolling_rsi(history, self.rsi_period).iloc[len(history) - len(closes):].to_numpy()
+
+        # Seeding the recursion with the previous EMA continues it exactly where the last chunk stopped
+        seeded = closes if self.ema is None else pd.concat([pd.Series([self.ema]), closes], ignore_index=True)
+        ema = seeded.ewm(span=self.ema_period, adjust=False).mean()
+        chunk["EMA"] = ema.iloc[len(seeded) - len(closes):].to_numpy()
+
+        self.closes = history.iloc[-self.rsi_period:].reset_index(drop=True)
+        self.ema = float(chunk["EMA"].iloc[-1])
+        return chunk
+
+    def flush(self):
+        return None
+
+    def reset(self):
+        self.closes = None
+        self.ema = None
+
+
+class FeatureStage:
+    """
+    Adds derived feature columns computed from a window of rows.
+
+    Every feature function receives the chunk with the last `lookback` rows of the previous
+    chunk prepended, so rolling features are continuous across chunk boundaries.
+    """
+
+    def __init__(self, features, lookback=0):
+        """
+        :param features: Dictionary mapping column names to functions of a DataFrame returning a Series
+        :param lookback: Number of previous rows the feature functions need
+        """
+        self.features = features
+        self.lookback = lookback
+        self.reset()
+
+    def process(self, chunk):
+        if chunk.empty:
+            return chunk
+        window = chunk if self.tail is None else pd.concat([self.tail, chunk], ignore_index=True)
+        window = window.reset_index(drop=True)
+        offset = len(window) - len(chunk)
+
+        chunk = chunk.copy()
+        for name, feature in self.features.items():
+            chunk[name] = feature(window).iloc[offset:].to_numpy()
+        if self.lookback:
+            self.tail = window.iloc[-self.lookback:].drop(columns=list(self.features), errors="ignore")
+        return chunk
+
+    def flush(self):
+        return None
+
+    def reset(self):
+        self.tail = None
+
+
+class CsvSink:
+    """
+    Writes the chunks to one CSV file, header first.
+
+    Rows go to a temporary file next to the target, which replaces the target only when the
+    pipeline completes, so a failed run never leaves a partial file at its final path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = f"{path}.tmp-{os.getpid()}"
+        self.rows = 0
+        self.file = None
+
+    def write(self, chunk):
+        if self.file is None:
+            self.file = open(self.temp_path, "w", newline="")
+            chunk.to_csv(self.file, index=False)
+        elif len(chunk):
+            chunk.to_csv(self.file, index=False, header=False)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            os.replace(self.temp_path, self.path)
+            logger.info("Prepared data saved to %s", self.path)
+
+    def abort(self):
+        self.rows = 0
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class StoreSink:
+    """
+    Streams the chunks into a new version of a MarketDataStore dataset, published when the pipeline completes.
+    """
+
+    def __init__(self, store, symbol, timeframe):
+        self.store = store
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.writer = None
+
+    def write(self, chunk):
+        if self.writer is None:
+            self.writer = self.store.writer(self.symbol, self.timeframe, "date")
+        self.writer.write(chunk)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.commit()
+            self.writer = None
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
+
+
+class FrameSink:
+    """
+    Collects the chunks into a single DataFrame (see the frame attribute).
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.frame = None
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+
+    def close(self):
+        self.frame = pd.concat(self.chunks, ignore_index=True) if self.chunks else pd.DataFrame()
+        self.chunks = []
+
+    def abort(self):
+        self.chunks = []
+
+
+class Pipeline:
+    """
+    Streams chunks of rows through a sequence of stages into one or more sinks.
+
+    A stage has process(chunk) returning the transformed chunk, flush() returning the rows it
+    still holds (or None) once the input ends, and reset() to start over. A sink has write(chunk),
+    close() to commit what it received once every row went through, and abort() to discard it
+    when the run fails (it can be written to again afterwards).
+    """
+
+    def __init__(self, stages, sinks):
+        self.stages = list(stages)
+        self.sinks = list(sinks)
+
+    def run(self, chunks):
+        """
+        Process every chunk, then flush the stages and close the sinks. If anything fails,
+        the sinks that were not closed yet are aborted instead and the error is raised.
+
+        :param chunks: Iterable of DataFrames
+        :return: Number of rows written
+        """
+        rows = 0
+        closed = 0
+        try:
+            for chunk in chunks:
+                rows += self._emit(self._apply(chunk, 0))
+            for position, stage in enumerate(self.stages):
+                remainder = stage.flush()
+                if remainder is not None:
+                    rows += self._emit(self._apply(remainder, position + 1))
+            for sink in self.sinks:
+                sink.close()
+                closed += 1
+        except BaseException:
+            for sink in self.sinks[closed:]:
+                sink.abort()
+            raise
+        return rows
+
+    def run_csv(self, file_path, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Stream a CSV file through the pipeline, reading chunksize rows at a time.
+
+        If the file is too far out of order to be sorted while streaming (OutOfOrderError), the
+        aborted run is started over with the whole file read at once, as one sorted chunk.
+        """
+        try:
+            return self.run(pd.read_csv(file_path, chunksize=chunksize))
+        except OutOfOrderError as e:
+            logger.warning("%s is out of order (%s); sorting the whole file instead", file_path, e)
+        self.reset()
+        return self.run([pd.read_csv(file_path)])
+
+    def reset(self):
+        """
+        Clear the state the stages carry from chunk to chunk.
+        """
+        for stage in self.stages:
+            stage.reset()
+
+    def _apply(self, chunk, first_stage):
+        for stage in self.stages[first_stage:]:
+            chunk = stage.process(chunk)
+        return chunk
+
+    def _emit(self, chunk):
+        for sink in self.sinks:
+            sink.write(chunk)
+        return len(chunk)
+
+
+def preparation_pipeline(sinks, features=None, lookback=0):
+    """
+    Build the clean -> sort/dedupe -> indicators (-> features) pipeline of the prepared datasets.
+
+    :param sinks: Sinks receiving the prepared rows
+    :param features: Optional dictionary of extra feature columns (see FeatureStage)
+    :param lookback: Number of previous rows the feature functions need
+    """
+    stages = [CleanStage(), SortDedupeStage(), IndicatorStage()]
+    if features:
+        stages.append(FeatureStage(features, lookback))
+    return Pipeline(stages, sinks)
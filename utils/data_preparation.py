@@ -1,45 +1,73 @@
 import os
-import pandas as pd
-from utils.clean_historical_data import HistoricalDataCleaner
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from utils.data_pipeline import DEFAULT_CHUNKSIZE, CsvSink, StoreSink, preparation_pipeline, rolling_rsi
+
+
+def _prepare_file(output_dir, store, chunksize, file_path):
+    """
+    Prepare one raw CSV file in a single streaming pass (module level so worker processes can run it).
+
+    :return: Number of prepared rows, or None if the file could not be prepared
+    """
+    try:
+        print(f"Preparing {file_path}...")
+        file_name = os.path.basename(file_path)
+        sinks = [CsvSink(os.path.join(output_dir, file_name))]
+        if store is not None:
+            symbol, timeframe = os.path.splitext(file_name)[0].rsplit("_", 1)
+            sinks.append(StoreSink(store, symbol, timeframe))
+        return preparation_pipeline(sinks).run_csv(file_path, chunksize)
+    except Exception as e:
+        print(f"Error preparing {file_path}: {e}")
+        return None
+
 
 class DataPreparer:
-    def __init__(self, input_dir, output_dir):
+    def __init__(self, input_dir, output_dir, store=None, chunksize=DEFAULT_CHUNKSIZE, max_workers=None):
+        """
+        :param input_dir: Directory with the raw CSV files
+        :param output_dir: Directory for the prepared CSV files
+        :param store: Optional MarketDataStore that also receives every prepared dataset
+        :param chunksize: Number of rows read at a time
+        :param max_workers: Number of worker processes for prepare_all (default: one per CPU; 1 runs in-process)
+        """
         self.input_dir = input_dir
         self.output_dir = output_dir
+        self.store = store
+        self.chunksize = chunksize
+        self.max_workers = max_workers or os.cpu_count() or 1
         os.makedirs(output_dir, exist_ok=True)
 
     def clean_and_prepare(self, file_path):
-        try:
-            # Step 1: Clean the data
-            cleaner = HistoricalDataCleaner(input_dir=self.input_dir, output_dir="cleaned_temp")
-            cleaner.clean_file(file_path)
-            cleaned_file = os.path.join("cleaned_temp", os.path.basename(file_path))
-            cleaned_data = pd.read_csv(cleaned_file)
-
-            # Step 2: Calculate indicators
-            print(f"Calculating indicators for {file_path}...")
-            cleaned_data["RSI"] = self.calculate_rsi(cleaned_data["close"], period=14)
-            cleaned_data["EMA"] = cleaned_data["close"].ewm(span=14, adjust=False).mean()
-
-            # Save the prepared data
-            output_file = os.path.join(self.output_dir, os.path.basename(file_path))
-            cleaned_data.to_csv(output_file, index=False)
-            print(f"Prepared data saved to {output_file}")
-        except Exception as e:
-            print(f"Error preparing {file_path}: {e}")
+        """
+        Clean, sort, de-duplicate and add indicators to one file, streaming it chunk by chunk
+        straight into the prepared CSV (and the store), without intermediate files.
+
+        :return: Number of prepared rows, or None if the file could not be prepared
+        """
+        return _prepare_file(self.output_dir, self.store, self.chunksize, file_path)
 
     def calculate_rsi(self, prices, period):
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+        return rolling_rsi(prices, period)
 
     def prepare_all(self):
-        for file_name in os.listdir(self.input_dir):
-            file_path = os.path.join(self.input_dir, file_name)
-            print(f"Preparing {file_path}...")
-            self.clean_and_prepare(file_path)
+        """
+        Prepare every CSV file of the input directory, several files at a time.
+
+        :return: Dictionary mapping file paths to their number of prepared rows (None on failure)
+        """
+        file_paths = [
+            os.path.join(self.input_dir, file_name) for file_name in sorted(os.listdir(self.input_dir))
+            if file_name.endswith(".csv") and os.path.isfile(os.path.join(self.input_dir, file_name))
+        ]
+        prepare = partial(_prepare_file, self.output_dir, self.store, self.chunksize)
+        if self.max_workers == 1 or len(file_paths) <= 1:
+            results = [prepare(file_path) for file_path in file_paths]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(file_paths))) as executor:
+                results = list(executor.map(prepare, file_paths))
+        return dict(zip(file_paths, results))
 
 if __name__ == "__main__":
     input_dir = "data"
@@ -0,0 +1,287 @@
+import json
+import logging
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from indicators.features import (DEFAULT_FEATURES, FEATURES_VERSION, compute_features, create_feature_streams,
+                                 feature_vector, features_hash)
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureStore:
+    """
+    Cache of materialized feature matrices, one per symbol/timeframe/feature definitions.
+
+    A matrix starts at the earliest bar it was given and lives in a directory named after the hash
+    of its feature definitions and version, holding an index.json with the row count, the covered
+    date range, the last bar and the state of the streaming indicators after it, and naming the
+    generation subdirectory that holds one raw float64 file per column and the bar times.
+    When new bars arrive the matrix is extended from that state, appending only the new rows,
+    so training, backtests and live trading read the same values without recomputing history.
+    Any date range inside the stored one is served from it; a range starting earlier rebuilds the
+    matrix. Bars already materialized are assumed not to change; pass rebuild=True after editing them.
+
+    A rebuild goes to a new generation and then replaces index.json in one atomic step, like
+    MarketDataStore, so readers always find a complete matrix.
+    """
+
+    INDEX_FILE = "index.json"
+    TIME_FILE = "date.bin"
+
+    def __init__(self, root="features"):
+        """
+        :param root: Directory holding the feature matrices
+        """
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, symbol, timeframe, features=None, version=FEATURES_VERSION):
+        return os.path.join(self.root, f"{symbol}_{timeframe}", features_hash(features, version))
+
+    def info(self, symbol, timeframe, features=None, version=FEATURES_VERSION):
+        """
+        Read the index of a feature matrix.
+
+        :return: Dictionary with columns, rows, start, end, last_bar and streams, or None if not materialized
+        """
+        index_path = os.path.join(self.path(symbol, timeframe, features, version), self.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path, "r") as file:
+            return json.load(file)
+
+    def materialize(self, symbol, timeframe, data, features=None, version=FEATURES_VERSION, rebuild=False):
+        """
+        Make sure the feature matrix covers every bar of data, computing only what is missing.
+
+        :param symbol: Trading symbol (e.g., "EURUSD")
+        :param timeframe: Timeframe label (e.g., "1h")
+        :param data: Date-sorted DataFrame with a date (or time) column and high, low and close columns
+        :param features: Dictionary of feature definitions (default: DEFAULT_FEATURES)
+        :param version: Calculation version (see indicators.features.FEATURES_VERSION)
+        :param rebuild: Recompute the whole matrix even if a cached one matches
+        :return: Number of rows that were computed (0 when the cache already covered data)
+        """
+        times, highs, lows, closes = self._price_arrays(data)
+        index = None if rebuild else self.info(symbol, timeframe, features, version)
+        covered = None if index is None else self._covered(symbol, timeframe, index, features, version,
+                                                            times, highs, lows, closes)
+        if covered is None:
+            self._write(symbol, timeframe, times, highs, lows, closes, features, version)
+            return len(times)
+        if covered == len(times):
+            return 0
+        return len(self.extend(symbol, timeframe, times[covered:], highs[covered:], lows[covered:],
+                               closes[covered:], features, version))
+
+    def materialize_from_store(self, market_store, symbol, timeframe, features=None, version=FEATURES_VERSION):
+        """
+        Materialize the features of a MarketDataStore dataset.
+
+        :return: Number of rows that were computed
+        """
+        arrays = market_store.read_arrays(symbol, timeframe, columns=["high", "low", "close"])
+        time_column = market_store.info(symbol, timeframe)["time_column"]
+        data = pd.DataFrame({"date": arrays[time_column], "high": arrays["high"], "low": arrays["low"],
+                             "close": arrays["close"]})
+        return self.materialize(symbol, timeframe, data, features, version)
+
+    def with_features(self, symbol, timeframe, data, features=None, version=FEATURES_VERSION):
+        """
+        Materialize the features of data and return a copy of it with the feature columns from the store.
+
+        Existing columns with the same names (e.g. indicators precomputed by another tool) are replaced,
+        so models are trained on exactly the values backtests and live trading read.
+
+        :return: DataFrame with the rows of data and one column per feature
+        """
+        self.materialize(symbol, timeframe, data, features, version)
+        times = self._price_arrays(data)[0]
+        stored = self.read_arrays(symbol, timeframe, features, version)
+        rows = np.searchsorted(stored["date"], times)
+        data = data.copy()
+        for name, values in stored.items():
+            if name != "date":
+                data[name] = np.asarray(values)[rows]
+        return data
+
+    def extend(self, symbol, timeframe, times, highs, lows, closes, features=None, version=FEATURES_VERSION):
+        """
+        Append the features of new bars, continuing the streaming indicators from the last stored bar.
+
+        Bars at or before the stored end are skipped, so a live loop can pass every closed bar.
+
+        :param times: Bar times (anything pd.to_datetime accepts)
+        :param highs: High prices of the bars
+        :param lows: Low prices of the bars
+        :param closes: Close prices of the bars
+        :return: Numpy array (new rows x features) of the appended feature rows
+        """
+        features = DEFAULT_FEATURES if features is None else features
+        index = self.info(symbol, timeframe, features, version)
+        if index is None:
+            raise ValueError(f"No features materialized for {symbol} {timeframe}; call materialize() first")
+
+        times = pd.to_datetime(np.asarray(times)).to_numpy(dtype="datetime64[ns]")
+        highs, lows, closes = (np.asarray(values, dtype=float) for values in (highs, lows, closes))
+        if index["end"] is not None:
+            new = times > np.datetime64(pd.Timestamp(index["end"]))
+            times, highs, lows, closes = times[new], highs[new], lows[new], closes[new]
+        if len(times) == 0:
+            return np.empty((0, len(features)))
+
+        streams = create_feature_streams(features)
+        for key, stream in streams.items():
+            stream.restore(index["streams"][key])
+        rows = []
+        for high, low, close in zip(highs.tolist(), lows.tolist(), closes.tolist()):
+            for stream in streams.values():
+                stream.update(high, low, close)
+            rows.append(feature_vector(streams, features))
+        matrix = np.array(rows, dtype=float)
+
+        directory = self._directory(self.path(symbol, timeframe, features, version), index)
+        self._append(directory, self.TIME_FILE, times.astype(np.int64), index["rows"])
+        for position, name in enumerate(index["columns"]):
+            self._append(directory, f"{name}.bin", matrix[:, position], index["rows"])
+
+        index.update(rows=index["rows"] + len(times), end=pd.Timestamp(times[-1]).isoformat(),
+                     last_bar=[highs[-1].item(), lows[-1].item(), closes[-1].item()],
+                     streams={key: stream.snapshot() for key, stream in streams.items()})
+        if index["start"] is None:
+            index["start"] = pd.Timestamp(times[0]).isoformat()
+        self._write_index(self.path(symbol, timeframe, features, version), index)
+        return matrix
+
+    def read_arrays(self, symbol, timeframe, features=None, version=FEATURES_VERSION, start=None, end=None):
+        """
+        Read a feature matrix as memory-mapped numpy arrays, without copying.
+
+        :param start: First timestamp to include (inclusive)
+        :param end: Last timestamp to include (inclusive)
+        :return: Dictionary with a 'date' array followed by one array per feature column
+        """
+        index = self.info(symbol, timeframe, features, version)
+        if index is None:
+            raise ValueError(f"No features materialized for {symbol} {timeframe}")
+        directory = self._directory(self.path(symbol, timeframe, features, version), index)
+        times = self._load(directory, self.TIME_FILE, np.int64, index["rows"]).view("datetime64[ns]")
+        first = 0 if start is None else int(np.searchsorted(times, np.datetime64(pd.Timestamp(start)), side="left"))
+        last = len(times) if end is None else int(np.searchsorted(times, np.datetime64(pd.Timestamp(end)), side="right"))
+
+        arrays = {"date": times[first:last]}
+        for name in index["columns"]:
+            arrays[name] = self._load(directory, f"{name}.bin", np.float64, index["rows"])[first:last]
+        return arrays
+
+    def read(self, symbol, timeframe, features=None, version=FEATURES_VERSION, start=None, end=None):
+        """
+        Read a feature matrix (or a date range of it) as a DataFrame with a date column.
+        """
+        arrays = self.read_arrays(symbol, timeframe, features, version, start, end)
+        return pd.DataFrame({column: np.array(values) for column, values in arrays.items()})
+
+    def _write(self, symbol, timeframe, times, highs, lows, closes, features, version):
+        features = DEFAULT_FEATURES if features is None else features
+        columns = compute_features(highs, lows, closes, features)
+        streams = create_feature_streams(features)
+        for stream in streams.values():
+            stream.warm_up(highs, lows, closes)
+
+        target = self.path(symbol, timeframe, features, version)
+        os.makedirs(target, exist_ok=True)
+        current = self.info(symbol, timeframe, features, version)
+        generation = current.get("generation", 0) + 1 if current is not None else 1
+        directory = os.path.join(target, str(generation))
+        shutil.rmtree(directory, ignore_errors=True)  # Left over by an interrupted write
+        os.makedirs(directory)
+        times.astype(np.int64).tofile(os.path.join(directory, self.TIME_FILE))
+        for name, values in columns.items():
+            values.astype(np.float64).tofile(os.path.join(directory, f"{name}.bin"))
+
+        index = {
+            "generation": generation,
+            "features": {name: list(definition) for name, definition in features.items()},
+            "version": version,
+            "columns": list(columns),
+            "rows": len(times),
+            "start": pd.Timestamp(times[0]).isoformat() if len(times) else None,
+            "end": pd.Timestamp(times[-1]).isoformat() if len(times) else None,
+            "last_bar": [highs[-1].item(), lows[-1].item(), closes[-1].item()] if len(times) else None,
+            "streams": {key: stream.snapshot() for key, stream in streams.items()},
+        }
+        # Publishing the index switches readers to the new generation in one step
+        self._write_index(target, index)
+        self._remove_stale_generations(target, generation)
+        logger.info("Features saved to %s (%d rows)", directory, len(times))
+
+    def _covered(self, symbol, timeframe, index, features, version, times, highs, lows, closes):
+        """
+        Number of leading bars of the prices that the stored matrix already covers.
+
+        :return: The number of bars, or None if the stored matrix does not hold the same history
+        """
+        if index["rows"] == 0:
+            return 0
+        stored = self.read_arrays(symbol, timeframe, features, version)["date"]
+        if len(times) == 0 or times[0] < stored[0]:
+            return None
+        first = int(np.searchsorted(stored, times[0]))
+        covered = min(len(times), len(stored) - first)
+        if covered == 0 or not np.array_equal(stored[first:first + covered], times[:covered]):
+            return None
+        if covered < len(times):
+            # New bars continue from the stored state, which is only valid if the last stored bar is the same
+            last = covered - 1
+            if [highs[last].item(), lows[last].item(), closes[last].item()] != index["last_bar"]:
+                return None
+        return covered
+
+    @staticmethod
+    def _directory(target, index):
+        # Matrices written before generations existed keep their columns next to index.json
+        return os.path.join(target, str(index["generation"])) if "generation" in index else target
+
+    def _write_index(self, target, index):
+        staging = os.path.join(target, f"{self.INDEX_FILE}.tmp-{os.getpid()}")
+        with open(staging, "w") as file:
+            json.dump(index, file, indent=2)
+        os.replace(staging, os.path.join(target, self.INDEX_FILE))
+
+    @staticmethod
+    def _remove_stale_generations(target, generation):
+        """
+        Delete every generation but the current and the previous one (and columns of the old flat layout).
+        """
+        for name in os.listdir(target):
+            path = os.path.join(target, name)
+            if name.isdigit() and int(name) < generation - 1:
+                shutil.rmtree(path, ignore_errors=True)
+            elif name.endswith(".bin"):
+                os.remove(path)
+
+    @staticmethod
+    def _append(directory, file_name, values, rows):
+        # Drop bytes past the indexed rows (left by an interrupted append) before adding new ones
+        with open(os.path.join(directory, file_name), "r+b") as file:
+            file.truncate(rows * values.itemsize)
+            file.seek(0, os.SEEK_END)
+            file.write(np.ascontiguousarray(values).tobytes())
+
+    @staticmethod
+    def _load(directory, file_name, dtype, rows):
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(directory, file_name), dtype=dtype, mode="r", shape=(rows,))
+
+    @staticmethod
+    def _price_arrays(data):
+        columns = {column.lower(): column for column in data.columns}
+        time_column = columns.get("date", columns.get("time"))
+        if time_column is None or not all(name in columns for name in ("high", "low", "close")):
+            raise ValueError("Price data needs a date (or time) column and high, low and close columns")
+        times = pd.to_datetime(data[time_column]).to_numpy(dtype="datetime64[ns]")
+        highs, lows, closes = (data[columns[name]].to_numpy(dtype=float) for name in ("high", "low", "close"))
+        return times, highs, lows, closes
@@ -0,0 +1,73 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Heavy or platform-specific dependencies (MetaTrader5, sklearn, matplotlib, ...) are bound at
+    module level with `mt5 = lazy_import("MetaTrader5")`, so importing a module that needs them
+    costs nothing until one of its functions actually uses them; a missing package raises its
+    ImportError at that point instead of at startup. Tests can still replace the attribute
+    (patch.object(module, "mt5", fake)) as with a real import.
+    """
+
+    def __init__(self, name):
+        """
+        :param name: Absolute module name (e.g., "MetaTrader5" or "matplotlib.pyplot")
+        """
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                module = self._module
+                if module is None:
+                    module = importlib.import_module(self._name)
+                    self.__dict__["_module"] = module
+        return module
+
+    @property
+    def loaded(self):
+        """
+        True once the module was imported.
+        """
+        return self._module is not None
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._load(), attribute, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """
+    A LazyModule for `name`, imported on first use.
+    """
+    return LazyModule(name)
+
+
+def import_object(path):
+    """
+    Import an object from a "package.module:attribute" (or "package.module.attribute") path.
+
+    :return: The attribute
+    """
+    module_name, _, attribute = path.partition(":") if ":" in path else path.rpartition(".")
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, attribute)
+    except AttributeError:
+        raise ImportError(f"Module {module_name} has no attribute {attribute}") from None
@@ -1,19 +1,169 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+# Attributes every LogRecord has; anything else was passed with `extra=` and goes into the JSON record
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+_queue_handler = None
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line: time, level, logger, message, the fields passed
+    with `extra=` and the exception, if any.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limits how often the same message is logged, for per-bar diagnostics.
+
+    Records are grouped by logger and message template (the format string before its arguments),
+    so "Analyzing %s" for every bar is one group. Each group may emit `rate` records per `period`
+    seconds, and with `sample` only every n-th record of a group is considered at all. Records
+    above `max_level` (warnings and errors by default) are never dropped. The next record let
+    through carries the number of records dropped before it as `suppressed`.
+    """
+
+    def __init__(self, rate=10, period=1.0, sample=1, max_level=logging.INFO):
+        """
+        :param rate: Records per group and period (None for no limit)
+        :param period: Length of the rate window in seconds
+        :param sample: Keep one record in `sample` of every group
+        :param max_level: Highest level that is limited
+        """
+        super().__init__()
+        self.rate = rate
+        self.period = period
+        self.sample = max(int(sample), 1)
+        self.max_level = max_level
+        self.groups = {}  # (logger, template) -> [window start, records in window, seen, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = [now, 0, 0, 0]
+            group[2] += 1
+            if now - group[0] >= self.period:
+                group[0], group[1] = now, 0
+            if (group[2] - 1) % self.sample or (self.rate is not None and group[1] >= self.rate):
+                group[3] += 1
+                return False
+            group[1] += 1
+            suppressed, group[3] = group[3], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+def configure_logging(log_file="trading_bot.log", level=logging.INFO, levels=None, json_format=True, console=True,
+                      rate_limit=None, force=False):
+    """
+    Send all logging through a queue to a background writer thread.
+
+    Callers only put the record on an in-memory queue; formatting and console/disk I/O happen on
+    the writer thread, so logging never blocks the trading loop or a backtest. Configured once per
+    process (like logging.basicConfig); later calls are ignored unless `force` is set.
+
+    :param log_file: File the records are appended to (None for none)
+    :param level: Root level
+    :param levels: Optional dictionary of per-module levels (e.g. {"backtest": "WARNING", "live.loop": "DEBUG"})
+    :param json_format: Write JSON records to the file (the console always gets plain text)
+    :param console: Also write to the console
+    :param rate_limit: Optional dictionary of RateLimitFilter arguments (e.g. {"rate": 5, "sample": 10})
+    :param force: Replace an existing configuration
+    :return: The QueueListener running the writer thread
+    """
+    global _listener, _queue_handler
+    with _configure_lock:
+        if _listener is not None and not force:
+            return _listener
+        shutdown_logging()
+
+        text = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+        handlers = []
+        if log_file:
+            file_handler = logging.FileHandler(log_file)
+            file_handler.setFormatter(JsonFormatter() if json_format else text)
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(text)
+            handlers.append(console_handler)
+
+        records = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(records)
+        if rate_limit is not None:
+            _queue_handler.addFilter(RateLimitFilter(**rate_limit))
+
+        root = logging.getLogger()
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+        for name, module_level in (levels or {}).items():
+            logging.getLogger(name).setLevel(module_level)
+
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        return _listener
+
+
+def shutdown_logging():
+    """
+    Write out the queued records and stop the writer thread.
+    """
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
 
 class Logger:
     """
     Centralized logging utility.
     """
-    def __init__(self, log_file="trading_bot.log"):
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()  # Logs to console
-            ]
-        )
-        self.logger = logging.getLogger()
+    def __init__(self, log_file="trading_bot.log", name=None, **options):
+        """
+        :param log_file: File the records are appended to
+        :param name: Logger name (default: the root logger)
+        :param options: Arguments of configure_logging (level, levels, json_format, console, rate_limit)
+        """
+        configure_logging(log_file, **options)
+        self.logger = logging.getLogger(name)
 
     def info(self, message):
         self.logger.info(message)
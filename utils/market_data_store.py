@@ -0,0 +1,341 @@
+import json
+import logging
+import os
+import shutil
+import sys
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataStore:
+    """
+    Binary columnar store for market data: one dataset per symbol/timeframe.
+
+    Every dataset is a directory holding a small index.json describing the columns, the row
+    count and the covered date range, and naming the generation subdirectory that holds one
+    raw binary file per column (dtypes in the index). Reads memory-map the column files, so
+    selecting a date range or a subset of columns only touches those bytes and nothing is parsed.
+    New bars are appended to the column files in place, so syncing costs what was fetched, not
+    the size of the history.
+
+    A rewrite goes to a new generation and then replaces index.json in one atomic step, so
+    readers always find a complete dataset; the previous generation is kept until the next
+    rewrite for readers that loaded the old index just before the switch.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, root="store"):
+        """
+        :param root: Directory holding the datasets
+        """
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, symbol, timeframe):
+        return os.path.join(self.root, f"{symbol}_{timeframe}")
+
+    def exists(self, symbol, timeframe):
+        return os.path.exists(os.path.join(self.path(symbol, timeframe), self.INDEX_FILE))
+
+    def info(self, symbol, timeframe):
+        """
+        Read the index of a dataset.
+
+        :return: Dictionary with columns, dtypes, rows, time_column, start and end
+        """
+        with open(os.path.join(self.path(symbol, timeframe), self.INDEX_FILE), "r") as file:
+            return json.load(file)
+
+    def write(self, symbol, timeframe, data, time_column=None):
+        """
+        Write (or replace) a dataset.
+
+        :param symbol: Trading symbol (e.g., "EURUSD")
+        :param timeframe: Timeframe label (e.g., "1h")
+        :param data: DataFrame with a datetime column and numeric columns
+        :param time_column: Name of the datetime column (default: 'date', or 'time' for raw MT5 data)
+        """
+        time_column = time_column or ("date" if "date" in data.columns else "time")
+        data = data.copy()
+        data[time_column] = pd.to_datetime(data[time_column]).astype("datetime64[ns]")
+        data = data.sort_values(time_column, kind="stable").reset_index(drop=True)
+
+        writer = self.writer(symbol, timeframe, time_column)
+        try:
+            writer.write(data)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit()
+
+    def writer(self, symbol, timeframe, time_column=None):
+        """
+        Start writing a new version of a dataset chunk by chunk (see DatasetWriter).
+        """
+        return DatasetWriter(self, symbol, timeframe, time_column)
+
+    def last_timestamp(self, symbol, timeframe):
+        """
+        Timestamp of the last stored bar.
+
+        :return: pd.Timestamp, or None if the dataset does not exist or is empty
+        """
+        if not self.exists(symbol, timeframe):
+            return None
+        end = self.info(symbol, timeframe)["end"]
+        return pd.Timestamp(end) if end else None
+
+    def append(self, symbol, timeframe, data, time_column=None):
+        """
+        Add new bars to a dataset, creating it if needed.
+
+        Stored bars at or after the first new timestamp are replaced by the new ones, so
+        re-fetching an overlapping range (e.g. a bar that was still forming) never duplicates
+        bars. Bars that all come after the stored ones are appended to the column files past
+        their last published row, then index.json is replaced to publish them; readers that
+        loaded the previous index only see its rows, which are never written to. A batch that
+        replaces stored bars rewrites the dataset as a new generation instead, so no stored
+        row changes under a reader's memory map.
+
+        :param symbol: Trading symbol (e.g., "EURUSD")
+        :param timeframe: Timeframe label (e.g., "1h")
+        :param data: DataFrame with the new bars
+        :param time_column: Name of the datetime column (default: 'date', or 'time' for raw MT5 data)
+        :return: Number of bars that were not stored before
+        """
+        time_column = time_column or ("date" if "date" in data.columns else "time")
+        data = data.copy()
+        data[time_column] = pd.to_datetime(data[time_column]).astype("datetime64[ns]")
+        data = data.drop_duplicates(subset=time_column, keep="last").sort_values(time_column, kind="stable")
+        if data.empty:
+            return 0
+
+        if not self.exists(symbol, timeframe):
+            self.write(symbol, timeframe, data, time_column)
+            return len(data)
+
+        index = self.info(symbol, timeframe)
+        if index["time_column"] != time_column:
+            raise ValueError(f"Time column mismatch: stored {index['time_column']}, got {time_column}")
+        missing = [column for column in index["columns"] if column not in data.columns]
+        if missing:
+            raise ValueError(f"New bars for {symbol} {timeframe} lack columns {missing}")
+
+        target = self.path(symbol, timeframe)
+        directory = self._directory(symbol, timeframe, index)
+        new_times = data[time_column].to_numpy()
+        times = self._load(directory, time_column, index)
+        keep = int(np.searchsorted(times, new_times[0], side="left"))
+        new_bars = len(data) - int(np.isin(new_times, times[keep:]).sum())
+        rows = keep + len(data)
+
+        in_place = keep == index["rows"] and all(
+            os.path.exists(os.path.join(directory, f"{column}.bin")) for column in index["columns"]
+        )
+        if not in_place:
+            # Stored bars replaced, or columns still in the .npy format: write a new generation
+            kept = self.read(symbol, timeframe, end=new_times[0] - np.timedelta64(1, "ns"), columns=index["columns"])
+            self.write(symbol, timeframe, pd.concat([kept, data[index["columns"]]], ignore_index=True), time_column)
+            return new_bars
+
+        for column in index["columns"]:
+            values = data[column].to_numpy().astype(index["dtypes"][column])
+            self._write_rows(os.path.join(directory, f"{column}.bin"), values, keep)
+        if keep == 0:
+            index["start"] = pd.Timestamp(new_times[0]).isoformat()
+        index.update(rows=rows, end=pd.Timestamp(new_times[-1]).isoformat())
+        self._write_index(target, index)
+        return new_bars
+
+    def read_arrays(self, symbol, timeframe, start=None, end=None, columns=None):
+        """
+        Read a dataset as memory-mapped numpy arrays, without copying.
+
+        :param symbol: Trading symbol (e.g., "EURUSD")
+        :param timeframe: Timeframe label (e.g., "1h")
+        :param start: First timestamp to include (inclusive)
+        :param end: Last timestamp to include (inclusive)
+        :param columns: Columns to load (default: all); the time column is always included
+        :return: Dictionary of read-only numpy arrays
+        """
+        index = self.info(symbol, timeframe)
+        directory = self._directory(symbol, timeframe, index)
+        time_column = index["time_column"]
+        columns = list(columns) if columns is not None else index["columns"]
+        if time_column not in columns:
+            columns = [time_column] + columns
+        missing = [column for column in columns if column not in index["columns"]]
+        if missing:
+            raise ValueError(f"Unknown columns for {symbol} {timeframe}: {missing}")
+
+        times = self._load(directory, time_column, index)
+        first = 0 if start is None else int(np.searchsorted(times, np.datetime64(pd.Timestamp(start)), side="left"))
+        last = len(times) if end is None else int(np.searchsorted(times, np.datetime64(pd.Timestamp(end)), side="right"))
+
+        return {column: self._load(directory, column, index)[first:last] for column in columns}
+
+    def read(self, symbol, timeframe, start=None, end=None, columns=None):
+        """
+        Read a dataset (or a date range / subset of columns of it) as a DataFrame.
+
+        :return: DataFrame with the selected rows and columns
+        """
+        arrays = self.read_arrays(symbol, timeframe, start, end, columns)
+        return pd.DataFrame({column: np.array(values) for column, values in arrays.items()})
+
+    def import_csv(self, file_path, symbol=None, timeframe=None):
+        """
+        Convert a CSV file named SYMBOL_TIMEFRAME.csv into a dataset.
+        """
+        if symbol is None or timeframe is None:
+            symbol, timeframe = os.path.splitext(os.path.basename(file_path))[0].rsplit("_", 1)
+        data = pd.read_csv(file_path)
+        time_column = "date" if "date" in data.columns else "time"
+        data[time_column] = pd.to_datetime(data[time_column])
+        self.write(symbol, timeframe, data, time_column)
+
+    def _directory(self, symbol, timeframe, index):
+        # Datasets written before generations existed keep their columns next to index.json
+        target = self.path(symbol, timeframe)
+        return os.path.join(target, str(index["generation"])) if "generation" in index else target
+
+    def _write_index(self, target, index):
+        staging = os.path.join(target, f"{self.INDEX_FILE}.tmp-{os.getpid()}")
+        with open(staging, "w") as file:
+            json.dump(index, file, indent=2)
+        os.replace(staging, os.path.join(target, self.INDEX_FILE))
+
+    @staticmethod
+    def _remove_stale_generations(target, generation):
+        """
+        Delete every generation but the current and the previous one (and columns of the old flat layout).
+        """
+        for name in os.listdir(target):
+            path = os.path.join(target, name)
+            if name.isdigit() and int(name) < generation - 1:
+                shutil.rmtree(path, ignore_errors=True)
+            elif name.endswith(".npy"):
+                os.remove(path)
+
+    @staticmethod
+    def _write_rows(path, values, first_row):
+        """
+        Write values into a column file from row first_row on, dropping any bytes after them
+        (e.g. left by an append that crashed before publishing its index).
+        """
+        with open(path, "r+b") as file:
+            file.seek(first_row * values.itemsize)
+            file.write(np.ascontiguousarray(values).tobytes())
+            file.truncate()
+
+    @staticmethod
+    def _load(directory, column, index):
+        path = os.path.join(directory, f"{column}.bin")
+        if not os.path.exists(path):
+            # Written before columns were stored as raw files
+            return np.load(os.path.join(directory, f"{column}.npy"), mmap_mode="r")
+        dtype = np.dtype(index["dtypes"][column])
+        if index["rows"] == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(index["rows"],))
+
+
+class DatasetWriter:
+    """
+    Writes a new generation of a MarketDataStore dataset chunk by chunk.
+
+    Chunks are appended to the column files of the new generation as they come, so a dataset
+    never has to be held in memory at once. commit() publishes it by replacing index.json;
+    until then readers keep seeing the previous version, and abort() discards the new one.
+    """
+
+    def __init__(self, store, symbol, timeframe, time_column=None):
+        """
+        :param store: MarketDataStore
+        :param symbol: Trading symbol (e.g., "EURUSD")
+        :param timeframe: Timeframe label (e.g., "1h")
+        :param time_column: Name of the datetime column (default: 'date', or 'time' for raw MT5 data)
+        """
+        self.store = store
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.time_column = time_column
+        self.target = store.path(symbol, timeframe)
+        os.makedirs(self.target, exist_ok=True)
+        self.generation = store.info(symbol, timeframe).get("generation", 0) + 1 if store.exists(symbol, timeframe) else 1
+        self.directory = os.path.join(self.target, str(self.generation))
+        shutil.rmtree(self.directory, ignore_errors=True)  # Left over by an interrupted write
+        os.makedirs(self.directory)
+        self.columns = None
+        self.dtypes = None
+        self.rows = 0
+        self.start = None
+        self.end = None
+
+    def write(self, chunk):
+        """
+        Append rows, which must continue the time order of the previous chunks.
+
+        :param chunk: DataFrame with a datetime column and numeric columns
+        """
+        time_column = self.time_column = self.time_column or ("date" if "date" in chunk.columns else "time")
+        chunk = chunk.copy()
+        chunk[time_column] = pd.to_datetime(chunk[time_column]).astype("datetime64[ns]")
+        if self.columns is None:
+            for column in chunk.columns:
+                if not (pd.api.types.is_numeric_dtype(chunk[column]) or
+                        pd.api.types.is_datetime64_any_dtype(chunk[column])):
+                    raise ValueError(f"Column {column} is not numeric and cannot be stored")
+            self.columns = chunk.columns.tolist()
+            self.dtypes = {column: str(chunk[column].dtype) for column in self.columns}
+        elif chunk.columns.tolist() != self.columns:
+            raise ValueError(f"Chunk columns {chunk.columns.tolist()} differ from {self.columns}")
+
+        times = chunk[time_column]
+        if len(chunk) and (not times.is_monotonic_increasing or (self.end is not None and times.iloc[0] < self.end)):
+            raise ValueError("Chunks must be in time order")
+        for column in self.columns:
+            values = chunk[column].to_numpy().astype(self.dtypes[column])
+            with open(os.path.join(self.directory, f"{column}.bin"), "ab") as file:
+                file.write(np.ascontiguousarray(values).tobytes())
+        if len(chunk):
+            self.start = times.iloc[0] if self.start is None else self.start
+            self.end = times.iloc[-1]
+            self.rows += len(chunk)
+
+    def commit(self):
+        """
+        Publish the written rows as the dataset.
+        """
+        if self.columns is None:
+            raise ValueError("Nothing was written")
+        index = {
+            "generation": self.generation,
+            "columns": self.columns,
+            "dtypes": self.dtypes,
+            "rows": self.rows,
+            "time_column": self.time_column,
+            "start": self.start.isoformat() if self.rows else None,
+            "end": self.end.isoformat() if self.rows else None,
+        }
+        self.store._write_index(self.target, index)
+        self.store._remove_stale_generations(self.target, self.generation)
+        logger.info("Data saved to %s (%d rows)", self.directory, self.rows)
+
+    def abort(self):
+        """
+        Discard the written rows; the dataset stays as it was.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.market_data_store <csv_dir> [store_dir]
+    csv_dir = sys.argv[1] if len(sys.argv) > 1 else "prepared_data"
+    store = MarketDataStore(sys.argv[2] if len(sys.argv) > 2 else "store")
+    for file_name in sorted(os.listdir(csv_dir)):
+        if file_name.endswith(".csv"):
+            store.import_csv(os.path.join(csv_dir, file_name))